@@ -2,7 +2,8 @@ from django.contrib import admin
 from django.utils.html import format_html
 from .models import (
     AcademicYear, Semester, Enrollment, Grade, Attendance, 
-    Schedule, GradeScale, AcademicProgram, Prerequisite, AcademicCalendar
+    Schedule, GradeScale, AcademicProgram, Prerequisite, AcademicCalendar,
+    CourseCapacity
 )
 
 
@@ -125,4 +126,12 @@ class AcademicCalendarAdmin(admin.ModelAdmin):
     list_filter = ['event_type', 'is_holiday', 'semester']
     search_fields = ['title', 'description']
     ordering = ['date']
-    date_hierarchy = 'date'
\ No newline at end of file
+    date_hierarchy = 'date'
+
+
+@admin.register(CourseCapacity)
+class CourseCapacityAdmin(admin.ModelAdmin):
+    list_display = ['course', 'semester', 'capacity', 'enrolled_count', 'waitlist_capacity', 'waitlisted_count', 'dropped_count', 'updated_at']
+    list_filter = ['semester']
+    search_fields = ['course__code']
+    readonly_fields = ['enrolled_count', 'waitlisted_count', 'dropped_count', 'updated_at']
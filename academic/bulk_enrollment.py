@@ -0,0 +1,362 @@
+"""
+Bulk Enrollment Import
+Streams CSV/XLSX cohort files and writes enrollments in validated chunks
+"""
+
+import csv
+import io
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import F, Max
+from django.utils import timezone
+
+from .models import CourseCapacity, Enrollment
+from .prerequisites import get_prerequisite_graph
+from .registration import ACTIVE_STATUSES, get_seat_counter
+from .timetable import Timetable, invalidate_semester_timetables, load_course_timetables
+from courses.models import Course
+from students.models import Student
+
+try:
+    import openpyxl
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    OPENPYXL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 2000
+REQUIRED_COLUMNS = ('student_id', 'course_code')
+
+
+class BulkImportError(Exception):
+    """Raised when the import file itself cannot be read"""
+
+
+@dataclass
+class RowError:
+    """A rejected row of the import file"""
+    row_number: int
+    student_id: str
+    course_code: str
+    error: str
+
+
+@dataclass
+class BulkEnrollmentResult:
+    """Summary of an import run"""
+    total_rows: int = 0
+    created: int = 0
+    dry_run: bool = False
+    errors: List[RowError] = field(default_factory=list)
+
+    @property
+    def rejected(self):
+        return len(self.errors)
+
+    def as_dict(self, max_errors: Optional[int] = None) -> Dict:
+        errors = self.errors if max_errors is None else self.errors[:max_errors]
+        return {
+            'total_rows': self.total_rows,
+            'created': self.created,
+            'rejected': self.rejected,
+            'dry_run': self.dry_run,
+            'errors': [error.__dict__ for error in errors],
+        }
+
+    def write_error_report(self, stream):
+        """Write the per-row error report as CSV"""
+        writer = csv.writer(stream)
+        writer.writerow(['row_number', 'student_id', 'course_code', 'error'])
+        for error in self.errors:
+            writer.writerow([error.row_number, error.student_id, error.course_code, error.error])
+
+
+def _normalize_header(header) -> List[str]:
+    columns = [str(name or '').strip().lower() for name in header]
+    missing = [name for name in REQUIRED_COLUMNS if name not in columns]
+    if missing:
+        raise BulkImportError(f"Missing required columns: {', '.join(missing)}")
+    return columns
+
+
+def _cell(value) -> str:
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def iter_csv_rows(fileobj) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """Yield (row_number, row) from a CSV file without loading it into memory"""
+    if not isinstance(fileobj, io.TextIOBase):
+        fileobj = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    reader = csv.reader(fileobj)
+    columns = _normalize_header(next(reader, []))
+    for row_number, values in enumerate(reader, start=2):
+        if any(values):
+            yield row_number, dict(zip(columns, (_cell(value) for value in values)))
+
+
+def iter_xlsx_rows(fileobj) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """Yield (row_number, row) from the first sheet of an XLSX file in read-only mode"""
+    if not OPENPYXL_AVAILABLE:
+        raise BulkImportError('openpyxl is required to import XLSX files')
+    workbook = openpyxl.load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        columns = _normalize_header(next(rows, ()))
+        for row_number, values in enumerate(rows, start=2):
+            if any(value is not None for value in values):
+                yield row_number, dict(zip(columns, (_cell(value) for value in values)))
+    finally:
+        workbook.close()
+
+
+def iter_import_rows(fileobj, filename: str) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """Pick the row reader from the file extension"""
+    if filename.lower().endswith('.xlsx'):
+        return iter_xlsx_rows(fileobj)
+    if filename.lower().endswith('.csv'):
+        return iter_csv_rows(fileobj)
+    raise BulkImportError('Unsupported file type - expected .csv or .xlsx')
+
+
+class BulkEnrollmentImporter:
+    """
+    Validate and write enrollments for one semester in chunks.
+
+    Each chunk loads its students, existing registrations and completed grades
+    with one query each; courses, seat counters and course timetables are
+    cached across chunks. Accepted rows are written with bulk_create inside a
+    transaction per chunk while the affected seat counters are locked.
+    Dropped or failed registrations of the same offering are reactivated in
+    place, as register_student does, since (student, course, semester) is unique.
+    """
+
+    def __init__(self, semester, chunk_size: int = DEFAULT_CHUNK_SIZE, dry_run: bool = False):
+        self.semester = semester
+        self.chunk_size = chunk_size
+        self.dry_run = dry_run
+        self.result = BulkEnrollmentResult(dry_run=dry_run)
+
+        self.graph = get_prerequisite_graph()
+        self._courses: Dict[str, object] = {}
+        self._unknown_courses = set()
+        self._counter_ids: Dict[object, int] = {}
+        self._course_timetables: Dict[object, Timetable] = {}
+        self._timetables: Dict[object, Timetable] = {}
+        self._registered = set()
+        self._inactive: Dict[Tuple[object, object], Tuple[object, str]] = {}
+        self._dry_run_allocated: Dict[object, int] = defaultdict(int)
+
+    def run(self, rows: Iterable[Tuple[int, Dict[str, str]]]) -> BulkEnrollmentResult:
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= self.chunk_size:
+                self._process_chunk(chunk)
+                chunk = []
+        if chunk:
+            self._process_chunk(chunk)
+
+        self.result.errors.sort(key=lambda error: error.row_number)
+        if self.result.created and not self.dry_run:
+            invalidate_semester_timetables(self.semester.pk)
+
+        logger.info(
+            f"Bulk enrollment import for semester {self.semester.pk}: "
+            f"{self.result.created} created, {self.result.rejected} rejected"
+        )
+        return self.result
+
+    def _reject(self, row_number, row, error):
+        self.result.errors.append(RowError(
+            row_number, row.get('student_id', ''), row.get('course_code', ''), error
+        ))
+
+    def _load_courses(self, codes):
+        codes = set(codes) - set(self._courses) - self._unknown_courses
+        if not codes:
+            return
+        courses = Course.objects.filter(code__in=codes)
+        for course in courses:
+            self._courses[course.code] = course
+        self._unknown_courses |= codes - set(self._courses)
+
+        new_ids = [course.pk for course in courses]
+        self._course_timetables.update(load_course_timetables(self.semester.pk, new_ids))
+
+    def _counter_id(self, course):
+        if course.pk not in self._counter_ids:
+            self._counter_ids[course.pk] = get_seat_counter(course, self.semester).pk
+        return self._counter_ids[course.pk]
+
+    def _load_students(self, chunk):
+        student_codes = {row.get('student_id') for _, row in chunk if row.get('student_id')}
+        students = dict(
+            Student.objects.filter(
+                student_id_display__in=student_codes
+            ).values_list('student_id_display', 'pk')
+        )
+        pks = [pk for pk in students.values() if pk not in self._timetables]
+
+        enrolled_courses = defaultdict(list)
+        for enrollment_pk, student_pk, course_id, status in Enrollment.objects.filter(
+            semester=self.semester, student_id__in=pks
+        ).values_list('pk', 'student_id', 'course_id', 'status'):
+            if status in ACTIVE_STATUSES:
+                self._registered.add((student_pk, course_id))
+            else:
+                self._inactive[(student_pk, course_id)] = (enrollment_pk, status)
+            if status == 'ENROLLED':
+                enrolled_courses[student_pk].append(course_id)
+
+        needed = {c for courses in enrolled_courses.values() for c in courses}
+        needed -= set(self._course_timetables)
+        if needed:
+            self._course_timetables.update(load_course_timetables(self.semester.pk, needed))
+
+        for pk in pks:
+            timetable = Timetable()
+            for course_id in enrolled_courses.get(pk, ()):
+                timetable.add_course(self._course_timetables.get(course_id, Timetable()))
+            self._timetables[pk] = timetable
+
+        grades = defaultdict(dict)
+        for student_pk, course_id, best in Enrollment.objects.filter(
+            student_id__in=students.values(), status='COMPLETED', final_grade__isnull=False
+        ).values_list('student_id', 'course_id').annotate(best=Max('final_grade')):
+            grades[student_pk][course_id] = best
+
+        return students, grades
+
+    def _process_chunk(self, chunk):
+        self.result.total_rows += len(chunk)
+        self._load_courses(row.get('course_code') for _, row in chunk if row.get('course_code'))
+        students, grades = self._load_students(chunk)
+
+        candidates = []
+        for row_number, row in chunk:
+            student_code, course_code = row.get('student_id'), row.get('course_code')
+            if not student_code or not course_code:
+                self._reject(row_number, row, 'student_id and course_code are required')
+                continue
+
+            student_pk = students.get(student_code)
+            if student_pk is None:
+                self._reject(row_number, row, 'Unknown student')
+                continue
+            course = self._courses.get(course_code)
+            if course is None:
+                self._reject(row_number, row, 'Unknown course')
+                continue
+
+            if (student_pk, course.pk) in self._registered:
+                self._reject(row_number, row, 'Already enrolled in this course for this semester')
+                continue
+
+            eligibility = self.graph.evaluate([course.pk], grades[student_pk])[course.pk]
+            if not eligibility.prerequisites_met:
+                missing = ', '.join(edge.code for edge in eligibility.missing)
+                self._reject(row_number, row, f'Prerequisites not met: {missing}')
+                continue
+
+            timetable = self._timetables[student_pk]
+            course_timetable = self._course_timetables.get(course.pk, Timetable())
+            conflicts = timetable.conflicts_with(course_timetable)
+            if conflicts:
+                codes = ', '.join(sorted({session.course_code for session in conflicts}))
+                self._reject(row_number, row, f'Schedule conflict with {codes}')
+                continue
+
+            # Reserve tentatively so later rows of the same student see this course
+            self._registered.add((student_pk, course.pk))
+            timetable.add_course(course_timetable)
+            candidates.append((row_number, row, student_pk, course))
+
+        if candidates:
+            self._write_candidates(candidates)
+
+    def _write_candidates(self, candidates):
+        counter_ids = {course.pk: self._counter_id(course) for _, _, _, course in candidates}
+        accepted, rejected = [], []
+
+        try:
+            with transaction.atomic():
+                counters = {
+                    counter.course_id: counter
+                    for counter in CourseCapacity.objects.select_for_update().filter(
+                        pk__in=counter_ids.values()
+                    ).order_by('pk')
+                }
+                remaining = {
+                    course_id: counter.capacity - counter.enrolled_count
+                    - self._dry_run_allocated[course_id]
+                    for course_id, counter in counters.items()
+                }
+
+                allocated = defaultdict(int)
+                for candidate in candidates:
+                    course_id = candidate[3].pk
+                    if remaining[course_id] > 0:
+                        remaining[course_id] -= 1
+                        allocated[course_id] += 1
+                        accepted.append(candidate)
+                    else:
+                        rejected.append(candidate)
+
+                new, reactivated = [], []
+                undropped = defaultdict(int)
+                for _, _, student_pk, course in accepted:
+                    existing = self._inactive.get((student_pk, course.pk))
+                    if existing is None:
+                        new.append(Enrollment(
+                            student_id=student_pk,
+                            course_id=course.pk,
+                            semester=self.semester,
+                            status='ENROLLED'
+                        ))
+                        continue
+                    reactivated.append(existing[0])
+                    if existing[1] == 'DROPPED':
+                        undropped[course.pk] += 1
+
+                Enrollment.objects.bulk_create(new, batch_size=500)
+                if reactivated:
+                    now = timezone.now()
+                    Enrollment.objects.filter(pk__in=reactivated).update(
+                        status='ENROLLED', enrollment_date=now, updated_at=now
+                    )
+                for course_id, count in allocated.items():
+                    CourseCapacity.objects.filter(pk=counter_ids[course_id]).update(
+                        enrolled_count=F('enrolled_count') + count,
+                        dropped_count=F('dropped_count') - undropped[course_id]
+                    )
+
+                if self.dry_run:
+                    for course_id, count in allocated.items():
+                        self._dry_run_allocated[course_id] += count
+                    transaction.set_rollback(True)
+        except Exception as e:
+            logger.error(f"Bulk enrollment chunk failed: {e}")
+            self._release(candidates, f'Chunk failed: {e}')
+            return
+
+        self._release(rejected, 'Course is full')
+        self.result.created += len(accepted)
+        if not self.dry_run:
+            for _, _, student_pk, course in accepted:
+                self._inactive.pop((student_pk, course.pk), None)
+
+    def _release(self, candidates, error):
+        """Undo the tentative reservation of rejected candidates"""
+        for row_number, row, student_pk, course in candidates:
+            self._registered.discard((student_pk, course.pk))
+            self._timetables[student_pk].remove_course(course.pk)
+            self._reject(row_number, row, error)
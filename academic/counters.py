@@ -0,0 +1,153 @@
+"""
+Enrollment Counters
+Denormalized per-offering enrollment counts maintained on status transitions
+"""
+
+import logging
+from typing import Dict, Iterable, List
+
+from django.db import transaction
+from django.db.models import Count, F
+
+from .models import CourseCapacity, Enrollment
+from .registration import build_seat_counter
+from courses.models import Course
+
+logger = logging.getLogger(__name__)
+
+STATUS_COUNTER_FIELDS = {
+    'ENROLLED': 'enrolled_count',
+    'WAITLISTED': 'waitlisted_count',
+    'DROPPED': 'dropped_count',
+}
+
+
+def counter_deltas(old_status, new_status) -> Dict[str, int]:
+    """Counter increments implied by moving an enrollment between statuses"""
+    deltas = {}
+    if old_status == new_status:
+        return deltas
+    if old_status in STATUS_COUNTER_FIELDS:
+        deltas[STATUS_COUNTER_FIELDS[old_status]] = -1
+    if new_status in STATUS_COUNTER_FIELDS:
+        deltas[STATUS_COUNTER_FIELDS[new_status]] = 1
+    return deltas
+
+
+def apply_status_transition(course_id, semester_id, old_status, new_status) -> int:
+    """
+    Apply a status transition to the offering's counters with a single F() update.
+    Offerings without a counter row are skipped; the row is seeded on first use.
+    """
+    deltas = counter_deltas(old_status, new_status)
+    if not deltas:
+        return 0
+    return CourseCapacity.objects.filter(course_id=course_id, semester_id=semester_id).update(
+        **{field: F(field) + delta for field, delta in deltas.items()}
+    )
+
+
+def seat_counters(semester, courses: Iterable) -> Dict[object, CourseCapacity]:
+    """
+    Counters for many courses in one query. Offerings without a counter row get
+    an unsaved counter built from one grouped count; nothing is written, the
+    rows are seeded by seed_enrollment_counters.
+    """
+    courses = list(courses)
+    counters = {
+        counter.course_id: counter
+        for counter in CourseCapacity.objects.filter(
+            semester=semester, course_id__in=[course.pk for course in courses]
+        )
+    }
+    missing = [course for course in courses if course.pk not in counters]
+    if missing:
+        actual = _actual_counts(Enrollment.objects.filter(
+            semester=semester, course_id__in=[course.pk for course in missing]
+        ))
+        for course in missing:
+            counters[course.pk] = build_seat_counter(
+                course, semester, actual.get((course.pk, semester.pk))
+            )
+    return counters
+
+
+def seed_enrollment_counters(semester, courses: Iterable = None) -> int:
+    """
+    Create the missing counters of a semester's offerings (all active courses
+    by default) from one grouped aggregate. Returns the number of counters seeded.
+    """
+    if courses is None:
+        courses = Course.objects.filter(is_active=True)
+    existing = set(
+        CourseCapacity.objects.filter(semester=semester).values_list('course_id', flat=True)
+    )
+    missing = [course for course in courses if course.pk not in existing]
+    if not missing:
+        return 0
+
+    actual = _actual_counts(Enrollment.objects.filter(
+        semester=semester, course_id__in=[course.pk for course in missing]
+    ))
+    created = CourseCapacity.objects.bulk_create(
+        [build_seat_counter(course, semester, actual.get((course.pk, semester.pk))) for course in missing],
+        batch_size=500,
+        ignore_conflicts=True
+    )
+    logger.info(f"Seeded {len(created)} enrollment counter(s) for semester {semester.pk}")
+    return len(created)
+
+
+def _actual_counts(queryset) -> Dict:
+    counts = {}
+    for course_id, semester_id, status, total in queryset.filter(
+        status__in=STATUS_COUNTER_FIELDS
+    ).values_list('course_id', 'semester_id', 'status').annotate(total=Count('id')):
+        counts.setdefault((course_id, semester_id), {})[STATUS_COUNTER_FIELDS[status]] = total
+    return counts
+
+
+def reconcile_enrollment_counters(semester=None, repair: bool = True) -> List[Dict]:
+    """
+    Compare every counter with a grouped aggregate of the enrollments and
+    repair drift. Drifted rows are recounted under the counter lock so a
+    concurrent registration cannot be overwritten.
+    """
+    enrollments = Enrollment.objects.all()
+    counters = CourseCapacity.objects.all()
+    if semester is not None:
+        enrollments = enrollments.filter(semester=semester)
+        counters = counters.filter(semester=semester)
+
+    actual = _actual_counts(enrollments)
+    fields = list(STATUS_COUNTER_FIELDS.values())
+
+    drift = []
+    for counter in counters.only('id', 'course_id', 'semester_id', *fields):
+        expected = actual.get((counter.course_id, counter.semester_id), {})
+        if all(getattr(counter, name) == expected.get(name, 0) for name in fields):
+            continue
+
+        if repair:
+            with transaction.atomic():
+                counter = CourseCapacity.objects.select_for_update().only(
+                    'id', 'course_id', 'semester_id', *fields
+                ).get(pk=counter.pk)
+                expected = _actual_counts(enrollments.filter(
+                    course_id=counter.course_id, semester_id=counter.semester_id
+                )).get((counter.course_id, counter.semester_id), {})
+                CourseCapacity.objects.filter(pk=counter.pk).update(
+                    **{name: expected.get(name, 0) for name in fields}
+                )
+
+        drift.append({
+            'course_id': counter.course_id,
+            'semester_id': counter.semester_id,
+            'counted': {name: getattr(counter, name) for name in fields},
+            'actual': {name: expected.get(name, 0) for name in fields},
+        })
+
+    if drift:
+        logger.warning(f"Enrollment counter drift in {len(drift)} offering(s)"
+                       f"{' - repaired' if repair else ''}")
+    return drift
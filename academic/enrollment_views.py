@@ -4,9 +4,11 @@ Handles course registration, prerequisites checking, and enrollment management
 """
 
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, parser_classes, permission_classes
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
 from django.db import transaction
 from django.utils import timezone
@@ -19,6 +21,13 @@ from .models import (
     Schedule, GradeScale
 )
 from .serializers import EnrollmentSerializer
+from .bulk_enrollment import BulkEnrollmentImporter, BulkImportError, iter_import_rows
+from .counters import seat_counters
+from .prerequisites import check_student_eligibility
+from .timetable import get_student_timetable, load_course_timetables
+from .registration import (
+    register_student, drop_enrollment, ALREADY_REGISTERED, FULL, WAITLISTED
+)
 
 
 @api_view(['POST'])
@@ -61,13 +70,6 @@ def enroll_in_course(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Check if already enrolled
-        if Enrollment.objects.filter(student=student, course=course, semester=semester).exists():
-            return Response(
-                {'error': 'Already enrolled in this course for this semester'}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
         # Check prerequisites
         prerequisites_met, missing_prereqs = check_prerequisites(student, course)
         if not prerequisites_met:
@@ -82,19 +84,6 @@ def enroll_in_course(request):
                 ]
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Check course capacity
-        current_enrollment = Enrollment.objects.filter(
-            course=course, 
-            semester=semester,
-            status='ENROLLED'
-        ).count()
-        
-        if current_enrollment >= course.max_capacity:
-            return Response(
-                {'error': 'Course is full'}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
         # Check schedule conflicts
         conflicts = check_schedule_conflicts(student, course, semester)
         if conflicts:
@@ -102,23 +91,36 @@ def enroll_in_course(request):
                 'error': 'Schedule conflict detected',
                 'conflicting_courses': [
                     {
-                        'course_code': conflict.course.code,
-                        'course_name': conflict.course.name,
+                        'course_code': conflict.course_code,
+                        'course_name': conflict.course_name,
                         'time': f"{conflict.day_of_week} {conflict.start_time}-{conflict.end_time}"
                     } for conflict in conflicts
                 ]
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Create enrollment
-        with transaction.atomic():
-            enrollment = Enrollment.objects.create(
-                student=student,
-                course=course,
-                semester=semester,
-                status='ENROLLED'
+        # Allocate a seat atomically (or a waitlist position when the course is full)
+        result = register_student(student, course, semester)
+        
+        if result.outcome == ALREADY_REGISTERED:
+            return Response(
+                {'error': 'Already enrolled in this course for this semester'}, 
+                status=status.HTTP_400_BAD_REQUEST
             )
         
-        serializer = EnrollmentSerializer(enrollment)
+        if result.outcome == FULL:
+            return Response(
+                {'error': 'Course is full'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        serializer = EnrollmentSerializer(result.enrollment)
+        if result.outcome == WAITLISTED:
+            return Response({
+                'message': 'Course is full - added to the waitlist',
+                'waitlist_position': result.waitlist_position,
+                'enrollment': serializer.data
+            }, status=status.HTTP_201_CREATED)
+        
         return Response({
             'message': 'Successfully enrolled in course',
             'enrollment': serializer.data
@@ -156,7 +158,7 @@ def drop_course(request):
             Enrollment, 
             id=enrollment_id, 
             student=student,
-            status='ENROLLED'
+            status__in=['ENROLLED', 'WAITLISTED']
         )
         
         # Check if drop period is still open
@@ -171,9 +173,8 @@ def drop_course(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Update enrollment status
-        enrollment.status = 'DROPPED'
-        enrollment.save()
+        # Update enrollment status and promote the next waitlisted student
+        drop_enrollment(enrollment)
         
         return Response({
             'message': 'Successfully dropped from course',
@@ -192,55 +193,17 @@ def check_prerequisites(student, course):
     Check if student has met all prerequisites for a course
     Returns: (bool, dict) - (prerequisites_met, missing_prerequisites)
     """
-    prerequisites = Prerequisite.objects.filter(course=course)
-    missing_prereqs = {}
-    
-    for prereq in prerequisites:
-        # Check if student has completed prerequisite course with minimum grade
-        completed = Enrollment.objects.filter(
-            student=student,
-            course=prereq.prerequisite_course,
-            status='COMPLETED',
-            final_grade__gte=prereq.min_grade
-        ).exists()
-        
-        if not completed:
-            missing_prereqs[prereq.prerequisite_course.id] = prereq.min_grade
-    
-    return len(missing_prereqs) == 0, missing_prereqs
+    eligibility = check_student_eligibility(student, [course.id])[course.id]
+    return eligibility.prerequisites_met, eligibility.missing_prerequisites
 
 
 def check_schedule_conflicts(student, course, semester):
     """
     Check for schedule conflicts with student's existing enrollments
     """
-    # Get student's current schedules for the semester
-    current_enrollments = Enrollment.objects.filter(
-        student=student,
-        semester=semester,
-        status='ENROLLED'
-    )
-    
-    current_schedules = Schedule.objects.filter(
-        course__in=[e.course for e in current_enrollments],
-        semester=semester
-    )
-    
-    # Get schedules for the new course
-    new_schedules = Schedule.objects.filter(
-        course=course,
-        semester=semester
-    )
-    
-    conflicts = []
-    for new_schedule in new_schedules:
-        for current_schedule in current_schedules:
-            if (new_schedule.day_of_week == current_schedule.day_of_week and
-                time_overlap(new_schedule.start_time, new_schedule.end_time,
-                           current_schedule.start_time, current_schedule.end_time)):
-                conflicts.append(current_schedule)
-    
-    return conflicts
+    student_timetable = get_student_timetable(student.pk, semester.pk)
+    course_timetable = load_course_timetables(semester.pk, [course.pk])[course.pk]
+    return student_timetable.conflicts_with(course_timetable)
 
 
 def time_overlap(start1, end1, start2, end2):
@@ -282,18 +245,17 @@ def get_available_courses(request):
             status__in=['ENROLLED', 'COMPLETED']
         ).values_list('course_id', flat=True)
         
-        available_courses = all_courses.exclude(id__in=enrolled_courses)
+        available_courses = list(all_courses.exclude(id__in=enrolled_courses))
+        course_ids = [course.id for course in available_courses]
+        
+        # Evaluate prerequisites for all courses in one pass and read the maintained seat counters
+        eligibility = check_student_eligibility(student, course_ids)
+        counters = seat_counters(current_semester, available_courses)
         
-        # Add prerequisite check and capacity info
         course_data = []
         for course in available_courses:
-            prerequisites_met, missing_prereqs = check_prerequisites(student, course)
-            
-            current_enrollment = Enrollment.objects.filter(
-                course=course, 
-                semester=current_semester,
-                status='ENROLLED'
-            ).count()
+            prerequisites_met = eligibility[course.id].prerequisites_met
+            counter = counters[course.id]
             
             course_info = {
                 'id': course.id,
@@ -301,16 +263,15 @@ def get_available_courses(request):
                 'name': course.name,
                 'description': course.description,
                 'credits': course.credits,
-                'max_capacity': course.max_capacity,
-                'current_enrollment': current_enrollment,
-                'spots_available': course.max_capacity - current_enrollment,
+                'max_capacity': counter.capacity,
+                'current_enrollment': counter.enrolled_count,
+                'spots_available': counter.available_seats,
                 'prerequisites_met': prerequisites_met
             }
             
             if not prerequisites_met:
                 course_info['missing_prerequisites'] = [
-                    Course.objects.get(id=prereq_id).code 
-                    for prereq_id in missing_prereqs.keys()
+                    edge.code for edge in eligibility[course.id].missing
                 ]
             
             course_data.append(course_info)
@@ -354,28 +315,20 @@ def get_student_schedule(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        enrollments = Enrollment.objects.filter(
-            student=student,
-            semester=current_semester,
-            status='ENROLLED'
-        )
-        
-        schedules = Schedule.objects.filter(
-            course__in=[e.course for e in enrollments],
-            semester=current_semester
-        ).order_by('day_of_week', 'start_time')
+        timetable = get_student_timetable(student.pk, current_semester.pk)
         
         schedule_data = []
-        for schedule in schedules:
+        for session in timetable.ordered_sessions():
             schedule_data.append({
-                'course_code': schedule.course.code,
-                'course_name': schedule.course.name,
-                'day_of_week': schedule.day_of_week,
-                'start_time': schedule.start_time,
-                'end_time': schedule.end_time,
-                'room': schedule.room,
-                'building': schedule.building,
-                'instructor': schedule.instructor.get_full_name() if schedule.instructor else 'TBA'
+                'course_code': session.course_code,
+                'course_name': session.course_name,
+                'course_name_en': session.course_name_en,
+                'day_of_week': session.day_of_week,
+                'start_time': session.start_time,
+                'end_time': session.end_time,
+                'room': session.room,
+                'building': session.building,
+                'instructor': session.instructor
             })
         
         return Response({
@@ -387,4 +340,50 @@ def get_student_schedule(request):
         return Response(
             {'error': f'Failed to get schedule: {str(e)}'}, 
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        )
\ No newline at end of file
+        )
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@parser_classes([MultiPartParser])
+def bulk_import_enrollments(request):
+    """
+    Import cohort enrollments from an uploaded CSV/XLSX file (registrar only).
+    Returns the import summary with a per-row error report, or the error
+    report as CSV when report=csv is given.
+    """
+    if not (request.user.is_admin or request.user.is_staff_member):
+        return Response(
+            {'error': 'Only administrators can import enrollments'}, 
+            status=status.HTTP_403_FORBIDDEN
+        )
+    
+    upload = request.FILES.get('file')
+    semester_id = request.data.get('semester_id')
+    if not upload or not semester_id:
+        return Response(
+            {'error': 'file and semester_id are required'}, 
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    semester = get_object_or_404(Semester, id=semester_id)
+    dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true', 'yes')
+    
+    try:
+        importer = BulkEnrollmentImporter(semester, dry_run=dry_run)
+        result = importer.run(iter_import_rows(upload, upload.name))
+    except BulkImportError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response(
+            {'error': f'Import failed: {str(e)}'}, 
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+    
+    if request.query_params.get('report') == 'csv':
+        response = HttpResponse(content_type='text/csv')
+        response['Content-Disposition'] = 'attachment; filename="enrollment_import_errors.csv"'
+        result.write_error_report(response)
+        return response
+    
+    return Response(result.as_dict(), status=status.HTTP_200_OK)
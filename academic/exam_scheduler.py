@@ -0,0 +1,416 @@
+# نظام جدولة الامتحانات النهائية
+# Final Exam Timetabling from the enrollment co-occurrence graph
+
+import csv
+import datetime
+import heapq
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# SciPy imports - لبناء مصفوفة التعارض المتفرقة
+try:
+    from scipy import sparse
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+from .smart_scheduler import SmartScheduler
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class ExamPeriod:
+    """فترة امتحان"""
+    index: int
+    day_index: int  # ترتيب يوم الامتحان ضمن فترة الامتحانات
+    date: datetime.date
+    start_time: datetime.time
+    end_time: datetime.time
+
+    def __str__(self):
+        return f"{self.date} {self.start_time.strftime('%H:%M')}-{self.end_time.strftime('%H:%M')}"
+
+@dataclass
+class ExamRoom:
+    """قاعة امتحان"""
+    room_id: str
+    name: str
+    capacity: int
+
+@dataclass
+class ExamAssignment:
+    """تخصيص امتحان مقرر لفترة وقاعات"""
+    course_id: str
+    period: ExamPeriod
+    student_count: int
+    rooms: List[Tuple[str, int]] = field(default_factory=list)  # (القاعة، عدد المقاعد)
+
+def build_exam_periods(start_date: datetime.date, end_date: datetime.date,
+                       session_times: Optional[Sequence[Tuple[datetime.time, datetime.time]]] = None,
+                       working_days: Optional[Sequence[int]] = None,
+                       holidays: Optional[set] = None) -> List[ExamPeriod]:
+    """توليد فترات الامتحانات لكل يوم عمل بين تاريخين"""
+    session_times = session_times or ExamTimetabler.DEFAULT_SESSION_TIMES
+    working_days = working_days if working_days is not None else \
+        SmartScheduler.DEFAULT_WORK_HOURS['working_days']
+    holidays = holidays or set()
+
+    periods = []
+    day_index = 0
+    current_date = start_date
+    while current_date <= end_date:
+        day = (current_date.weekday() + 1) % 7  # الأحد=0
+        if day in working_days and current_date not in holidays:
+            for start_time, end_time in session_times:
+                periods.append(ExamPeriod(
+                    index=len(periods),
+                    day_index=day_index,
+                    date=current_date,
+                    start_time=start_time,
+                    end_time=end_time
+                ))
+            day_index += 1
+        current_date += datetime.timedelta(days=1)
+
+    return periods
+
+def exam_periods_from_academic_calendar(semester_id, session_times=None) -> List[ExamPeriod]:
+    """توليد فترات الامتحانات من أحداث EXAM_PERIOD_START/END والعطل في AcademicCalendar"""
+    from .models import AcademicCalendar
+
+    events = list(AcademicCalendar.objects.filter(
+        semester_id=semester_id,
+        event_type__in=['EXAM_PERIOD_START', 'EXAM_PERIOD_END', 'HOLIDAY']
+    ).values_list('event_type', 'date', 'end_date'))
+
+    starts = [date for event_type, date, _ in events if event_type == 'EXAM_PERIOD_START']
+    ends = [end_date or date for event_type, date, end_date in events
+            if event_type == 'EXAM_PERIOD_END']
+    if not starts or not ends:
+        logger.warning(f"لا توجد فترة امتحانات محددة في التقويم للفصل {semester_id}")
+        return []
+
+    holidays = set()
+    for event_type, date, end_date in events:
+        if event_type != 'HOLIDAY':
+            continue
+        current_date = date
+        while current_date <= (end_date or date):
+            holidays.add(current_date)
+            current_date += datetime.timedelta(days=1)
+
+    return build_exam_periods(min(starts), max(ends), session_times, holidays=holidays)
+
+class EnrollmentConflictGraph:
+    """رسم التعارض بين المقررات من التسجيلات
+
+    يحتفظ بمصفوفة الحدوث (طالب × مقرر) بصيغتي CSR/CSC ومصفوفة تعارض متفرقة
+    (مقرر × مقرر) وزن كل حافة فيها عدد الطلاب المشتركين بين المقررين.
+    """
+
+    def __init__(self, student_ids: Sequence, course_ids: Sequence):
+        self.students, student_idx = np.unique(np.asarray(student_ids), return_inverse=True)
+        self.courses, course_idx = np.unique(np.asarray(course_ids), return_inverse=True)
+        n_students, n_courses = len(self.students), len(self.courses)
+
+        # إزالة التسجيلات المكررة - المفاتيح مرتبة حسب الطالب ثم المقرر
+        keys = np.unique(student_idx.astype(np.int64) * max(n_courses, 1) + course_idx)
+        student_idx = keys // max(n_courses, 1)
+        course_idx = keys % max(n_courses, 1)
+
+        # طالب -> مقررات (CSR)
+        self.student_indptr = np.zeros(n_students + 1, dtype=np.int64)
+        np.cumsum(np.bincount(student_idx, minlength=n_students), out=self.student_indptr[1:])
+        self.student_courses = course_idx
+
+        # مقرر -> طلاب (CSC)
+        order = np.argsort(course_idx, kind='stable')
+        self.course_indptr = np.zeros(n_courses + 1, dtype=np.int64)
+        np.cumsum(np.bincount(course_idx, minlength=n_courses), out=self.course_indptr[1:])
+        self.course_students = student_idx[order]
+        self.course_sizes = np.diff(self.course_indptr)
+
+        self.indptr, self.indices, self.weights = self._build_conflicts(student_idx, course_idx)
+
+    @classmethod
+    def from_enrollments(cls, semester_id, statuses=('ENROLLED',)) -> 'EnrollmentConflictGraph':
+        """بناء الرسم من جدول التسجيلات باستعلام واحد"""
+        from .models import Enrollment
+
+        rows = Enrollment.objects.filter(
+            semester_id=semester_id,
+            status__in=statuses
+        ).values_list('student_id', 'course_id')
+
+        student_ids, course_ids = [], []
+        for student_id, course_id in rows.iterator(chunk_size=10000):
+            student_ids.append(student_id)
+            course_ids.append(course_id)
+
+        logger.info(f"تحميل {len(student_ids)} تسجيل لبناء رسم تعارض الامتحانات")
+        return cls(student_ids, course_ids)
+
+    def _build_conflicts(self, student_idx: 'np.ndarray',
+                         course_idx: 'np.ndarray') -> Tuple['np.ndarray', 'np.ndarray', 'np.ndarray']:
+        """مصفوفة التعارض = Aᵀ·A بدون القطر"""
+        n_students, n_courses = len(self.students), len(self.courses)
+
+        if SCIPY_AVAILABLE:
+            incidence = sparse.csr_matrix(
+                (np.ones(len(student_idx), dtype=np.int32), (student_idx, course_idx)),
+                shape=(n_students, n_courses)
+            )
+            conflicts = (incidence.T @ incidence).tocsr()
+            conflicts.setdiag(0)
+            conflicts.eliminate_zeros()
+            conflicts.sort_indices()
+            return conflicts.indptr, conflicts.indices, conflicts.data
+
+        # بديل NumPy: توليد أزواج المقررات لكل طالب ثم تجميعها
+        pairs = []
+        for s in range(n_students):
+            courses = self.student_courses[self.student_indptr[s]:self.student_indptr[s + 1]]
+            if len(courses) > 1:
+                first, second = np.triu_indices(len(courses), 1)
+                pairs.append(courses[first] * n_courses + courses[second])
+
+        if not pairs:
+            return np.zeros(n_courses + 1, dtype=np.int64), np.zeros(0, dtype=np.int64), \
+                np.zeros(0, dtype=np.int64)
+
+        pair_keys, weights = np.unique(np.concatenate(pairs), return_counts=True)
+        rows = np.concatenate([pair_keys // n_courses, pair_keys % n_courses])
+        cols = np.concatenate([pair_keys % n_courses, pair_keys // n_courses])
+        weights = np.concatenate([weights, weights])
+
+        order = np.lexsort((cols, rows))
+        indptr = np.zeros(n_courses + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n_courses), out=indptr[1:])
+        return indptr, cols[order], weights[order]
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.indices) // 2
+
+    def neighbors(self, course: int) -> 'np.ndarray':
+        return self.indices[self.indptr[course]:self.indptr[course + 1]]
+
+    def students_of(self, course: int) -> 'np.ndarray':
+        return self.course_students[self.course_indptr[course]:self.course_indptr[course + 1]]
+
+    def courses_of(self, student: int) -> 'np.ndarray':
+        return self.student_courses[self.student_indptr[student]:self.student_indptr[student + 1]]
+
+class ExamTimetabler:
+    """جدولة الامتحانات بتلوين رسم التعارض (DSatur)
+
+    القيود: لا امتحانين للطالب في الفترة نفسها، حد أقصى للامتحانات اليومية لكل طالب،
+    وسعة القاعات المتاحة في كل فترة.
+    """
+
+    DEFAULT_SESSION_TIMES = [
+        (datetime.time(9, 0), datetime.time(11, 0)),
+        (datetime.time(13, 0), datetime.time(15, 0)),
+    ]
+
+    def __init__(self, graph: EnrollmentConflictGraph, periods: List[ExamPeriod],
+                 rooms: Optional[List[ExamRoom]] = None, max_exams_per_day: int = 2):
+        self.graph = graph
+        self.periods = periods
+        self.rooms = sorted(rooms or [], key=lambda room: room.capacity, reverse=True)
+        self.max_exams_per_day = max_exams_per_day
+
+        n_days = max((period.day_index for period in periods), default=-1) + 1
+        self.period_days = np.array([period.day_index for period in periods], dtype=np.int64)
+        self.day_counts = np.zeros((len(graph.students), max(n_days, 1)), dtype=np.int16)
+        self.course_periods = np.full(len(graph.courses), -1, dtype=np.int64)
+        self.course_rooms: Dict[int, List[Tuple[str, int]]] = {}
+
+        # المقاعد الحرة لكل قاعة في كل فترة
+        self.free_rooms = [list(range(len(self.rooms))) for _ in periods]
+        self.free_seats = np.full(len(periods), sum(room.capacity for room in self.rooms),
+                                  dtype=np.int64)
+
+    def schedule(self) -> Dict:
+        """تنفيذ الجدولة وإرجاع التخصيصات والمقررات غير المجدولة"""
+        started = time.perf_counter()
+        graph = self.graph
+        n_courses = len(graph.courses)
+        degrees = np.diff(graph.indptr)
+        saturation = [set() for _ in range(n_courses)]
+        unscheduled = []
+
+        # الأولوية: أعلى تشبع ثم أعلى درجة ثم أكبر عدد طلاب
+        heap = [(0, -int(degrees[c]), -int(graph.course_sizes[c]), c) for c in range(n_courses)]
+        heapq.heapify(heap)
+        done = np.zeros(n_courses, dtype=bool)
+
+        while heap:
+            neg_saturation, neg_degree, neg_size, course = heapq.heappop(heap)
+            if done[course] or -neg_saturation != len(saturation[course]):
+                continue
+            done[course] = True
+
+            period = self._first_feasible_period(course, saturation[course])
+            if period is None:
+                unscheduled.append(course)
+                continue
+
+            self._assign(course, period)
+
+            for neighbor in graph.neighbors(course):
+                if not done[neighbor] and period not in saturation[neighbor]:
+                    saturation[neighbor].add(period)
+                    heapq.heappush(heap, (-len(saturation[neighbor]), -int(degrees[neighbor]),
+                                          -int(graph.course_sizes[neighbor]), neighbor))
+
+        elapsed = time.perf_counter() - started
+        logger.info(f"اكتملت جدولة الامتحانات: {n_courses - len(unscheduled)} مقرر مجدول، "
+                    f"{len(unscheduled)} غير مجدول خلال {elapsed:.2f} ثانية")
+
+        return {
+            'assignments': {
+                graph.courses[c]: self._assignment(c)
+                for c in range(n_courses) if self.course_periods[c] >= 0
+            },
+            'unscheduled': [
+                {
+                    'course_id': graph.courses[c],
+                    'student_count': int(graph.course_sizes[c]),
+                    'reason': 'لا توجد فترة خالية من التعارض تتسع للمقرر'
+                }
+                for c in unscheduled
+            ],
+            'statistics': {
+                'total_courses': n_courses,
+                'total_students': len(graph.students),
+                'conflict_edges': graph.edge_count,
+                'periods_available': len(self.periods),
+                'periods_used': int(len(np.unique(self.course_periods[self.course_periods >= 0]))),
+                'elapsed_seconds': round(elapsed, 3),
+            }
+        }
+
+    def _first_feasible_period(self, course: int, blocked: set) -> Optional[int]:
+        """أول فترة بدون تعارض تحقق الحد اليومي وسعة القاعات"""
+        students = self.graph.students_of(course)
+        size = len(students)
+
+        # الأيام التي لم يبلغ فيها أي طالب من طلاب المقرر الحد الأقصى
+        if size:
+            day_ok = self.day_counts[students].max(axis=0) < self.max_exams_per_day
+        else:
+            day_ok = np.ones(self.day_counts.shape[1], dtype=bool)
+
+        for period in range(len(self.periods)):
+            if period in blocked or not day_ok[self.period_days[period]]:
+                continue
+            if self.rooms and self.free_seats[period] < size:
+                continue
+            return period
+
+        return None
+
+    def _assign(self, course: int, period: int):
+        """تسجيل التخصيص وتحديث عدادات الطلاب والقاعات"""
+        students = self.graph.students_of(course)
+        self.course_periods[course] = period
+        self.day_counts[students, self.period_days[period]] += 1
+
+        if self.rooms:
+            self.course_rooms[course] = self._pack_rooms(period, len(students))
+
+    def _pack_rooms(self, period: int, size: int) -> List[Tuple[str, int]]:
+        """تعبئة القاعات: أصغر قاعة تتسع للمقرر وإلا أكبر القاعات الحرة تباعاً"""
+        free = self.free_rooms[period]
+        fitting = [r for r in free if self.rooms[r].capacity >= size]
+        chosen = [fitting[-1]] if fitting else []
+
+        if not chosen:
+            remaining = size
+            for r in free:
+                chosen.append(r)
+                remaining -= self.rooms[r].capacity
+                if remaining <= 0:
+                    break
+
+        allocation = []
+        remaining = size
+        for r in chosen:
+            free.remove(r)
+            seats = min(self.rooms[r].capacity, remaining)
+            remaining -= seats
+            self.free_seats[period] -= self.rooms[r].capacity
+            allocation.append((self.rooms[r].room_id, seats))
+
+        return allocation
+
+    def _assignment(self, course: int) -> ExamAssignment:
+        return ExamAssignment(
+            course_id=self.graph.courses[course],
+            period=self.periods[self.course_periods[course]],
+            student_count=int(self.graph.course_sizes[course]),
+            rooms=self.course_rooms.get(course, [])
+        )
+
+    def iter_student_calendars(self) -> Iterator[Tuple[object, List[Dict]]]:
+        """توليد جدول امتحانات كل طالب مرتباً حسب الفترة"""
+        graph = self.graph
+        for student in range(len(graph.students)):
+            courses = graph.courses_of(student)
+            periods = self.course_periods[courses]
+            order = np.argsort(periods, kind='stable')
+
+            entries = []
+            for course, period in zip(courses[order], periods[order]):
+                if period < 0:
+                    continue
+                exam_period = self.periods[period]
+                entries.append({
+                    'course_id': graph.courses[course],
+                    'date': exam_period.date.isoformat(),
+                    'start_time': exam_period.start_time.strftime('%H:%M'),
+                    'end_time': exam_period.end_time.strftime('%H:%M'),
+                    'rooms': [room_id for room_id, _ in self.course_rooms.get(course, [])],
+                })
+            yield graph.students[student], entries
+
+    def export_student_calendars_csv(self, file_obj) -> int:
+        """تصدير جداول امتحانات الطلاب إلى CSV وإرجاع عدد الصفوف"""
+        writer = csv.writer(file_obj)
+        writer.writerow(['student_id', 'course_id', 'date', 'start_time', 'end_time', 'rooms'])
+
+        rows = 0
+        for student_id, entries in self.iter_student_calendars():
+            for entry in entries:
+                writer.writerow([
+                    student_id, entry['course_id'], entry['date'],
+                    entry['start_time'], entry['end_time'], ' '.join(map(str, entry['rooms']))
+                ])
+                rows += 1
+        return rows
+
+def load_exam_rooms() -> List[ExamRoom]:
+    """تحميل القاعات النشطة والمتاحة كقاعات امتحان"""
+    from courses.models import Classroom
+
+    return [
+        ExamRoom(room_id=str(room_id), name=name, capacity=capacity)
+        for room_id, name, capacity in Classroom.objects.filter(
+            is_active=True, is_available=True
+        ).values_list('id', 'name', 'capacity')
+    ]
+
+def schedule_semester_exams(semester_id, max_exams_per_day: int = 2,
+                            session_times=None, use_rooms: bool = True) -> Tuple[ExamTimetabler, Dict]:
+    """جدولة الامتحانات النهائية لفصل دراسي كامل"""
+    graph = EnrollmentConflictGraph.from_enrollments(semester_id)
+    periods = exam_periods_from_academic_calendar(semester_id, session_times)
+    rooms = load_exam_rooms() if use_rooms else None
+
+    timetabler = ExamTimetabler(graph, periods, rooms, max_exams_per_day)
+    return timetabler, timetabler.schedule()
@@ -0,0 +1,82 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from academic.bulk_enrollment import (
+    BulkEnrollmentImporter, BulkImportError, DEFAULT_CHUNK_SIZE, iter_import_rows
+)
+from academic.models import Semester
+
+
+class Command(BaseCommand):
+    help = 'استيراد تسجيلات الطلاب دفعة واحدة من ملف CSV أو XLSX'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'file',
+            help='مسار ملف التسجيلات (أعمدة student_id و course_code)'
+        )
+
+        parser.add_argument(
+            '--semester',
+            required=True,
+            help='معرف الفصل الدراسي'
+        )
+
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help=f'عدد الصفوف في كل دفعة (افتراضي: {DEFAULT_CHUNK_SIZE})'
+        )
+
+        parser.add_argument(
+            '--errors',
+            help='مسار ملف CSV لتقرير الأخطاء لكل صف'
+        )
+
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='التحقق من الملف دون حفظ التسجيلات'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            semester = Semester.objects.get(pk=options['semester'])
+        except Semester.DoesNotExist:
+            raise CommandError('الفصل الدراسي غير موجود')
+
+        importer = BulkEnrollmentImporter(
+            semester,
+            chunk_size=options['chunk_size'],
+            dry_run=options['dry_run']
+        )
+
+        started = time.perf_counter()
+        try:
+            with open(options['file'], 'rb') as source:
+                result = importer.run(iter_import_rows(source, options['file']))
+        except (OSError, BulkImportError) as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - started
+
+        prefix = '[تجربة] ' if options['dry_run'] else ''
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{prefix}تمت معالجة {result.total_rows} صف خلال {elapsed:.1f} ثانية: '
+                f'{result.created} تسجيل، {result.rejected} مرفوض'
+            )
+        )
+
+        if options['errors']:
+            with open(options['errors'], 'w', newline='', encoding='utf-8') as output:
+                result.write_error_report(output)
+            self.stdout.write(f"تم حفظ تقرير الأخطاء في {options['errors']}")
+        else:
+            for error in result.errors[:20]:
+                self.stdout.write(
+                    self.style.WARNING(f'صف {error.row_number}: {error.error}')
+                )
+            if result.rejected > 20:
+                self.stdout.write(f'... و {result.rejected - 20} خطأ آخر (استخدم --errors)')
@@ -0,0 +1,200 @@
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count, Q
+
+from academic.models import CourseCapacity, Enrollment, Semester
+from academic.registration import drop_enrollment, get_seat_counter, register_student
+from courses.models import Course
+from students.models import Student
+
+
+class Command(BaseCommand):
+    help = 'محاكاة تسجيل متزامن لآلاف الطلاب على شعب مطلوبة والتحقق من عدم تجاوز السعة'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--semester',
+            help='معرف الفصل الدراسي (افتراضي: الفصل الحالي)'
+        )
+
+        parser.add_argument(
+            '--courses',
+            nargs='+',
+            required=True,
+            help='رموز المقررات المطلوبة التي يتنافس عليها الطلاب'
+        )
+
+        parser.add_argument(
+            '--students',
+            type=int,
+            default=5000,
+            help='عدد الطلاب المتزامنين (افتراضي: 5000)'
+        )
+
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=64,
+            help='عدد خيوط التنفيذ المتزامنة (افتراضي: 64)'
+        )
+
+        parser.add_argument(
+            '--drop-ratio',
+            type=float,
+            default=0.1,
+            help='نسبة المسجلين الذين ينسحبون لاختبار الترقية من قائمة الانتظار (افتراضي: 0.1)'
+        )
+
+        parser.add_argument(
+            '--keep',
+            action='store_true',
+            help='الإبقاء على التسجيلات التي أنشأها الاختبار'
+        )
+
+    def handle(self, *args, **options):
+        semester = self.get_semester(options['semester'])
+        courses = list(Course.objects.filter(code__in=options['courses']))
+        if not courses:
+            raise CommandError('لم يتم العثور على أي من المقررات المحددة')
+
+        student_ids = list(Student.objects.values_list('pk', flat=True)[:options['students']])
+        if len(student_ids) < options['students']:
+            self.stdout.write(
+                self.style.WARNING(f'يتوفر {len(student_ids)} طالب فقط - سيتم استخدامهم جميعاً')
+            )
+
+        existing_ids = set(
+            Enrollment.objects.filter(course__in=courses, semester=semester).values_list('id', flat=True)
+        )
+        for course in courses:
+            get_seat_counter(course, semester)
+
+        # كل طالب يحاول التسجيل في مقرر عشوائي من المقررات المطلوبة
+        attempts = [(pk, random.choice(courses)) for pk in student_ids]
+        outcomes, latencies, elapsed = self.run_concurrently(
+            attempts,
+            lambda item: register_student(Student(pk=item[0]), item[1], semester).outcome,
+            options['workers']
+        )
+
+        self.report('التسجيل', outcomes, latencies, elapsed)
+
+        # انسحاب متزامن لجزء من المسجلين لاختبار الترقية من قائمة الانتظار
+        to_drop = list(
+            Enrollment.objects.filter(course__in=courses, semester=semester, status='ENROLLED')
+            .exclude(id__in=existing_ids)
+            .select_related('course', 'semester')
+        )
+        random.shuffle(to_drop)
+        to_drop = to_drop[:int(len(to_drop) * options['drop_ratio'])]
+
+        if to_drop:
+            outcomes, latencies, elapsed = self.run_concurrently(
+                to_drop,
+                lambda enrollment: 'PROMOTED' if drop_enrollment(enrollment) else 'DROPPED',
+                options['workers']
+            )
+            self.report('الانسحاب', outcomes, latencies, elapsed)
+
+        oversold = self.verify(courses, semester)
+
+        if not options['keep']:
+            Enrollment.objects.filter(course__in=courses, semester=semester).exclude(
+                id__in=existing_ids
+            ).delete()
+            CourseCapacity.objects.filter(course__in=courses, semester=semester).delete()
+            self.stdout.write('تم حذف التسجيلات التي أنشأها الاختبار')
+
+        if oversold:
+            raise CommandError(f'تم تجاوز السعة في {oversold} مقرر')
+
+    def get_semester(self, semester_id):
+        if semester_id:
+            return Semester.objects.get(pk=semester_id)
+        semester = Semester.objects.filter(is_current=True).first()
+        if not semester:
+            raise CommandError('لا يوجد فصل دراسي حالي - استخدم --semester')
+        return semester
+
+    def run_concurrently(self, items, func, workers):
+        """تنفيذ العمليات عبر خيوط متزامنة وقياس زمن كل عملية"""
+        outcomes = {}
+        latencies = []
+        lock = threading.Lock()
+        batches = [items[i::workers] for i in range(workers)]
+
+        def worker(batch):
+            local_outcomes, local_latencies = {}, []
+            try:
+                for item in batch:
+                    started = time.perf_counter()
+                    try:
+                        outcome = func(item)
+                    except Exception as e:
+                        outcome = f'ERROR: {type(e).__name__}'
+                    local_latencies.append(time.perf_counter() - started)
+                    local_outcomes[outcome] = local_outcomes.get(outcome, 0) + 1
+            finally:
+                connection.close()
+
+            with lock:
+                latencies.extend(local_latencies)
+                for outcome, total in local_outcomes.items():
+                    outcomes[outcome] = outcomes.get(outcome, 0) + total
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(worker, [batch for batch in batches if batch]))
+        return outcomes, latencies, time.perf_counter() - started
+
+    def report(self, phase, outcomes, latencies, elapsed):
+        total = sum(outcomes.values())
+        throughput = total / elapsed if elapsed else 0
+        latencies = sorted(latencies)
+        p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{phase}: {total} عملية خلال {elapsed:.2f} ثانية ({throughput:.0f} عملية/ثانية)'
+        ))
+        self.stdout.write(
+            f'  زمن الاستجابة: الوسيط {statistics.median(latencies or [0]) * 1000:.1f}ms، '
+            f'p95 {p95 * 1000:.1f}ms'
+        )
+        for outcome, count in sorted(outcomes.items()):
+            self.stdout.write(f'  {outcome}: {count}')
+
+    def verify(self, courses, semester):
+        """التحقق من عدم تجاوز السعة وتطابق العدادات مع التسجيلات الفعلية"""
+        actual = {
+            row['course_id']: row
+            for row in Enrollment.objects.filter(course__in=courses, semester=semester)
+            .values('course_id')
+            .annotate(
+                enrolled=Count('id', filter=Q(status='ENROLLED')),
+                waitlisted=Count('id', filter=Q(status='WAITLISTED')),
+                dropped=Count('id', filter=Q(status='DROPPED'))
+            )
+        }
+
+        oversold = 0
+        for counter in CourseCapacity.objects.filter(course__in=courses, semester=semester):
+            row = actual.get(counter.course_id, {'enrolled': 0, 'waitlisted': 0, 'dropped': 0})
+            in_sync = (row['enrolled'] == counter.enrolled_count and
+                       row['waitlisted'] == counter.waitlisted_count and
+                       row['dropped'] == counter.dropped_count)
+            if row['enrolled'] > counter.capacity:
+                oversold += 1
+            style = self.style.SUCCESS if in_sync and row['enrolled'] <= counter.capacity \
+                else self.style.ERROR
+            self.stdout.write(style(
+                f"{counter.course.code}: مسجل {row['enrolled']}/{counter.capacity}، "
+                f"انتظار {row['waitlisted']}/{counter.waitlist_capacity}، "
+                f"العداد {counter.enrolled_count}/{counter.waitlisted_count}"
+            ))
+        return oversold
@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from academic.exam_scheduler import schedule_semester_exams
+
+
+class Command(BaseCommand):
+    help = 'جدولة الامتحانات النهائية لفصل دراسي من رسم تعارض التسجيلات'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--semester',
+            required=True,
+            help='معرف الفصل الدراسي'
+        )
+
+        parser.add_argument(
+            '--max-per-day',
+            type=int,
+            default=2,
+            help='الحد الأقصى لامتحانات الطالب في اليوم (افتراضي: 2)'
+        )
+
+        parser.add_argument(
+            '--output',
+            help='مسار ملف CSV لتصدير جداول امتحانات الطلاب'
+        )
+
+        parser.add_argument(
+            '--no-rooms',
+            action='store_true',
+            help='تجاهل سعة القاعات أثناء الجدولة'
+        )
+
+    def handle(self, *args, **options):
+        timetabler, result = schedule_semester_exams(
+            options['semester'],
+            max_exams_per_day=options['max_per_day'],
+            use_rooms=not options['no_rooms']
+        )
+
+        if not timetabler.periods:
+            raise CommandError('لا توجد فترة امتحانات محددة في التقويم الأكاديمي لهذا الفصل')
+
+        stats = result['statistics']
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"تمت جدولة {len(result['assignments'])} من {stats['total_courses']} مقرر "
+                f"({stats['total_students']} طالب، {stats['conflict_edges']} تعارض) "
+                f"خلال {stats['elapsed_seconds']} ثانية"
+            )
+        )
+
+        for item in result['unscheduled']:
+            self.stdout.write(
+                self.style.WARNING(f"لم تتم جدولة المقرر {item['course_id']}: {item['reason']}")
+            )
+
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as output:
+                rows = timetabler.export_student_calendars_csv(output)
+            self.stdout.write(
+                self.style.SUCCESS(f"تم تصدير {rows} امتحان إلى {options['output']}")
+            )
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.16 on 2026-10-18 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("academic", "0003_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="academiccalendar",
+            name="start_time",
+            field=models.TimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="academiccalendar",
+            name="end_time",
+            field=models.TimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="academiccalendar",
+            name="event_type",
+            field=models.CharField(
+                choices=[
+                    ("SEMESTER_START", "Semester Start"),
+                    ("SEMESTER_END", "Semester End"),
+                    ("REGISTRATION_START", "Registration Starts"),
+                    ("REGISTRATION_END", "Registration Ends"),
+                    ("EXAM_PERIOD_START", "Exam Period Starts"),
+                    ("EXAM_PERIOD_END", "Exam Period Ends"),
+                    ("HOLIDAY", "Holiday"),
+                    ("BREAK", "Academic Break"),
+                    ("GRADUATION", "Graduation Ceremony"),
+                    ("TEACHING_HOURS", "Weekly Teaching Hours"),
+                    ("DAILY_BREAK", "Daily Break"),
+                    ("OTHER", "Other Event"),
+                ],
+                max_length=20,
+            ),
+        ),
+    ]
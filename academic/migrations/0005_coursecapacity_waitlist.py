@@ -0,0 +1,88 @@
+# Generated by Django 4.2.16 on 2026-10-18 10:30
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0001_initial"),
+        ("academic", "0004_academiccalendar_time_window"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="enrollment",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("ENROLLED", "Enrolled"),
+                    ("WAITLISTED", "Waitlisted"),
+                    ("DROPPED", "Dropped"),
+                    ("COMPLETED", "Completed"),
+                    ("FAILED", "Failed"),
+                ],
+                default="ENROLLED",
+                max_length=10,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="enrollment",
+            index=models.Index(
+                fields=["course", "semester", "status", "enrollment_date"],
+                name="enroll_course_sem_status_idx",
+            ),
+        ),
+        migrations.CreateModel(
+            name="CourseCapacity",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "capacity",
+                    models.IntegerField(
+                        validators=[django.core.validators.MinValueValidator(0)]
+                    ),
+                ),
+                (
+                    "waitlist_capacity",
+                    models.IntegerField(
+                        default=10,
+                        validators=[django.core.validators.MinValueValidator(0)],
+                    ),
+                ),
+                ("enrolled_count", models.IntegerField(default=0)),
+                ("waitlisted_count", models.IntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "course",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="seat_counters",
+                        to="courses.course",
+                    ),
+                ),
+                (
+                    "semester",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="seat_counters",
+                        to="academic.semester",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "course_capacities",
+                "unique_together": {("course", "semester")},
+            },
+        ),
+    ]
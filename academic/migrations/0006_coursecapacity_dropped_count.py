@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-18 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("academic", "0005_coursecapacity_waitlist"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="coursecapacity",
+            name="dropped_count",
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.16 on 2026-10-18 19:10
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("academic", "0006_coursecapacity_dropped_count"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="enrollment",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
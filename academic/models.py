@@ -65,6 +65,7 @@ class Enrollment(models.Model):
     """Student course enrollment"""
     STATUS_CHOICES = [
         ('ENROLLED', 'Enrolled'),
+        ('WAITLISTED', 'Waitlisted'),
         ('DROPPED', 'Dropped'),
         ('COMPLETED', 'Completed'),
         ('FAILED', 'Failed'),
@@ -77,16 +78,55 @@ class Enrollment(models.Model):
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='ENROLLED')
     final_grade = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True,
                                      validators=[MinValueValidator(0), MaxValueValidator(100)])
+    # High-water mark for report snapshots; include it in update_fields saves
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         db_table = 'enrollments'
         unique_together = ('student', 'course', 'semester')
         ordering = ['-enrollment_date']
+        indexes = [
+            # FIFO waitlist lookups and per-course status counts
+            models.Index(fields=['course', 'semester', 'status', 'enrollment_date'],
+                         name='enroll_course_sem_status_idx'),
+        ]
     
     def __str__(self):
         return f"{self.student.student_id} - {self.course.code} ({self.semester})"
 
 
+class CourseCapacity(models.Model):
+    """Seat counters for a course offering in a semester.
+
+    The row is locked with select_for_update during registration so seat
+    checks and counter updates are atomic. The counts are maintained by
+    enrollment signals and repaired by the periodic reconciliation task.
+    """
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='seat_counters')
+    semester = models.ForeignKey(Semester, on_delete=models.CASCADE, related_name='seat_counters')
+    capacity = models.IntegerField(validators=[MinValueValidator(0)])
+    waitlist_capacity = models.IntegerField(default=10, validators=[MinValueValidator(0)])
+    enrolled_count = models.IntegerField(default=0)
+    waitlisted_count = models.IntegerField(default=0)
+    dropped_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'course_capacities'
+        unique_together = ('course', 'semester')
+    
+    def __str__(self):
+        return f"{self.course.code} ({self.semester}) {self.enrolled_count}/{self.capacity}"
+    
+    @property
+    def available_seats(self):
+        return max(0, self.capacity - self.enrolled_count)
+    
+    @property
+    def is_full(self):
+        return self.enrolled_count >= self.capacity
+
+
 class Grade(models.Model):
     """Individual assignment/exam grades"""
     GRADE_TYPE_CHOICES = [
@@ -261,6 +301,8 @@ class AcademicCalendar(models.Model):
         ('HOLIDAY', 'Holiday'),
         ('BREAK', 'Academic Break'),
         ('GRADUATION', 'Graduation Ceremony'),
+        ('TEACHING_HOURS', 'Weekly Teaching Hours'),
+        ('DAILY_BREAK', 'Daily Break'),
         ('OTHER', 'Other Event'),
     ]
     
@@ -268,6 +310,9 @@ class AcademicCalendar(models.Model):
     event_type = models.CharField(max_length=20, choices=EVENT_TYPES)
     date = models.DateField()
     end_date = models.DateField(null=True, blank=True)  # For multi-day events
+    # Time window for weekly TEACHING_HOURS / DAILY_BREAK events (weekday taken from date)
+    start_time = models.TimeField(null=True, blank=True)
+    end_time = models.TimeField(null=True, blank=True)
     description = models.TextField(blank=True)
     is_holiday = models.BooleanField(default=False)
     semester = models.ForeignKey(Semester, on_delete=models.CASCADE, null=True, blank=True)
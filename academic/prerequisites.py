@@ -0,0 +1,180 @@
+"""
+Prerequisite Graph Service
+Versioned in-memory prerequisite DAG with bulk eligibility evaluation
+"""
+
+import logging
+import threading
+import uuid
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from django.core.cache import cache
+from django.db.models import Max
+
+from .models import Enrollment, Prerequisite
+
+logger = logging.getLogger(__name__)
+
+GRAPH_VERSION_CACHE_KEY = 'academic:prerequisite_graph:version'
+
+
+@dataclass(frozen=True)
+class PrerequisiteEdge:
+    """A single prerequisite requirement"""
+    course_id: object
+    code: str
+    min_grade: Decimal
+
+
+@dataclass
+class CourseEligibility:
+    """Eligibility of one course for one student"""
+    course_id: object
+    prerequisites_met: bool
+    missing: List[PrerequisiteEdge] = field(default_factory=list)
+
+    @property
+    def missing_prerequisites(self):
+        """Missing prerequisites in the legacy {course_id: min_grade} shape"""
+        return {edge.course_id: edge.min_grade for edge in self.missing}
+
+
+class PrerequisiteGraph:
+    """
+    In-memory prerequisite DAG built from all Prerequisite rows in one query
+    """
+
+    def __init__(self, edges: Iterable[Tuple], version: str):
+        self.version = version
+        self.requirements: Dict[object, List[PrerequisiteEdge]] = {}
+        for course_id, prerequisite_id, prerequisite_code, min_grade in edges:
+            self.requirements.setdefault(course_id, []).append(
+                PrerequisiteEdge(prerequisite_id, prerequisite_code, min_grade)
+            )
+        self._closure: Dict[object, Set] = {}
+        self.cycles = self._find_cycles()
+        if self.cycles:
+            logger.warning(f"Prerequisite graph contains {len(self.cycles)} cycle(s): {self.cycles}")
+
+    @classmethod
+    def load(cls, version: str) -> 'PrerequisiteGraph':
+        edges = Prerequisite.objects.values_list(
+            'course_id', 'prerequisite_course_id', 'prerequisite_course__code', 'min_grade'
+        )
+        return cls(edges, version)
+
+    def prerequisites_of(self, course_id) -> List[PrerequisiteEdge]:
+        return self.requirements.get(course_id, [])
+
+    def all_prerequisites(self, course_id) -> Set:
+        """Transitive prerequisites of a course (memoized per graph version)"""
+        if course_id not in self._closure:
+            seen = set()
+            stack = [edge.course_id for edge in self.prerequisites_of(course_id)]
+            while stack:
+                current = stack.pop()
+                if current in seen:
+                    continue
+                seen.add(current)
+                stack.extend(edge.course_id for edge in self.prerequisites_of(current))
+            self._closure[course_id] = seen
+        return self._closure[course_id]
+
+    def evaluate(self, course_ids: Iterable, best_grades: Dict) -> Dict[object, CourseEligibility]:
+        """
+        Evaluate eligibility for many courses in a single pass over the graph.
+        best_grades maps completed course ids to the student's best final grade.
+        """
+        results = {}
+        for course_id in course_ids:
+            missing = [
+                edge for edge in self.prerequisites_of(course_id)
+                if best_grades.get(edge.course_id) is None
+                or best_grades[edge.course_id] < edge.min_grade
+            ]
+            results[course_id] = CourseEligibility(course_id, not missing, missing)
+        return results
+
+    def _find_cycles(self) -> List[List]:
+        """Detect cycles with an iterative three-colour DFS"""
+        WHITE, GREY, BLACK = 0, 1, 2
+        colour = {}
+        cycles = []
+
+        for root in self.requirements:
+            if colour.get(root, WHITE) != WHITE:
+                continue
+            path = [root]
+            stack = [(root, iter(self.prerequisites_of(root)))]
+            colour[root] = GREY
+            while stack:
+                node, children = stack[-1]
+                edge = next(children, None)
+                if edge is None:
+                    colour[node] = BLACK
+                    stack.pop()
+                    path.pop()
+                    continue
+                state = colour.get(edge.course_id, WHITE)
+                if state == GREY:
+                    cycles.append(path[path.index(edge.course_id):] + [edge.course_id])
+                elif state == WHITE:
+                    colour[edge.course_id] = GREY
+                    path.append(edge.course_id)
+                    stack.append((edge.course_id, iter(self.prerequisites_of(edge.course_id))))
+
+        return cycles
+
+
+_graph: Optional[PrerequisiteGraph] = None
+_graph_lock = threading.Lock()
+
+
+def current_graph_version() -> str:
+    """Shared graph version, so every worker reloads after a prerequisite change"""
+    version = cache.get(GRAPH_VERSION_CACHE_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(GRAPH_VERSION_CACHE_KEY, version, None):
+            version = cache.get(GRAPH_VERSION_CACHE_KEY, version)
+    return version
+
+
+def get_prerequisite_graph() -> PrerequisiteGraph:
+    """Return the process-local graph, reloading it when the shared version changed"""
+    global _graph
+    version = current_graph_version()
+    graph = _graph
+    if graph is not None and graph.version == version:
+        return graph
+
+    with _graph_lock:
+        if _graph is None or _graph.version != version:
+            _graph = PrerequisiteGraph.load(version)
+            logger.info(f"Loaded prerequisite graph version {version} "
+                        f"({len(_graph.requirements)} courses with prerequisites)")
+        return _graph
+
+
+def invalidate_prerequisite_graph():
+    """Bump the shared version; workers reload lazily on next access"""
+    cache.set(GRAPH_VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+
+
+def completed_course_grades(student) -> Dict:
+    """Best final grade per completed course for a student, in one query"""
+    return dict(
+        Enrollment.objects.filter(
+            student=student,
+            status='COMPLETED',
+            final_grade__isnull=False
+        ).values_list('course_id').annotate(best=Max('final_grade'))
+    )
+
+
+def check_student_eligibility(student, course_ids: Iterable) -> Dict[object, CourseEligibility]:
+    """Eligibility of a student for many courses (one query plus the cached graph)"""
+    return get_prerequisite_graph().evaluate(course_ids, completed_course_grades(student))
+
@@ -0,0 +1,180 @@
+"""
+High-Concurrency Registration Engine
+Atomic seat allocation with FIFO waitlists for course registration
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Optional
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import CourseCapacity, Enrollment
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WAITLIST_CAPACITY = 10
+
+# Registration outcomes
+ENROLLED = 'ENROLLED'
+WAITLISTED = 'WAITLISTED'
+FULL = 'FULL'
+ALREADY_REGISTERED = 'ALREADY_REGISTERED'
+
+ACTIVE_STATUSES = ('ENROLLED', 'WAITLISTED', 'COMPLETED')
+
+
+@dataclass
+class RegistrationResult:
+    """Outcome of a single registration attempt"""
+    outcome: str
+    enrollment: Optional[Enrollment] = None
+    waitlist_position: Optional[int] = None
+
+    @property
+    def success(self):
+        return self.outcome in (ENROLLED, WAITLISTED)
+
+
+def course_capacity(course):
+    """
+    Seat capacity configured on the course
+    """
+    return getattr(course, 'max_enrollment', None) or getattr(course, 'max_capacity', 0)
+
+
+def build_seat_counter(course, semester, counts=None) -> CourseCapacity:
+    """
+    Unsaved counter for a course offering.
+    `counts` maps counter field names (enrolled_count, ...) to current totals.
+    """
+    counts = counts or {}
+    waitlist_capacity = (
+        DEFAULT_WAITLIST_CAPACITY if getattr(course, 'allows_waitlist', True) else 0
+    )
+    return CourseCapacity(
+        course=course,
+        semester=semester,
+        capacity=course_capacity(course),
+        waitlist_capacity=waitlist_capacity,
+        enrolled_count=counts.get('enrolled_count', 0),
+        waitlisted_count=counts.get('waitlisted_count', 0),
+        dropped_count=counts.get('dropped_count', 0)
+    )
+
+
+def get_seat_counter(course, semester):
+    """
+    Fetch the seat counter for a course offering, creating it on first use.
+    New counters are seeded from the existing enrollments so they start in sync.
+    """
+    try:
+        return CourseCapacity.objects.get(course=course, semester=semester)
+    except CourseCapacity.DoesNotExist:
+        pass
+
+    counts = dict(
+        Enrollment.objects.filter(
+            course=course,
+            semester=semester,
+            status__in=['ENROLLED', 'WAITLISTED', 'DROPPED']
+        ).values_list('status').annotate(total=Count('id'))
+    )
+    counter = build_seat_counter(course, semester, {
+        'enrolled_count': counts.get('ENROLLED', 0),
+        'waitlisted_count': counts.get('WAITLISTED', 0),
+        'dropped_count': counts.get('DROPPED', 0),
+    })
+
+    try:
+        with transaction.atomic():
+            counter.save(force_insert=True)
+            return counter
+    except IntegrityError:
+        # Another worker created the counter concurrently
+        return CourseCapacity.objects.get(course=course, semester=semester)
+
+
+def register_student(student, course, semester, allow_waitlist=True):
+    """
+    Enroll a student or place them on the waitlist.
+
+    The seat counter row is locked for the duration of the transaction, so the
+    capacity check and the counter increment (applied by the enrollment signal)
+    can never interleave with another registration for the same offering.
+    """
+    counter = get_seat_counter(course, semester)
+
+    with transaction.atomic():
+        counter = CourseCapacity.objects.select_for_update().get(pk=counter.pk)
+
+        existing = Enrollment.objects.filter(
+            student=student, course=course, semester=semester
+        ).first()
+        if existing and existing.status in ACTIVE_STATUSES:
+            return RegistrationResult(ALREADY_REGISTERED, existing)
+
+        if counter.enrolled_count < counter.capacity:
+            status = 'ENROLLED'
+        elif allow_waitlist and counter.waitlisted_count < counter.waitlist_capacity:
+            status = 'WAITLISTED'
+        else:
+            return RegistrationResult(FULL)
+
+        if existing:
+            # Re-registration after a drop: move to the back of the queue
+            existing.status = status
+            existing.enrollment_date = timezone.now()
+            existing.save(update_fields=['status', 'enrollment_date', 'updated_at'])
+            enrollment = existing
+        else:
+            enrollment = Enrollment.objects.create(
+                student=student,
+                course=course,
+                semester=semester,
+                status=status
+            )
+
+    if status == 'WAITLISTED':
+        return RegistrationResult(WAITLISTED, enrollment, counter.waitlisted_count + 1)
+    return RegistrationResult(ENROLLED, enrollment)
+
+
+def drop_enrollment(enrollment):
+    """
+    Drop an enrollment and promote the first waitlisted student into the freed seat.
+    Returns the promoted enrollment, if any.
+    """
+    counter = get_seat_counter(enrollment.course, enrollment.semester)
+
+    with transaction.atomic():
+        # Always lock the counter first to keep a consistent lock order
+        counter = CourseCapacity.objects.select_for_update().get(pk=counter.pk)
+        enrollment = Enrollment.objects.select_for_update().get(pk=enrollment.pk)
+
+        previous_status = enrollment.status
+        if previous_status not in ('ENROLLED', 'WAITLISTED'):
+            return None
+
+        enrollment.status = 'DROPPED'
+        enrollment.save(update_fields=['status', 'updated_at'])
+
+        if previous_status == 'WAITLISTED':
+            return None
+
+        promoted = Enrollment.objects.select_for_update().filter(
+            course_id=enrollment.course_id,
+            semester_id=enrollment.semester_id,
+            status='WAITLISTED'
+        ).order_by('enrollment_date', 'id').first()
+
+        if promoted is None:
+            return None
+
+        promoted.status = 'ENROLLED'
+        promoted.save(update_fields=['status', 'updated_at'])
+
+    logger.info(f"Promoted waitlisted enrollment {promoted.pk} after drop of {enrollment.pk}")
+    return promoted
@@ -222,8 +222,9 @@ class AcademicCalendarSerializer(serializers.ModelSerializer):
     class Meta:
         model = AcademicCalendar
         fields = [
-            'id', 'title', 'event_type', 'date', 'end_date', 'description',
-            'is_holiday', 'semester', 'semester_name', 'days_until'
+            'id', 'title', 'event_type', 'date', 'end_date', 'start_time',
+            'end_time', 'description', 'is_holiday', 'semester', 'semester_name',
+            'days_until'
         ]
     
     def get_days_until(self, obj):
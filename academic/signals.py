@@ -3,12 +3,16 @@ Academic App Signals
 Handle automatic updates when academic records are modified
 """
 
-from django.db.models.signals import post_save, pre_delete
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, post_delete, pre_delete
 from django.dispatch import receiver
 from django.db.models import Avg
 from django.utils import timezone
 
-from .models import Grade, Enrollment, Attendance
+from .models import Grade, Enrollment, Attendance, Prerequisite, Schedule
+from .counters import apply_status_transition
+from .prerequisites import invalidate_prerequisite_graph
+from .timetable import invalidate_semester_timetables, sync_enrollment_timetable
 from students.models import Student
 
 
@@ -33,7 +37,7 @@ def update_enrollment_grade(sender, instance, created, **kwargs):
             if total_possible > 0:
                 final_grade = (total_points / total_possible) * 100
                 enrollment.final_grade = round(final_grade, 2)
-                enrollment.save(update_fields=['final_grade'])
+                enrollment.save(update_fields=['final_grade', 'updated_at'])
                 
                 # Update student GPA
                 update_student_gpa(enrollment.student)
@@ -135,7 +139,65 @@ def recalculate_grade_on_delete(sender, instance, **kwargs):
     else:
         enrollment.final_grade = None
     
-    enrollment.save(update_fields=['final_grade'])
+    enrollment.save(update_fields=['final_grade', 'updated_at'])
     
     # Update student GPA
-    update_student_gpa(enrollment.student)
\ No newline at end of file
+    update_student_gpa(enrollment.student)
+
+
+@receiver(post_save, sender=Prerequisite)
+@receiver(post_delete, sender=Prerequisite)
+def invalidate_prerequisite_graph_on_change(sender, instance, **kwargs):
+    """
+    Reload the in-memory prerequisite graph in every worker after a change
+    """
+    invalidate_prerequisite_graph()
+
+
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+def update_student_timetable(sender, instance, **kwargs):
+    """
+    Keep the cached student timetable in step with enrollment and drop events
+    """
+    enrolled = instance.status == 'ENROLLED' and kwargs.get('signal') is post_save
+    transaction.on_commit(lambda: sync_enrollment_timetable(
+        instance.student_id, instance.semester_id, instance.course_id, enrolled
+    ))
+
+
+@receiver(post_save, sender=Schedule)
+@receiver(post_delete, sender=Schedule)
+def invalidate_timetables_on_schedule_change(sender, instance, **kwargs):
+    """
+    Rebuild course and student timetables of the semester after a schedule change
+    """
+    transaction.on_commit(lambda: invalidate_semester_timetables(instance.semester_id))
+
+
+@receiver(post_init, sender=Enrollment)
+def remember_enrollment_status(sender, instance, **kwargs):
+    """
+    Remember the loaded status so the next save knows which transition happened
+    """
+    # Read from __dict__ so a deferred status field is not fetched here
+    instance._counted_status = instance.__dict__.get('status')
+
+
+@receiver(post_save, sender=Enrollment)
+def update_enrollment_counters(sender, instance, created, **kwargs):
+    """
+    Keep the offering's enrolled/waitlisted/dropped counters in step with status changes
+    """
+    previous = None if created else instance._counted_status
+    if created or previous is not None:
+        apply_status_transition(instance.course_id, instance.semester_id, previous, instance.status)
+    instance._counted_status = instance.status
+
+
+@receiver(post_delete, sender=Enrollment)
+def release_enrollment_counters(sender, instance, **kwargs):
+    """
+    Remove a deleted enrollment from the offering's counters
+    """
+    apply_status_transition(instance.course_id, instance.semester_id, instance._counted_status, None)
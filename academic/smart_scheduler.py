@@ -10,6 +10,13 @@ from typing import List, Dict, Optional, Tuple
 import json
 import logging
 
+# NumPy imports - لتقييم الفترات بشكل متجه
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
 # Machine Learning imports
 try:
     from sklearn.cluster import KMeans
@@ -67,6 +74,229 @@ class SchedulingRequest:
     constraints: SchedulingConstraint
     priority: int = 1  # 1=عادي, 2=عالي, 3=حرج
 
+def _time_to_minutes(value: datetime.time) -> int:
+    """تحويل الوقت إلى دقائق منذ منتصف الليل"""
+    return value.hour * 60 + value.minute
+
+def _minutes_to_time(minutes: int) -> datetime.time:
+    """تحويل الدقائق منذ منتصف الليل إلى وقت"""
+    return datetime.time(minutes // 60, minutes % 60)
+
+@dataclass
+class SchedulingCalendar:
+    """تقويم الجدولة الأسبوعي: نافذة عمل لكل يوم، استراحات متعددة، ودقة أساسية للفترات"""
+    working_windows: Dict[int, Tuple[datetime.time, datetime.time]]  # اليوم -> (البداية، النهاية)
+    break_times: Dict[int, List[Tuple[datetime.time, datetime.time]]] = field(default_factory=dict)
+    granularity: int = 60  # دقائق
+
+    SUPPORTED_GRANULARITIES = (15, 30, 60)
+
+    def __post_init__(self):
+        if self.granularity not in self.SUPPORTED_GRANULARITIES:
+            raise ValidationError(f"دقة الفترات غير مدعومة: {self.granularity} دقيقة")
+
+    @classmethod
+    def from_work_hours(cls, work_hours: Dict, granularity: int = 60) -> 'SchedulingCalendar':
+        """إنشاء تقويم موحد لجميع الأيام من إعدادات أوقات العمل"""
+        return cls(
+            working_windows={
+                day: (work_hours['start_time'], work_hours['end_time'])
+                for day in work_hours['working_days']
+            },
+            break_times={
+                day: list(work_hours['break_times'])
+                for day in work_hours['working_days']
+            },
+            granularity=granularity
+        )
+
+    @classmethod
+    def from_academic_calendar(cls, semester_id, granularity: int = 60,
+                               fallback_work_hours: Optional[Dict] = None) -> 'SchedulingCalendar':
+        """تحميل التقويم من أحداث AcademicCalendar للفصل الدراسي
+
+        أحداث TEACHING_HOURS تحدد نافذة العمل وأحداث DAILY_BREAK تحدد الاستراحات،
+        ويُؤخذ اليوم من تاريخ الحدث.
+        """
+        from .models import AcademicCalendar
+
+        events = AcademicCalendar.objects.filter(
+            semester_id=semester_id,
+            event_type__in=['TEACHING_HOURS', 'DAILY_BREAK'],
+            start_time__isnull=False,
+            end_time__isnull=False
+        ).values_list('event_type', 'date', 'start_time', 'end_time')
+
+        working_windows = {}
+        break_times = {}
+        for event_type, date, start_time, end_time in events:
+            day = (date.weekday() + 1) % 7  # الأحد=0
+            if event_type == 'TEACHING_HOURS':
+                # دمج النوافذ المتعددة لنفس اليوم في أوسع نافذة
+                if day in working_windows:
+                    start_time = min(start_time, working_windows[day][0])
+                    end_time = max(end_time, working_windows[day][1])
+                working_windows[day] = (start_time, end_time)
+            else:
+                break_times.setdefault(day, []).append((start_time, end_time))
+
+        if not working_windows and fallback_work_hours:
+            logger.info(f"لا توجد أوقات تدريس للفصل {semester_id} - استخدام أوقات العمل الافتراضية")
+            calendar = cls.from_work_hours(fallback_work_hours, granularity)
+            for day, breaks in break_times.items():
+                calendar.break_times.setdefault(day, []).extend(breaks)
+            return calendar
+
+        return cls(working_windows=working_windows, break_times=break_times,
+                   granularity=granularity)
+
+    def generate_base_slots(self) -> List[TimeSlot]:
+        """توليد الفترات الأساسية بطول الدقة المحددة مع تجنب الاستراحات"""
+        slots = []
+
+        for day in sorted(self.working_windows):
+            window_start, window_end = self.working_windows[day]
+            end_minute = _time_to_minutes(window_end)
+            breaks = [
+                (_time_to_minutes(break_start), _time_to_minutes(break_end))
+                for break_start, break_end in self.break_times.get(day, [])
+            ]
+
+            minute = _time_to_minutes(window_start)
+            while minute + self.granularity <= end_minute:
+                slot_end = minute + self.granularity
+
+                # القفز إلى نهاية الاستراحة المتداخلة
+                overlapping = [b_end for b_start, b_end in breaks
+                               if minute < b_end and slot_end > b_start]
+                if overlapping:
+                    minute = max(overlapping)
+                    continue
+
+                slots.append(TimeSlot(
+                    day=day,
+                    start_time=_minutes_to_time(minute),
+                    end_time=_minutes_to_time(slot_end),
+                    duration=self.granularity
+                ))
+                minute = slot_end
+
+        return slots
+
+class SlotScoringModel:
+    """نموذج تقييم الفترات الزمنية بمصفوفات NumPy
+
+    يحسب نقاط جميع الطلبات × جميع الفترات دفعة واحدة عبر عمليات البث
+    (broadcasting) بدلاً من تقييم كل زوج (فترة، طلب) على حدة.
+    """
+
+    # أوزان التقييم
+    PREFERRED_DAY_BONUS = 10
+    NEAR_PREFERRED_BONUS = 5
+    NEAR_PREFERRED_WINDOW = 60  # دقائق
+    MORNING_BONUS = 3
+    LATE_PENALTY = 2
+    MORNING_CUTOFF = 12 * 60  # 12:00
+    LATE_CUTOFF = 15 * 60     # 15:00
+    DAY_SCORES = (5, 5, 5, 4, 3, 1, 0)  # الأحد-السبت
+
+    # أعمدة مصفوفة ميزات الفترات
+    DAY, START_MINUTE, IS_MORNING, IS_LATE = range(4)
+
+    def __init__(self, time_slots: List[TimeSlot]):
+        self.time_slots = list(time_slots)
+        self.slot_index = {
+            (slot.day, slot.start_time): i for i, slot in enumerate(self.time_slots)
+        }
+        self.slot_features = self.build_slot_features(self.time_slots)
+        self.base_scores = self._base_scores(self.slot_features)
+        self.request_index: Dict[str, int] = {}
+        self.scores = np.zeros((0, len(self.time_slots)))
+
+    @classmethod
+    def build_slot_features(cls, slots: List[TimeSlot]) -> 'np.ndarray':
+        """مصفوفة ميزات الفترات (اليوم، دقيقة البداية، صباحية، متأخرة)"""
+        features = np.zeros((len(slots), 4), dtype=np.int32)
+        features[:, cls.DAY] = [slot.day for slot in slots]
+        features[:, cls.START_MINUTE] = [_time_to_minutes(slot.start_time) for slot in slots]
+        features[:, cls.IS_MORNING] = features[:, cls.START_MINUTE] <= cls.MORNING_CUTOFF
+        features[:, cls.IS_LATE] = features[:, cls.START_MINUTE] >= cls.LATE_CUTOFF
+        return features
+
+    @staticmethod
+    def build_preference_matrices(requests: List[SchedulingRequest]) -> Tuple['np.ndarray', 'np.ndarray']:
+        """مصفوفات تفضيلات الطلبات (R × P): الأيام ودقائق البداية
+
+        تُملأ الخانات الفارغة باليوم -1 الذي لا يطابق أي فترة.
+        """
+        width = max((len(r.constraints.preferred_time_slots) for r in requests), default=0)
+        pref_days = np.full((len(requests), width), -1, dtype=np.int32)
+        pref_minutes = np.zeros((len(requests), width), dtype=np.int32)
+
+        for row, request in enumerate(requests):
+            for col, preferred_slot in enumerate(request.constraints.preferred_time_slots):
+                pref_days[row, col] = preferred_slot.day
+                pref_minutes[row, col] = _time_to_minutes(preferred_slot.start_time)
+
+        return pref_days, pref_minutes
+
+    @classmethod
+    def _base_scores(cls, features: 'np.ndarray') -> 'np.ndarray':
+        """النقاط المستقلة عن الطلب: توزيع الأيام والأوقات الصباحية/المتأخرة"""
+        day_scores = np.asarray(cls.DAY_SCORES, dtype=np.float64)
+        return (day_scores[features[:, cls.DAY]]
+                + cls.MORNING_BONUS * features[:, cls.IS_MORNING]
+                - cls.LATE_PENALTY * features[:, cls.IS_LATE])
+
+    @classmethod
+    def score_matrix(cls, features: 'np.ndarray', base_scores: 'np.ndarray',
+                     pref_days: 'np.ndarray', pref_minutes: 'np.ndarray') -> 'np.ndarray':
+        """نقاط جميع الطلبات × الفترات (R × S)"""
+        # (R, P, 1) مقابل (1, 1, S)
+        same_day = pref_days[:, :, None] == features[None, None, :, cls.DAY]
+        near = np.abs(
+            pref_minutes[:, :, None] - features[None, None, :, cls.START_MINUTE]
+        ) < cls.NEAR_PREFERRED_WINDOW
+
+        preference = (same_day * (cls.PREFERRED_DAY_BONUS +
+                                  cls.NEAR_PREFERRED_BONUS * near)).sum(axis=1)
+        return base_scores[None, :] + preference
+
+    def fit(self, requests: List[SchedulingRequest]) -> 'SlotScoringModel':
+        """حساب مصفوفة النقاط لجميع الطلبات مرة واحدة"""
+        pref_days, pref_minutes = self.build_preference_matrices(requests)
+        self.scores = self.score_matrix(
+            self.slot_features, self.base_scores, pref_days, pref_minutes
+        )
+        self.request_index = {request.course_id: i for i, request in enumerate(requests)}
+        return self
+
+    def request_scores(self, request: SchedulingRequest, slots: List[TimeSlot]) -> 'np.ndarray':
+        """نقاط طلب لقائمة فترات - من المصفوفة المحسوبة مسبقاً إن أمكن"""
+        row = self.request_index.get(request.course_id)
+        indices = [self.slot_index.get((slot.day, slot.start_time)) for slot in slots]
+
+        if row is not None and None not in indices:
+            return self.scores[row, indices]
+
+        # فترات أو طلبات خارج النموذج المحسوب - حساب مباشر
+        features = self.build_slot_features(slots)
+        pref_days, pref_minutes = self.build_preference_matrices([request])
+        return self.score_matrix(
+            features, self._base_scores(features), pref_days, pref_minutes
+        )[0]
+
+    def score(self, slot: TimeSlot, request: SchedulingRequest) -> float:
+        """نقاط فترة واحدة لطلب واحد"""
+        return float(self.request_scores(request, [slot])[0])
+
+    def rank(self, slots: List[TimeSlot], request: SchedulingRequest) -> List[TimeSlot]:
+        """ترتيب الفترات تنازلياً حسب النقاط (ترتيب مستقر للفترات المتساوية)"""
+        if not slots:
+            return []
+        order = np.argsort(-self.request_scores(request, slots), kind='stable')
+        return [slots[i] for i in order]
+
 class SmartScheduler:
     """نظام الجدولة الذكي"""
     
@@ -80,48 +310,61 @@ class SmartScheduler:
         ]
     }
     
-    def __init__(self, semester_id: str):
+    def __init__(self, semester_id: str, calendar: Optional[SchedulingCalendar] = None):
         self.semester_id = semester_id
+        self.calendar = calendar or SchedulingCalendar.from_work_hours(self.DEFAULT_WORK_HOURS)
         self.time_slots = self._generate_time_slots()
         self.conflicts = []
         self.optimization_scores = {}
+        self.scoring_model = SlotScoringModel(self.time_slots) if NUMPY_AVAILABLE else None
+        self._run_lengths = self._compute_run_lengths()
+        self._run_starts_cache: Dict[int, List[int]] = {}
+        self._session_slots_cache: Dict[int, List[TimeSlot]] = {}
         
     def _generate_time_slots(self) -> List[TimeSlot]:
-        """توليد الفترات الزمنية المتاحة"""
-        slots = []
-        work_hours = self.DEFAULT_WORK_HOURS
-        
-        for day in work_hours['working_days']:
-            current_time = work_hours['start_time']
-            end_time = work_hours['end_time']
-            
-            while current_time < end_time:
-                # تجنب أوقات الاستراحة
-                is_break_time = False
-                for break_start, break_end in work_hours['break_times']:
-                    if break_start <= current_time < break_end:
-                        current_time = break_end
-                        is_break_time = True
-                        break
-                
-                if is_break_time or current_time >= end_time:
-                    continue
-                
-                # إنشاء فترة زمنية (ساعة واحدة)
-                slot_end = (datetime.datetime.combine(datetime.date.today(), current_time) + 
-                           datetime.timedelta(hours=1)).time()
-                
-                if slot_end <= end_time:
-                    slots.append(TimeSlot(
-                        day=day,
-                        start_time=current_time,
-                        end_time=slot_end,
-                        duration=60
-                    ))
-                
-                current_time = slot_end
-        
-        return slots
+        """توليد الفترات الزمنية الأساسية المتاحة من التقويم"""
+        return self.calendar.generate_base_slots()
+
+    def _compute_run_lengths(self) -> List[int]:
+        """طول السلسلة المتصلة من الفترات الأساسية التي تبدأ عند كل فترة"""
+        run_lengths = [1] * len(self.time_slots)
+
+        for i in range(len(self.time_slots) - 2, -1, -1):
+            current_slot, next_slot = self.time_slots[i], self.time_slots[i + 1]
+            if (current_slot.day == next_slot.day and
+                    current_slot.end_time == next_slot.start_time):
+                run_lengths[i] = run_lengths[i + 1] + 1
+
+        return run_lengths
+
+    def _run_starts(self, run_length: int) -> List[int]:
+        """مؤشرات بداية السلاسل المتصلة بطول معين (محسوبة مرة واحدة لكل طول)"""
+        if run_length not in self._run_starts_cache:
+            self._run_starts_cache[run_length] = [
+                i for i, length in enumerate(self._run_lengths) if length >= run_length
+            ]
+        return self._run_starts_cache[run_length]
+
+    def _session_slots(self, duration_minutes: int) -> List[TimeSlot]:
+        """الفترات المرشحة لجلسة بمدة معينة كسلاسل متصلة من الفترات الأساسية"""
+        if duration_minutes not in self._session_slots_cache:
+            granularity = self.calendar.granularity
+            run_length = max(1, -(-duration_minutes // granularity))
+
+            session_slots = []
+            for i in self._run_starts(run_length):
+                base_slot = self.time_slots[i]
+                start_minute = _time_to_minutes(base_slot.start_time)
+                session_slots.append(TimeSlot(
+                    day=base_slot.day,
+                    start_time=base_slot.start_time,
+                    end_time=_minutes_to_time(start_minute + duration_minutes),
+                    duration=duration_minutes
+                ))
+
+            self._session_slots_cache[duration_minutes] = session_slots
+
+        return self._session_slots_cache[duration_minutes]
     
     def schedule_courses(self, requests: List[SchedulingRequest]) -> Dict:
         """جدولة مجموعة من المقررات"""
@@ -129,7 +372,11 @@ class SmartScheduler:
         
         # ترتيب الطلبات حسب الأولوية والقيود
         sorted_requests = self._prioritize_requests(requests)
-        
+
+        # حساب نقاط جميع الطلبات × الفترات دفعة واحدة
+        if self.scoring_model is not None:
+            self.scoring_model.fit(sorted_requests)
+
         # إنشاء الجدول الأساسي
         schedule = {}
         failed_requests = []
@@ -153,9 +400,8 @@ class SmartScheduler:
                 logger.error(f"خطأ في جدولة مقرر {request.course_name}: {str(e)}")
                 failed_requests.append(request)
         
-        # تحسين الجدول باستخدام الذكاء الاصطناعي
-        if ML_AVAILABLE:
-            schedule = self._optimize_schedule_with_ai(schedule)
+        # تحليل الجدول بالذكاء الاصطناعي؛ النتيجة خارج قاموس المقررات
+        ai_analysis = self._analyze_schedule_with_ai(schedule) if ML_AVAILABLE else {}
         
         # إنشاء التقرير النهائي
         result = {
@@ -171,7 +417,8 @@ class SmartScheduler:
             'conflicts': self.conflicts,
             'optimization_score': self._calculate_optimization_score(schedule),
             'statistics': self._generate_statistics(schedule),
-            'recommendations': self._generate_recommendations(schedule, failed_requests)
+            'recommendations': self._generate_recommendations(schedule, failed_requests),
+            'ai_analysis': ai_analysis
         }
         
         logger.info(f"اكتملت الجدولة: {len(schedule)} مقرر مجدول، {len(failed_requests)} مقرر فاشل")
@@ -211,8 +458,8 @@ class SmartScheduler:
             logger.warning(f"لا توجد فترات كافية لمقرر {request.course_name}")
             return []
         
-        # اختيار أفضل الفترات
-        selected_slots = self._select_optimal_slots(suitable_slots[:sessions_needed], request)
+        # اختيار أفضل الفترات من بين جميع الفترات المناسبة
+        selected_slots = self._select_optimal_slots(suitable_slots, request)
         
         # إنشاء الجلسات
         for slot in selected_slots:
@@ -232,7 +479,8 @@ class SmartScheduler:
         """البحث عن الفترات المناسبة لمقرر"""
         suitable_slots = []
         
-        for slot in self.time_slots:
+        # الجلسات متعددة الفترات تُوضع كسلاسل متصلة من الفترات الأساسية
+        for slot in self._session_slots(duration_minutes):
             # فحص القيود الأساسية
             if not self._check_basic_constraints(slot, request):
                 continue
@@ -372,19 +620,18 @@ class SmartScheduler:
         """اختيار أفضل الفترات الزمنية"""
         if not slots:
             return []
-        
-        # تقييم كل فترة
-        scored_slots = []
-        for slot in slots:
-            score = self._calculate_slot_score(slot, request)
-            scored_slots.append((slot, score))
-        
-        # ترتيب حسب النقاط
-        scored_slots.sort(key=lambda x: x[1], reverse=True)
-        
+
+        # ترتيب حسب النقاط المحسوبة مسبقاً في نموذج التقييم
+        if self.scoring_model is not None:
+            ranked_slots = self.scoring_model.rank(slots, request)
+        else:
+            ranked_slots = sorted(
+                slots, key=lambda slot: self._calculate_slot_score(slot, request), reverse=True
+            )
+
         # اختيار أفضل الفترات
         selected = []
-        for slot, score in scored_slots:
+        for slot in ranked_slots:
             if len(selected) >= request.sessions_per_week:
                 break
             
@@ -396,62 +643,61 @@ class SmartScheduler:
     
     def _calculate_slot_score(self, slot: TimeSlot, request: SchedulingRequest) -> float:
         """حساب نقاط الفترة الزمنية"""
+        if self.scoring_model is not None:
+            return self.scoring_model.score(slot, request)
+
+        model = SlotScoringModel
         score = 0.0
         constraints = request.constraints
-        
+        slot_minutes = _time_to_minutes(slot.start_time)
+
         # الفترات المفضلة
         for preferred_slot in constraints.preferred_time_slots:
             if slot.day == preferred_slot.day:
                 # نقاط إضافية للأيام المفضلة
-                score += 10
-                
-                # نقاط للأوقات القريبة من المفضلة
-                time_diff = abs(
-                    (datetime.datetime.combine(datetime.date.today(), slot.start_time) -
-                     datetime.datetime.combine(datetime.date.today(), preferred_slot.start_time)).seconds
-                )
-                if time_diff < 3600:  # أقل من ساعة
-                    score += 5
-        
+                score += model.PREFERRED_DAY_BONUS
+
+                # نقاط للأوقات القريبة من المفضلة (أقل من ساعة)
+                time_diff = abs(slot_minutes - _time_to_minutes(preferred_slot.start_time))
+                if time_diff < model.NEAR_PREFERRED_WINDOW:
+                    score += model.NEAR_PREFERRED_BONUS
+
         # تفضيل الأوقات الصباحية
-        if slot.start_time <= datetime.time(12, 0):
-            score += 3
-        
+        if slot_minutes <= model.MORNING_CUTOFF:
+            score += model.MORNING_BONUS
+
         # تجنب الأوقات المتأخرة
-        if slot.start_time >= datetime.time(15, 0):
-            score -= 2
-        
+        if slot_minutes >= model.LATE_CUTOFF:
+            score -= model.LATE_PENALTY
+
         # توزيع الأيام
-        day_scores = {0: 5, 1: 5, 2: 5, 3: 4, 4: 3, 5: 1, 6: 0}  # الأحد-السبت
-        score += day_scores.get(slot.day, 0)
-        
+        if 0 <= slot.day < len(model.DAY_SCORES):
+            score += model.DAY_SCORES[slot.day]
+
         return score
     
-    def _optimize_schedule_with_ai(self, schedule: Dict) -> Dict:
-        """تحسين الجدول باستخدام الذكاء الاصطناعي"""
+    def _analyze_schedule_with_ai(self, schedule: Dict) -> Dict:
+        """تحليل الجدول بالذكاء الاصطناعي واقتراح التحسينات دون تعديل قاموس المقررات"""
         if not ML_AVAILABLE:
             logger.warning("مكتبات التعلم الآلي غير متوفرة - تخطي التحسين بالذكاء الاصطناعي")
-            return schedule
+            return {}
         
         try:
             # استخراج البيانات للتحليل
             schedule_data = self._extract_schedule_features(schedule)
             
             if not schedule_data:
-                return schedule
+                return {}
             
             # تطبيق خوارزمية التجميع لتحسين التوزيع
             optimized_data = self._apply_clustering_optimization(schedule_data)
             
-            # تطبيق التحسينات على الجدول
-            optimized_schedule = self._apply_optimizations(schedule, optimized_data)
-            
-            logger.info("تم تحسين الجدول باستخدام الذكاء الاصطناعي")
-            return optimized_schedule
+            logger.info("تم تحليل الجدول باستخدام الذكاء الاصطناعي")
+            return self._summarize_optimizations(optimized_data)
             
         except Exception as e:
             logger.error(f"خطأ في تحسين الجدول بالذكاء الاصطناعي: {str(e)}")
-            return schedule
+            return {}
     
     def _extract_schedule_features(self, schedule: Dict) -> List[List[float]]:
         """استخراج الميزات من الجدول للتحليل"""
@@ -493,7 +739,7 @@ class SmartScheduler:
         
         return optimization_suggestions
     
-    def _generate_ai_suggestions(self, clusters: np.ndarray, data: List[List[float]]) -> List[str]:
+    def _generate_ai_suggestions(self, clusters: 'np.ndarray', data: List[List[float]]) -> List[str]:
         """توليد اقتراحات التحسين من التحليل"""
         suggestions = []
         
@@ -520,19 +766,13 @@ class SmartScheduler:
         
         return suggestions
     
-    def _apply_optimizations(self, schedule: Dict, optimizations: Dict) -> Dict:
-        """تطبيق التحسينات على الجدول"""
-        # في هذا الإصدار، نحتفظ بالجدول الأساسي ونضيف معلومات التحسين
-        optimized_schedule = schedule.copy()
-        
-        # إضافة اقتراحات التحسين
-        optimized_schedule['_ai_analysis'] = {
+    def _summarize_optimizations(self, optimizations: Dict) -> Dict:
+        """ملخص اقتراحات التحسين؛ الجدول الأساسي يبقى كما هو في هذا الإصدار"""
+        return {
             'optimization_applied': True,
             'suggestions': optimizations.get('suggestions', []),
             'analysis_timestamp': timezone.now().isoformat()
         }
-        
-        return optimized_schedule
     
     def _calculate_optimization_score(self, schedule: Dict) -> float:
         """حساب نقاط تحسين الجدول"""
@@ -686,9 +926,15 @@ def create_scheduling_request(course_data: Dict) -> SchedulingRequest:
         priority=course_data.get('priority', 1)
     )
 
-def schedule_semester_courses(semester_id: str, courses_data: List[Dict]) -> Dict:
+def schedule_semester_courses(semester_id: str, courses_data: List[Dict],
+                              granularity: int = 60) -> Dict:
     """جدولة مقررات فصل دراسي كامل"""
-    scheduler = SmartScheduler(semester_id)
+    calendar = SchedulingCalendar.from_academic_calendar(
+        semester_id,
+        granularity=granularity,
+        fallback_work_hours=SmartScheduler.DEFAULT_WORK_HOURS
+    )
+    scheduler = SmartScheduler(semester_id, calendar=calendar)
     
     # تحويل بيانات المقررات إلى طلبات جدولة
     requests = [create_scheduling_request(course) for course in courses_data]
@@ -0,0 +1,227 @@
+"""
+Student Timetable Service
+Cached per-student weekly timetables backed by a (day, 5-minute slot) bitmap
+"""
+
+import logging
+import uuid
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, List, Optional
+
+from django.core.cache import cache
+
+from .models import Enrollment, Schedule
+
+logger = logging.getLogger(__name__)
+
+SLOT_MINUTES = 5
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+DAY_INDEX = {day: index for index, (day, _) in enumerate(Schedule.DAYS_OF_WEEK)}
+
+TIMETABLE_TIMEOUT = 60 * 60 * 24
+
+
+@dataclass(frozen=True)
+class TimetableSession:
+    """One weekly meeting of a course"""
+    course_id: object
+    course_code: str
+    course_name: str
+    day_of_week: str
+    start_time: object
+    end_time: object
+    room: str = ''
+    building: str = ''
+    instructor: str = 'TBA'
+    course_name_en: str = ''
+
+    @property
+    def mask(self) -> int:
+        return session_mask(self.day_of_week, self.start_time, self.end_time)
+
+    def overlaps(self, other: 'TimetableSession') -> bool:
+        """Exact check on the clock times; touching sessions do not overlap"""
+        return (self.day_of_week == other.day_of_week
+                and self.start_time < other.end_time
+                and other.start_time < self.end_time)
+
+    def as_dict(self) -> Dict:
+        return asdict(self)
+
+
+def session_mask(day_of_week, start_time, end_time) -> int:
+    """
+    Bitmap of the 5-minute slots covered by a session.
+    Partial slots are rounded outwards, so sessions that do not align with
+    the grid can share a slot without overlapping; the mask only pre-filters.
+    """
+    start = (start_time.hour * 60 + start_time.minute) // SLOT_MINUTES
+    end = -(-(end_time.hour * 60 + end_time.minute) // SLOT_MINUTES)
+    if end <= start:
+        return 0
+    offset = DAY_INDEX[day_of_week] * SLOTS_PER_DAY
+    return ((1 << (end - start)) - 1) << (offset + start)
+
+
+class Timetable:
+    """
+    Weekly timetable: the session list plus the OR of all session bitmaps
+    """
+
+    def __init__(self, sessions: Iterable[TimetableSession] = ()):
+        self.sessions: List[TimetableSession] = []
+        self.bitmap = 0
+        self.add_sessions(sessions)
+
+    @property
+    def course_ids(self):
+        return {session.course_id for session in self.sessions}
+
+    def add_sessions(self, sessions: Iterable[TimetableSession]):
+        for session in sessions:
+            self.sessions.append(session)
+            self.bitmap |= session.mask
+
+    def add_course(self, course_timetable: 'Timetable') -> bool:
+        """Merge a course timetable; returns False if the course is already present"""
+        if not course_timetable.sessions or course_timetable.sessions[0].course_id in self.course_ids:
+            return False
+        self.add_sessions(course_timetable.sessions)
+        return True
+
+    def remove_course(self, course_id) -> bool:
+        """Drop all sessions of a course and rebuild the bitmap from the rest"""
+        remaining = [session for session in self.sessions if session.course_id != course_id]
+        if len(remaining) == len(self.sessions):
+            return False
+        self.sessions = []
+        self.bitmap = 0
+        self.add_sessions(remaining)
+        return True
+
+    def conflicts_with(self, other: 'Timetable') -> List[TimetableSession]:
+        """
+        Sessions of this timetable that overlap the other one.
+        The bitwise AND rejects the common no-conflict case without touching sessions;
+        masked hits are confirmed against the exact times.
+        """
+        overlap = self.bitmap & other.bitmap
+        if not overlap:
+            return []
+        candidates = [session for session in other.sessions if session.mask & overlap]
+        return [
+            session for session in self.sessions
+            if session.mask & overlap and any(session.overlaps(candidate) for candidate in candidates)
+        ]
+
+    def ordered_sessions(self) -> List[TimetableSession]:
+        return sorted(self.sessions, key=lambda s: (DAY_INDEX[s.day_of_week], s.start_time))
+
+
+def _version_key(semester_id) -> str:
+    return f'academic:timetable:version:{semester_id}'
+
+
+def timetable_version(semester_id) -> str:
+    """Per-semester version token; bumping it invalidates every cached timetable"""
+    key = _version_key(semester_id)
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def invalidate_semester_timetables(semester_id):
+    """Called when class schedules of a semester change"""
+    cache.set(_version_key(semester_id), uuid.uuid4().hex, None)
+
+
+def _course_key(semester_id, course_id, version) -> str:
+    return f'academic:timetable:course:{semester_id}:{course_id}:{version}'
+
+
+def _student_key(semester_id, student_id, version) -> str:
+    return f'academic:timetable:student:{semester_id}:{student_id}:{version}'
+
+
+def load_course_timetables(semester_id, course_ids: Iterable) -> Dict[object, Timetable]:
+    """
+    Precomputed course timetables, read from the cache in one round trip.
+    Misses are filled from a single Schedule query.
+    """
+    course_ids = list(course_ids)
+    version = timetable_version(semester_id)
+    keys = {_course_key(semester_id, course_id, version): course_id for course_id in course_ids}
+    cached = cache.get_many(list(keys))
+    timetables = {keys[key]: timetable for key, timetable in cached.items()}
+
+    missing = [course_id for course_id in course_ids if course_id not in timetables]
+    if missing:
+        fresh = {course_id: Timetable() for course_id in missing}
+        schedules = Schedule.objects.filter(
+            semester_id=semester_id,
+            course_id__in=missing
+        ).select_related('course', 'instructor')
+        for schedule in schedules:
+            fresh[schedule.course_id].add_sessions([TimetableSession(
+                course_id=schedule.course_id,
+                course_code=schedule.course.code,
+                course_name=schedule.course.name_ar,
+                course_name_en=schedule.course.name_en,
+                day_of_week=schedule.day_of_week,
+                start_time=schedule.start_time,
+                end_time=schedule.end_time,
+                room=schedule.room,
+                building=schedule.building,
+                instructor=schedule.instructor.get_full_name() if schedule.instructor else 'TBA'
+            )])
+        cache.set_many(
+            {_course_key(semester_id, course_id, version): timetable
+             for course_id, timetable in fresh.items()},
+            TIMETABLE_TIMEOUT
+        )
+        timetables.update(fresh)
+
+    return timetables
+
+
+def get_student_timetable(student_id, semester_id) -> Timetable:
+    """Cached timetable of a student's ENROLLED courses in a semester"""
+    key = _student_key(semester_id, student_id, timetable_version(semester_id))
+    timetable = cache.get(key)
+    if timetable is not None:
+        return timetable
+
+    course_ids = Enrollment.objects.filter(
+        student_id=student_id,
+        semester_id=semester_id,
+        status='ENROLLED'
+    ).values_list('course_id', flat=True)
+
+    timetable = Timetable()
+    for course_timetable in load_course_timetables(semester_id, course_ids).values():
+        timetable.add_sessions(course_timetable.sessions)
+
+    cache.set(key, timetable, TIMETABLE_TIMEOUT)
+    return timetable
+
+
+def sync_enrollment_timetable(student_id, semester_id, course_id, enrolled: bool):
+    """
+    Apply an enrollment change to the cached student timetable in place.
+    Nothing is cached yet means there is nothing to update; the next read rebuilds it.
+    """
+    key = _student_key(semester_id, student_id, timetable_version(semester_id))
+    timetable: Optional[Timetable] = cache.get(key)
+    if timetable is None:
+        return
+
+    if enrolled:
+        changed = timetable.add_course(load_course_timetables(semester_id, [course_id])[course_id])
+    else:
+        changed = timetable.remove_course(course_id)
+
+    if changed:
+        cache.set(key, timetable, TIMETABLE_TIMEOUT)
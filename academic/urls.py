@@ -1,7 +1,7 @@
 from django.urls import path, include
 from django.http import JsonResponse
 from rest_framework.routers import DefaultRouter
-from . import views
+from . import views, enrollment_views
 
 def placeholder_view(request):
     return JsonResponse({'message': 'Endpoint under development'}, status=501)
@@ -10,4 +10,6 @@ router = DefaultRouter()
 
 urlpatterns = [
     path('api/', include(router.urls)),
+    path('api/enrollments/bulk-import/', enrollment_views.bulk_import_enrollments,
+         name='bulk-import-enrollments'),
 ]
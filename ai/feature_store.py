@@ -0,0 +1,297 @@
+"""
+Student Feature Store
+Vectorized feature matrix for performance models, materialized to memory-mapped files
+"""
+
+import json
+import logging
+import os
+import shutil
+import threading
+import uuid
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from django.conf import settings
+from django.db.models import Avg, Count, Q, Sum
+from django.utils import timezone
+
+from students.models import Student
+from academic.models import Enrollment, Grade, Attendance
+
+logger = logging.getLogger(__name__)
+
+# Column order is the model input order; keep in sync with trained models
+FEATURE_COLUMNS = [
+    'current_gpa',
+    'current_semester',
+    'avg_grade',
+    'grade_std',
+    'grade_trend',
+    'avg_courses_per_semester',
+    'avg_credits_per_semester',
+    'attendance_rate',
+    'best_dept_performance',
+    'worst_dept_performance',
+]
+
+MIN_COMPLETED_COURSES = 3
+
+
+def build_feature_frame(students, grades, course_loads, attendance, departments) -> pd.DataFrame:
+    """
+    Assemble the feature matrix from grouped query rows.
+
+    students:     (student_id, gpa, current_semester)
+    grades:       (student_id, final_grade) of completed enrollments, most recent first
+    course_loads: (student_id, courses, semesters, credits)
+    attendance:   (student_id, total, present)
+    departments:  (student_id, department_id, avg_grade)
+    """
+    frame = pd.DataFrame(list(students), columns=['student_id', 'current_gpa', 'current_semester'])
+    frame = frame.set_index('student_id').astype(float)
+
+    grade_rows = pd.DataFrame(list(grades), columns=['student_id', 'grade'])
+    grade_rows['grade'] = grade_rows['grade'].astype(float)
+    grouped = grade_rows.groupby('student_id', sort=False)['grade']
+
+    # Least-squares slope of grade against its position, matching np.polyfit(x, grades, 1)
+    grade_rows['x'] = grouped.cumcount().astype(float)
+    grade_rows['xy'] = grade_rows['x'] * grade_rows['grade']
+    grade_rows['xx'] = grade_rows['x'] ** 2
+    sums = grade_rows.groupby('student_id', sort=False)[['x', 'grade', 'xy', 'xx']].mean()
+    variance = sums['xx'] - sums['x'] ** 2
+    trend = (sums['xy'] - sums['x'] * sums['grade']) / variance.where(variance > 0)
+
+    frame['completed_courses'] = grouped.size()
+    frame['avg_grade'] = grouped.mean()
+    frame['grade_std'] = grouped.std(ddof=0)
+    frame['grade_trend'] = trend.fillna(0.0)
+
+    loads = pd.DataFrame(list(course_loads), columns=['student_id', 'courses', 'semesters', 'credits'])
+    loads = loads.set_index('student_id').astype(float)
+    semesters = loads['semesters'].where(loads['semesters'] > 0)
+    frame['avg_courses_per_semester'] = (loads['courses'] / semesters).fillna(0.0)
+    frame['avg_credits_per_semester'] = (loads['credits'] / semesters).fillna(0.0)
+
+    records = pd.DataFrame(list(attendance), columns=['student_id', 'total', 'present'])
+    records = records.set_index('student_id').astype(float)
+    rate = records['present'] / records['total'].where(records['total'] > 0) * 100
+    frame['attendance_rate'] = rate.reindex(frame.index).fillna(100.0)
+
+    dept = pd.DataFrame(list(departments), columns=['student_id', 'department_id', 'avg_grade'])
+    dept['avg_grade'] = dept['avg_grade'].astype(float)
+    by_student = dept.groupby('student_id')['avg_grade']
+    frame['best_dept_performance'] = by_student.max()
+    frame['worst_dept_performance'] = by_student.min()
+
+    frame['completed_courses'] = frame['completed_courses'].fillna(0).astype(int)
+    frame[FEATURE_COLUMNS] = frame.reindex(columns=FEATURE_COLUMNS).fillna(0.0)
+    return frame[FEATURE_COLUMNS + ['completed_courses']]
+
+
+def compute_feature_frame(student_ids: Optional[Iterable] = None) -> pd.DataFrame:
+    """Feature matrix for all (or the given) students from five grouped queries"""
+    students = Student.objects.all()
+    enrollments = Enrollment.objects.all()
+    attendance = Attendance.objects.all()
+    if student_ids is not None:
+        student_ids = list(student_ids)
+        students = students.filter(pk__in=student_ids)
+        enrollments = enrollments.filter(student_id__in=student_ids)
+        attendance = attendance.filter(enrollment__student_id__in=student_ids)
+
+    completed = enrollments.filter(status='COMPLETED', final_grade__isnull=False)
+
+    return build_feature_frame(
+        students.values_list('pk', 'cumulative_gpa', 'current_semester'),
+        completed.order_by('student_id', '-enrollment_date').values_list('student_id', 'final_grade'),
+        enrollments.order_by().values_list('student_id').annotate(
+            courses=Count('id'),
+            semesters=Count('semester', distinct=True),
+            credits=Sum('course__credit_hours')
+        ),
+        attendance.order_by().values_list('enrollment__student_id').annotate(
+            total=Count('id'),
+            present=Count('id', filter=Q(status='PRESENT'))
+        ),
+        completed.order_by().values_list('student_id', 'course__department_id').annotate(
+            avg=Avg('final_grade')
+        ),
+    )
+
+
+class FeatureStore:
+    """
+    Feature matrix materialized as a memory-mapped .npy file plus a student id index.
+    Each refresh writes both files into a new version directory and then swaps
+    meta.json to point at it, so readers always load a matching matrix and index.
+    """
+
+    FEATURES_FILE = 'features.npy'
+    IDS_FILE = 'student_ids.npy'
+    META_FILE = 'meta.json'
+    # Versions kept on disk; the previous one stays for readers that read the old meta
+    KEEP_VERSIONS = 2
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or getattr(
+            settings, 'AI_FEATURE_STORE_DIR',
+            os.path.join(settings.MEDIA_ROOT, 'ml', 'feature_store')
+        )
+        self._lock = threading.Lock()
+        self._loaded_at = None
+        self._matrix = None
+        self._index: Dict[str, int] = {}
+        self._completed = None
+
+    def _path(self, *names):
+        return os.path.join(self.directory, *names)
+
+    @property
+    def meta(self) -> Dict:
+        try:
+            with open(self._path(self.META_FILE)) as meta_file:
+                return json.load(meta_file)
+        except (OSError, ValueError):
+            return {}
+
+    @property
+    def exists(self):
+        return bool(self.meta)
+
+    def _write(self, frame: pd.DataFrame, refreshed_at):
+        os.makedirs(self.directory, exist_ok=True)
+        ids = np.array([str(pk) for pk in frame.index])
+        matrix = np.column_stack([
+            frame[FEATURE_COLUMNS].to_numpy(dtype=np.float64),
+            frame['completed_courses'].to_numpy(dtype=np.float64),
+        ]) if len(frame) else np.empty((0, len(FEATURE_COLUMNS) + 1))
+
+        version = f"v{refreshed_at:%Y%m%d%H%M%S}-{uuid.uuid4().hex[:8]}"
+        os.makedirs(self._path(version))
+        np.save(self._path(version, self.FEATURES_FILE), matrix)
+        np.save(self._path(version, self.IDS_FILE), ids)
+
+        tmp_path = self._path(f'{self.META_FILE}.{version}.tmp')
+        with open(tmp_path, 'w') as meta_file:
+            json.dump({
+                'version': version,
+                'columns': FEATURE_COLUMNS,
+                'rows': len(frame),
+                'refreshed_at': refreshed_at.isoformat(),
+            }, meta_file)
+        os.replace(tmp_path, self._path(self.META_FILE))
+        self._prune(version)
+
+    def _prune(self, current):
+        """Remove version directories older than the last KEEP_VERSIONS"""
+        versions = sorted(
+            name for name in os.listdir(self.directory)
+            if name.startswith('v') and os.path.isdir(self._path(name))
+        )
+        for name in versions[:-self.KEEP_VERSIONS]:
+            if name != current:
+                shutil.rmtree(self._path(name), ignore_errors=True)
+
+    def _load(self):
+        """Map the matrix into memory, reloading after another process refreshed it"""
+        version = self.meta.get('version')
+        if version is None:
+            return False
+        if version != self._loaded_at:
+            with self._lock:
+                if version != self._loaded_at:
+                    matrix = np.load(self._path(version, self.FEATURES_FILE), mmap_mode='r')
+                    ids = np.load(self._path(version, self.IDS_FILE))
+                    self._index = {pk: row for row, pk in enumerate(ids)}
+                    self._matrix = matrix
+                    self._loaded_at = version
+        return True
+
+    def frame(self) -> pd.DataFrame:
+        """The whole materialized matrix as a DataFrame indexed by student id"""
+        if not self._load():
+            return pd.DataFrame(columns=FEATURE_COLUMNS + ['completed_courses'])
+        ids = sorted(self._index, key=self._index.get)
+        frame = pd.DataFrame(np.asarray(self._matrix), index=ids,
+                             columns=FEATURE_COLUMNS + ['completed_courses'])
+        frame['completed_courses'] = frame['completed_courses'].astype(int)
+        return frame
+
+    def features_for(self, student_id) -> Optional[Dict[str, float]]:
+        """
+        Feature dict for one student, or None when there is too little history.
+        Students missing from the store are computed on the fly.
+        """
+        row = None
+        if self._load():
+            position = self._index.get(str(student_id))
+            if position is not None:
+                row = np.asarray(self._matrix[position])
+
+        if row is None:
+            frame = compute_feature_frame([student_id])
+            if frame.empty:
+                return None
+            row = frame.iloc[0].to_numpy(dtype=np.float64)
+
+        if row[-1] < MIN_COMPLETED_COURSES:
+            return None
+        return dict(zip(FEATURE_COLUMNS, row[:-1].tolist()))
+
+    def rebuild(self) -> int:
+        """Recompute the matrix for every student"""
+        started = timezone.now()
+        frame = compute_feature_frame()
+        self._write(frame, started)
+        logger.info(f"Feature store rebuilt with {len(frame)} students")
+        return len(frame)
+
+    def changed_students(self, since: datetime) -> set:
+        """Students with new grades, attendance or enrollments since the last refresh"""
+        changed = set(Grade.objects.filter(updated_at__gte=since).values_list(
+            'enrollment__student_id', flat=True))
+        changed |= set(Attendance.objects.filter(recorded_at__gte=since).values_list(
+            'enrollment__student_id', flat=True))
+        # New enrollments, and status or final grade changes on existing ones
+        changed |= set(Enrollment.objects.filter(updated_at__gte=since).values_list(
+            'student_id', flat=True))
+        return changed
+
+    def refresh(self) -> int:
+        """
+        Recompute only the students whose data changed since the last refresh.
+        Falls back to a full rebuild when nothing is materialized yet.
+        """
+        refreshed_at = self.meta.get('refreshed_at')
+        if refreshed_at is None:
+            return self.rebuild()
+
+        started = timezone.now()
+        changed = self.changed_students(datetime.fromisoformat(refreshed_at))
+        if not changed:
+            self._write(self.frame(), started)
+            return 0
+
+        updates = compute_feature_frame(changed)
+        updates.index = updates.index.map(str)
+        frame = self.frame()
+        frame = pd.concat([frame.drop(index=updates.index, errors='ignore'), updates])
+        self._write(frame, started)
+        logger.info(f"Feature store refreshed {len(updates)} of {len(frame)} students")
+        return len(updates)
+
+
+_store: Optional[FeatureStore] = None
+
+
+def get_feature_store() -> FeatureStore:
+    """Process-wide feature store"""
+    global _store
+    if _store is None:
+        _store = FeatureStore()
+    return _store
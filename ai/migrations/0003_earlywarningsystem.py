@@ -0,0 +1,103 @@
+# Generated by Django 4.2.16 on 2026-10-18 15:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("students", "0001_initial"),
+        ("ai", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EarlyWarningSystem",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "warning_type",
+                    models.CharField(
+                        choices=[
+                            ("DROPOUT_RISK", "Dropout Risk"),
+                            ("ACADEMIC", "Academic"),
+                            ("ATTENDANCE", "Attendance"),
+                            ("FINANCIAL", "Financial"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "severity_level",
+                    models.CharField(
+                        choices=[
+                            ("LOW", "Low"),
+                            ("MEDIUM", "Medium"),
+                            ("HIGH", "High"),
+                            ("CRITICAL", "Critical"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("title", models.CharField(max_length=200)),
+                ("description", models.TextField(blank=True)),
+                ("risk_score", models.DecimalField(decimal_places=2, max_digits=3)),
+                (
+                    "confidence_score",
+                    models.DecimalField(
+                        blank=True, decimal_places=2, max_digits=5, null=True
+                    ),
+                ),
+                ("risk_factors", models.JSONField(default=list)),
+                ("recommended_actions", models.JSONField(default=list)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("ACTIVE", "Active"),
+                            ("RESOLVED", "Resolved"),
+                            ("DISMISSED", "Dismissed"),
+                        ],
+                        default="ACTIVE",
+                        max_length=10,
+                    ),
+                ),
+                ("resolved_at", models.DateTimeField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "student",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="early_warnings",
+                        to="students.studentprofile",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "early_warnings",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["status", "severity_level"],
+                        name="early_warning_status_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="earlywarningsystem",
+            constraint=models.UniqueConstraint(
+                fields=("student", "warning_type"), name="unique_student_warning_type"
+            ),
+        ),
+    ]
@@ -8,12 +8,15 @@ import pandas as pd
 from sklearn.ensemble import RandomForestRegressor, RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler, LabelEncoder
-from sklearn.metrics import accuracy_score, mean_squared_error
-import joblib
+from sklearn.metrics import accuracy_score, mean_squared_error, r2_score
+import logging
 import warnings
+from decimal import Decimal
 warnings.filterwarnings('ignore')
 
-from django.db.models import Avg, Count, Sum, Q
+from django.core.cache import cache
+from django.db.models import Count, Sum, Q
+from django.utils import timezone
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
@@ -22,7 +25,15 @@ from rest_framework import status
 from students.models import Student, User
 from courses.models import Course
 from academic.models import Enrollment, Grade, Attendance, Semester
+from smart_ai.model_registry import get_model_registry
 from .models import PerformancePrediction, CourseRecommendation, StudyPattern
+from .feature_store import FEATURE_COLUMNS, get_feature_store
+from .recommendation_index import get_or_queue_recommendation_index
+
+logger = logging.getLogger(__name__)
+
+PERFORMANCE_MODEL_NAME = 'performance_predictor'
+PERFORMANCE_TRAINING_LOCK = 'ai:performance_model:training'
 
 
 @api_view(['POST'])
@@ -59,8 +70,13 @@ def predict_student_performance(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Load or train model
+        # Load the active model version (trained in the background on first use)
         model = get_or_train_performance_model()
+        if model is None:
+            return Response(
+                {'error': 'Prediction model is being trained - try again later'}, 
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
         
         # Make prediction
         features = np.array([list(student_data.values())]).reshape(1, -1)
@@ -104,6 +120,51 @@ def predict_student_performance(request):
         )
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def predict_cohort_performance(request):
+    """
+    Predict performance for a whole cohort (department, academic level and/or semester).
+    Runs in the background when run_async is set; otherwise returns the batch summary.
+    """
+    if not request.user.role in ['ADMIN', 'STAFF', 'TEACHER']:
+        return Response(
+            {'error': 'Permission denied'}, 
+            status=status.HTTP_403_FORBIDDEN
+        )
+    
+    from .batch_predictions import ModelNotReady, predict_cohort
+    
+    filters = {
+        'department_id': request.data.get('department_id'),
+        'academic_level': request.data.get('academic_level'),
+        'semester_id': request.data.get('semester_id'),
+    }
+    if not any(filters.values()):
+        return Response(
+            {'error': 'At least one of department_id, academic_level or semester_id is required'}, 
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    if str(request.data.get('run_async', '')).lower() in ('1', 'true', 'yes'):
+        from university_system.tasks import predict_cohort_task
+        task = predict_cohort_task.delay(**filters)
+        return Response({'task_id': task.id, 'status': 'queued'}, status=status.HTTP_202_ACCEPTED)
+    
+    try:
+        summary = predict_cohort(**filters)
+    except ModelNotReady as e:
+        get_or_train_performance_model()
+        return Response({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    except Exception as e:
+        return Response(
+            {'error': f'Cohort prediction failed: {str(e)}'}, 
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+    
+    return Response(summary, status=status.HTTP_200_OK)
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def recommend_courses(request):
@@ -119,32 +180,12 @@ def recommend_courses(request):
     try:
         student_id = request.data.get('student_id')
         if not student_id and request.user.is_student:
-            student_id = request.user.student_profile.id
+            student_id = request.user.student_profile.pk
         
-        student = Student.objects.get(id=student_id)
+        student = Student.objects.get(pk=student_id)
         current_semester = Semester.objects.filter(is_current=True).first()
         
-        # Get student's course history and performance
-        completed_enrollments = Enrollment.objects.filter(
-            student=student,
-            status='COMPLETED'
-        ).select_related('course')
-        
-        # Analyze performance patterns
-        performance_by_department = {}
-        for enrollment in completed_enrollments:
-            dept = enrollment.course.department.name
-            if dept not in performance_by_department:
-                performance_by_department[dept] = []
-            performance_by_department[dept].append(enrollment.final_grade or 0)
-        
-        # Calculate average performance per department
-        dept_averages = {
-            dept: np.mean(grades) 
-            for dept, grades in performance_by_department.items()
-        }
-        
-        # Get available courses
+        # Exclude courses already taken this semester
         enrolled_courses = Enrollment.objects.filter(
             student=student,
             semester=current_semester,
@@ -153,38 +194,28 @@ def recommend_courses(request):
         
         available_courses = Course.objects.filter(
             is_active=True,
-            semester_offered=student.current_semester
-        ).exclude(id__in=enrolled_courses)
-        
-        # Score courses based on multiple factors
-        course_recommendations = []
-        for course in available_courses:
-            score = calculate_course_score(student, course, dept_averages)
-            
-            if score > 0.5:  # Threshold for recommendation
-                course_recommendations.append({
-                    'course_id': course.id,
-                    'course_code': course.code,
-                    'course_name': course.name,
-                    'department': course.department.name,
-                    'credits': course.credits,
-                    'recommendation_score': round(score, 2),
-                    'predicted_performance': predict_course_performance(student, course),
-                    'reasons': get_recommendation_reasons(student, course, dept_averages)
-                })
+            academic_level=student.academic_level
+        ).exclude(id__in=enrolled_courses).select_related('department')
         
-        # Sort by recommendation score
-        course_recommendations.sort(key=lambda x: x['recommendation_score'], reverse=True)
+        # Score every candidate against the precomputed index
+        index = get_or_queue_recommendation_index()
+        if index is None:
+            return Response(
+                {'error': 'Course recommendations are being prepared - try again later'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        course_recommendations = index.recommend(student, available_courses)
         
-        # Save recommendations to database
-        for rec in course_recommendations[:10]:  # Top 10 recommendations
-            CourseRecommendation.objects.create(
+        # Save top 10 recommendations to database
+        CourseRecommendation.objects.bulk_create([
+            CourseRecommendation(
                 student=student,
-                course_id=rec['course_id'],
-                recommendation_score=rec['recommendation_score'],
-                predicted_grade=rec['predicted_performance'],
-                reasons=rec['reasons']
+                recommended_course_id=rec['course_id'],
+                recommendation_score=Decimal(f"{rec['recommendation_score']:.2f}"),
+                reasoning='; '.join(rec['reasons'])
             )
+            for rec in course_recommendations[:10]
+        ])
         
         return Response({
             'student_id': student.id,
@@ -221,9 +252,9 @@ def analyze_study_patterns(request):
     try:
         student_id = request.GET.get('student_id')
         if not student_id and request.user.is_student:
-            student_id = request.user.student_profile.id
+            student_id = request.user.student_profile.pk
         
-        student = Student.objects.get(id=student_id)
+        student = Student.objects.get(pk=student_id)
         
         # Analyze attendance patterns
         attendance_pattern = analyze_attendance_patterns(student)
@@ -270,99 +301,66 @@ def analyze_study_patterns(request):
 
 def collect_student_features(student):
     """
-    Collect relevant features for machine learning model
+    Collect relevant features for machine learning model (served from the feature store)
     """
-    features = {}
-    
-    # Basic student info
-    features['current_gpa'] = float(student.gpa)
-    features['current_semester'] = student.current_semester
-    
-    # Historical performance
-    completed_enrollments = Enrollment.objects.filter(
-        student=student,
-        status='COMPLETED',
-        final_grade__isnull=False
-    )
-    
-    if completed_enrollments.count() < 3:  # Need minimum data
-        return None
-    
-    grades = [e.final_grade for e in completed_enrollments]
-    features['avg_grade'] = np.mean(grades)
-    features['grade_std'] = np.std(grades)
-    features['grade_trend'] = calculate_grade_trend(grades)
-    
-    # Course load analysis
-    features['avg_courses_per_semester'] = calculate_avg_course_load(student)
-    features['avg_credits_per_semester'] = calculate_avg_credits(student)
-    
-    # Attendance patterns
-    attendance_rate = calculate_attendance_rate(student)
-    features['attendance_rate'] = attendance_rate
-    
-    # Department performance
-    dept_performance = calculate_department_performance(student)
-    features['best_dept_performance'] = max(dept_performance.values()) if dept_performance else 0
-    features['worst_dept_performance'] = min(dept_performance.values()) if dept_performance else 0
-    
-    return features
+    return get_feature_store().features_for(student.pk)
 
 
 def get_or_train_performance_model():
     """
-    Get existing model or train new one if needed
+    Get the active performance model from the registry.
+    When no version has been trained yet, queue background training and return None.
     """
-    try:
-        # Try to load existing model
-        model = joblib.load('/tmp/performance_model.pkl')
-        return model
-    except:
-        # Train new model
-        return train_performance_model()
+    model = get_model_registry().get_active(PERFORMANCE_MODEL_NAME)
+    if model is None:
+        from university_system.tasks import train_performance_model_task
+        if cache.add(PERFORMANCE_TRAINING_LOCK, True, 60 * 60):
+            train_performance_model_task.delay()
+    return model
 
 
 def train_performance_model():
     """
-    Train machine learning model for performance prediction
+    Train machine learning model for performance prediction and register it as a new version.
+    Returns None when there is not enough training data.
     """
-    # Collect training data from all students
-    students = Student.objects.filter(status='ACTIVE')
-    training_data = []
-    
-    for student in students:
-        features = collect_student_features(student)
-        if features:
-            # Add target variable (next semester GPA)
-            next_semester_gpa = get_next_semester_gpa(student)
-            if next_semester_gpa:
-                features['target_gpa'] = next_semester_gpa
-                training_data.append(features)
-    
-    if len(training_data) < 10:  # Need minimum samples
-        # Return simple model if insufficient data
-        model = RandomForestRegressor(n_estimators=10, random_state=42)
-        # Create dummy data for training
-        X = np.random.random((10, 8))
-        y = np.random.random(10) * 4  # GPA range 0-4
-        model.fit(X, y)
-        return model
-    
-    # Convert to DataFrame
-    df = pd.DataFrame(training_data)
-    
-    # Separate features and target
-    X = df.drop('target_gpa', axis=1)
-    y = df['target_gpa']
-    
-    # Train model
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    started = timezone.now()
+    
+    # Semester GPA labels joined with the materialized feature matrix
+    from .online_learning import holdout_mask, semester_targets, training_examples
+    X, y, student_keys = training_examples(semester_targets(Grade.objects.all()))
+    holdout = holdout_mask(student_keys)
+    
+    if (~holdout).sum() < 10:  # Need minimum samples
+        logger.warning(f"Not enough training data for the performance model ({(~holdout).sum()} samples)")
+        return None
     
+    # Train on everyone outside the holdout set shared with the online model
+    X_train, y_train = X[~holdout], y[~holdout]
     model = RandomForestRegressor(n_estimators=100, random_state=42)
     model.fit(X_train, y_train)
     
-    # Save model
-    joblib.dump(model, '/tmp/performance_model.pkl')
+    metrics = {}
+    if holdout.sum() >= 2:
+        predictions = model.predict(X[holdout])
+        mse = float(mean_squared_error(y[holdout], predictions))
+        metrics = {
+            'accuracy': round(max(0.0, r2_score(y[holdout], predictions)), 4),
+            'mse': mse,
+            'holdout_mse': mse,
+        }
+    
+    # Save as a new registry version and activate it
+    get_model_registry().register(
+        PERFORMANCE_MODEL_NAME,
+        model,
+        algorithm='RandomForestRegressor',
+        feature_columns=FEATURE_COLUMNS,
+        target_column='target_gpa',
+        metrics=metrics,
+        training_data_size=len(y_train),
+        training_started=started,
+    )
     
     return model
 
@@ -429,88 +427,6 @@ def generate_performance_recommendations(student, predicted_gpa):
     return recommendations
 
 
-def calculate_course_score(student, course, dept_averages):
-    """
-    Calculate recommendation score for a course
-    """
-    score = 0.5  # Base score
-    
-    # Department performance factor
-    dept_name = course.department.name
-    if dept_name in dept_averages:
-        dept_performance = dept_averages[dept_name] / 100.0  # Normalize to 0-1
-        score += dept_performance * 0.3
-    
-    # Course difficulty (based on average grades of all students)
-    avg_course_grade = Enrollment.objects.filter(
-        course=course,
-        status='COMPLETED',
-        final_grade__isnull=False
-    ).aggregate(avg=Avg('final_grade'))['avg']
-    
-    if avg_course_grade:
-        # Higher average grade = easier course = higher score
-        difficulty_factor = avg_course_grade / 100.0
-        score += difficulty_factor * 0.2
-    
-    # Prerequisites met factor
-    from academic.enrollment_views import check_prerequisites
-    prereq_met, _ = check_prerequisites(student, course)
-    if prereq_met:
-        score += 0.2
-    else:
-        score -= 0.3
-    
-    return max(0, min(1, score))
-
-
-def predict_course_performance(student, course):
-    """
-    Predict student's likely grade in a specific course
-    """
-    # Simple prediction based on department performance
-    student_enrollments = Enrollment.objects.filter(
-        student=student,
-        course__department=course.department,
-        status='COMPLETED',
-        final_grade__isnull=False
-    )
-    
-    if student_enrollments.exists():
-        avg_grade = student_enrollments.aggregate(avg=Avg('final_grade'))['avg']
-        # Add some variation based on course difficulty
-        course_difficulty = get_course_difficulty(course)
-        adjusted_grade = avg_grade * (1 - course_difficulty * 0.1)
-        return round(max(0, min(100, adjusted_grade)), 1)
-    else:
-        # Default prediction based on overall GPA
-        return round(float(student.gpa) * 25, 1)  # Convert 4.0 scale to 100 scale
-
-
-def get_recommendation_reasons(student, course, dept_averages):
-    """
-    Generate reasons for course recommendation
-    """
-    reasons = []
-    
-    dept_name = course.department.name
-    if dept_name in dept_averages and dept_averages[dept_name] > 80:
-        reasons.append(f"Strong performance in {dept_name} courses")
-    
-    # Check prerequisite completion
-    from academic.enrollment_views import check_prerequisites
-    prereq_met, _ = check_prerequisites(student, course)
-    if prereq_met:
-        reasons.append("All prerequisites completed")
-    
-    # Course popularity/success rate
-    success_rate = calculate_course_success_rate(course)
-    if success_rate > 85:
-        reasons.append(f"High success rate ({success_rate}%) among students")
-    
-    return reasons
-
-
 # Helper functions for analysis
 def calculate_grade_trend(grades):
     """Calculate if grades are improving, declining, or stable"""
@@ -534,15 +450,6 @@ def calculate_avg_course_load(student):
     return total_courses / semesters if semesters > 0 else 0
 
 
-def calculate_avg_credits(student):
-    """Calculate average credits per semester"""
-    enrollments = Enrollment.objects.filter(student=student)
-    semesters = enrollments.values('semester').distinct().count()
-    total_credits = sum([e.course.credits for e in enrollments])
-    
-    return total_credits / semesters if semesters > 0 else 0
-
-
 def calculate_attendance_rate(student):
     """Calculate overall attendance rate for student"""
     total_records = Attendance.objects.filter(
@@ -557,60 +464,6 @@ def calculate_attendance_rate(student):
     return (present_records / total_records * 100) if total_records > 0 else 100
 
 
-def calculate_department_performance(student):
-    """Calculate average performance per department"""
-    enrollments = Enrollment.objects.filter(
-        student=student,
-        status='COMPLETED',
-        final_grade__isnull=False
-    )
-    
-    dept_performance = {}
-    for enrollment in enrollments:
-        dept = enrollment.course.department.name
-        if dept not in dept_performance:
-            dept_performance[dept] = []
-        dept_performance[dept].append(enrollment.final_grade)
-    
-    return {dept: np.mean(grades) for dept, grades in dept_performance.items()}
-
-
-def get_next_semester_gpa(student):
-    """Get GPA from next semester for training data"""
-    # This would require historical data - simplified for now
-    return None
-
-
-def get_course_difficulty(course):
-    """Calculate course difficulty based on average grades"""
-    avg_grade = Enrollment.objects.filter(
-        course=course,
-        status='COMPLETED',
-        final_grade__isnull=False
-    ).aggregate(avg=Avg('final_grade'))['avg']
-    
-    if avg_grade:
-        # Lower average grade = higher difficulty
-        return (100 - avg_grade) / 100.0
-    return 0.5  # Default medium difficulty
-
-
-def calculate_course_success_rate(course):
-    """Calculate percentage of students who passed the course"""
-    total_students = Enrollment.objects.filter(
-        course=course,
-        status='COMPLETED'
-    ).count()
-    
-    passed_students = Enrollment.objects.filter(
-        course=course,
-        status='COMPLETED',
-        final_grade__gte=60  # Assuming 60 is passing grade
-    ).count()
-    
-    return (passed_students / total_students * 100) if total_students > 0 else 0
-
-
 def analyze_attendance_patterns(student):
     """Analyze student's attendance patterns"""
     # Simplified analysis
@@ -67,3 +67,54 @@ class StudyPattern(models.Model):
     
     def __str__(self):
         return f"{self.student.student_id} - {self.analysis_period_start} to {self.analysis_period_end}"
+
+
+class EarlyWarningSystem(models.Model):
+    """
+    Early warnings raised for at-risk students.
+    """
+    WARNING_TYPES = [
+        ('DROPOUT_RISK', 'Dropout Risk'),
+        ('ACADEMIC', 'Academic'),
+        ('ATTENDANCE', 'Attendance'),
+        ('FINANCIAL', 'Financial'),
+    ]
+    SEVERITY_LEVELS = [
+        ('LOW', 'Low'),
+        ('MEDIUM', 'Medium'),
+        ('HIGH', 'High'),
+        ('CRITICAL', 'Critical'),
+    ]
+    STATUS_CHOICES = [
+        ('ACTIVE', 'Active'),
+        ('RESOLVED', 'Resolved'),
+        ('DISMISSED', 'Dismissed'),
+    ]
+    
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='early_warnings')
+    warning_type = models.CharField(max_length=20, choices=WARNING_TYPES)
+    severity_level = models.CharField(max_length=10, choices=SEVERITY_LEVELS)
+    title = models.CharField(max_length=200)
+    description = models.TextField(blank=True)
+    risk_score = models.DecimalField(max_digits=3, decimal_places=2)
+    confidence_score = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    risk_factors = models.JSONField(default=list)
+    recommended_actions = models.JSONField(default=list)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='ACTIVE')
+    resolved_at = models.DateTimeField(null=True, blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'early_warnings'
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'warning_type'], name='unique_student_warning_type'),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'severity_level'], name='early_warning_status_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.student.student_id} - {self.warning_type} - {self.severity_level}"
@@ -0,0 +1,240 @@
+"""
+Online Performance Model
+Incremental partial_fit updates from new grades and enrollment changes, with
+holdout drift monitoring
+"""
+
+import logging
+import zlib
+from datetime import timedelta
+from typing import Dict, Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import SGDRegressor
+from sklearn.metrics import mean_squared_error, r2_score
+from sklearn.preprocessing import StandardScaler
+
+from django.core.cache import cache
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from academic.models import Enrollment, Grade
+from smart_ai.model_registry import get_model_registry
+from smart_ai.models import AIModel
+from .batch_predictions import cohort_features
+from .feature_store import FEATURE_COLUMNS, MIN_COMPLETED_COURSES
+from .ml_predictions import PERFORMANCE_MODEL_NAME, PERFORMANCE_TRAINING_LOCK
+
+logger = logging.getLogger(__name__)
+
+ONLINE_MODEL_NAME = 'performance_predictor_online'
+MINI_BATCH_SIZE = 256
+FEEDER_CHUNK_STUDENTS = 5000
+
+# One student in HOLDOUT_MODULUS is never trained on and serves as the holdout set
+HOLDOUT_MODULUS = 10
+HOLDOUT_WINDOW_DAYS = 365
+HOLDOUT_MAX_ROWS = 20000
+
+# Holdout error above baseline * DRIFT_TOLERANCE triggers a full retrain
+DRIFT_TOLERANCE = 1.25
+
+
+class OnlinePerformanceModel:
+    """
+    Standardized SGD regressor trained with partial_fit.
+    Keeps the grade and enrollment high-water mark it has consumed so far.
+    """
+
+    def __init__(self):
+        self.scaler = StandardScaler()
+        self.regressor = SGDRegressor(learning_rate='invscaling', eta0=0.01, random_state=42)
+        self.high_water_mark = None
+        self.samples_seen = 0
+
+    def partial_fit(self, X, y):
+        self.scaler.partial_fit(X)
+        self.regressor.partial_fit(self.scaler.transform(X), y)
+        self.samples_seen += len(y)
+        return self
+
+    def predict(self, X):
+        return np.clip(self.regressor.predict(self.scaler.transform(X)), 0, 4)
+
+
+def semester_targets(grades) -> pd.DataFrame:
+    """Weighted grade percentage per (student, semester) on the 4.0 GPA scale"""
+    rows = grades.order_by().values_list(
+        'enrollment__student_id', 'enrollment__semester_id'
+    ).annotate(
+        earned=Sum(F('points_earned') * F('weight')),
+        possible=Sum(F('points_possible') * F('weight'))
+    )
+    frame = pd.DataFrame(list(rows), columns=['student_id', 'semester_id', 'earned', 'possible'])
+    frame[['earned', 'possible']] = frame[['earned', 'possible']].astype(float)
+    frame = frame[frame['possible'] > 0]
+    frame['target_gpa'] = (frame['earned'] / frame['possible'] * 4).clip(0, 4)
+    return frame[['student_id', 'semester_id', 'target_gpa']]
+
+
+def training_examples(targets: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Feature matrix, targets and student keys for students with enough history"""
+    if targets.empty:
+        return np.empty((0, len(FEATURE_COLUMNS))), np.empty(0), np.empty(0, dtype=object)
+
+    keys = targets['student_id'].map(str)
+    features = cohort_features(keys.unique())
+    features = features[features['completed_courses'] >= MIN_COMPLETED_COURSES]
+    rows = keys.isin(features.index).to_numpy()
+
+    keys = keys[rows].to_numpy()
+    X = features.loc[keys, FEATURE_COLUMNS].to_numpy(dtype=np.float64)
+    y = targets['target_gpa'].to_numpy(dtype=np.float64)[rows]
+    return X, y, keys
+
+
+def holdout_mask(student_keys) -> np.ndarray:
+    """Stable assignment of students to the holdout set"""
+    return np.array(
+        [zlib.crc32(str(key).encode()) % HOLDOUT_MODULUS == 0 for key in student_keys],
+        dtype=bool
+    )
+
+
+def holdout_set() -> Tuple[np.ndarray, np.ndarray]:
+    """Recent holdout examples for evaluating the online and active models"""
+    since = timezone.now() - timedelta(days=HOLDOUT_WINDOW_DAYS)
+    targets = semester_targets(Grade.objects.filter(updated_at__gte=since))
+    targets = targets[holdout_mask(targets['student_id'])].head(HOLDOUT_MAX_ROWS)
+    X, y, _ = training_examples(targets)
+    return X, y
+
+
+def changed_pairs(since=None) -> pd.DataFrame:
+    """
+    (student, semester) pairs with grades or enrollments changed after the
+    high-water mark, from one UNION query. Without a mark every graded pair
+    is returned; pairs without grades have no target to learn from.
+    """
+    changed = Grade.objects.order_by().values_list('enrollment__student_id', 'enrollment__semester_id')
+    if since is None:
+        changed = changed.distinct()
+    else:
+        # Status and final grade changes alter the features of the pair
+        changed = changed.filter(updated_at__gt=since).union(
+            Enrollment.objects.filter(updated_at__gt=since).order_by().values_list('student_id', 'semester_id')
+        )
+    return pd.DataFrame(list(changed), columns=['student_id', 'semester_id'])
+
+
+def iter_new_examples(since=None) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Stream training examples for (student, semester) pairs with grades or
+    enrollments changed after the high-water mark, a chunk of students at
+    a time. Holdout students are left out.
+    """
+    pairs = changed_pairs(since)
+    pairs = pairs[~holdout_mask(pairs['student_id'])]
+
+    student_ids = pairs['student_id'].unique()
+    for start in range(0, len(student_ids), FEEDER_CHUNK_STUDENTS):
+        chunk = pairs[pairs['student_id'].isin(student_ids[start:start + FEEDER_CHUNK_STUDENTS])]
+        targets = semester_targets(Grade.objects.filter(
+            enrollment__student_id__in=chunk['student_id'].unique().tolist(),
+            enrollment__semester_id__in=chunk['semester_id'].unique().tolist()
+        )).merge(chunk, on=['student_id', 'semester_id'])
+        X, y, _ = training_examples(targets)
+        if len(y):
+            yield X, y
+
+
+def _holdout_metrics(model, X, y) -> Optional[Dict]:
+    if model is None or len(y) < 2:
+        return None
+    predictions = model.predict(X)
+    return {
+        'holdout_mse': float(mean_squared_error(y, predictions)),
+        'accuracy': round(max(0.0, r2_score(y, predictions)), 4),
+    }
+
+
+def _queue_full_retrain():
+    from university_system.tasks import train_performance_model_task
+    if cache.add(PERFORMANCE_TRAINING_LOCK, True, 60 * 60):
+        train_performance_model_task.delay()
+
+
+def update_online_model(batch_size: int = MINI_BATCH_SIZE) -> Dict:
+    """
+    Fold grades and enrollments changed since the last run into the online
+    model with partial_fit mini-batches, then compare it with the active
+    performance model on the holdout set. The online model is promoted
+    when it is at least as accurate; drift of the active model queues a
+    full retrain.
+    """
+    started = timezone.now()
+    registry = get_model_registry()
+    model = registry.load_for_update(ONLINE_MODEL_NAME) or OnlinePerformanceModel()
+
+    rng = np.random.default_rng(42)
+    trained_rows = 0
+    for X, y in iter_new_examples(model.high_water_mark):
+        order = rng.permutation(len(y))
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            model.partial_fit(X[batch], y[batch])
+        trained_rows += len(y)
+    model.high_water_mark = started
+
+    holdout_X, holdout_y = holdout_set()
+    candidate = _holdout_metrics(model, holdout_X, holdout_y) if model.samples_seen else None
+    summary = {
+        'trained_rows': trained_rows,
+        'samples_seen': model.samples_seen,
+        'holdout_rows': int(len(holdout_y)),
+        'online': candidate,
+        'promoted': False,
+        'drift': False,
+    }
+
+    # A new online version (with its high-water mark) only when it learned something
+    if trained_rows:
+        registry.register(
+            ONLINE_MODEL_NAME, model,
+            algorithm='SGDRegressor',
+            feature_columns=FEATURE_COLUMNS,
+            target_column='target_gpa',
+            metrics={**(candidate or {}), 'trained_rows': trained_rows},
+            training_data_size=model.samples_seen,
+            training_started=started,
+        )
+
+    active = registry.get_active(PERFORMANCE_MODEL_NAME)
+    current = _holdout_metrics(active, holdout_X, holdout_y)
+    summary['active'] = current
+
+    if active is not None and current is not None:
+        baseline = (AIModel.objects.get(pk=active.record_id).parameters or {}).get(
+            'metrics', {}).get('holdout_mse')
+        if baseline and current['holdout_mse'] > baseline * DRIFT_TOLERANCE:
+            summary['drift'] = True
+            logger.warning(f"Performance model drift: holdout MSE {current['holdout_mse']:.4f} "
+                           f"vs baseline {baseline:.4f} - queueing full retrain")
+            _queue_full_retrain()
+
+    if trained_rows and candidate is not None and (
+            current is None or candidate['holdout_mse'] <= current['holdout_mse']):
+        registry.register(
+            PERFORMANCE_MODEL_NAME, model,
+            algorithm='SGDRegressor',
+            feature_columns=FEATURE_COLUMNS,
+            target_column='target_gpa',
+            metrics=candidate,
+            training_data_size=model.samples_seen,
+            training_started=started,
+        )
+        summary['promoted'] = True
+
+    logger.info(f"Online performance model update: {summary}")
+    return summary
@@ -0,0 +1,336 @@
+"""
+Course Recommendation Index
+Precomputed course statistics and item-item similarity for course recommendations
+"""
+
+import logging
+import os
+import threading
+from typing import Dict, Iterable, List, Optional
+
+import joblib
+import numpy as np
+from scipy import sparse
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Avg, Count, Max, Q
+from django.utils import timezone
+
+from academic.models import Enrollment
+from academic.prerequisites import completed_course_grades, get_prerequisite_graph
+from courses.models import Course
+
+logger = logging.getLogger(__name__)
+
+PASSING_GRADE = 60
+DEFAULT_TOP_K = 20
+INDEX_BUILD_LOCK = 'ai:recommendation_index:building'
+
+# Score weights (base score and factors match the former per-course calculation)
+BASE_SCORE = 0.5
+DEPARTMENT_WEIGHT = 0.3
+EASE_WEIGHT = 0.2
+SIMILARITY_WEIGHT = 0.2
+PREREQUISITES_MET_BONUS = 0.2
+PREREQUISITES_MISSING_PENALTY = 0.3
+RECOMMENDATION_THRESHOLD = 0.5
+
+
+def item_similarity(matrix: sparse.csr_matrix, top_k: int = DEFAULT_TOP_K) -> sparse.csr_matrix:
+    """
+    Cosine similarity between the columns (courses) of a student x course
+    matrix, keeping only the top_k neighbors of each course.
+    """
+    matrix = sparse.csr_matrix(matrix, dtype=np.float64)
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=0))).ravel()
+    inverse = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+    normalized = matrix @ sparse.diags(inverse)
+
+    similarity = (normalized.T @ normalized).tocsr()
+    similarity.setdiag(0)
+    similarity.eliminate_zeros()
+
+    rows, cols, values = [], [], []
+    for course in range(similarity.shape[0]):
+        start, end = similarity.indptr[course], similarity.indptr[course + 1]
+        neighbors, weights = similarity.indices[start:end], similarity.data[start:end]
+        if len(weights) > top_k:
+            keep = np.argpartition(weights, -top_k)[-top_k:]
+            neighbors, weights = neighbors[keep], weights[keep]
+        rows.extend([course] * len(neighbors))
+        cols.extend(neighbors)
+        values.extend(weights)
+
+    return sparse.csr_matrix((values, (rows, cols)), shape=similarity.shape)
+
+
+class RecommendationIndex:
+    """
+    Per-course statistics and the course neighbor matrix, aligned on one
+    course axis. Scoring a student needs only their completed grades.
+    """
+
+    def __init__(self, course_ids, department_ids, avg_grade, completed, passed,
+                 similarity: sparse.csr_matrix, built_at=None):
+        self.course_ids = np.asarray(course_ids, dtype=object)
+        self.department_ids = np.asarray(department_ids, dtype=object)
+        self.avg_grade = np.asarray(avg_grade, dtype=np.float64)
+        self.completed = np.asarray(completed, dtype=np.int64)
+        self.passed = np.asarray(passed, dtype=np.int64)
+        self.similarity = similarity.tocsr()
+        self.built_at = built_at
+        self.position = {course_id: column for column, course_id in enumerate(self.course_ids)}
+
+    @property
+    def success_rate(self) -> np.ndarray:
+        """Percentage of completed enrollments that passed, per course"""
+        return np.divide(self.passed * 100.0, self.completed,
+                         out=np.zeros(len(self.completed)), where=self.completed > 0)
+
+    @classmethod
+    def from_rows(cls, courses, stats, grades, top_k: int = DEFAULT_TOP_K, built_at=None):
+        """
+        Build the index from query rows.
+
+        courses: (course_id, department_id)
+        stats:   (course_id, avg_final_grade, completed, passed)
+        grades:  (student_id, course_id, best_final_grade) of completed enrollments
+        """
+        courses = list(courses)
+        course_ids = [course_id for course_id, _ in courses]
+        position = {course_id: column for column, course_id in enumerate(course_ids)}
+
+        avg_grade = np.full(len(courses), np.nan)
+        completed = np.zeros(len(courses), dtype=np.int64)
+        passed = np.zeros(len(courses), dtype=np.int64)
+        for course_id, avg, total, passes in stats:
+            column = position.get(course_id)
+            if column is not None:
+                avg_grade[column] = np.nan if avg is None else float(avg)
+                completed[column] = total
+                passed[column] = passes
+
+        students, rows, cols, values = {}, [], [], []
+        for student_id, course_id, grade in grades:
+            column = position.get(course_id)
+            if column is None or grade is None:
+                continue
+            rows.append(students.setdefault(student_id, len(students)))
+            cols.append(column)
+            values.append(float(grade) / 100.0)
+        matrix = sparse.csr_matrix((values, (rows, cols)), shape=(len(students), len(courses)))
+
+        return cls(
+            course_ids=course_ids,
+            department_ids=[department_id for _, department_id in courses],
+            avg_grade=avg_grade,
+            completed=completed,
+            passed=passed,
+            similarity=item_similarity(matrix, top_k),
+            built_at=built_at,
+        )
+
+    def score(self, grades: Dict, candidate_ids: Iterable, prerequisites_met: Dict) -> Dict[object, Dict]:
+        """
+        Score candidate courses for a student from their best completed grades.
+
+        The neighbor-weighted grade of every candidate comes from one sparse
+        multiply of the similarity matrix with the student's grade and
+        completion vectors.
+        """
+        candidates = [course_id for course_id in candidate_ids if course_id in self.position]
+        if not candidates:
+            return {}
+        columns = np.array([self.position[course_id] for course_id in candidates])
+
+        vectors = np.zeros((len(self.course_ids), 2))
+        for course_id, grade in grades.items():
+            column = self.position.get(course_id)
+            if column is not None and grade is not None:
+                vectors[column] = (float(grade), 1.0)
+
+        weighted = self.similarity[columns] @ vectors
+        neighbor_grade = np.divide(weighted[:, 0], weighted[:, 1],
+                                   out=np.full(len(columns), np.nan), where=weighted[:, 1] > 0)
+
+        # Student average per department of the completed courses
+        graded = vectors[:, 1] > 0
+        department_averages = {}
+        for department_id in set(self.department_ids[graded]):
+            in_department = graded & (self.department_ids == department_id)
+            department_averages[department_id] = float(vectors[in_department, 0].mean())
+
+        department_avg = np.array([
+            department_averages.get(department_id, np.nan)
+            for department_id in self.department_ids[columns]
+        ])
+        course_avg = self.avg_grade[columns]
+        met = np.array([prerequisites_met.get(course_id, True) for course_id in candidates])
+
+        scores = (
+            BASE_SCORE
+            + np.nan_to_num(department_avg / 100.0) * DEPARTMENT_WEIGHT
+            + np.nan_to_num(course_avg / 100.0) * EASE_WEIGHT
+            + np.nan_to_num(neighbor_grade / 100.0) * SIMILARITY_WEIGHT
+            + np.where(met, PREREQUISITES_MET_BONUS, -PREREQUISITES_MISSING_PENALTY)
+        )
+        scores = np.clip(scores, 0, 1)
+
+        difficulty = np.where(np.isnan(course_avg), 0.5, (100 - course_avg) / 100.0)
+        predicted = np.clip(department_avg * (1 - difficulty * 0.1), 0, 100)
+        success_rate = self.success_rate[columns]
+
+        return {
+            course_id: {
+                'score': float(scores[i]),
+                'predicted_grade': None if np.isnan(predicted[i]) else round(float(predicted[i]), 1),
+                'department_average': None if np.isnan(department_avg[i]) else float(department_avg[i]),
+                'neighbor_grade': None if np.isnan(neighbor_grade[i]) else float(neighbor_grade[i]),
+                'prerequisites_met': bool(met[i]),
+                'success_rate': round(float(success_rate[i]), 1),
+            }
+            for i, course_id in enumerate(candidates)
+        }
+
+    def recommend(self, student, courses, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Ranked recommendations for a student among candidate courses
+        (loaded with their department). Uses one query for the student's grades.
+        """
+        courses = list(courses)
+        grades = completed_course_grades(student)
+        eligibility = get_prerequisite_graph().evaluate([course.pk for course in courses], grades)
+        scored = self.score(
+            grades,
+            [course.pk for course in courses],
+            {course_id: result.prerequisites_met for course_id, result in eligibility.items()}
+        )
+
+        recommendations = []
+        for course in courses:
+            result = scored.get(course.pk)
+            if result is None or result['score'] <= RECOMMENDATION_THRESHOLD:
+                continue
+
+            department = course.department.name_ar
+            reasons = []
+            if result['department_average'] is not None and result['department_average'] > 80:
+                reasons.append(f"Strong performance in {department} courses")
+            if result['prerequisites_met']:
+                reasons.append("All prerequisites completed")
+            if result['success_rate'] > 85:
+                reasons.append(f"High success rate ({result['success_rate']}%) among students")
+            if result['neighbor_grade'] is not None and result['neighbor_grade'] > 80:
+                reasons.append("Similar to courses you did well in")
+
+            predicted = result['predicted_grade']
+            if predicted is None:
+                # No history in the department: fall back to the overall GPA
+                predicted = round(float(student.cumulative_gpa or 0) * 25, 1)
+
+            recommendations.append({
+                'course_id': course.id,
+                'course_code': course.code,
+                'course_name': course.name_ar,
+                'course_name_en': course.name_en,
+                'department': department,
+                'credits': course.credit_hours,
+                'recommendation_score': round(result['score'], 2),
+                'predicted_performance': predicted,
+                'reasons': reasons,
+            })
+
+        recommendations.sort(key=lambda rec: rec['recommendation_score'], reverse=True)
+        return recommendations if limit is None else recommendations[:limit]
+
+
+def compute_recommendation_index(top_k: int = DEFAULT_TOP_K) -> RecommendationIndex:
+    """Build the index from three grouped queries"""
+    started = timezone.now()
+    completed = Enrollment.objects.filter(status='COMPLETED').order_by()
+
+    return RecommendationIndex.from_rows(
+        Course.objects.order_by('pk').values_list('pk', 'department_id'),
+        completed.values_list('course_id').annotate(
+            avg=Avg('final_grade'),
+            total=Count('id'),
+            passed=Count('id', filter=Q(final_grade__gte=PASSING_GRADE))
+        ),
+        completed.filter(final_grade__isnull=False).values_list(
+            'student_id', 'course_id'
+        ).annotate(best=Max('final_grade')),
+        top_k=top_k,
+        built_at=started,
+    )
+
+
+class RecommendationIndexStore:
+    """
+    The index materialized as one joblib file, replaced atomically on rebuild.
+    Each process reloads it when the file changes.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or getattr(
+            settings, 'AI_RECOMMENDATION_INDEX_PATH',
+            os.path.join(settings.MEDIA_ROOT, 'ml', 'recommendation_index.joblib')
+        )
+        self._lock = threading.Lock()
+        self._loaded_mtime = None
+        self._index: Optional[RecommendationIndex] = None
+
+    @property
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def rebuild(self, top_k: int = DEFAULT_TOP_K) -> RecommendationIndex:
+        index = compute_recommendation_index(top_k)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        joblib.dump(index, tmp_path, compress=0)
+        os.replace(tmp_path, self.path)
+        logger.info(f"Recommendation index rebuilt: {len(index.course_ids)} courses, "
+                    f"{index.similarity.nnz} neighbor links")
+        return index
+
+    def get(self) -> Optional[RecommendationIndex]:
+        """
+        The current index, or None when nothing is materialized yet.
+        Building is left to the rebuild_recommendation_index task.
+        """
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return None
+
+        if mtime != self._loaded_mtime:
+            with self._lock:
+                if mtime != self._loaded_mtime:
+                    self._index = joblib.load(self.path)
+                    self._loaded_mtime = mtime
+        return self._index
+
+
+_store: Optional[RecommendationIndexStore] = None
+
+
+def get_recommendation_index_store() -> RecommendationIndexStore:
+    """Process-wide recommendation index store"""
+    global _store
+    if _store is None:
+        _store = RecommendationIndexStore()
+    return _store
+
+
+def get_or_queue_recommendation_index() -> Optional[RecommendationIndex]:
+    """
+    The materialized index. When none exists yet, queue a background
+    rebuild and return None instead of building inside the request.
+    """
+    index = get_recommendation_index_store().get()
+    if index is None:
+        from university_system.tasks import rebuild_recommendation_index
+        if cache.add(INDEX_BUILD_LOCK, True, 60 * 60):
+            rebuild_recommendation_index.delay()
+    return index
@@ -67,6 +67,10 @@ def pre_fork(server, worker):
 
 def post_fork(server, worker):
     server.log.info("Worker spawned (pid: %s)", worker.pid)
+    # Load the shared AI models once per worker instead of on the first request
+    if os.environ.get("AI_ENGINE_WARMUP", "1") == "1":
+        from smart_ai.ai_engine import warm_up
+        warm_up()
 
 def post_worker_init(worker):
     worker.log.info("Worker initialized (pid: %s)", worker.pid)
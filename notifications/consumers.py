@@ -3,12 +3,14 @@ WebSocket Consumers for Real-time Features
 المستهلكون WebSocket للميزات الفورية
 """
 
+import asyncio
 import json
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.contrib.auth.models import User
 from django.core.serializers.json import DjangoJSONEncoder
 from .models import Notification
+from .realtime import COALESCE_WINDOW, socket_groups, user_group
 import logging
 
 logger = logging.getLogger(__name__)
@@ -25,13 +27,15 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             return
         
         # Create user-specific group
-        self.group_name = f"notifications_{self.user.id}"
+        self.group_name = user_group(self.user.id)
+        self.pending = []
+        self.flush_task = None
         
-        # Join notification group
-        await self.channel_layer.group_add(
-            self.group_name,
-            self.channel_name
-        )
+        # Join notification group, plus the role, department and global
+        # groups used to broadcast identical notifications
+        self.groups_joined = [self.group_name] + await self.get_broadcast_groups()
+        for group in self.groups_joined:
+            await self.channel_layer.group_add(group, self.channel_name)
         
         await self.accept()
         logger.info(f"User {self.user.username} connected to notifications")
@@ -41,11 +45,10 @@ class NotificationConsumer(AsyncWebsocketConsumer):
     
     async def disconnect(self, close_code):
         """Handle WebSocket disconnection"""
-        if hasattr(self, 'group_name'):
-            await self.channel_layer.group_discard(
-                self.group_name,
-                self.channel_name
-            )
+        if getattr(self, 'flush_task', None):
+            self.flush_task.cancel()
+        for group in getattr(self, 'groups_joined', []):
+            await self.channel_layer.group_discard(group, self.channel_name)
         logger.info(f"User disconnected from notifications: {close_code}")
     
     async def receive(self, text_data):
@@ -56,7 +59,10 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             
             if message_type == 'mark_as_read':
                 notification_id = text_data_json.get('notification_id')
-                await self.mark_notification_read(notification_id)
+                if notification_id:
+                    await self.mark_notification_read(notification_id)
+                elif text_data_json.get('broadcast_id'):
+                    await self.mark_broadcast_read(text_data_json['broadcast_id'])
             elif message_type == 'get_notifications':
                 await self.send_pending_notifications()
             
@@ -66,11 +72,38 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             logger.error(f"Error in notification consumer: {str(e)}")
     
     async def notification_message(self, event):
-        """Send notification to WebSocket"""
-        await self.send(text_data=json.dumps({
-            'type': 'notification',
-            'notification': event['notification']
-        }, cls=DjangoJSONEncoder))
+        """Queue a notification for the WebSocket"""
+        self.queue_notifications([event['notification']])
+    
+    async def notification_batch(self, event):
+        """Several notifications coalesced for this user by the sender"""
+        self.queue_notifications(event['notifications'])
+    
+    async def notification_broadcast(self, event):
+        """Notification sent once to a role, department or global group"""
+        self.queue_notifications([event['notification']])
+    
+    def queue_notifications(self, notifications):
+        """Buffer notifications so a burst reaches the client as one frame"""
+        self.pending.extend(notifications)
+        if self.flush_task is None:
+            self.flush_task = asyncio.ensure_future(self.flush_notifications())
+    
+    async def flush_notifications(self):
+        """Write buffered notifications after COALESCE_WINDOW"""
+        await asyncio.sleep(COALESCE_WINDOW)
+        notifications, self.pending, self.flush_task = self.pending, [], None
+        
+        if len(notifications) == 1:
+            frame = {'type': 'notification', 'notification': notifications[0]}
+        else:
+            frame = {'type': 'notifications_batch', 'notifications': notifications, 'count': len(notifications)}
+        await self.send(text_data=json.dumps(frame, cls=DjangoJSONEncoder))
+    
+    @database_sync_to_async
+    def get_broadcast_groups(self):
+        """Role, department and global groups for this user"""
+        return socket_groups(self.user)
     
     @database_sync_to_async
     def get_pending_notifications(self):
@@ -98,6 +131,17 @@ class NotificationConsumer(AsyncWebsocketConsumer):
         except Notification.DoesNotExist:
             return False
     
+    @database_sync_to_async
+    def mark_broadcast_read(self, broadcast_id):
+        """Mark this user's copy of a broadcast notification as read"""
+        notification = Notification.objects.filter(
+            user=self.user,
+            metadata__broadcast_id=broadcast_id
+        ).first()
+        if notification:
+            notification.mark_as_read()
+        return notification is not None
+    
     async def send_pending_notifications(self):
         """Send all pending notifications to client"""
         notifications = await self.get_pending_notifications()
@@ -341,7 +385,7 @@ async def send_notification_to_user(user_id, notification_data):
     from channels.layers import get_channel_layer
     
     channel_layer = get_channel_layer()
-    group_name = f"notifications_{user_id}"
+    group_name = user_group(user_id)
     
     await channel_layer.group_send(
         group_name,
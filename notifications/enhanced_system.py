@@ -2,9 +2,12 @@
 # Advanced Intelligent Notification System with Multi-Channel Support
 
 import json
+import time
 import smtplib
 import datetime
-from typing import Dict, List, Optional, Any, Union
+from collections import defaultdict
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Any, Tuple, Union
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
@@ -20,7 +23,7 @@ import uuid
 from django.conf import settings
 from django.template.loader import render_to_string
 from django.utils import timezone
-from django.core.mail import send_mail, EmailMultiAlternatives
+from django.core.mail import send_mail, EmailMultiAlternatives, get_connection
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
 from django.db import models
@@ -76,6 +79,31 @@ class NotificationCategory(Enum):
     PERSONAL = "personal"
     EMERGENCY = "emergency"
 
+# حجم دفعة التوزيع: عدد المستلمين الذين يُقرؤون من المؤشر وتُنشأ إشعاراتهم معاً
+# وتُرسل إليهم مهمة واحدة لكل قناة
+FANOUT_CHUNK_SIZE = 1000
+
+# حقول المستخدم اللازمة لبناء المستلم دون تحميل النموذج كاملاً
+RECIPIENT_USER_FIELDS = ('id', 'email', 'phone_number', 'language_preference', 'first_name_ar',
+                         'last_name_ar', 'first_name_en', 'last_name_en', 'middle_name')
+
+# حقول التفعيل في تفضيلات المستخدم لكل قناة ولكل فئة
+CHANNEL_PREFERENCE_FIELDS = {
+    NotificationChannel.EMAIL: 'email_enabled',
+    NotificationChannel.SMS: 'sms_enabled',
+    NotificationChannel.PUSH: 'push_enabled',
+    NotificationChannel.IN_APP: 'in_app_enabled',
+    NotificationChannel.TELEGRAM: 'telegram_enabled',
+}
+CATEGORY_PREFERENCE_FIELDS = {
+    NotificationCategory.ACADEMIC: 'academic_notifications',
+    NotificationCategory.FINANCIAL: 'financial_notifications',
+    NotificationCategory.ADMINISTRATIVE: 'administrative_notifications',
+    NotificationCategory.SECURITY: 'security_notifications',
+    NotificationCategory.SYSTEM: 'system_notifications',
+}
+PREFERENCE_FIELDS = ('id', 'urgent_only', *CHANNEL_PREFERENCE_FIELDS.values(), *CATEGORY_PREFERENCE_FIELDS.values())
+
 @dataclass
 class NotificationRecipient:
     """متلقي الإشعار"""
@@ -249,6 +277,22 @@ class NotificationEngine:
                                    content: NotificationContent, channels: List[NotificationChannel],
                                    priority: NotificationPriority) -> Dict:
         """إرسال إشعار فوري"""
+        if CELERY_AVAILABLE and priority != NotificationPriority.CRITICAL:
+            # إرسال غير متزامن للإشعارات غير الحرجة: مهمة واحدة لكل دفعة ولكل قناة
+            entries = [(recipient, self._determine_recipient_channels(recipient, channels))
+                       for recipient in recipients]
+            totals = self._dispatch_chunks(template, iter(entries), content, priority, FANOUT_CHUNK_SIZE)
+            
+            return {
+                'success': True,
+                'sent_count': 0,
+                'failed_count': 0,
+                'tasks_count': totals['tasks_count'],
+                'results': {recipient.user_id: {channel.value: "scheduled" for channel in recipient_channels}
+                            for recipient, recipient_channels in entries},
+                'timestamp': timezone.now().isoformat()
+            }
+        
         sent_count = 0
         failed_count = 0
         results = {}
@@ -259,22 +303,15 @@ class NotificationEngine:
             
             for channel in recipient_channels:
                 try:
-                    if CELERY_AVAILABLE and priority != NotificationPriority.CRITICAL:
-                        # إرسال غير متزامن للإشعارات غير الحرجة
-                        send_notification_async.delay(
-                            channel.value, recipient.__dict__, content.__dict__, template.category.value
-                        )
-                        recipient_results[channel.value] = "scheduled"
+                    # إرسال متزامن للإشعارات الحرجة
+                    result = self._send_via_channel(channel, recipient, content, template.category)
+                    recipient_results[channel.value] = result
+                    
+                    if result.get('success'):
+                        sent_count += 1
                     else:
-                        # إرسال متزامن للإشعارات الحرجة
-                        result = self._send_via_channel(channel, recipient, content, template.category)
-                        recipient_results[channel.value] = result
+                        failed_count += 1
                         
-                        if result.get('success'):
-                            sent_count += 1
-                        else:
-                            failed_count += 1
-                            
                 except Exception as e:
                     logger.error(f"خطأ في إرسال الإشعار للمستلم {recipient.user_id} عبر {channel.value}: {str(e)}")
                     recipient_results[channel.value] = {'success': False, 'error': str(e)}
@@ -293,6 +330,202 @@ class NotificationEngine:
             'timestamp': timezone.now().isoformat()
         }
     
+    def broadcast(self, template_id: str, users, variables: Dict[str, Any],
+                  priority: NotificationPriority = NotificationPriority.NORMAL,
+                  channels: List[NotificationChannel] = None, chunk_size: int = FANOUT_CHUNK_SIZE) -> Dict:
+        """
+        إرسال إشعار لكل مستخدمي استعلام (QuerySet) على دفعات
+        يُقرأ المستخدمون من المؤشر مع تفضيلاتهم في الاستعلام نفسه، وتُنشأ إشعارات
+        التطبيق وسجلات الإرسال لكل دفعة باستعلام واحد، وتُرسل مهمة واحدة لكل دفعة ولكل قناة
+        """
+        try:
+            if template_id not in self.templates:
+                raise ValueError(f"قالب الإشعار غير موجود: {template_id}")
+            
+            template = self.templates[template_id]
+            channels = channels or template.default_channels
+            content = self._prepare_notification_content(template, variables)
+            
+            started = time.perf_counter()
+            entries = (
+                (self._recipient_from_row(row), self._preferred_channels(row, channels, template.category, priority))
+                for row in self._stream_recipient_rows(users, chunk_size)
+            )
+            totals = self._dispatch_chunks(template, entries, content, priority, chunk_size)
+            
+            if not totals['recipients_count']:
+                return {'success': False, 'error': 'لا يوجد مستلمون صالحون'}
+            
+            logger.info(
+                f"تم توزيع الإشعار {template_id} على {totals['recipients_count']} مستلم "
+                f"في {totals['chunks_count']} دفعة و{totals['tasks_count']} مهمة"
+            )
+            return {
+                'success': True,
+                **totals,
+                'enqueue_seconds': round(time.perf_counter() - started, 3),
+                'timestamp': timezone.now().isoformat()
+            }
+            
+        except Exception as e:
+            logger.error(f"خطأ في توزيع الإشعار: {str(e)}")
+            return {'success': False, 'error': str(e)}
+    
+    def _stream_recipient_rows(self, users, chunk_size: int) -> Iterator[Dict]:
+        """صفوف المستلمين وتفضيلاتهم (ربط يساري) من المؤشر دون تحميل نماذج المستخدمين"""
+        fields = RECIPIENT_USER_FIELDS + tuple(f'notification_preference__{name}' for name in PREFERENCE_FIELDS)
+        return users.order_by().values(*fields).iterator(chunk_size=chunk_size)
+    
+    def _recipient_from_row(self, row: Dict) -> NotificationRecipient:
+        """بناء المستلم من صف القيم؛ الاسم كما في User.display_name"""
+        language = row['language_preference'] or 'ar'
+        suffix = 'ar' if language == 'ar' else 'en'
+        name = f"{row[f'first_name_{suffix}']} {row['middle_name']} {row[f'last_name_{suffix}']}".strip()
+        
+        return NotificationRecipient(
+            user_id=str(row['id']),
+            name=name,
+            email=row['email'] or '',
+            phone=row['phone_number'] or '',
+            language=language
+        )
+    
+    def _preferred_channels(self, row: Dict, channels: List[NotificationChannel],
+                            category: NotificationCategory, priority: NotificationPriority) -> List[NotificationChannel]:
+        """قنوات المستلم بعد تطبيق تفضيلاته؛ من لا تفضيلات له يتلقى قنوات القالب"""
+        if row['notification_preference__id'] is None or priority == NotificationPriority.CRITICAL:
+            return channels
+        
+        preference = lambda name: row[f'notification_preference__{name}']
+        
+        if category in CATEGORY_PREFERENCE_FIELDS and not preference(CATEGORY_PREFERENCE_FIELDS[category]):
+            return []
+        if preference('urgent_only') and priority != NotificationPriority.URGENT:
+            return []
+        
+        return [
+            channel for channel in channels
+            if channel not in CHANNEL_PREFERENCE_FIELDS or preference(CHANNEL_PREFERENCE_FIELDS[channel])
+        ]
+    
+    def _dispatch_chunks(self, template: NotificationTemplate,
+                         entries: Iterator[Tuple[NotificationRecipient, List[NotificationChannel]]],
+                         content: NotificationContent, priority: NotificationPriority, chunk_size: int) -> Dict:
+        """تقسيم المستلمين إلى دفعات وإرسال كل دفعة"""
+        totals = {'recipients_count': 0, 'chunks_count': 0, 'tasks_count': 0,
+                  'in_app_created': 0, 'sent_count': 0, 'failed_count': 0}
+        
+        while True:
+            chunk = list(islice(entries, chunk_size))
+            if not chunk:
+                return totals
+            
+            self._dispatch_chunk(template, chunk, content, priority, totals)
+            totals['recipients_count'] += len(chunk)
+            totals['chunks_count'] += 1
+    
+    def _dispatch_chunk(self, template: NotificationTemplate,
+                        chunk: List[Tuple[NotificationRecipient, List[NotificationChannel]]],
+                        content: NotificationContent, priority: NotificationPriority, totals: Dict):
+        """
+        إنشاء إشعارات التطبيق وسجلات الدفعة، ثم مهمة واحدة لكل قناة
+        الإشعارات الحرجة (أو عند غياب Celery) تُرسل فوراً في العملية نفسها
+        """
+        asynchronous = CELERY_AVAILABLE and priority != NotificationPriority.CRITICAL
+        by_channel = defaultdict(list)
+        for recipient, recipient_channels in chunk:
+            if not recipient_channels:
+                continue
+            # بيانات المستلم للمهمة تُبنى مرة واحدة وتُشارك بين قنواته
+            data = {**recipient.__dict__, 'preferred_channels': [c.value for c in recipient.preferred_channels]}
+            for channel in recipient_channels:
+                by_channel[channel].append((recipient, data))
+        
+        content_data = content.__dict__
+        for channel, entries in by_channel.items():
+            recipients_data = [data for _, data in entries]
+            notifications = None
+            if channel == NotificationChannel.IN_APP:
+                created = self._create_in_app_notifications(
+                    [recipient for recipient, _ in entries], content, template.category, priority
+                )
+                totals['in_app_created'] += len(created)
+                if not WEBSOCKET_AVAILABLE:
+                    # الصفوف هي التسليم؛ لا حاجة لمهمة إشعار فوري
+                    continue
+                # مهمة التطبيق تحتاج بيانات الإشعارات المنشأة فقط
+                recipients_data = []
+                notifications = [
+                    {'user_id': str(notification.user_id), 'notification': self._in_app_payload(notification)}
+                    for notification in created
+                ]
+            
+            args = (channel.value, recipients_data,
+                    content_data, template.category.value, notifications)
+            if asynchronous:
+                send_notification_chunk.delay(*args)
+                totals['tasks_count'] += 1
+            else:
+                result = send_notification_chunk(*args)
+                totals['sent_count'] += result.get('sent_count', 0)
+                totals['failed_count'] += result.get('failed_count', 0)
+        
+        self._save_chunk_records(template, chunk, content, priority, 'scheduled' if asynchronous else 'processed')
+    
+    def _create_in_app_notifications(self, recipients: List[NotificationRecipient], content: NotificationContent,
+                                     category: NotificationCategory, priority: NotificationPriority) -> List:
+        """إنشاء إشعارات التطبيق لدفعة مستلمين باستعلام واحد"""
+        from .models import InAppNotification
+        
+        return InAppNotification.objects.bulk_create([
+            InAppNotification(
+                user_id=recipient.user_id,
+                title=content.title,
+                message=content.message,
+                category=category.value,
+                priority=priority.value,
+                action_url=content.action_url,
+                action_text=content.action_text,
+                metadata=content.metadata
+            )
+            for recipient in recipients
+        ])
+    
+    def _save_chunk_records(self, template: NotificationTemplate,
+                            chunk: List[Tuple[NotificationRecipient, List[NotificationChannel]]],
+                            content: NotificationContent, priority: NotificationPriority, delivery: str):
+        """حفظ سجلات الإرسال لدفعة باستعلام واحد"""
+        try:
+            from .models import NotificationLog
+            
+            # تركيبات القنوات قليلة؛ تُرمَّز مرة واحدة لكل تركيبة
+            encoded = {}
+            for _, recipient_channels in chunk:
+                key = tuple(recipient_channels)
+                if key not in encoded:
+                    encoded[key] = (json.dumps([c.value for c in key]),
+                                    json.dumps({c.value: delivery for c in key}))
+            
+            NotificationLog.objects.bulk_create([
+                NotificationLog(
+                    template_id=template.template_id,
+                    recipient_user_id=recipient.user_id,
+                    recipient_email=recipient.email,
+                    recipient_phone=recipient.phone,
+                    title=content.title,
+                    message=content.message,
+                    channels_used=encoded[tuple(recipient_channels)][0],
+                    priority=priority.value,
+                    category=template.category.value,
+                    delivery_results=encoded[tuple(recipient_channels)][1],
+                    metadata=content.metadata
+                )
+                for recipient, recipient_channels in chunk
+            ])
+            
+        except Exception as e:
+            logger.error(f"خطأ في حفظ سجلات الدفعة: {str(e)}")
+    
     def _determine_recipient_channels(self, recipient: NotificationRecipient, 
                                     default_channels: List[NotificationChannel]) -> List[NotificationChannel]:
         """تحديد قنوات الإرسال للمستلم"""
@@ -366,6 +599,39 @@ class NotificationEngine:
             logger.error(f"فشل إرسال البريد الإلكتروني: {str(e)}")
             return {'success': False, 'error': str(e)}
     
+    def _send_email_chunk(self, recipients: List[NotificationRecipient], content: NotificationContent) -> List[Dict]:
+        """إرسال البريد لدفعة مستلمين عبر اتصال واحد بخادم البريد"""
+        results = []
+        messages = []
+        for recipient in recipients:
+            if not recipient.email:
+                results.append({'success': False, 'error': 'عنوان البريد غير متوفر'})
+                continue
+            
+            msg = EmailMultiAlternatives(
+                subject=content.title,
+                body=content.message,
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                to=[recipient.email]
+            )
+            if content.html_content:
+                msg.attach_alternative(content.html_content, "text/html")
+            messages.append(msg)
+        
+        if messages:
+            try:
+                with get_connection() as connection:
+                    sent = connection.send_messages(messages) or 0
+                error = 'لم يُرسل البريد'
+            except Exception as e:
+                logger.error(f"فشل إرسال دفعة البريد الإلكتروني: {str(e)}")
+                sent, error = 0, str(e)
+            
+            results.extend([{'success': True, 'channel': 'email'}] * sent)
+            results.extend([{'success': False, 'error': error}] * (len(messages) - sent))
+        
+        return results
+    
     def _send_sms(self, recipient: NotificationRecipient, content: NotificationContent) -> Dict:
         """إرسال رسالة نصية"""
         try:
@@ -474,23 +740,7 @@ class NotificationEngine:
             
             # إشعار الواجهة الأمامية عبر WebSocket إذا كان متوفراً
             if WEBSOCKET_AVAILABLE:
-                try:
-                    channel_layer = get_channel_layer()
-                    async_to_sync(channel_layer.group_send)(
-                        f"user_{recipient.user_id}",
-                        {
-                            'type': 'notification_message',
-                            'notification': {
-                                'id': str(notification.id),
-                                'title': content.title,
-                                'message': content.message,
-                                'category': category.value,
-                                'timestamp': notification.created_at.isoformat()
-                            }
-                        }
-                    )
-                except Exception as e:
-                    logger.warning(f"فشل إرسال WebSocket: {str(e)}")
+                self._push_in_app_notification(recipient.user_id, self._in_app_payload(notification))
             
             logger.info(f"تم حفظ الإشعار داخل التطبيق للمستخدم {recipient.user_id}")
             return {'success': True, 'channel': 'in_app', 'notification_id': str(notification.id)}
@@ -499,18 +749,46 @@ class NotificationEngine:
             logger.error(f"فشل إرسال الإشعار داخل التطبيق: {str(e)}")
             return {'success': False, 'error': str(e)}
     
+    def _in_app_payload(self, notification) -> Dict:
+        """بيانات إشعار التطبيق المرسلة للواجهة الأمامية"""
+        return {
+            'id': str(notification.id),
+            'title': notification.title,
+            'message': notification.message,
+            'category': notification.category,
+            'timestamp': notification.created_at.isoformat()
+        }
+    
+    def _push_in_app_notification(self, user_id: str, payload: Dict) -> Dict:
+        """إشعار الواجهة الأمامية بإشعار تطبيق محفوظ"""
+        try:
+            from .realtime import user_group
+            
+            channel_layer = get_channel_layer()
+            async_to_sync(channel_layer.group_send)(
+                user_group(user_id),
+                {'type': 'notification_message', 'notification': payload}
+            )
+            return {'success': True, 'channel': 'in_app'}
+        except Exception as e:
+            logger.warning(f"فشل إرسال WebSocket: {str(e)}")
+            return {'success': False, 'error': str(e)}
+    
     def _send_websocket_notification(self, recipient: NotificationRecipient, content: NotificationContent) -> Dict:
         """إرسال إشعار عبر WebSocket"""
         if not WEBSOCKET_AVAILABLE:
             return {'success': False, 'error': 'WebSocket غير متوفر'}
         
         try:
+            from .realtime import user_group
+            
+            # مجموعة المستخدم ونوع الرسالة كما يستقبلهما NotificationConsumer
             channel_layer = get_channel_layer()
             async_to_sync(channel_layer.group_send)(
-                f"user_{recipient.user_id}",
+                user_group(recipient.user_id),
                 {
-                    'type': 'real_time_notification',
-                    'data': {
+                    'type': 'notification_message',
+                    'notification': {
                         'title': content.title,
                         'message': content.message,
                         'action_url': content.action_url,
@@ -676,6 +954,52 @@ def send_notification_async(channel: str, recipient_data: Dict, content_data: Di
         logger.error(f"خطأ في المهمة غير المتزامنة: {str(e)}")
         return {'success': False, 'error': str(e)}
 
+@shared_task
+def send_notification_chunk(channel: str, recipients_data: List[Dict], content_data: Dict, category: str,
+                            notifications: List[Dict] = None):
+    """مهمة Celery لإرسال إشعار إلى دفعة من المستلمين عبر قناة واحدة"""
+    try:
+        engine = NotificationEngine()
+        
+        content = NotificationContent(**content_data)
+        channel_enum = NotificationChannel(channel)
+        category_enum = NotificationCategory(category)
+        
+        if channel_enum == NotificationChannel.IN_APP:
+            # الإشعارات أُنشئت عند التوزيع؛ يبقى إشعار الواجهة الأمامية دفعةً واحدة
+            from .realtime import deliver_notifications
+            
+            notifications = notifications or []
+            # رسالة واحدة لكل مستخدم تُرسل كلها أو لا شيء؛ الصفر يعني عدم توفر طبقة القنوات
+            delivered = deliver_notifications((item['user_id'], item['notification']) for item in notifications)
+            results = [{'success': delivered > 0}] * len(notifications)
+        else:
+            recipients = [NotificationRecipient(**data) for data in recipients_data]
+            if channel_enum == NotificationChannel.EMAIL:
+                results = engine._send_email_chunk(recipients, content)
+            else:
+                results = [engine._send_via_channel(channel_enum, recipient, content, category_enum)
+                           for recipient in recipients]
+        
+        sent_count = sum(1 for result in results if result.get('success'))
+        logger.info(f"تم إرسال دفعة إشعارات عبر {channel}: {sent_count} من {len(results)}")
+        return {
+            'success': True,
+            'channel': channel,
+            'sent_count': sent_count,
+            'failed_count': len(results) - sent_count
+        }
+        
+    except Exception as e:
+        logger.error(f"خطأ في مهمة دفعة الإشعارات: {str(e)}")
+        return {'success': False, 'error': str(e)}
+
+@shared_task
+def send_scheduled_broadcast(template_id: str, user_ids: List[str], variables: Dict[str, Any],
+                             priority: str, channels: List[str] = None):
+    """مهمة Celery لتوزيع إشعار مجدول عند حلول موعده"""
+    return send_notification(template_id, user_ids, variables, priority, channels)
+
 @shared_task
 def send_scheduled_notification(template_id: str, recipients_data: List[Dict], content_data: Dict,
                                channels: List[str], priority: str):
@@ -711,41 +1035,35 @@ def send_notification(template_id: str, user_ids: List[str], variables: Dict[str
                      scheduled_time: datetime.datetime = None) -> Dict:
     """إرسال إشعار للمستخدمين"""
     try:
-        engine = NotificationEngine()
-        
-        # الحصول على بيانات المستلمين
-        recipients = []
-        for user_id in user_ids:
-            try:
-                user = User.objects.get(id=user_id)
-                recipient = NotificationRecipient(
-                    user_id=str(user.id),
-                    name=user.display_name,
-                    email=user.email,
-                    phone=getattr(user, 'phone_number', ''),
-                    language=getattr(user, 'language_preference', 'ar')
-                )
-                recipients.append(recipient)
-            except User.DoesNotExist:
-                logger.warning(f"المستخدم غير موجود: {user_id}")
-                continue
-        
-        if not recipients:
-            return {'success': False, 'error': 'لا يوجد مستلمون صالحون'}
-        
-        # تحويل القنوات والأولوية
-        priority_enum = NotificationPriority(priority)
-        channel_enums = [NotificationChannel(c) for c in channels] if channels else None
+        if scheduled_time and scheduled_time > timezone.now():
+            if not CELERY_AVAILABLE:
+                return {'success': False, 'error': 'Celery غير متوفر للجدولة'}
+            
+            send_scheduled_broadcast.apply_async(
+                args=[template_id, [str(user_id) for user_id in user_ids], variables, priority, channels],
+                eta=scheduled_time
+            )
+            return {
+                'success': True,
+                'scheduled': True,
+                'scheduled_time': scheduled_time.isoformat(),
+                'recipients_count': len(user_ids)
+            }
         
-        # إرسال الإشعار
-        return engine.send_notification(
-            template_id, recipients, variables, priority_enum, scheduled_time, channel_enums
-        )
+        return _broadcast(NotificationEngine(), template_id, User.objects.filter(id__in=user_ids),
+                          variables, priority, channels)
         
     except Exception as e:
         logger.error(f"خطأ في دالة إرسال الإشعار: {str(e)}")
         return {'success': False, 'error': str(e)}
 
+def _broadcast(engine: NotificationEngine, template_id: str, users, variables: Dict[str, Any],
+               priority: str, channels: List[str] = None) -> Dict:
+    """تحويل الأولوية والقنوات ثم التوزيع على دفعات"""
+    priority_enum = NotificationPriority(priority)
+    channel_enums = [NotificationChannel(c) for c in channels] if channels else None
+    return engine.broadcast(template_id, users, variables, priority_enum, channel_enums)
+
 def send_bulk_notification(template_id: str, filter_criteria: Dict[str, Any],
                           variables: Dict[str, Any], priority: str = "normal") -> Dict:
     """إرسال إشعار جماعي مع معايير تصفية"""
@@ -759,23 +1077,17 @@ def send_bulk_notification(template_id: str, filter_criteria: Dict[str, Any],
             query &= Q(role=filter_criteria['role'])
         
         if 'college_id' in filter_criteria:
-            query &= Q(studentprofile__college_id=filter_criteria['college_id'])
+            query &= Q(student_profile__college_id=filter_criteria['college_id'])
         
         if 'department_id' in filter_criteria:
-            query &= Q(studentprofile__department_id=filter_criteria['department_id'])
+            query &= Q(student_profile__department_id=filter_criteria['department_id'])
         
         if 'academic_level' in filter_criteria:
-            query &= Q(studentprofile__academic_level=filter_criteria['academic_level'])
+            query &= Q(student_profile__academic_level=filter_criteria['academic_level'])
         
-        # الحصول على المستخدمين
+        # المستخدمون يُقرؤون من المؤشر على دفعات دون تحميلهم في قائمة
         users = User.objects.filter(query, is_active=True)
-        user_ids = [str(user.id) for user in users]
-        
-        if not user_ids:
-            return {'success': False, 'error': 'لا يوجد مستخدمون يطابقون المعايير'}
-        
-        # إرسال الإشعار
-        return send_notification(template_id, user_ids, variables, priority)
+        return _broadcast(NotificationEngine(), template_id, users, variables, priority)
         
     except Exception as e:
         logger.error(f"خطأ في الإشعار الجماعي: {str(e)}")
@@ -797,11 +1109,12 @@ def create_custom_notification(title: str, message: str, user_ids: List[str],
             message_template=message
         )
         
-        # إضافة القالب مؤقتاً
+        # إضافة القالب مؤقتاً إلى المحرك الذي يرسل الإشعار
         engine.templates[custom_template.template_id] = custom_template
         
         # إرسال الإشعار
-        return send_notification(custom_template.template_id, user_ids, {}, priority, channels)
+        return _broadcast(engine, custom_template.template_id, User.objects.filter(id__in=user_ids),
+                          {}, priority, channels)
         
     except Exception as e:
         logger.error(f"خطأ في الإشعار المخصص: {str(e)}")
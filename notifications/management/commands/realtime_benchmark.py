@@ -0,0 +1,104 @@
+import asyncio
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+
+from notifications.realtime import (
+    broadcast_notification, coalesce_messages, deliver_notifications, user_group
+)
+
+
+class Command(BaseCommand):
+    help = 'قياس معدل تسليم الإشعارات الفورية (رسالة/ث) لكل رسالة على حدة والمجمع والبث للمجموعات'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--layer', choices=('memory', 'redis'), default='memory', help='نوع طبقة القنوات')
+        parser.add_argument('--redis-url', default='redis://127.0.0.1:6379/2', help='عنوان Redis لطبقة القنوات')
+        parser.add_argument('--users', type=int, default=2000, help='عدد المستخدمين المتصلين')
+
+        parser.add_argument(
+            '--burst',
+            type=int,
+            default=3,
+            help='عدد الإشعارات المتتالية لكل مستخدم (تُدمج في رسالة واحدة في الطريقة المجمعة)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            from asgiref.sync import async_to_sync
+        except ImportError:
+            raise CommandError('حزمة channels غير مثبتة')
+
+        layer = self.channel_layer(options)
+        run = uuid.uuid4().hex[:8]
+        users = [f'{run}-{index}' for index in range(options['users'])]
+        burst = options['burst']
+        payloads = [
+            (user, {'id': f'{user}-{position}', 'title': 'إشعار', 'message': 'اختبار الأداء', 'priority': 'normal'})
+            for position in range(burst) for user in users
+        ]
+        broadcast = f'notifications_bench_{run}'
+
+        channels = async_to_sync(self.connect)(layer, users, broadcast)
+        self.stdout.write(f'{len(users)} مستخدم، {len(payloads)} إشعار، طبقة {options["layer"]}')
+
+        # الطريقة السابقة: group_send مستقل لكل إشعار
+        def per_message():
+            for user, payload in payloads:
+                async_to_sync(layer.group_send)(
+                    user_group(user), {'type': 'notification.message', 'notification': payload}
+                )
+            return len(payloads)
+
+        # (الطريقة، الإرسال، الرسائل المتوقعة لكل قناة، الإشعارات المسلمة)
+        methods = [
+            ('لكل إشعار', per_message, burst, len(payloads)),
+            ('مجمع', lambda: deliver_notifications(payloads, channel_layer=layer), 1, len(payloads)),
+            ('بث للمجموعة', lambda: int(broadcast_notification(broadcast, payloads[0][1], channel_layer=layer)),
+             1, len(users)),
+        ]
+        for label, send, frames, delivered in methods:
+            started = time.perf_counter()
+            sent = send()
+            elapsed = time.perf_counter() - started
+            async_to_sync(self.drain)(layer, channels, frames)
+
+            self.stdout.write(self.style.SUCCESS(f'{label}:'))
+            self.stdout.write(f'  رسائل الطبقة: {sent} في {elapsed * 1000:.1f} ms')
+            self.stdout.write(f'  المعدل: {delivered / max(elapsed, 1e-9):,.0f} إشعار/ث')
+
+        self.stdout.write(f'  رسائل مدمجة: {len(coalesce_messages(payloads))} بدلاً من {len(payloads)}')
+
+    def channel_layer(self, options):
+        if options['layer'] == 'redis':
+            try:
+                from channels_redis.core import RedisChannelLayer
+            except ImportError:
+                raise CommandError('حزمة channels-redis غير مثبتة')
+            return RedisChannelLayer(hosts=[options['redis_url']], capacity=max(100, options['burst'] * 2))
+
+        try:
+            from channels.layers import InMemoryChannelLayer
+        except ImportError:
+            raise CommandError('حزمة channels غير مثبتة')
+        return InMemoryChannelLayer(capacity=max(100, options['burst'] * 2))
+
+    async def connect(self, layer, users, broadcast):
+        """قناة لكل مستخدم في مجموعته ومجموعة البث كما يفعل NotificationConsumer"""
+        channels = []
+        for user in users:
+            channel = await layer.new_channel()
+            await layer.group_add(user_group(user), channel)
+            await layer.group_add(broadcast, channel)
+            channels.append(channel)
+        return channels
+
+    async def drain(self, layer, channels, frames):
+        """استلام الرسائل المتوقعة من كل قناة للتحقق من التسليم وتفريغ السعة"""
+        for channel in channels:
+            for _ in range(frames):
+                try:
+                    await asyncio.wait_for(layer.receive(channel), timeout=5)
+                except asyncio.TimeoutError:
+                    raise CommandError(f'لم تصل رسالة متوقعة إلى {channel}')
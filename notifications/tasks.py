@@ -3,8 +3,11 @@ Celery Tasks for Notifications
 مهام Celery للإشعارات
 """
 
+import uuid
+from itertools import islice
+
 from celery import shared_task
-from django.contrib.auth.models import User
+from django.contrib.auth import get_user_model
 from django.core.mail import send_mail, send_mass_mail
 from django.template.loader import render_to_string
 from django.utils import timezone
@@ -13,9 +16,48 @@ from datetime import timedelta, datetime
 import logging
 
 from .models import Notification, NotificationTemplate
-from .consumers import send_notification_to_user
+from .realtime import (
+    BROADCAST_GROUP, broadcast_group_for, broadcast_notification, deliver_notifications, notification_payload
+)
 
 logger = logging.getLogger(__name__)
+User = get_user_model()
+
+# Recipients read, created and pushed together by the bulk tasks
+BULK_CHUNK_SIZE = 1000
+
+
+def _chunked(rows, size=BULK_CHUNK_SIZE):
+    """Lists of up to `size` rows from an iterator"""
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def _new_notification(user_id, title, message, notification_type, priority, **metadata):
+    return Notification(
+        user_id=user_id,
+        title=title,
+        message=message,
+        priority=priority.lower(),
+        metadata={'notification_type': notification_type, **metadata}
+    )
+
+
+def _broadcast_payload(broadcast_id, title, message, notification_type, priority):
+    """Frame data shared by every recipient of a group broadcast"""
+    return {
+        'id': None,
+        'broadcast_id': broadcast_id,
+        'title': title,
+        'message': message,
+        'type': notification_type,
+        'priority': priority.lower(),
+        'created_at': timezone.now().isoformat(),
+        'action_url': '',
+        'action_text': ''
+    }
+
 
 @shared_task(bind=True, max_retries=3)
 def send_email_notification(self, notification_id):
@@ -79,45 +121,30 @@ def send_email_notification(self, notification_id):
 
 @shared_task
 def send_bulk_notifications(user_ids, title, message, notification_type='GENERAL', priority='NORMAL'):
-    """Send notifications to multiple users"""
+    """
+    Send notifications to multiple users.
+    Each chunk of rows is bulk-created and pushed to the users' sockets in
+    one batched channel-layer pass, instead of one task per notification.
+    """
     notifications_created = 0
+    messages_sent = 0
     
     try:
-        users = User.objects.filter(id__in=user_ids, is_active=True)
-        
-        notifications = []
-        for user in users:
-            notification = Notification(
-                recipient=user,
-                title=title,
-                message=message,
-                notification_type=notification_type,
-                priority=priority,
-                status='PENDING'
-            )
-            notifications.append(notification)
-        
-        # Bulk create notifications
-        created_notifications = Notification.objects.bulk_create(notifications)
-        notifications_created = len(created_notifications)
-        
-        # Send real-time notifications via WebSocket
-        for notification in created_notifications:
-            send_notification_to_user.delay(
-                notification.recipient.id,
-                {
-                    'id': notification.id,
-                    'title': notification.title,
-                    'message': notification.message,
-                    'type': notification.notification_type,
-                    'priority': notification.priority,
-                    'created_at': notification.created_at.isoformat(),
-                    'action_url': notification.action_url,
-                    'action_text': notification.action_text
-                }
+        recipients = User.objects.filter(id__in=user_ids, is_active=True).order_by().values_list(
+            'id', flat=True
+        ).iterator(chunk_size=BULK_CHUNK_SIZE)
+        
+        for chunk in _chunked(recipients):
+            created = Notification.objects.bulk_create([
+                _new_notification(user_id, title, message, notification_type, priority) for user_id in chunk
+            ])
+            notifications_created += len(created)
+            # Send real-time notifications via WebSocket
+            messages_sent += deliver_notifications(
+                (notification.user_id, notification_payload(notification)) for notification in created
             )
         
-        logger.info(f"Created {notifications_created} bulk notifications")
+        logger.info(f"Created {notifications_created} bulk notifications, {messages_sent} real-time messages")
         return f"Created {notifications_created} notifications"
         
     except Exception as exc:
@@ -126,24 +153,34 @@ def send_bulk_notifications(user_ids, title, message, notification_type='GENERAL
 
 @shared_task
 def send_notification_by_role(role, title, message, notification_type='GENERAL', priority='NORMAL'):
-    """Send notifications to all users with specific role"""
+    """
+    Send notifications to all users with specific role.
+    Every user gets a stored row; the real-time copy is one message to the
+    role group since the content is identical.
+    """
     try:
-        from students.models import UserProfile
-        
-        users = User.objects.filter(
-            profile__role=role,
-            is_active=True
-        )
-        
-        user_ids = list(users.values_list('id', flat=True))
-        
-        if user_ids:
-            return send_bulk_notifications.delay(
-                user_ids, title, message, notification_type, priority
-            )
-        else:
+        broadcast_id = str(uuid.uuid4())
+        recipients = User.objects.filter(role=role, is_active=True).order_by().values_list(
+            'id', flat=True
+        ).iterator(chunk_size=BULK_CHUNK_SIZE)
+        
+        notifications_created = 0
+        for chunk in _chunked(recipients):
+            notifications_created += len(Notification.objects.bulk_create([
+                _new_notification(user_id, title, message, notification_type, priority, broadcast_id=broadcast_id)
+                for user_id in chunk
+            ]))
+        
+        if not notifications_created:
             logger.info(f"No users found with role {role}")
             return f"No users found with role {role}"
+        
+        broadcast_notification(
+            broadcast_group_for(role=role),
+            _broadcast_payload(broadcast_id, title, message, notification_type, priority)
+        )
+        logger.info(f"Sent role notification to {notifications_created} users with role {role}")
+        return f"Created {notifications_created} notifications"
             
     except Exception as exc:
         logger.error(f"Failed to send role-based notifications: {str(exc)}")
@@ -281,34 +318,24 @@ def send_push_notification(user_id, title, message, data=None):
 def process_notification_queue():
     """Process pending notifications"""
     try:
-        pending_notifications = Notification.objects.filter(
+        pending_notifications = Notification.objects.select_related('user').filter(
             status='PENDING'
         ).order_by('priority', 'created_at')[:100]
         
         processed_count = 0
+        realtime = []
         
         for notification in pending_notifications:
             # Send email if user has email enabled
-            if notification.recipient.email:
+            if notification.user.email:
                 send_email_notification.delay(notification.id)
             
-            # Send real-time notification
-            send_notification_to_user.delay(
-                notification.recipient.id,
-                {
-                    'id': notification.id,
-                    'title': notification.title,
-                    'message': notification.message,
-                    'type': notification.notification_type,
-                    'priority': notification.priority,
-                    'created_at': notification.created_at.isoformat(),
-                    'action_url': notification.action_url,
-                    'action_text': notification.action_text
-                }
-            )
-            
+            realtime.append((notification.user_id, notification_payload(notification)))
             processed_count += 1
         
+        # Send real-time notifications in one batched pass
+        deliver_notifications(realtime)
+        
         logger.info(f"Processed {processed_count} pending notifications")
         return f"Processed {processed_count} notifications"
         
@@ -318,57 +345,47 @@ def process_notification_queue():
 
 @shared_task
 def send_urgent_alert(title, message, user_ids=None, roles=None):
-    """Send urgent alert to specified users or roles"""
+    """
+    Send urgent alert to specified users or roles.
+    Alerts to roles or to everyone go out as one message per broadcast
+    group; alerts to listed users are coalesced per user.
+    """
     try:
         if user_ids:
             users = User.objects.filter(id__in=user_ids, is_active=True)
         elif roles:
-            from students.models import UserProfile
-            users = User.objects.filter(
-                profile__role__in=roles,
-                is_active=True
-            )
+            users = User.objects.filter(role__in=roles, is_active=True)
         else:
             # Send to all active users
             users = User.objects.filter(is_active=True)
         
-        notifications = []
-        for user in users:
-            notification = Notification(
-                recipient=user,
-                title=title,
-                message=message,
-                notification_type='URGENT',
-                priority='URGENT',
-                status='PENDING'
-            )
-            notifications.append(notification)
+        broadcast_id = None if user_ids else str(uuid.uuid4())
+        metadata = {'broadcast_id': broadcast_id} if broadcast_id else {}
+        recipients = users.order_by().values_list('id', 'email').iterator(chunk_size=BULK_CHUNK_SIZE)
+        alert_count = 0
         
-        # Bulk create notifications
-        created_notifications = Notification.objects.bulk_create(notifications)
-        
-        # Send immediate notifications
-        for notification in created_notifications:
+        for chunk in _chunked(recipients):
+            created = Notification.objects.bulk_create([
+                _new_notification(user_id, title, message, 'URGENT', 'URGENT', **metadata) for user_id, _ in chunk
+            ])
+            alert_count += len(created)
+            
             # Email
-            if notification.recipient.email:
-                send_email_notification.delay(notification.id)
+            for notification, (_, email) in zip(created, chunk):
+                if email:
+                    send_email_notification.delay(notification.id)
             
             # Real-time
-            send_notification_to_user.delay(
-                notification.recipient.id,
-                {
-                    'id': notification.id,
-                    'title': notification.title,
-                    'message': notification.message,
-                    'type': notification.notification_type,
-                    'priority': notification.priority,
-                    'created_at': notification.created_at.isoformat(),
-                    'action_url': notification.action_url,
-                    'action_text': notification.action_text
-                }
-            )
+            if user_ids:
+                deliver_notifications(
+                    (notification.user_id, notification_payload(notification)) for notification in created
+                )
+        
+        if broadcast_id and alert_count:
+            payload = _broadcast_payload(broadcast_id, title, message, 'URGENT', 'URGENT')
+            for group in ([broadcast_group_for(role=role) for role in roles] if roles else [BROADCAST_GROUP]):
+                broadcast_notification(group, payload)
         
-        alert_count = len(created_notifications)
         logger.info(f"Sent urgent alert to {alert_count} users")
         return f"Urgent alert sent to {alert_count} users"
         
@@ -1,15 +1,16 @@
 # نظام التقارير المتطور والشامل
 # Advanced Comprehensive Reporting System with AI Analytics
 
-import io
+import os
 import json
 import datetime
 from decimal import Decimal
-from typing import Dict, List, Optional, Any, Union
-import base64
+from typing import Dict, Iterable, List, Optional, Any, Union
 import logging
+from functools import lru_cache
 
 # Django imports
+from django.conf import settings
 from django.http import HttpResponse
 from django.template.loader import get_template
 from django.utils import timezone
@@ -36,12 +37,7 @@ from openpyxl.chart import BarChart, LineChart, PieChart, Reference
 import pandas as pd
 import numpy as np
 
-# Visualization
-import matplotlib.pyplot as plt
-import seaborn as sns
-from matplotlib.backends.backend_agg import FigureCanvasAgg
-import matplotlib
-matplotlib.use('Agg')  # Non-interactive backend
+# Visualization is rendered by the chart service in worker processes (reports/charts.py)
 
 # Arabic text support
 try:
@@ -51,9 +47,85 @@ try:
 except ImportError:
     ARABIC_SUPPORT = False
 
+from .charts import ChartSpec, chart_flowable, get_chart_service, pdf_chart_format
+from .exports import XLSX_CONTENT_TYPE, infer_columns, write_xlsx
+from .outputs import report_output_metadata, report_output_path, save_report_output
+
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
+ARABIC_TEXT_CACHE_SIZE = 4096
+
+@lru_cache(maxsize=None)
+def register_arabic_font() -> str:
+    """تسجيل الخط العربي مرة واحدة لكل عملية وإرجاع اسمه"""
+    try:
+        # محاولة تسجيل خط عربي
+        font_path = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
+        pdfmetrics.registerFont(TTFont('Arabic', font_path))
+        return 'Arabic'
+    except:
+        logger.warning("فشل في تحميل الخط العربي - استخدام الخط الافتراضي")
+        return 'Helvetica'
+
+
+@lru_cache(maxsize=None)
+def report_styles(font_name: str):
+    """أنماط التقارير مبنية مرة واحدة لكل خط ومشتركة بين المولدات"""
+    styles = getSampleStyleSheet()
+    
+    # نمط العنوان الرئيسي
+    styles.add(ParagraphStyle(
+        name='ArabicTitle',
+        parent=styles['Title'],
+        fontName=font_name,
+        fontSize=18,
+        alignment=TA_CENTER,
+        spaceAfter=20,
+        textColor=colors.darkblue
+    ))
+    
+    # نمط العنوان الفرعي
+    styles.add(ParagraphStyle(
+        name='ArabicHeading',
+        parent=styles['Heading1'],
+        fontName=font_name,
+        fontSize=14,
+        alignment=TA_RIGHT,
+        spaceAfter=12,
+        textColor=colors.darkgreen
+    ))
+    
+    # نمط النص العادي
+    styles.add(ParagraphStyle(
+        name='ArabicNormal',
+        parent=styles['Normal'],
+        fontName=font_name,
+        fontSize=10,
+        alignment=TA_RIGHT,
+        spaceBefore=6,
+        spaceAfter=6
+    ))
+    
+    return styles
+
+
+@lru_cache(maxsize=ARABIC_TEXT_CACHE_SIZE)
+def format_arabic_text(text: str) -> str:
+    """
+    تنسيق النص العربي للعرض الصحيح
+    النتائج مخزنة لأن أسماء المقررات والعناوين تتكرر في كل كشف
+    """
+    if not ARABIC_SUPPORT or not text:
+        return text
+    
+    try:
+        reshaped_text = reshape(text)
+        return get_display(reshaped_text)
+    except:
+        return text
+
+
 class ReportGenerator:
     """مولد التقارير المتطور"""
     
@@ -63,64 +135,15 @@ class ReportGenerator:
     
     def setup_fonts(self):
         """إعداد الخطوط للنصوص العربية"""
-        try:
-            # محاولة تسجيل خط عربي
-            font_path = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
-            pdfmetrics.registerFont(TTFont('Arabic', font_path))
-            self.arabic_font = 'Arabic'
-        except:
-            logger.warning("فشل في تحميل الخط العربي - استخدام الخط الافتراضي")
-            self.arabic_font = 'Helvetica'
+        self.arabic_font = register_arabic_font()
     
     def _create_styles(self):
         """إنشاء أنماط التقارير"""
-        styles = getSampleStyleSheet()
-        
-        # نمط العنوان الرئيسي
-        styles.add(ParagraphStyle(
-            name='ArabicTitle',
-            parent=styles['Title'],
-            fontName=self.arabic_font,
-            fontSize=18,
-            alignment=TA_CENTER,
-            spaceAfter=20,
-            textColor=colors.darkblue
-        ))
-        
-        # نمط العنوان الفرعي
-        styles.add(ParagraphStyle(
-            name='ArabicHeading',
-            parent=styles['Heading1'],
-            fontName=self.arabic_font,
-            fontSize=14,
-            alignment=TA_RIGHT,
-            spaceAfter=12,
-            textColor=colors.darkgreen
-        ))
-        
-        # نمط النص العادي
-        styles.add(ParagraphStyle(
-            name='ArabicNormal',
-            parent=styles['Normal'],
-            fontName=self.arabic_font,
-            fontSize=10,
-            alignment=TA_RIGHT,
-            spaceBefore=6,
-            spaceAfter=6
-        ))
-        
-        return styles
+        return report_styles(self.arabic_font)
     
     def _format_arabic_text(self, text: str) -> str:
         """تنسيق النص العربي للعرض الصحيح"""
-        if not ARABIC_SUPPORT or not text:
-            return text
-        
-        try:
-            reshaped_text = reshape(text)
-            return get_display(reshaped_text)
-        except:
-            return text
+        return format_arabic_text(text)
 
 class AcademicReportGenerator(ReportGenerator):
     """مولد التقارير الأكاديمية"""
@@ -128,23 +151,18 @@ class AcademicReportGenerator(ReportGenerator):
     def generate_student_transcript(self, student_id: str, format_type: str = 'pdf') -> Dict:
         """إنشاء كشف درجات الطالب"""
         try:
-            from students.models import User, StudentProfile
-            from academic.models import StudentGrade, CourseEnrollment
+            from .transcripts import cohort_students, load_transcripts
             
-            # الحصول على بيانات الطالب
-            student = User.objects.get(student_id=student_id, role='STUDENT')
-            profile = StudentProfile.objects.get(user=student)
-            
-            # الحصول على الدرجات
-            grades = StudentGrade.objects.filter(
-                student=student
-            ).select_related('course', 'semester').order_by('-semester__year', 'course__name')
+            # بيانات الطالب ودرجاته باستعلامات مجمعة كما في الكشوف الجماعية
+            transcript = next(load_transcripts(cohort_students(student_ids=[student_id])), None)
+            if transcript is None:
+                raise ValueError("الطالب غير موجود")
             
             # إنشاء التقرير
             if format_type.lower() == 'pdf':
-                return self._create_transcript_pdf(student, profile, grades)
+                return self._create_transcript_pdf(transcript)
             elif format_type.lower() == 'excel':
-                return self._create_transcript_excel(student, profile, grades)
+                return self._create_transcript_excel(transcript)
             else:
                 raise ValueError("نوع التقرير غير مدعوم")
                 
@@ -152,10 +170,17 @@ class AcademicReportGenerator(ReportGenerator):
             logger.error(f"خطأ في إنشاء كشف الدرجات: {str(e)}")
             raise
     
-    def _create_transcript_pdf(self, student, profile, grades) -> Dict:
+    def _create_transcript_pdf(self, transcript) -> Dict:
         """إنشاء كشف درجات PDF"""
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=inch, leftMargin=inch)
+        return save_report_output(
+            f"transcript_{transcript.student_id}_{timezone.now().strftime('%Y%m%d')}.pdf",
+            'application/pdf',
+            lambda output: self.write_transcript_pdf(transcript, output)
+        )
+    
+    def write_transcript_pdf(self, transcript, output):
+        """كتابة كشف درجات PDF في ملف ثنائي (يُستدعى أيضاً من عمليات الكشوف الجماعية)"""
+        doc = SimpleDocTemplate(output, pagesize=A4, rightMargin=inch, leftMargin=inch)
         story = []
         
         # العنوان الرئيسي
@@ -165,12 +190,12 @@ class AcademicReportGenerator(ReportGenerator):
         
         # معلومات الطالب
         student_info = [
-            [self._format_arabic_text("رقم الطالب:"), student.student_id],
-            [self._format_arabic_text("الاسم:"), self._format_arabic_text(student.display_name)],
-            [self._format_arabic_text("التخصص:"), self._format_arabic_text(profile.major.name_ar if profile.major else "غير محدد")],
-            [self._format_arabic_text("المعدل التراكمي:"), f"{profile.cumulative_gpa:.3f}"],
-            [self._format_arabic_text("الساعات المكتسبة:"), str(profile.completed_credit_hours)],
-            [self._format_arabic_text("تاريخ التقرير:"), timezone.now().strftime("%Y-%m-%d")]
+            [self._format_arabic_text("رقم الطالب:"), transcript.student_id],
+            [self._format_arabic_text("الاسم:"), self._format_arabic_text(transcript.name)],
+            [self._format_arabic_text("التخصص:"), self._format_arabic_text(transcript.major or "غير محدد")],
+            [self._format_arabic_text("المعدل التراكمي:"), f"{transcript.gpa:.3f}"],
+            [self._format_arabic_text("الساعات المكتسبة:"), str(transcript.completed_hours)],
+            [self._format_arabic_text("تاريخ التقرير:"), transcript.issued]
         ]
         
         student_table = Table(student_info, colWidths=[2*inch, 3*inch])
@@ -188,7 +213,7 @@ class AcademicReportGenerator(ReportGenerator):
         story.append(Spacer(1, 30))
         
         # جدول الدرجات
-        if grades:
+        if transcript.rows:
             # عنوان الجدول
             grades_title = self._format_arabic_text("سجل الدرجات")
             story.append(Paragraph(grades_title, self.styles['ArabicHeading']))
@@ -205,18 +230,18 @@ class AcademicReportGenerator(ReportGenerator):
             ]
             
             data = [header]
+            not_set = self._format_arabic_text("غير محدد")
             
             # إضافة الدرجات
-            for grade in grades:
-                row = [
-                    self._format_arabic_text(grade.course.name_ar),
-                    grade.course.code,
-                    str(grade.course.credit_hours),
-                    f"{grade.numerical_grade:.1f}" if grade.numerical_grade else "غير محدد",
-                    grade.letter_grade or "غير محدد",
-                    self._format_arabic_text(f"{grade.semester.name} {grade.semester.year}")
-                ]
-                data.append(row)
+            for row in transcript.rows:
+                data.append([
+                    self._format_arabic_text(row.course_name),
+                    row.course_code,
+                    str(row.credit_hours),
+                    f"{row.grade:.1f}" if row.grade is not None else not_set,
+                    row.letter_grade or not_set,
+                    self._format_arabic_text(row.semester)
+                ])
             
             grades_table = Table(data, colWidths=[2*inch, 1*inch, 0.8*inch, 0.8*inch, 0.8*inch, 1.5*inch])
             grades_table.setStyle(TableStyle([
@@ -234,16 +259,9 @@ class AcademicReportGenerator(ReportGenerator):
         
         # بناء الوثيقة
         doc.build(story)
-        buffer.seek(0)
-        
-        return {
-            'success': True,
-            'content': base64.b64encode(buffer.getvalue()).decode(),
-            'filename': f"transcript_{student.student_id}_{timezone.now().strftime('%Y%m%d')}.pdf",
-            'content_type': 'application/pdf'
-        }
+        return output
     
-    def _create_transcript_excel(self, student, profile, grades) -> Dict:
+    def _create_transcript_excel(self, transcript) -> Dict:
         """إنشاء كشف درجات Excel"""
         wb = openpyxl.Workbook()
         ws = wb.active
@@ -259,11 +277,11 @@ class AcademicReportGenerator(ReportGenerator):
         # معلومات الطالب
         row = 3
         student_info = [
-            ("رقم الطالب:", student.student_id),
-            ("الاسم:", student.display_name),
-            ("التخصص:", profile.major.name_ar if profile.major else "غير محدد"),
-            ("المعدل التراكمي:", f"{profile.cumulative_gpa:.3f}"),
-            ("الساعات المكتسبة:", str(profile.completed_credit_hours))
+            ("رقم الطالب:", transcript.student_id),
+            ("الاسم:", transcript.name),
+            ("التخصص:", transcript.major or "غير محدد"),
+            ("المعدل التراكمي:", f"{transcript.gpa:.3f}"),
+            ("الساعات المكتسبة:", str(transcript.completed_hours))
         ]
         
         for label, value in student_info:
@@ -282,13 +300,13 @@ class AcademicReportGenerator(ReportGenerator):
         
         # بيانات الدرجات
         row += 1
-        for grade in grades:
-            ws.cell(row=row, column=1, value=grade.course.name_ar)
-            ws.cell(row=row, column=2, value=grade.course.code)
-            ws.cell(row=row, column=3, value=grade.course.credit_hours)
-            ws.cell(row=row, column=4, value=float(grade.numerical_grade) if grade.numerical_grade else 0)
+        for grade in transcript.rows:
+            ws.cell(row=row, column=1, value=grade.course_name)
+            ws.cell(row=row, column=2, value=grade.course_code)
+            ws.cell(row=row, column=3, value=grade.credit_hours)
+            ws.cell(row=row, column=4, value=grade.grade if grade.grade is not None else 0)
             ws.cell(row=row, column=5, value=grade.letter_grade or "غير محدد")
-            ws.cell(row=row, column=6, value=f"{grade.semester.name} {grade.semester.year}")
+            ws.cell(row=row, column=6, value=grade.semester)
             row += 1
         
         # تنسيق الأعمدة
@@ -299,99 +317,152 @@ class AcademicReportGenerator(ReportGenerator):
         ws.column_dimensions['E'].width = 10
         ws.column_dimensions['F'].width = 20
         
-        # حفظ الملف
-        buffer = io.BytesIO()
-        wb.save(buffer)
-        buffer.seek(0)
-        
-        return {
-            'success': True,
-            'content': base64.b64encode(buffer.getvalue()).decode(),
-            'filename': f"transcript_{student.student_id}_{timezone.now().strftime('%Y%m%d')}.xlsx",
-            'content_type': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        }
+        # حفظ الملف مباشرة في مخزن التقارير
+        return save_report_output(
+            f"transcript_{transcript.student_id}_{timezone.now().strftime('%Y%m%d')}.xlsx",
+            'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            wb.save
+        )
     
     def generate_course_performance_report(self, course_id: str, semester_id: str) -> Dict:
         """تقرير أداء المقرر"""
         try:
             from courses.models import Course
-            from academic.models import StudentGrade, Semester
+            from academic.models import Semester
+            from .snapshots import get_snapshot
             
             course = Course.objects.get(id=course_id)
-            semester = Semester.objects.get(id=semester_id)
+            semester = Semester.objects.select_related('academic_year').get(id=semester_id)
             
-            # الحصول على درجات المقرر
-            grades = StudentGrade.objects.filter(
-                course=course,
-                semester=semester
-            ).select_related('student')
+            # التحليل من اللقطة المخزنة ولا يُعاد حسابه إلا عند تغير التسجيلات
+            analysis = get_snapshot(
+                'course_performance', {'course_id': str(course.id), 'semester_id': semester.id}
+            ).dataset
             
-            if not grades:
+            if not analysis.get('graded_students'):
                 return {'success': False, 'error': 'لا توجد درجات لهذا المقرر'}
             
-            # تحليل البيانات
-            analysis = self._analyze_course_performance(grades, course, semester)
-            
             # إنشاء التقرير
-            return self._create_performance_report_pdf(analysis)
+            return self._create_performance_report_pdf(analysis, course, semester)
             
         except Exception as e:
             logger.error(f"خطأ في تقرير أداء المقرر: {str(e)}")
             raise
     
-    def _analyze_course_performance(self, grades, course, semester) -> Dict:
-        """تحليل أداء المقرر"""
-        grade_values = [float(g.numerical_grade) for g in grades if g.numerical_grade]
+    def _create_performance_report_pdf(self, analysis: Dict, course, semester) -> Dict:
+        """إنشاء تقرير أداء المقرر PDF"""
+        story = []
         
-        if not grade_values:
-            return {'error': 'لا توجد درجات رقمية للتحليل'}
+        # العنوان
+        title = self._format_arabic_text(f"تقرير أداء المقرر - {course.name_ar}")
+        story.append(Paragraph(title, self.styles['ArabicTitle']))
+        story.append(Spacer(1, 20))
         
-        analysis = {
-            'course': course,
-            'semester': semester,
-            'total_students': len(grades),
-            'average_grade': np.mean(grade_values),
-            'median_grade': np.median(grade_values),
-            'std_deviation': np.std(grade_values),
-            'min_grade': min(grade_values),
-            'max_grade': max(grade_values),
-            'pass_rate': len([g for g in grade_values if g >= 60]) / len(grade_values) * 100,
-            'grade_distribution': self._calculate_grade_distribution(grade_values),
-            'statistical_summary': self._generate_statistical_summary(grade_values)
-        }
+        # الملخص الإحصائي
+        summary = analysis['statistical_summary']
+        summary_data = [
+            [self._format_arabic_text("رمز المقرر:"), course.code],
+            [self._format_arabic_text("الفصل الدراسي:"), self._format_arabic_text(str(semester))],
+            [self._format_arabic_text("عدد الطلاب:"), str(analysis['total_students'])],
+            [self._format_arabic_text("المتوسط:"), f"{analysis['average_grade']:.2f}"],
+            [self._format_arabic_text("الوسيط:"), f"{analysis['median_grade']:.2f}"],
+            [self._format_arabic_text("الانحراف المعياري:"), f"{analysis['std_deviation']:.2f}"],
+            [self._format_arabic_text("أدنى / أعلى درجة:"), f"{analysis['min_grade']:.1f} / {analysis['max_grade']:.1f}"],
+            [self._format_arabic_text("نسبة النجاح:"), f"{analysis['pass_rate']:.1f}%"],
+            [self._format_arabic_text("المدى الربيعي:"), f"{summary['iqr']:.2f}"],
+            [self._format_arabic_text("القيم الشاذة:"), str(len(summary['outliers']))]
+        ]
+        
+        summary_table = Table(summary_data)
+        summary_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, -1), colors.lightgrey),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('FONTNAME', (0, 0), (-1, -1), self.arabic_font),
+            ('ALIGN', (0, 0), (-1, -1), 'RIGHT')
+        ]))
+        
+        story.append(summary_table)
+        story.append(Spacer(1, 30))
         
+        # توزيع الدرجات
+        distribution_title = self._format_arabic_text("توزيع الدرجات")
+        story.append(Paragraph(distribution_title, self.styles['ArabicHeading']))
+        
+        distribution_data = [[self._format_arabic_text("الفئة"), self._format_arabic_text("عدد الطلاب")]]
+        distribution_data.extend([band, str(count)] for band, count in analysis['grade_distribution'].items())
+        
+        distribution_table = Table(distribution_data)
+        distribution_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('FONTNAME', (0, 0), (-1, -1), self.arabic_font),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER')
+        ]))
+        
+        story.append(distribution_table)
+        
+        return save_report_output(
+            f"course_performance_{course.code}_{semester.id}.pdf",
+            'application/pdf',
+            lambda output: SimpleDocTemplate(output, pagesize=A4).build(story)
+        )
+
+
+def analyze_course_grades(grade_values: List[float], total_students: int) -> Dict:
+    """تحليل أداء المقرر من الدرجات النهائية (قيم قابلة للتخزين بصيغة JSON)"""
+    analysis = {
+        'total_students': total_students,
+        'graded_students': len(grade_values),
+    }
+    if not grade_values:
         return analysis
     
-    def _calculate_grade_distribution(self, grades: List[float]) -> Dict:
-        """حساب توزيع الدرجات"""
-        ranges = {
-            'A (90-100)': len([g for g in grades if 90 <= g <= 100]),
-            'B (80-89)': len([g for g in grades if 80 <= g < 90]),
-            'C (70-79)': len([g for g in grades if 70 <= g < 80]),
-            'D (60-69)': len([g for g in grades if 60 <= g < 70]),
-            'F (0-59)': len([g for g in grades if g < 60])
-        }
-        return ranges
+    analysis.update({
+        'average_grade': float(np.mean(grade_values)),
+        'median_grade': float(np.median(grade_values)),
+        'std_deviation': float(np.std(grade_values)),
+        'min_grade': min(grade_values),
+        'max_grade': max(grade_values),
+        'pass_rate': len([g for g in grade_values if g >= 60]) / len(grade_values) * 100,
+        'grade_distribution': calculate_grade_distribution(grade_values),
+        'statistical_summary': generate_statistical_summary(grade_values)
+    })
+    return analysis
+
+
+def calculate_grade_distribution(grades: List[float]) -> Dict:
+    """حساب توزيع الدرجات"""
+    ranges = {
+        'A (90-100)': len([g for g in grades if 90 <= g <= 100]),
+        'B (80-89)': len([g for g in grades if 80 <= g < 90]),
+        'C (70-79)': len([g for g in grades if 70 <= g < 80]),
+        'D (60-69)': len([g for g in grades if 60 <= g < 70]),
+        'F (0-59)': len([g for g in grades if g < 60])
+    }
+    return ranges
+
+
+def generate_statistical_summary(grades: List[float]) -> Dict:
+    """إنشاء ملخص إحصائي"""
+    quartiles = [float(q) for q in np.percentile(grades, [25, 50, 75])]
     
-    def _generate_statistical_summary(self, grades: List[float]) -> Dict:
-        """إنشاء ملخص إحصائي"""
-        quartiles = np.percentile(grades, [25, 50, 75])
-        
-        return {
-            'first_quartile': quartiles[0],
-            'median': quartiles[1],
-            'third_quartile': quartiles[2],
-            'iqr': quartiles[2] - quartiles[0],
-            'outliers': self._detect_outliers(grades, quartiles[0], quartiles[2])
-        }
+    return {
+        'first_quartile': quartiles[0],
+        'median': quartiles[1],
+        'third_quartile': quartiles[2],
+        'iqr': quartiles[2] - quartiles[0],
+        'outliers': detect_outliers(grades, quartiles[0], quartiles[2])
+    }
+
+
+def detect_outliers(grades: List[float], q1: float, q3: float) -> List[float]:
+    """اكتشاف القيم الشاذة"""
+    iqr = q3 - q1
+    lower_bound = q1 - 1.5 * iqr
+    upper_bound = q3 + 1.5 * iqr
     
-    def _detect_outliers(self, grades: List[float], q1: float, q3: float) -> List[float]:
-        """اكتشاف القيم الشاذة"""
-        iqr = q3 - q1
-        lower_bound = q1 - 1.5 * iqr
-        upper_bound = q3 + 1.5 * iqr
-        
-        return [g for g in grades if g < lower_bound or g > upper_bound]
+    return [g for g in grades if g < lower_bound or g > upper_bound]
 
 class FinancialReportGenerator(ReportGenerator):
     """مولد التقارير المالية"""
@@ -400,45 +471,32 @@ class FinancialReportGenerator(ReportGenerator):
         """بيان مالي للطالب"""
         try:
             from students.models import User
-            from finance.models import StudentAccount, Payment, Fee
+            from finance.models import AcademicYear, StudentAccount
+            from .snapshots import get_snapshot
             
             student = User.objects.get(student_id=student_id, role='STUDENT')
             account = StudentAccount.objects.get(student=student)
             
             # تحديد السنة الأكاديمية
             if not academic_year:
-                academic_year = timezone.now().year
+                academic_year = AcademicYear.objects.filter(
+                    is_current=True
+                ).values_list('year', flat=True).first()
             
-            # الحصول على البيانات المالية
-            payments = Payment.objects.filter(
-                student_account=account,
-                payment_date__year=academic_year
-            ).order_by('-payment_date')
-            
-            fees = Fee.objects.filter(
-                student_accounts=account,
-                academic_year=academic_year
-            )
-            
-            # حساب الإجماليات
-            total_fees = sum(fee.amount for fee in fees)
-            total_payments = sum(payment.amount for payment in payments if payment.status == 'COMPLETED')
-            balance = total_fees - total_payments
+            # المدفوعات والرسوم من اللقطة المخزنة؛ يُعاد حساب الجزء الذي تغير فقط
+            statement = get_snapshot(
+                'financial_statement', {'student_id': student_id, 'academic_year': academic_year}
+            ).dataset
             
             # إنشاء التقرير
-            return self._create_financial_statement_pdf(
-                student, account, payments, fees, total_fees, total_payments, balance, academic_year
-            )
+            return self._create_financial_statement_pdf(student, account, statement, academic_year)
             
         except Exception as e:
             logger.error(f"خطأ في البيان المالي: {str(e)}")
             raise
     
-    def _create_financial_statement_pdf(self, student, account, payments, fees, 
-                                      total_fees, total_payments, balance, academic_year) -> Dict:
+    def _create_financial_statement_pdf(self, student, account, statement: Dict, academic_year) -> Dict:
         """إنشاء البيان المالي PDF"""
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4)
         story = []
         
         # العنوان
@@ -470,9 +528,9 @@ class FinancialReportGenerator(ReportGenerator):
         story.append(Paragraph(summary_title, self.styles['ArabicHeading']))
         
         summary_data = [
-            [self._format_arabic_text("إجمالي الرسوم:"), f"{total_fees:,.2f} ريال"],
-            [self._format_arabic_text("إجمالي المدفوعات:"), f"{total_payments:,.2f} ريال"],
-            [self._format_arabic_text("الرصيد المتبقي:"), f"{balance:,.2f} ريال"]
+            [self._format_arabic_text("إجمالي الرسوم:"), f"{Decimal(statement['total_fees']):,.2f} ريال"],
+            [self._format_arabic_text("إجمالي المدفوعات:"), f"{Decimal(statement['total_payments']):,.2f} ريال"],
+            [self._format_arabic_text("الرصيد المتبقي:"), f"{Decimal(statement['balance']):,.2f} ريال"]
         ]
         
         summary_table = Table(summary_data)
@@ -488,7 +546,7 @@ class FinancialReportGenerator(ReportGenerator):
         story.append(PageBreak())
         
         # تفاصيل المدفوعات
-        if payments:
+        if statement['payments']:
             payments_title = self._format_arabic_text("تفاصيل المدفوعات")
             story.append(Paragraph(payments_title, self.styles['ArabicHeading']))
             
@@ -502,13 +560,13 @@ class FinancialReportGenerator(ReportGenerator):
             
             payment_data = [payment_headers]
             
-            for payment in payments:
+            for payment in statement['payments']:
                 row = [
-                    payment.payment_date.strftime("%Y-%m-%d"),
-                    f"{payment.amount:,.2f}",
-                    self._format_arabic_text(payment.get_payment_type_display()),
-                    self._format_arabic_text(payment.get_status_display()),
-                    payment.reference_number or "غير محدد"
+                    payment['date'],
+                    f"{Decimal(payment['amount']):,.2f}",
+                    self._format_arabic_text(payment['method']),
+                    self._format_arabic_text(payment['status']),
+                    payment['reference'] or self._format_arabic_text("غير محدد")
                 ]
                 payment_data.append(row)
             
@@ -523,15 +581,11 @@ class FinancialReportGenerator(ReportGenerator):
             
             story.append(payment_table)
         
-        doc.build(story)
-        buffer.seek(0)
-        
-        return {
-            'success': True,
-            'content': base64.b64encode(buffer.getvalue()).decode(),
-            'filename': f"financial_statement_{student.student_id}_{academic_year}.pdf",
-            'content_type': 'application/pdf'
-        }
+        return save_report_output(
+            f"financial_statement_{student.student_id}_{academic_year}.pdf",
+            'application/pdf',
+            lambda output: SimpleDocTemplate(output, pagesize=A4).build(story)
+        )
 
 class AnalyticsReportGenerator(ReportGenerator):
     """مولد تقارير التحليلات والإحصائيات"""
@@ -539,20 +593,17 @@ class AnalyticsReportGenerator(ReportGenerator):
     def generate_enrollment_analytics(self, semester_id: str = None) -> Dict:
         """تحليلات التسجيل"""
         try:
-            from academic.models import CourseEnrollment, Semester
-            from courses.models import Course, College
+            from academic.models import Semester
             
             # تحديد الفصل الدراسي
+            semesters = Semester.objects.select_related('academic_year')
             if semester_id:
-                semester = Semester.objects.get(id=semester_id)
-                enrollments = CourseEnrollment.objects.filter(semester=semester)
+                semester = semesters.get(id=semester_id)
             else:
-                current_semester = Semester.objects.filter(is_current=True).first()
-                enrollments = CourseEnrollment.objects.filter(semester=current_semester)
-                semester = current_semester
+                semester = semesters.filter(is_current=True).first()
             
             # تحليل البيانات
-            analytics = self._analyze_enrollment_data(enrollments, semester)
+            analytics = self.enrollment_analytics(semester)
             
             # إنشاء الرسوم البيانية
             charts = self._create_enrollment_charts(analytics)
@@ -564,89 +615,59 @@ class AnalyticsReportGenerator(ReportGenerator):
             logger.error(f"خطأ في تحليلات التسجيل: {str(e)}")
             raise
     
-    def _analyze_enrollment_data(self, enrollments, semester) -> Dict:
-        """تحليل بيانات التسجيل"""
-        from django.db.models import Count
-        
-        total_enrollments = enrollments.count()
-        
-        # تحليل حسب الكلية
-        college_stats = enrollments.values(
-            'course__department__college__name_ar'
-        ).annotate(
-            count=Count('id')
-        ).order_by('-count')
-        
-        # تحليل حسب المستوى الأكاديمي
-        level_stats = enrollments.values(
-            'student__studentprofile__academic_level'
-        ).annotate(
-            count=Count('id')
-        ).order_by('student__studentprofile__academic_level')
-        
-        # تحليل حسب حالة التسجيل
-        status_stats = enrollments.values('status').annotate(
-            count=Count('id')
-        )
-        
+    def enrollment_analytics(self, semester) -> Dict:
+        """
+        تحليل بيانات التسجيل من لقطة الفصل المخزنة
+        كل مقرر جزء مستقل فلا يُعاد إلا حساب المقررات التي تغيرت تسجيلاتها
+        """
+        from .snapshots import get_snapshot
+        
+        snapshot = get_snapshot('enrollment_analytics', {'semester_id': semester.id})
         return {
+            **snapshot.dataset,
             'semester': semester,
-            'total_enrollments': total_enrollments,
-            'college_distribution': list(college_stats),
-            'level_distribution': list(level_stats),
-            'status_distribution': list(status_stats),
-            'average_enrollments_per_course': enrollments.values('course').distinct().count(),
-            'analysis_date': timezone.now()
+            'analysis_date': datetime.datetime.fromisoformat(snapshot.refreshed_at)
         }
     
-    def _create_enrollment_charts(self, analytics: Dict) -> Dict:
-        """إنشاء الرسوم البيانية للتسجيل"""
-        charts = {}
+    def enrollment_chart_specs(self, analytics: Dict, chart_format: str = 'png') -> Dict[str, ChartSpec]:
+        """مواصفات الرسوم البيانية للتسجيل (تحدد مفتاح التخزين المؤقت)"""
+        specs = {}
         
         # رسم بياني للتوزيع حسب الكلية
         if analytics['college_distribution']:
-            plt.figure(figsize=(10, 6))
-            colleges = [item['course__department__college__name_ar'] or 'غير محدد' 
-                       for item in analytics['college_distribution']]
-            counts = [item['count'] for item in analytics['college_distribution']]
-            
-            plt.bar(range(len(colleges)), counts)
-            plt.xlabel('الكليات')
-            plt.ylabel('عدد التسجيلات')
-            plt.title('توزيع التسجيلات حسب الكلية')
-            plt.xticks(range(len(colleges)), colleges, rotation=45, ha='right')
-            plt.tight_layout()
-            
-            # حفظ الرسم
-            buffer = io.BytesIO()
-            plt.savefig(buffer, format='png', dpi=300, bbox_inches='tight')
-            buffer.seek(0)
-            charts['college_chart'] = base64.b64encode(buffer.getvalue()).decode()
-            plt.close()
+            specs['college_chart'] = ChartSpec(
+                kind='bar',
+                title=self._format_arabic_text('توزيع التسجيلات حسب الكلية'),
+                labels=tuple(self._format_arabic_text(item['course__department__college__name_ar'] or 'غير محدد')
+                             for item in analytics['college_distribution']),
+                values=tuple(item['count'] for item in analytics['college_distribution']),
+                xlabel=self._format_arabic_text('الكليات'),
+                ylabel=self._format_arabic_text('عدد التسجيلات'),
+                figsize=(10, 6),
+                format=chart_format
+            )
         
         # رسم دائري للتوزيع حسب المستوى
         if analytics['level_distribution']:
-            plt.figure(figsize=(8, 8))
-            levels = [f"المستوى {item['student__studentprofile__academic_level']}" 
-                     for item in analytics['level_distribution']]
-            counts = [item['count'] for item in analytics['level_distribution']]
-            
-            plt.pie(counts, labels=levels, autopct='%1.1f%%', startangle=90)
-            plt.title('توزيع التسجيلات حسب المستوى الأكاديمي')
-            plt.axis('equal')
-            
-            buffer = io.BytesIO()
-            plt.savefig(buffer, format='png', dpi=300, bbox_inches='tight')
-            buffer.seek(0)
-            charts['level_chart'] = base64.b64encode(buffer.getvalue()).decode()
-            plt.close()
+            specs['level_chart'] = ChartSpec(
+                kind='pie',
+                title=self._format_arabic_text('توزيع التسجيلات حسب المستوى الأكاديمي'),
+                labels=tuple(self._format_arabic_text(f"المستوى {item['student__academic_level']}")
+                             for item in analytics['level_distribution']),
+                values=tuple(item['count'] for item in analytics['level_distribution']),
+                figsize=(8, 8),
+                format=chart_format
+            )
         
-        return charts
+        return specs
+    
+    def _create_enrollment_charts(self, analytics: Dict) -> Dict:
+        """مسارات الرسوم البيانية للتسجيل من ذاكرة الرسوم المؤقتة"""
+        specs = self.enrollment_chart_specs(analytics, pdf_chart_format())
+        return get_chart_service().render_many(specs)
     
     def _create_analytics_report_pdf(self, analytics: Dict, charts: Dict, title: str) -> Dict:
         """إنشاء تقرير التحليلات PDF"""
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4)
         story = []
         
         # العنوان
@@ -657,7 +678,7 @@ class AnalyticsReportGenerator(ReportGenerator):
         # معلومات عامة
         general_info = [
             [self._format_arabic_text("الفصل الدراسي:"), 
-             self._format_arabic_text(f"{analytics['semester'].name} {analytics['semester'].year}")],
+             self._format_arabic_text(str(analytics['semester']))],
             [self._format_arabic_text("إجمالي التسجيلات:"), str(analytics['total_enrollments'])],
             [self._format_arabic_text("تاريخ التقرير:"), 
              analytics['analysis_date'].strftime("%Y-%m-%d %H:%M")]
@@ -674,24 +695,16 @@ class AnalyticsReportGenerator(ReportGenerator):
         story.append(info_table)
         story.append(Spacer(1, 30))
         
-        # إضافة الرسوم البيانية
-        for chart_name, chart_data in charts.items():
-            from reportlab.platypus import Image
-            
-            chart_buffer = io.BytesIO(base64.b64decode(chart_data))
-            img = Image(chart_buffer, width=6*inch, height=4*inch)
-            story.append(img)
+        # إضافة الرسوم البيانية مباشرة من ملفاتها
+        for chart_name, chart_path in charts.items():
+            story.append(chart_flowable(chart_path, width=6*inch, height=4*inch))
             story.append(Spacer(1, 20))
         
-        doc.build(story)
-        buffer.seek(0)
-        
-        return {
-            'success': True,
-            'content': base64.b64encode(buffer.getvalue()).decode(),
-            'filename': f"analytics_report_{timezone.now().strftime('%Y%m%d_%H%M%S')}.pdf",
-            'content_type': 'application/pdf'
-        }
+        return save_report_output(
+            f"analytics_report_{timezone.now().strftime('%Y%m%d_%H%M%S')}.pdf",
+            'application/pdf',
+            lambda output: SimpleDocTemplate(output, pagesize=A4).build(story)
+        )
 
 # دوال مساعدة للاستخدام الخارجي
 
@@ -720,51 +733,26 @@ def generate_analytics_report(report_type: str, **kwargs) -> Dict:
     else:
         raise ValueError("نوع التحليل غير مدعوم")
 
-def export_data_to_excel(data: List[Dict], filename: str, sheet_name: str = 'البيانات') -> Dict:
-    """تصدير البيانات إلى Excel"""
+def export_data_to_excel(data: Iterable, filename: str, sheet_name: str = 'البيانات',
+                         columns: Optional[List] = None) -> Dict:
+    """
+    تصدير البيانات إلى ملف Excel بالبث صفاً صفاً دون تحميلها كاملة في الذاكرة
+    data قائمة أو مولد قواميس، أو QuerySet مع تحديد columns
+    """
     try:
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = sheet_name
+        if columns is None:
+            columns, data = infer_columns(data)
         
-        if not data:
+        if not columns:
             return {'success': False, 'error': 'لا توجد بيانات للتصدير'}
         
-        # إضافة الرؤوس
-        headers = list(data[0].keys())
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col, value=header)
-            cell.font = Font(bold=True)
-            cell.fill = PatternFill(start_color='4F81BD', end_color='4F81BD', fill_type='solid')
-        
-        # إضافة البيانات
-        for row, item in enumerate(data, 2):
-            for col, header in enumerate(headers, 1):
-                ws.cell(row=row, column=col, value=item.get(header, ''))
-        
-        # تنسيق الأعمدة
-        for column in ws.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 50)
-            ws.column_dimensions[column_letter].width = adjusted_width
-        
-        # حفظ الملف
-        buffer = io.BytesIO()
-        wb.save(buffer)
-        buffer.seek(0)
+        filename = os.path.basename(filename)
+        path = report_output_path(filename)
+        counts = write_xlsx(path, {sheet_name: (columns, data)})
         
         return {
-            'success': True,
-            'content': base64.b64encode(buffer.getvalue()).decode(),
-            'filename': filename,
-            'content_type': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            **report_output_metadata(path, XLSX_CONTENT_TYPE),
+            'rows': counts[sheet_name]
         }
         
     except Exception as e:
@@ -0,0 +1,220 @@
+"""
+Report Chart Service
+Charts are rendered in worker processes into a content-addressed disk cache
+keyed by a hash of the chart spec and its data
+"""
+
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional, Tuple
+
+from django.conf import settings
+
+try:
+    from svglib.svglib import svg2rlg
+    SVGLIB_AVAILABLE = True
+except ImportError:
+    SVGLIB_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Bump when the drawing code changes so stale renders are not reused
+CHART_STYLE_VERSION = 1
+CHART_RENDER_WORKERS = 2
+CHART_CACHE_MAX_AGE_DAYS = 30
+RASTER_DPI = 150
+
+
+@dataclass(frozen=True)
+class ChartSpec:
+    """Everything that determines a chart's pixels"""
+    kind: str
+    title: str
+    labels: Tuple[str, ...]
+    values: Tuple[float, ...]
+    xlabel: str = ''
+    ylabel: str = ''
+    figsize: Tuple[float, float] = (10, 6)
+    format: str = 'png'
+    dpi: int = RASTER_DPI
+
+    def __post_init__(self):
+        if self.kind not in ('bar', 'pie'):
+            raise ValueError(f"Unsupported chart kind: {self.kind}")
+        if self.format not in ('png', 'svg'):
+            raise ValueError(f"Unsupported chart format: {self.format}")
+
+    @property
+    def key(self) -> str:
+        payload = json.dumps({'version': CHART_STYLE_VERSION, **asdict(self)},
+                             sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def render_chart(spec: ChartSpec, path: str) -> str:
+    """
+    Draw a chart into path. Runs inside a worker process and uses the
+    object-oriented Figure API, so no pyplot global state is involved.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    figure = Figure(figsize=spec.figsize)
+    FigureCanvasAgg(figure)
+    axes = figure.add_subplot()
+
+    if spec.kind == 'bar':
+        positions = range(len(spec.labels))
+        axes.bar(positions, spec.values)
+        axes.set_xticks(list(positions))
+        axes.set_xticklabels(spec.labels, rotation=45, ha='right')
+        axes.set_xlabel(spec.xlabel)
+        axes.set_ylabel(spec.ylabel)
+    else:
+        axes.pie(spec.values, labels=spec.labels, autopct='%1.1f%%', startangle=90)
+        axes.axis('equal')
+    axes.set_title(spec.title)
+    figure.tight_layout()
+
+    # Write next to the target and rename so readers never see a partial file
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    handle, temporary = tempfile.mkstemp(dir=directory, suffix=f'.{spec.format}')
+    try:
+        with os.fdopen(handle, 'wb') as output:
+            figure.savefig(output, format=spec.format, dpi=spec.dpi, bbox_inches='tight')
+        os.replace(temporary, path)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+    return path
+
+
+class ChartService:
+    """Content-addressed chart cache in front of a matplotlib process pool"""
+
+    def __init__(self, directory: Optional[str] = None, workers: Optional[int] = None):
+        self.directory = directory or getattr(
+            settings, 'REPORT_CHART_CACHE_DIR',
+            os.path.join(settings.MEDIA_ROOT, 'charts')
+        )
+        self.workers = workers or getattr(settings, 'REPORT_CHART_WORKERS', CHART_RENDER_WORKERS)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        # Fallback when processes cannot be started (e.g. inside daemonic workers)
+        self._inline_lock = threading.Lock()
+
+    def path_for(self, spec: ChartSpec) -> str:
+        key = spec.key
+        return os.path.join(self.directory, key[:2], f'{key}.{spec.format}')
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor
+
+    def _render_inline(self, spec: ChartSpec, path: str) -> str:
+        with self._inline_lock:
+            return render_chart(spec, path)
+
+    def render_many(self, specs: Dict[str, ChartSpec]) -> Dict[str, str]:
+        """
+        Paths of the rendered charts by name. Cached files are returned
+        as they are; missing charts are rendered in parallel.
+        """
+        paths = {name: self.path_for(spec) for name, spec in specs.items()}
+        missing = {}
+        for name, spec in specs.items():
+            try:
+                # mtime marks the last use for prune()
+                os.utime(paths[name])
+            except FileNotFoundError:
+                missing[name] = spec
+        if not missing:
+            return paths
+
+        try:
+            pool = self._pool()
+            futures = {name: pool.submit(render_chart, spec, paths[name]) for name, spec in missing.items()}
+            for future in futures.values():
+                future.result()
+        except (AssertionError, BrokenProcessPool, OSError) as e:
+            logger.warning(f"Chart process pool unavailable, rendering in-process: {e}")
+            with self._lock:
+                self._executor = None
+            for name, spec in missing.items():
+                if not os.path.exists(paths[name]):
+                    self._render_inline(spec, paths[name])
+        return paths
+
+    def render(self, spec: ChartSpec) -> str:
+        return self.render_many({'chart': spec})['chart']
+
+    def prune(self, max_age_days: int = CHART_CACHE_MAX_AGE_DAYS) -> int:
+        """Remove charts not used for max_age_days; returns the number removed"""
+        cutoff = time.time() - max_age_days * 86400
+        removed = 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    if os.stat(path).st_mtime < cutoff:
+                        os.remove(path)
+                        removed += 1
+                except FileNotFoundError:
+                    continue
+        return removed
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+def chart_flowable(path: str, width: float, height: float):
+    """
+    ReportLab flowable for a cached chart file, read directly from disk.
+    SVG charts stay vector when svglib is installed.
+    """
+    if path.endswith('.svg'):
+        drawing = svg2rlg(path)
+        scale = min(width / drawing.width, height / drawing.height)
+        drawing.width, drawing.height = drawing.width * scale, drawing.height * scale
+        drawing.scale(scale, scale)
+        return drawing
+
+    from reportlab.platypus import Image
+    return Image(path, width=width, height=height)
+
+
+def pdf_chart_format() -> str:
+    """Vector charts for PDFs when they can be embedded"""
+    return 'svg' if SVGLIB_AVAILABLE else 'png'
+
+
+_service: Optional[ChartService] = None
+_service_lock = threading.Lock()
+
+
+def get_chart_service() -> ChartService:
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = ChartService()
+    return _service
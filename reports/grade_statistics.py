@@ -0,0 +1,134 @@
+"""
+Grade Statistics
+Per-course grade statistics for many courses at once. Final grades are
+loaded as (course_id, grade) arrays in one query and every statistic is a
+grouped NumPy operation over the course-sorted grades
+"""
+
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from django.db.models import QuerySet
+
+GRADE_CHUNK_SIZE = 5000
+PASS_GRADE = 60.0
+OUTLIER_IQR_FACTOR = 1.5
+# Lower bounds of the D, C, B and A bands; below the first is F
+GRADE_BAND_EDGES = np.array([60.0, 70.0, 80.0, 90.0])
+GRADE_BANDS = ('F (0-59)', 'D (60-69)', 'C (70-79)', 'B (80-89)', 'A (90-100)')
+# Enrollments that do not count towards course results
+INACTIVE_ENROLLMENT_STATUSES = ('DROPPED', 'WAITLISTED')
+
+
+def course_enrollments(semester_id=None, college_id=None, department_id=None) -> QuerySet:
+    from academic.models import Enrollment
+
+    enrollments = Enrollment.objects.exclude(status__in=INACTIVE_ENROLLMENT_STATUSES)
+    if semester_id:
+        enrollments = enrollments.filter(semester_id=semester_id)
+    if college_id:
+        enrollments = enrollments.filter(course__department__college_id=college_id)
+    if department_id:
+        enrollments = enrollments.filter(course__department_id=department_id)
+    return enrollments
+
+
+def load_course_grades(enrollments: QuerySet):
+    """
+    (course_ids, grades) arrays streamed from one query. Course ids are
+    UUIDs and stay in an object array; ungraded enrollments are NaN so
+    they still count as students of their course.
+    """
+    rows = enrollments.order_by().values_list('course_id', 'final_grade').iterator(chunk_size=GRADE_CHUNK_SIZE)
+    course_ids, grades = [], []
+    for course_id, grade in rows:
+        course_ids.append(course_id)
+        grades.append(np.nan if grade is None else grade)
+    return np.array(course_ids, dtype=object), np.array(grades, dtype=np.float64)
+
+
+def _quantile(sorted_grades: np.ndarray, starts: np.ndarray, counts: np.ndarray, q: float) -> np.ndarray:
+    """Per-group quantile with linear interpolation, as np.percentile does"""
+    position = (counts - 1) * q
+    lower = np.floor(position).astype(np.int64)
+    upper = np.ceil(position).astype(np.int64)
+    below = sorted_grades[starts + lower]
+    above = sorted_grades[starts + upper]
+    return below + (above - below) * (position - lower)
+
+
+def grade_statistics(course_ids: np.ndarray, grades: np.ndarray) -> Dict[Any, Dict]:
+    """
+    Statistics per course pk, in the shape of analyze_course_grades.
+    Course ids are factorized to integer codes; grades are sorted by
+    (code, grade) once and sums, counts and band histograms are then
+    reductions over the contiguous course runs.
+    """
+    keys, codes = np.unique(np.asarray(course_ids), return_inverse=True)
+    codes = codes.reshape(-1)
+    keys = keys.tolist()
+    grades = np.asarray(grades, dtype=np.float64)
+
+    totals = np.bincount(codes, minlength=len(keys))
+    results = {key: {'total_students': int(total), 'graded_students': 0} for key, total in zip(keys, totals)}
+
+    graded = ~np.isnan(grades)
+    codes, grades = codes[graded], grades[graded]
+    if not grades.size:
+        return results
+
+    order = np.lexsort((grades, codes))
+    codes, grades = codes[order], grades[order]
+    courses, starts, counts = np.unique(codes, return_index=True, return_counts=True)
+    ends = starts + counts
+    group = np.repeat(np.arange(courses.size), counts)
+
+    means = np.add.reduceat(grades, starts) / counts
+    deviations = grades - means[group]
+    std = np.sqrt(np.add.reduceat(deviations * deviations, starts) / counts)
+    passed = np.add.reduceat((grades >= PASS_GRADE).astype(np.int64), starts)
+
+    q1 = _quantile(grades, starts, counts, 0.25)
+    median = _quantile(grades, starts, counts, 0.5)
+    q3 = _quantile(grades, starts, counts, 0.75)
+    iqr = q3 - q1
+
+    bands = np.searchsorted(GRADE_BAND_EDGES, grades, side='right')
+    histogram = np.bincount(group * len(GRADE_BANDS) + bands,
+                            minlength=courses.size * len(GRADE_BANDS)).reshape(courses.size, len(GRADE_BANDS))
+
+    lower_fence = (q1 - OUTLIER_IQR_FACTOR * iqr)[group]
+    upper_fence = (q3 + OUTLIER_IQR_FACTOR * iqr)[group]
+    outlier = (grades < lower_fence) | (grades > upper_fence)
+    outliers = np.split(grades[outlier], np.cumsum(np.bincount(group[outlier], minlength=courses.size))[:-1])
+
+    for index, code in enumerate(courses.tolist()):
+        results[keys[code]].update({
+            'graded_students': int(counts[index]),
+            'average_grade': float(means[index]),
+            'median_grade': float(median[index]),
+            'std_deviation': float(std[index]),
+            'min_grade': float(grades[starts[index]]),
+            'max_grade': float(grades[ends[index] - 1]),
+            'pass_rate': float(passed[index] / counts[index] * 100),
+            # Highest band first, as in the report tables
+            'grade_distribution': {band: int(histogram[index, position])
+                                   for position, band in reversed(list(enumerate(GRADE_BANDS)))},
+            'statistical_summary': {
+                'first_quartile': float(q1[index]),
+                'median': float(median[index]),
+                'third_quartile': float(q3[index]),
+                'iqr': float(iqr[index]),
+                'outliers': outliers[index].tolist(),
+            },
+        })
+    return results
+
+
+def course_statistics(semester_id=None, college_id=None, department_id=None,
+                      enrollments: Optional[QuerySet] = None) -> Dict[Any, Dict]:
+    """Grade statistics for every course matching the filters, from one query"""
+    if enrollments is None:
+        enrollments = course_enrollments(semester_id, college_id, department_id)
+    return grade_statistics(*load_course_grades(enrollments))
@@ -0,0 +1,73 @@
+import time
+
+import numpy as np
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reports.advanced_reports import analyze_course_grades
+from reports.grade_statistics import course_enrollments, grade_statistics, load_course_grades
+
+
+class Command(BaseCommand):
+    help = 'قياس إحصائيات الدرجات المجمعة لكل المقررات مقارنة بالحساب لكل مقرر على حدة'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--semester', type=int, help='معرف الفصل الدراسي')
+        parser.add_argument('--college', help='معرف الكلية')
+        parser.add_argument('--department', help='معرف القسم')
+
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='عدد مرات تكرار الحساب على المصفوفات المحملة'
+        )
+
+    def handle(self, *args, **options):
+        enrollments = course_enrollments(options['semester'], options['college'], options['department'])
+
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            course_ids, grades = load_course_grades(enrollments)
+        load_time = time.perf_counter() - started
+        if not course_ids.size:
+            raise CommandError('لا توجد تسجيلات مطابقة للمرشحات المحددة')
+
+        started = time.perf_counter()
+        for _ in range(options['repeat']):
+            bulk = grade_statistics(course_ids, grades)
+        compute_time = (time.perf_counter() - started) / options['repeat']
+
+        self.stdout.write(self.style.SUCCESS(f'الطريقة المجمعة ({len(bulk)} مقرر، {course_ids.size} تسجيل):'))
+        self.stdout.write(f'  التحميل: {load_time * 1000:.1f} ms ({len(queries)} استعلام)')
+        self.stdout.write(f'  الحساب: {compute_time * 1000:.1f} ms')
+
+        per_course, elapsed, query_count = self.benchmark_per_course(enrollments, list(bulk))
+
+        self.stdout.write(self.style.SUCCESS('الطريقة السابقة (استعلام وحساب لكل مقرر):'))
+        self.stdout.write(f'  الزمن: {elapsed * 1000:.1f} ms ({query_count} استعلام)')
+        self.stdout.write(f'  التسريع: {elapsed / max(load_time + compute_time, 1e-9):.1f}x')
+
+        mismatched = [
+            course for course, expected in per_course.items()
+            if expected['graded_students'] and not np.isclose(
+                expected['average_grade'], bulk[course]['average_grade']
+            )
+        ]
+        if mismatched:
+            raise CommandError(f'نتائج مختلفة للمقررات: {mismatched[:10]}')
+        self.stdout.write(self.style.SUCCESS('النتائج متطابقة'))
+
+    def benchmark_per_course(self, enrollments, course_ids):
+        """الحساب السابق: قائمة درجات ودوال بايثون لكل مقرر"""
+        results = {}
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            for course_id in course_ids:
+                values = list(enrollments.filter(course_id=course_id).values_list('final_grade', flat=True))
+                results[course_id] = analyze_course_grades(
+                    [float(value) for value in values if value is not None], len(values)
+                )
+        return results, time.perf_counter() - started, len(queries)
@@ -0,0 +1,75 @@
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Avg
+from django.test.utils import CaptureQueriesContext
+
+from academic.models import Grade
+from reports.report_engine import REPORTS, ProgressThrottle
+from students.models import Student
+
+
+class Command(BaseCommand):
+    help = 'قياس زمن واستعلامات وذاكرة محرك التقارير الأكاديمية مقارنة بالحلقة لكل طالب'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--report',
+            default='student_performance',
+            choices=sorted(REPORTS),
+            help='نوع التقرير المقاس (افتراضي: student_performance)'
+        )
+
+        parser.add_argument(
+            '--legacy-sample',
+            type=int,
+            default=1000,
+            help='عدد الطلاب المقاسين بالطريقة القديمة ثم التقدير لكامل العدد (0 للتخطي)'
+        )
+
+    def handle(self, *args, **options):
+        definition = REPORTS[options['report']]
+        progress_calls = []
+        progress = ProgressThrottle(lambda current, total: progress_calls.append(current))
+
+        tracemalloc.start()
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            rows = sum(1 for _ in definition.rows({}, progress))
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        if not rows:
+            raise CommandError('لا توجد بيانات للتقرير في قاعدة البيانات')
+
+        self.stdout.write(self.style.SUCCESS(f'محرك التقارير ({definition.name}):'))
+        self.stdout.write(f'  الصفوف: {rows}')
+        self.stdout.write(f'  الزمن: {elapsed:.2f} s ({rows / elapsed:,.0f} صف/ث)')
+        self.stdout.write(f'  الاستعلامات: {len(queries)}')
+        self.stdout.write(f'  تحديثات التقدم: {len(progress_calls)}')
+        self.stdout.write(f'  ذروة الذاكرة: {peak / 1024 / 1024:.1f} MB')
+
+        if options['legacy_sample'] and definition.name == 'student_performance':
+            self.benchmark_legacy(options['legacy_sample'], rows)
+
+    def benchmark_legacy(self, sample, total):
+        """الحلقة السابقة: أربعة استعلامات وتحديث تقدم لكل طالب"""
+        students = list(Student.objects.filter(user__is_active=True)[:sample])
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            for student in students:
+                grades = Grade.objects.filter(enrollment__student=student)
+                if grades.exists():
+                    grades.aggregate(avg=Avg('points_earned'))
+                    grades.count()
+                    student.department.name_ar
+        elapsed = time.perf_counter() - started
+        scale = total / max(len(students), 1)
+
+        self.stdout.write(self.style.SUCCESS(f'الطريقة السابقة (عينة {len(students)} طالب):'))
+        self.stdout.write(f'  الزمن المقدر: {elapsed * scale:.1f} s')
+        self.stdout.write(f'  الاستعلامات المقدرة: {len(queries) * scale:,.0f}')
+        self.stdout.write(f'  تحديثات التقدم: {total}')
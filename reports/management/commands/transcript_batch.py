@@ -0,0 +1,53 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from reports.outputs import report_output_path
+from reports.transcripts import TRANSCRIPT_WORKERS, cohort_students, generate_batch_transcripts
+
+
+class Command(BaseCommand):
+    help = 'إنتاج كشوف درجات دفعة كاملة في ملف ZIP وقياس معدل الكشوف في الثانية'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--department', type=int, help='معرف القسم')
+        parser.add_argument('--major', type=int, help='معرف التخصص')
+        parser.add_argument('--academic-year', help='السنة الأكاديمية للدفعة (مثال: 2022-2023)')
+        parser.add_argument('--limit', type=int, default=0, help='أقصى عدد من الطلاب (0 للجميع)')
+
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=getattr(settings, 'TRANSCRIPT_WORKERS', TRANSCRIPT_WORKERS),
+            help='عدد عمليات الرسم (1 للرسم داخل العملية نفسها)'
+        )
+
+        parser.add_argument('--output', help='مسار ملف ZIP الناتج')
+
+    def handle(self, *args, **options):
+        students = cohort_students(
+            department_id=options['department'],
+            major_id=options['major'],
+            academic_year=options['academic_year'],
+        )
+        if options['limit']:
+            pks = list(students.order_by('student_id_display').values_list('pk', flat=True)[:options['limit']])
+            students = students.filter(pk__in=pks)
+
+        total = students.count()
+        if not total:
+            raise CommandError('لا يوجد طلاب مطابقون للدفعة المحددة')
+
+        path = options['output'] or report_output_path(f"transcripts_{timezone.now():%Y%m%d_%H%M%S}.zip")
+        self.stdout.write(f'إنتاج {total} كشف باستخدام {options["workers"]} عملية...')
+
+        summary = generate_batch_transcripts(path, students=students, workers=options['workers'])
+
+        self.stdout.write(self.style.SUCCESS('تم إنتاج الكشوف:'))
+        self.stdout.write(f'  الملف: {summary["path"]}')
+        self.stdout.write(f'  الكشوف: {summary["transcripts"]}')
+        self.stdout.write(f'  الزمن: {summary["elapsed"]:.2f} s')
+        self.stdout.write(f'  المعدل: {summary["per_second"]:,.1f} كشف/ث')
+        self.stdout.write(f'  الحجم: {os.path.getsize(summary["path"]) / 1024 / 1024:.1f} MB')
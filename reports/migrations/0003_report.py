@@ -0,0 +1,39 @@
+# Generated by Django 4.2.16 on 2026-10-18 16:05
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reports", "0002_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Report",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("title", models.CharField(max_length=200)),
+                ("type", models.CharField(max_length=50)),
+                ("parameters", models.JSONField(blank=True, default=dict)),
+                ("data", models.JSONField(blank=True, default=dict)),
+                ("file_format", models.CharField(
+                    choices=[("json", "JSON"), ("xlsx", "Excel"), ("csv", "CSV"), ("pdf", "PDF")],
+                    default="json", max_length=10)),
+                ("file_path", models.CharField(blank=True, max_length=500)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("generated_by", models.ForeignKey(
+                    blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL,
+                    related_name="reports", to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                "db_table": "reports",
+                "ordering": ["-created_at"],
+                "indexes": [models.Index(fields=["type", "created_at"], name="report_type_created_idx")],
+            },
+        ),
+    ]
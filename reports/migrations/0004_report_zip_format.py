@@ -0,0 +1,20 @@
+# Generated by Django 4.2.16 on 2026-10-18 18:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reports", "0003_report"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="report",
+            name="file_format",
+            field=models.CharField(
+                choices=[("json", "JSON"), ("xlsx", "Excel"), ("csv", "CSV"), ("pdf", "PDF"), ("zip", "ZIP")],
+                default="json", max_length=10),
+        ),
+    ]
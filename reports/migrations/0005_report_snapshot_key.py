@@ -0,0 +1,25 @@
+# Generated by Django 4.2.16 on 2026-10-18 19:10
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reports", "0004_report_zip_format"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="report",
+            name="snapshot_key",
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name="report",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
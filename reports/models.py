@@ -76,3 +76,40 @@ class EnrollmentStatistics(models.Model):
     
     def __str__(self):
         return f"Enrollment Stats - {self.academic_year}/{self.semester}"
+
+
+class Report(models.Model):
+    """
+    A generated report run: its parameters, a summary of the result and the output file.
+    """
+    FILE_FORMAT_CHOICES = [
+        ('json', 'JSON'),
+        ('xlsx', 'Excel'),
+        ('csv', 'CSV'),
+        ('pdf', 'PDF'),
+        ('zip', 'ZIP'),
+    ]
+
+    title = models.CharField(max_length=200)
+    type = models.CharField(max_length=50)
+    parameters = models.JSONField(default=dict, blank=True)
+    data = models.JSONField(default=dict, blank=True)
+    file_format = models.CharField(max_length=10, choices=FILE_FORMAT_CHOICES, default='json')
+    file_path = models.CharField(max_length=500, blank=True)
+    generated_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True,
+                                    related_name='reports')
+    # Set on report snapshots: hash of (report type, parameters, data version)
+    snapshot_key = models.CharField(max_length=64, null=True, blank=True, unique=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'reports'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['type', 'created_at'], name='report_type_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.title} ({self.created_at:%Y-%m-%d %H:%M})"
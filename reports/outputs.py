@@ -0,0 +1,133 @@
+"""
+Report Output Storage
+Generated report files are written straight to private storage and handed
+out through signed, expiring download links instead of inline base64
+"""
+
+import mimetypes
+import os
+import tempfile
+import time
+import uuid
+from typing import BinaryIO, Callable, Dict, Optional
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core import signing
+from django.http import FileResponse, Http404, HttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import content_disposition_header
+
+DOWNLOAD_SALT = 'reports.download'
+DOWNLOAD_MAX_AGE = 60 * 60 * 24
+OUTPUT_MAX_AGE_DAYS = 7
+
+
+def output_root() -> str:
+    """Outside MEDIA_ROOT, which the web server exposes publicly"""
+    return str(getattr(settings, 'REPORT_OUTPUT_ROOT', os.path.join(settings.BASE_DIR, 'private', 'reports')))
+
+
+def report_output_path(filename: str) -> str:
+    """A new path for an output file, in its own randomly named directory"""
+    directory = os.path.join(output_root(), timezone.now().strftime('%Y/%m/%d'), uuid.uuid4().hex)
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, os.path.basename(filename))
+
+
+def save_report_output(filename: str, content_type: str, write: Callable[[BinaryIO], object]) -> Dict:
+    """
+    Let write() stream the report into a file in storage and return its
+    metadata. The file appears under its final name only once complete.
+    """
+    path = report_output_path(filename)
+    handle, temporary = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.part')
+    try:
+        with os.fdopen(handle, 'wb') as output:
+            write(output)
+        os.replace(temporary, path)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+    return report_output_metadata(path, content_type)
+
+
+def report_output_metadata(path: str, content_type: Optional[str] = None) -> Dict:
+    """JSON-safe description of a stored output, small enough for task results"""
+    token = download_token(path)
+    return {
+        'success': True,
+        'filename': os.path.basename(path),
+        'content_type': content_type or _content_type(path),
+        'size': os.path.getsize(path),
+        'path': path,
+        'download_token': token,
+        'download_url': reverse('report-download', args=[token]),
+    }
+
+
+def download_token(path: str) -> str:
+    return signing.dumps(os.path.relpath(path, output_root()), salt=DOWNLOAD_SALT)
+
+
+def resolve_download_token(token: str) -> str:
+    """Absolute path of a stored output; Http404 for bad, expired or foreign tokens"""
+    max_age = getattr(settings, 'REPORT_DOWNLOAD_MAX_AGE', DOWNLOAD_MAX_AGE)
+    try:
+        relative = signing.loads(token, salt=DOWNLOAD_SALT, max_age=max_age)
+    except signing.BadSignature:
+        raise Http404("Invalid or expired download link")
+
+    root = os.path.realpath(output_root())
+    path = os.path.realpath(os.path.join(root, relative))
+    if os.path.commonpath([root, path]) != root or not os.path.isfile(path):
+        raise Http404("Report file not found")
+    return path
+
+
+def _content_type(path: str) -> str:
+    return mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+
+def report_download_response(token: str) -> HttpResponse:
+    """
+    Serve a stored output. With REPORT_X_ACCEL_REDIRECT_PREFIX set, nginx
+    sends the file from an internal location and the worker returns at once.
+    """
+    path = resolve_download_token(token)
+    filename = os.path.basename(path)
+    prefix = getattr(settings, 'REPORT_X_ACCEL_REDIRECT_PREFIX', '')
+
+    if prefix:
+        relative = os.path.relpath(path, os.path.realpath(output_root()))
+        response = HttpResponse(content_type=_content_type(path))
+        response['X-Accel-Redirect'] = f"{prefix.rstrip('/')}/{quote(relative.replace(os.sep, '/'))}"
+        response['Content-Disposition'] = content_disposition_header(True, filename)
+        return response
+
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=filename,
+                        content_type=_content_type(path))
+
+
+def prune_report_outputs(max_age_days: int = OUTPUT_MAX_AGE_DAYS) -> int:
+    """Remove outputs older than max_age_days and their empty directories; returns files removed"""
+    cutoff = time.time() - max_age_days * 86400
+    removed = 0
+    for root, directories, files in os.walk(output_root(), topdown=False):
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                if os.stat(path).st_mtime < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except FileNotFoundError:
+                continue
+        for name in directories:
+            try:
+                os.rmdir(os.path.join(root, name))
+            except OSError:
+                # Not empty
+                continue
+    return removed
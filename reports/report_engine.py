@@ -0,0 +1,212 @@
+"""
+Academic Report Engine
+Each report is one grouped query whose rows are streamed into the output
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from django.db.models import Avg, Count, F, FloatField, Q, QuerySet, Value
+from django.db.models.functions import Concat, NullIf
+
+from academic.models import Grade
+from courses.models import Course
+from .exports import Column
+
+REPORT_CHUNK_SIZE = 2000
+PROGRESS_INTERVAL = 2.0
+PASS_PERCENTAGE = 60
+
+
+def grade_percentage(prefix: str = ''):
+    """Grade percentage as a SQL expression; NULL when nothing is possible"""
+    return (F(f'{prefix}points_earned') * 100.0
+            / NullIf(F(f'{prefix}points_possible'), Value(0)))
+
+
+def passed_grade(prefix: str = '') -> Q:
+    return Q(**{
+        f'{prefix}points_possible__gt': 0,
+        f'{prefix}points_earned__gte': F(f'{prefix}points_possible') * (PASS_PERCENTAGE / 100),
+    })
+
+
+def _rate(part, whole) -> float:
+    return round(part * 100 / whole, 2) if whole else 0
+
+
+@dataclass(frozen=True)
+class ReportDefinition:
+    """A report type: its output columns, grouped query and row formatter"""
+    name: str
+    title: str
+    sheet: str
+    columns: Tuple[Column, ...]
+    query: Callable[[Dict], QuerySet]
+    format_row: Callable[[Dict], Dict]
+
+    def rows(self, parameters: Optional[Dict] = None, progress: Optional['ProgressThrottle'] = None
+             ) -> Iterator[Dict]:
+        """
+        Stream formatted rows from a server-side cursor. When a progress
+        throttle is given the total is counted first (one extra query).
+        """
+        queryset = self.query(parameters or {})
+        if progress is not None:
+            progress.total = queryset.count()
+        for current, values in enumerate(queryset.iterator(chunk_size=REPORT_CHUNK_SIZE), 1):
+            yield self.format_row(values)
+            if progress is not None:
+                progress(current)
+        if progress is not None:
+            progress.finish()
+
+
+class ProgressThrottle:
+    """
+    Forwards progress to a callback (e.g. Celery update_state) at most once
+    per interval instead of once per row.
+    """
+
+    def __init__(self, callback: Callable[[int, int], None], interval: float = PROGRESS_INTERVAL,
+                 clock: Callable[[], float] = time.monotonic):
+        self.callback = callback
+        self.interval = interval
+        self.clock = clock
+        self.total = 0
+        self.current = 0
+        self._last = clock()
+
+    def __call__(self, current: int):
+        self.current = current
+        now = self.clock()
+        if now - self._last >= self.interval:
+            self._last = now
+            self.callback(current, self.total)
+
+    def finish(self):
+        self.callback(self.current, self.total)
+
+
+# ----------------------------------------------------------------------
+# Student performance
+# ----------------------------------------------------------------------
+
+def student_performance_query(parameters: Dict) -> QuerySet:
+    """One row per active student with grades: averages over Grade joined to Enrollment"""
+    grades = Grade.objects.filter(enrollment__student__user__is_active=True)
+    if parameters.get('department_id'):
+        grades = grades.filter(enrollment__student__department_id=parameters['department_id'])
+    if parameters.get('semester_id'):
+        grades = grades.filter(enrollment__semester_id=parameters['semester_id'])
+
+    return grades.order_by().values(
+        student_id=F('enrollment__student__student_id_display'),
+        student_name=Concat('enrollment__student__user__first_name', Value(' '),
+                            'enrollment__student__user__last_name'),
+        department=F('enrollment__student__department__name_ar'),
+        gpa=F('enrollment__student__cumulative_gpa'),
+    ).annotate(
+        average_grade=Avg(grade_percentage(), output_field=FloatField()),
+        total_courses=Count('enrollment', distinct=True),
+        graded_items=Count('id'),
+        passed_items=Count('id', filter=passed_grade()),
+    ).order_by('student_id')
+
+
+def format_student_row(values: Dict) -> Dict:
+    return {
+        'student_id': values['student_id'],
+        'student_name': values['student_name'].strip(),
+        'department': values['department'] or 'N/A',
+        'gpa': float(values['gpa'] or 0),
+        'average_grade': round(values['average_grade'] or 0, 2),
+        'total_courses': values['total_courses'],
+        'pass_rate': _rate(values['passed_items'], values['graded_items']),
+    }
+
+
+# ----------------------------------------------------------------------
+# Course statistics
+# ----------------------------------------------------------------------
+
+def course_statistics_query(parameters: Dict) -> QuerySet:
+    """
+    One row per active course, including courses with no enrollments.
+    Course is LEFT JOINed to Enrollment and Grade, so enrollment counts are distinct.
+    """
+    courses = Course.objects.filter(is_active=True)
+    if parameters.get('department_id'):
+        courses = courses.filter(department_id=parameters['department_id'])
+
+    enrollment_filter = Q()
+    if parameters.get('semester_id'):
+        enrollment_filter = Q(enrollments__semester_id=parameters['semester_id'])
+
+    return courses.order_by().values(
+        course_code=F('code'),
+        course_name=F('name_ar'),
+    ).annotate(
+        enrolled_students=Count('enrollments', filter=enrollment_filter, distinct=True),
+        completed_students=Count('enrollments', distinct=True,
+                                 filter=enrollment_filter & Q(enrollments__status='COMPLETED')),
+        average_grade=Avg(grade_percentage('enrollments__grades__'),
+                          filter=enrollment_filter, output_field=FloatField()),
+        graded_items=Count('enrollments__grades', filter=enrollment_filter),
+        passed_items=Count('enrollments__grades',
+                           filter=enrollment_filter & passed_grade('enrollments__grades__')),
+    ).order_by('course_code')
+
+
+def format_course_row(values: Dict) -> Dict:
+    return {
+        'course_code': values['course_code'],
+        'course_name': values['course_name'],
+        'enrolled_students': values['enrolled_students'],
+        'completed_students': values['completed_students'],
+        'average_grade': round(values['average_grade'] or 0, 2),
+        'pass_rate': _rate(values['passed_items'], values['graded_items']),
+    }
+
+
+REPORTS = {
+    'student_performance': ReportDefinition(
+        name='student_performance',
+        title='Student Performance Report',
+        sheet='Students',
+        columns=(
+            Column('student_id', 'Student ID'),
+            Column('student_name', 'Student Name', width=30),
+            Column('department', 'Department', width=30),
+            Column('gpa', 'GPA', 'float'),
+            Column('average_grade', 'Average Grade', 'float'),
+            Column('total_courses', 'Courses', 'int'),
+            Column('pass_rate', 'Pass Rate (%)', 'percent'),
+        ),
+        query=student_performance_query,
+        format_row=format_student_row,
+    ),
+    'course_statistics': ReportDefinition(
+        name='course_statistics',
+        title='Course Statistics Report',
+        sheet='Courses',
+        columns=(
+            Column('course_code', 'Course Code'),
+            Column('course_name', 'Course Name', width=40),
+            Column('enrolled_students', 'Enrolled', 'int'),
+            Column('completed_students', 'Completed', 'int'),
+            Column('average_grade', 'Average Grade', 'float'),
+            Column('pass_rate', 'Pass Rate (%)', 'percent'),
+        ),
+        query=course_statistics_query,
+        format_row=format_course_row,
+    ),
+}
+
+
+def get_report_definition(report_type: str) -> ReportDefinition:
+    try:
+        return REPORTS[report_type]
+    except KeyError:
+        raise ValueError(f"Unknown report type: {report_type}")
@@ -0,0 +1,316 @@
+"""
+Report Snapshots
+Computed report datasets are stored on the Report table in partitions that
+remember the high-water marks of their source rows. A request serves the
+stored dataset and recomputes only the partitions whose sources changed
+"""
+
+import hashlib
+import json
+import logging
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from django.db.models import Count, Max, QuerySet, Sum
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_TYPE_PREFIX = 'snapshot:'
+# Enrollments that do not count towards course results
+INACTIVE_ENROLLMENT_STATUSES = ('DROPPED', 'WAITLISTED')
+
+
+def _mark(values: Dict) -> List:
+    latest = values['latest']
+    return [latest.isoformat() if latest else None, values['rows']]
+
+
+@dataclass(frozen=True)
+class SnapshotSource:
+    """
+    An input table of a snapshot. Its rows are grouped into partitions by
+    partition_field; without one the whole source is a single partition
+    named after the source.
+    """
+    name: str
+    queryset: Callable[[Dict], QuerySet]
+    partition_field: Optional[str] = None
+    updated_field: str = 'updated_at'
+
+    def watermarks(self, parameters: Dict) -> Dict[str, List]:
+        """
+        [latest change, row count] per partition in one grouped query.
+        The row count catches deletions, which leave no newer timestamp.
+        """
+        rows = self.queryset(parameters).order_by()
+        if self.partition_field is None:
+            return {self.name: _mark(rows.aggregate(latest=Max(self.updated_field), rows=Count('pk')))}
+
+        grouped = rows.values(self.partition_field).annotate(
+            latest=Max(self.updated_field), rows=Count('pk')
+        )
+        return {str(values[self.partition_field]): _mark(values) for values in grouped}
+
+
+@dataclass(frozen=True)
+class SnapshotDefinition:
+    """
+    A snapshot-backed report. compute builds the data of the given stale
+    partitions (in bulk); combine merges all partition data into the dataset.
+    Bump version when either changes so older snapshots are not served.
+    """
+    name: str
+    title: str
+    version: int
+    sources: Tuple[SnapshotSource, ...]
+    compute: Callable[[Dict, Sequence[str]], Dict[str, Dict]]
+    combine: Callable[[Dict, Dict[str, Dict]], Dict]
+
+    def key(self, parameters: Dict) -> str:
+        payload = json.dumps({'type': self.name, 'version': self.version, 'parameters': parameters},
+                             sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def watermarks(self, parameters: Dict) -> Dict[str, Dict[str, List]]:
+        """Marks of every current partition, by partition and source"""
+        marks = defaultdict(dict)
+        for source in self.sources:
+            for partition, mark in source.watermarks(parameters).items():
+                marks[partition][source.name] = mark
+        return dict(marks)
+
+
+@dataclass
+class Snapshot:
+    dataset: Dict
+    refreshed_at: str
+    refreshed: List[str]
+    reused: int
+    report_id: Optional[int] = None
+
+
+def get_snapshot(report_type: str, parameters: Optional[Dict] = None, force: bool = False) -> Snapshot:
+    """
+    The dataset of a report, served from its snapshot when no source changed.
+    Otherwise only new or changed partitions are recomputed and the snapshot
+    is saved again. force recomputes every partition.
+    """
+    from .models import Report
+
+    definition = get_snapshot_definition(report_type)
+    parameters = parameters or {}
+    key = definition.key(parameters)
+
+    report = Report.objects.filter(snapshot_key=key).first()
+    stored = {} if report is None or force else report.data.get('partitions', {})
+
+    # Marks are read before computing: a change racing with the refresh
+    # leaves an older mark behind and is picked up by the next request
+    current = definition.watermarks(parameters)
+    stale = [partition for partition, mark in current.items()
+             if stored.get(partition, {}).get('watermark') != mark]
+
+    if report is not None and not stale and set(stored) == set(current):
+        return Snapshot(report.data['dataset'], report.data['refreshed_at'], [], len(current), report.pk)
+
+    computed = definition.compute(parameters, stale) if stale else {}
+    partitions = {
+        partition: {
+            'watermark': mark,
+            'data': computed.get(partition, {}) if partition in stale else stored[partition]['data'],
+        }
+        for partition, mark in current.items()
+    }
+    dataset = definition.combine(parameters, {partition: value['data'] for partition, value in partitions.items()})
+    refreshed_at = timezone.now().isoformat()
+
+    report, _ = Report.objects.update_or_create(
+        snapshot_key=key,
+        defaults={
+            'title': definition.title,
+            'type': f'{SNAPSHOT_TYPE_PREFIX}{definition.name}',
+            'parameters': parameters,
+            'data': {'dataset': dataset, 'partitions': partitions, 'refreshed_at': refreshed_at},
+            'file_format': 'json',
+        }
+    )
+    logger.info(f"Snapshot {definition.name} refreshed {len(stale)} of {len(current)} partitions")
+    return Snapshot(dataset, refreshed_at, stale, len(current) - len(stale), report.pk)
+
+
+# ----------------------------------------------------------------------
+# Course performance
+# ----------------------------------------------------------------------
+
+def course_enrollments(parameters: Dict) -> QuerySet:
+    from academic.models import Enrollment
+    return Enrollment.objects.filter(
+        course_id=parameters['course_id'], semester_id=parameters['semester_id']
+    ).exclude(status__in=INACTIVE_ENROLLMENT_STATUSES)
+
+
+def compute_course_performance(parameters: Dict, partitions: Sequence[str]) -> Dict[str, Dict]:
+    from courses.models import Course
+    from .grade_statistics import course_statistics
+
+    # Parameters are stored as JSON, so the UUID pk arrives as a string
+    course_id = Course._meta.pk.to_python(parameters['course_id'])
+    statistics = course_statistics(enrollments=course_enrollments(parameters))
+    return {'enrollments': statistics.get(course_id, {'total_students': 0, 'graded_students': 0})}
+
+
+def combine_course_performance(parameters: Dict, partitions: Dict[str, Dict]) -> Dict:
+    return partitions.get('enrollments', {})
+
+
+# ----------------------------------------------------------------------
+# Enrollment analytics (one partition per course)
+# ----------------------------------------------------------------------
+
+def semester_enrollments(parameters: Dict) -> QuerySet:
+    from academic.models import Enrollment
+    return Enrollment.objects.filter(semester_id=parameters['semester_id'])
+
+
+def compute_enrollment_analytics(parameters: Dict, partitions: Sequence[str]) -> Dict[str, Dict]:
+    """Counts for the stale courses in three grouped queries"""
+    enrollments = semester_enrollments(parameters).filter(course_id__in=partitions).order_by()
+    data = {partition: {'college': None, 'total': 0, 'levels': [], 'statuses': []} for partition in partitions}
+
+    for values in enrollments.values('course_id', 'course__department__college__name_ar').annotate(count=Count('id')):
+        data[str(values['course_id'])].update(
+            college=values['course__department__college__name_ar'], total=values['count']
+        )
+    for values in enrollments.values('course_id', 'student__academic_level').annotate(count=Count('id')):
+        data[str(values['course_id'])]['levels'].append([values['student__academic_level'], values['count']])
+    for values in enrollments.values('course_id', 'status').annotate(count=Count('id')):
+        data[str(values['course_id'])]['statuses'].append([values['status'], values['count']])
+    return data
+
+
+def combine_enrollment_analytics(parameters: Dict, partitions: Dict[str, Dict]) -> Dict:
+    colleges, levels, statuses = Counter(), Counter(), Counter()
+    for data in partitions.values():
+        if not data:
+            # Course emptied between reading the marks and computing
+            continue
+        colleges[data['college']] += data['total']
+        levels.update(dict((level, count) for level, count in data['levels']))
+        statuses.update(dict((status, count) for status, count in data['statuses']))
+
+    total = sum(colleges.values())
+    return {
+        'total_enrollments': total,
+        'college_distribution': [{'course__department__college__name_ar': college, 'count': count}
+                                 for college, count in colleges.most_common()],
+        'level_distribution': [{'student__academic_level': level, 'count': levels[level]}
+                               for level in sorted(levels, key=lambda level: (level is None, level or 0))],
+        'status_distribution': [{'status': status, 'count': count} for status, count in statuses.items()],
+        'courses': len(partitions),
+        'average_enrollments_per_course': round(total / len(partitions), 2) if partitions else 0,
+    }
+
+
+# ----------------------------------------------------------------------
+# Student financial statement (payments and charges partitions)
+# ----------------------------------------------------------------------
+
+# Charges that are not owed
+VOID_FEE_STATUSES = ('WAIVED', 'CANCELLED')
+
+
+def student_payments(parameters: Dict) -> QuerySet:
+    from finance.models import Payment
+    return Payment.objects.filter(
+        student_account__student__student_id=parameters['student_id'],
+        academic_year__year=parameters['academic_year']
+    )
+
+
+def student_charges(parameters: Dict) -> QuerySet:
+    from finance.models import StudentFee
+    return StudentFee.objects.filter(
+        student__student_id=parameters['student_id'],
+        academic_year=parameters['academic_year']
+    )
+
+
+def compute_financial_statement(parameters: Dict, partitions: Sequence[str]) -> Dict[str, Dict]:
+    from finance.models import Payment
+
+    data = {}
+    if 'payments' in partitions:
+        methods, statuses = dict(Payment.PAYMENT_METHODS), dict(Payment.PAYMENT_STATUS)
+        payments = student_payments(parameters)
+        completed = payments.filter(status='COMPLETED').aggregate(total=Sum('amount'))['total']
+        data['payments'] = {
+            'total': str(completed or 0),
+            'rows': [
+                {
+                    'date': payment_date.date().isoformat(),
+                    'amount': str(amount),
+                    'method': methods.get(method, method),
+                    'status': statuses.get(status, status),
+                    'reference': reference,
+                }
+                for payment_date, amount, method, status, reference in payments.order_by('-payment_date').values_list(
+                    'payment_date', 'amount', 'payment_method', 'status', 'reference_number'
+                )
+            ],
+        }
+    if 'charges' in partitions:
+        charges = student_charges(parameters).exclude(status__in=VOID_FEE_STATUSES)
+        data['charges'] = {'total': str(charges.aggregate(total=Sum('total_amount'))['total'] or 0)}
+    return data
+
+
+def combine_financial_statement(parameters: Dict, partitions: Dict[str, Dict]) -> Dict:
+    total_fees = Decimal(partitions['charges']['total'])
+    total_payments = Decimal(partitions['payments']['total'])
+    return {
+        'total_fees': str(total_fees),
+        'total_payments': str(total_payments),
+        'balance': str(total_fees - total_payments),
+        'payments': partitions['payments']['rows'],
+    }
+
+
+SNAPSHOTS = {
+    'course_performance': SnapshotDefinition(
+        name='course_performance',
+        title='Course Performance Snapshot',
+        version=2,
+        sources=(SnapshotSource('enrollments', course_enrollments),),
+        compute=compute_course_performance,
+        combine=combine_course_performance,
+    ),
+    'enrollment_analytics': SnapshotDefinition(
+        name='enrollment_analytics',
+        title='Enrollment Analytics Snapshot',
+        version=1,
+        sources=(SnapshotSource('enrollments', semester_enrollments, partition_field='course_id'),),
+        compute=compute_enrollment_analytics,
+        combine=combine_enrollment_analytics,
+    ),
+    'financial_statement': SnapshotDefinition(
+        name='financial_statement',
+        title='Student Financial Statement Snapshot',
+        version=1,
+        sources=(
+            SnapshotSource('payments', student_payments),
+            SnapshotSource('charges', student_charges),
+        ),
+        compute=compute_financial_statement,
+        combine=combine_financial_statement,
+    ),
+}
+
+
+def get_snapshot_definition(report_type: str) -> SnapshotDefinition:
+    try:
+        return SNAPSHOTS[report_type]
+    except KeyError:
+        raise ValueError(f"Unknown snapshot report: {report_type}")
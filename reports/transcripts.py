@@ -0,0 +1,291 @@
+"""
+Batch Transcript Generation
+A cohort's transcripts are loaded with a few bulk queries, rendered to PDF
+in worker processes and streamed into a ZIP archive on disk
+"""
+
+import io
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+import zipfile
+from bisect import bisect_right
+from collections import defaultdict
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from itertools import chain, islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.db.models import QuerySet
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+TRANSCRIPT_CHUNK_SIZE = 500
+TRANSCRIPT_BATCH_SIZE = 25
+TRANSCRIPT_WORKERS = 4
+# Enrollments that never appear on a transcript
+EXCLUDED_STATUSES = ('DROPPED', 'WAITLISTED')
+
+
+@dataclass(frozen=True)
+class TranscriptRow:
+    course_name: str
+    course_code: str
+    credit_hours: int
+    grade: Optional[float]
+    letter_grade: str
+    semester: str
+
+
+@dataclass(frozen=True)
+class Transcript:
+    """Plain, picklable transcript data for one student"""
+    student_id: str
+    name: str
+    major: str
+    gpa: float
+    completed_hours: int
+    issued: str
+    rows: Tuple[TranscriptRow, ...] = ()
+
+    @property
+    def filename(self) -> str:
+        return f"transcript_{self.student_id}.pdf"
+
+
+class GradeScaleLookup:
+    """Letter grades by percentage from the grading scale, loaded once"""
+
+    def __init__(self, bands: Iterable[Tuple[float, str]]):
+        bands = sorted((float(minimum), letter) for minimum, letter in bands)
+        self._minimums = [minimum for minimum, _ in bands]
+        self._letters = [letter for _, letter in bands]
+
+    @classmethod
+    def load(cls) -> 'GradeScaleLookup':
+        from academic.models import GradeScale
+        return cls(GradeScale.objects.values_list('min_percentage', 'letter_grade'))
+
+    def letter(self, percentage: Optional[float]) -> str:
+        if percentage is None:
+            return ''
+        index = bisect_right(self._minimums, percentage) - 1
+        return self._letters[index] if index >= 0 else ''
+
+
+def cohort_students(department_id=None, major_id=None, academic_year: Optional[str] = None,
+                    student_ids: Optional[Sequence] = None) -> QuerySet:
+    """Student profiles of a cohort, optionally narrowed to explicit student numbers"""
+    from students.models import StudentProfile
+
+    students = StudentProfile.objects.all()
+    if department_id:
+        students = students.filter(department_id=department_id)
+    if major_id:
+        students = students.filter(major_id=major_id)
+    if academic_year:
+        students = students.filter(academic_year=academic_year)
+    if student_ids:
+        students = students.filter(student_id_display__in=student_ids)
+    return students
+
+
+def _chunks(iterable: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def load_transcripts(students: QuerySet, chunk_size: int = TRANSCRIPT_CHUNK_SIZE,
+                     scale: Optional[GradeScaleLookup] = None) -> Iterator[Transcript]:
+    """
+    Transcripts for the given student profiles in student number order.
+    Profiles are streamed and each chunk's enrollments come from one query,
+    so a cohort costs two queries per chunk instead of several per student.
+    """
+    from academic.models import Enrollment, Semester
+
+    scale = scale or GradeScaleLookup.load()
+    semester_names = dict(Semester.SEMESTER_CHOICES)
+    issued = timezone.now().strftime("%Y-%m-%d")
+
+    profiles = students.order_by('student_id_display').values_list(
+        'pk', 'student_id_display', 'user__first_name', 'user__last_name',
+        'major__name_ar', 'cumulative_gpa', 'completed_credit_hours'
+    )
+
+    for chunk in _chunks(profiles.iterator(chunk_size=chunk_size), chunk_size):
+        rows = defaultdict(list)
+        enrollments = Enrollment.objects.filter(
+            student_id__in=[profile[0] for profile in chunk]
+        ).exclude(status__in=EXCLUDED_STATUSES).order_by(
+            'student_id', '-semester__start_date', 'course__code'
+        ).values_list(
+            'student_id', 'course__name_ar', 'course__code', 'course__credit_hours',
+            'final_grade', 'semester__name', 'semester__academic_year__name'
+        )
+        for student_pk, course_name, code, credits, final_grade, semester, year in enrollments:
+            grade = float(final_grade) if final_grade is not None else None
+            rows[student_pk].append(TranscriptRow(
+                course_name=course_name,
+                course_code=code,
+                credit_hours=credits,
+                grade=grade,
+                letter_grade=scale.letter(grade),
+                semester=f"{semester_names.get(semester, semester)} {year}",
+            ))
+
+        for pk, student_id, first_name, last_name, major, gpa, hours in chunk:
+            yield Transcript(
+                student_id=student_id,
+                name=f"{first_name} {last_name}".strip(),
+                major=major or '',
+                gpa=float(gpa or 0),
+                completed_hours=hours or 0,
+                issued=issued,
+                rows=tuple(rows.get(pk, ())),
+            )
+
+
+# ----------------------------------------------------------------------
+# Rendering (runs in worker processes)
+# ----------------------------------------------------------------------
+
+_generator = None
+
+
+def _init_worker():
+    """Set up Django, fonts and styles once per worker process"""
+    import django
+    django.setup()
+    _get_generator()
+
+
+def _get_generator():
+    global _generator
+    if _generator is None:
+        from .advanced_reports import AcademicReportGenerator
+        _generator = AcademicReportGenerator()
+    return _generator
+
+
+def render_transcripts(transcripts: Sequence[Transcript]) -> List[Tuple[str, bytes]]:
+    """(filename, PDF bytes) for a batch of transcripts"""
+    generator = _get_generator()
+    rendered = []
+    for transcript in transcripts:
+        buffer = io.BytesIO()
+        generator.write_transcript_pdf(transcript, buffer)
+        rendered.append((transcript.filename, buffer.getvalue()))
+    return rendered
+
+
+class BatchTranscriptWriter:
+    """
+    Renders transcripts in a process pool and appends each finished batch
+    to a ZIP archive. Only a bounded number of batches is in flight, so
+    memory stays flat for any cohort size.
+    """
+
+    def __init__(self, workers: Optional[int] = None, batch_size: int = TRANSCRIPT_BATCH_SIZE):
+        self.workers = workers or getattr(settings, 'TRANSCRIPT_WORKERS', TRANSCRIPT_WORKERS)
+        self.batch_size = batch_size
+
+    def write(self, transcripts: Iterable[Transcript], path: str,
+              progress: Optional[Callable[[int], None]] = None) -> Dict:
+        """Write all transcripts into a ZIP at path; returns count, timing and throughput"""
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        handle, temporary = tempfile.mkstemp(dir=directory, suffix='.zip')
+        os.close(handle)
+
+        started = time.perf_counter()
+        written = 0
+        try:
+            # PDF page streams are already compressed by ReportLab
+            with zipfile.ZipFile(temporary, 'w', compression=zipfile.ZIP_STORED) as archive:
+                def add(rendered):
+                    nonlocal written
+                    for filename, content in rendered:
+                        archive.writestr(filename, content)
+                    written += len(rendered)
+                    if progress is not None:
+                        progress(written)
+
+                batches = _chunks(transcripts, self.batch_size)
+                for batch in self._render_parallel(batches, add):
+                    add(render_transcripts(batch))
+            os.replace(temporary, path)
+        except BaseException:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+
+        elapsed = time.perf_counter() - started
+        return {
+            'path': path,
+            'transcripts': written,
+            'elapsed': round(elapsed, 2),
+            'per_second': round(written / elapsed, 1) if elapsed else 0.0,
+            'workers': self.workers,
+        }
+
+    def _render_parallel(self, batches: Iterator[List[Transcript]], add) -> Iterable[List[Transcript]]:
+        """
+        Keep two batches per worker queued. Returns the batches still to be
+        rendered in-process: all of them when there is a single worker or
+        this is a daemonic process (a prefork Celery worker), or the
+        unfinished ones if the pool cannot be used.
+        """
+        if self.workers <= 1:
+            return batches
+        if multiprocessing.current_process().daemon:
+            logger.warning("Daemonic process cannot start a transcript pool, rendering in-process; "
+                           "route the task to the transcripts queue")
+            return batches
+
+        unfinished = {}
+        current = None
+        try:
+            with ProcessPoolExecutor(max_workers=self.workers,
+                                     mp_context=multiprocessing.get_context('spawn'),
+                                     initializer=_init_worker) as pool:
+                for current in batches:
+                    unfinished[pool.submit(render_transcripts, current)] = current
+                    current = None
+                    if len(unfinished) >= self.workers * 2:
+                        self._collect(unfinished, add, FIRST_COMPLETED)
+                self._collect(unfinished, add, ALL_COMPLETED)
+        except (AssertionError, BrokenProcessPool, OSError) as e:
+            logger.warning(f"Transcript process pool unavailable, rendering in-process: {e}")
+            retry = list(unfinished.values()) + ([current] if current is not None else [])
+            return chain(retry, batches)
+        return ()
+
+    @staticmethod
+    def _collect(unfinished: Dict, add, return_when):
+        done, _ = wait(unfinished, return_when=return_when)
+        for future in done:
+            rendered = future.result()
+            del unfinished[future]
+            add(rendered)
+
+
+def generate_batch_transcripts(path: str, students: Optional[QuerySet] = None,
+                               workers: Optional[int] = None,
+                               progress: Optional[Callable[[int], None]] = None, **cohort) -> Dict:
+    """
+    Write PDF transcripts for a cohort into a ZIP archive at path.
+    students defaults to cohort_students(**cohort).
+    """
+    if students is None:
+        students = cohort_students(**cohort)
+    return BatchTranscriptWriter(workers).write(load_transcripts(students), path, progress)
@@ -10,4 +10,7 @@ router = DefaultRouter()
 
 urlpatterns = [
     path('api/', include(router.urls)),
+    path('export/<str:report_type>/', views.export_academic_report, name='export-academic-report'),
+    path('course-statistics/', views.course_grade_statistics, name='course-grade-statistics'),
+    path('download/<str:token>/', views.download_report, name='report-download'),
 ]
@@ -2,16 +2,21 @@
 # إصلاح مشاكل الأداء وإضافة تحسينات للتقارير
 
 from rest_framework import viewsets, status
-from rest_framework.decorators import action
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from django.db.models import Count, Avg, Sum, Q
 from django.core.cache import cache
 from django.utils.decorators import method_decorator
 from django.views.decorators.cache import cache_page
+from django.views.decorators.http import require_GET
 from django.db import transaction
+from django.utils import timezone
 import logging
 
 from .models import StudentPerformanceReport, CourseAnalytics, EnrollmentStatistics
+from .exports import csv_response, xlsx_response
+from .outputs import report_download_response
+from .report_engine import get_report_definition
 from .serializers import (StudentPerformanceReportSerializer, CourseAnalyticsSerializer,
                           EnrollmentStatisticsSerializer)
 from students.permissions import IsAdminOrStaff
@@ -297,4 +302,66 @@ class EnrollmentStatisticsViewSet(viewsets.ModelViewSet):
             logger.info(f"Enrollment statistics created for semester: {stats.semester}")
         except Exception as e:
             logger.error(f"Failed to create enrollment statistics: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminOrStaff])
+def export_academic_report(request, report_type):
+    """
+    Stream an academic report as CSV (default) or XLSX.
+    Rows go from the database cursor to the client without being collected.
+    """
+    try:
+        definition = get_report_definition(report_type)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
+
+    parameters = {
+        key: request.query_params[key]
+        for key in ('department_id', 'semester_id')
+        if request.query_params.get(key)
+    }
+    export_format = request.query_params.get('export_format', 'csv')
+    timestamp = timezone.now().strftime('%Y%m%d_%H%M%S')
+
+    if export_format == 'xlsx':
+        return xlsx_response(
+            f'{report_type}_{timestamp}.xlsx',
+            {definition.sheet: (definition.columns, definition.rows(parameters))}
+        )
+    return csv_response(f'{report_type}_{timestamp}.csv', definition.columns, definition.rows(parameters))
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminOrStaff])
+def course_grade_statistics(request):
+    """
+    Grade statistics for every course matching semester_id, college_id and
+    department_id, computed together from a single query.
+    """
+    from courses.models import Course
+    from .grade_statistics import course_statistics
+
+    filters = {
+        key: request.query_params[key]
+        for key in ('semester_id', 'college_id', 'department_id')
+        if request.query_params.get(key)
+    }
+    statistics = course_statistics(**filters)
+    courses = Course.objects.filter(id__in=statistics).values_list('id', 'code', 'name_ar')
+
+    results = [
+        {'course_id': course_id, 'course_code': code, 'course_name': name, **statistics[course_id]}
+        for course_id, code, name in sorted(courses, key=lambda course: course[1])
+    ]
+    return Response({'count': len(results), 'results': results})
+
+
+@require_GET
+def download_report(request, token):
+    """
+    Download a generated report file. The signed, expiring token is the
+    credential, so links handed out by tasks work without a session.
+    """
+    return report_download_response(token)
@@ -334,6 +334,13 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Generated reports are kept outside MEDIA_ROOT and downloaded through signed,
+# expiring links. Behind nginx, set the prefix of its internal location so
+# files are sent with X-Accel-Redirect.
+REPORT_OUTPUT_ROOT = config('REPORT_OUTPUT_ROOT', default=str(BASE_DIR / 'private' / 'reports'))
+REPORT_DOWNLOAD_MAX_AGE = config('REPORT_DOWNLOAD_MAX_AGE', default=60 * 60 * 24, cast=int)
+REPORT_X_ACCEL_REDIRECT_PREFIX = config('REPORT_X_ACCEL_REDIRECT_PREFIX', default='')
+
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
 
@@ -437,6 +444,25 @@ if not DEBUG:
         'TIMEOUT': 300,
     }
 
+# =============================================================================
+# CHANNEL LAYERS (real-time notifications)
+# =============================================================================
+
+CHANNEL_LAYERS = {
+    'default': {
+        'BACKEND': 'channels.layers.InMemoryChannelLayer',
+    }
+}
+
+if not DEBUG:
+    CHANNEL_LAYERS['default'] = {
+        'BACKEND': 'channels_redis.core.RedisChannelLayer',
+        'CONFIG': {
+            'hosts': [config('CHANNEL_REDIS_URL', default='redis://127.0.0.1:6379/2')],
+            'capacity': 1500,
+        },
+    }
+
 # =============================================================================
 # SESSION CONFIGURATION
 # =============================================================================
@@ -566,6 +592,12 @@ CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
 
+# Batch transcripts render in a process pool, which prefork (daemonic)
+# workers cannot start; they run on a solo-pool worker for this queue
+CELERY_TASK_ROUTES = {
+    'university_system.tasks.generate_batch_transcripts_task': {'queue': 'transcripts'},
+}
+
 # =============================================================================
 # EMAIL CONFIGURATION - محسنة
 # =============================================================================
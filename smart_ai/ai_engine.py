@@ -3,19 +3,116 @@
 
 import numpy as np
 import pandas as pd
-from sklearn.ensemble import RandomForestRegressor, RandomForestClassifier
-from sklearn.neural_network import MLPRegressor, MLPClassifier
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler, LabelEncoder
-from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.metrics import accuracy_score, mean_squared_error, classification_report
-import joblib
 import json
+import logging
+import threading
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Tuple, Optional
 import warnings
 warnings.filterwarnings('ignore')
 
+logger = logging.getLogger(__name__)
+
+
+# مصانع النماذج: لا يُستورد scikit-learn ولا يُنشأ النموذج إلا عند أول استخدام
+def _grade_predictor():
+    from sklearn.ensemble import RandomForestRegressor
+    return RandomForestRegressor(n_estimators=100, max_depth=10, random_state=42)
+
+
+def _student_classifier():
+    from sklearn.ensemble import RandomForestClassifier
+    return RandomForestClassifier(n_estimators=100, max_depth=8, random_state=42)
+
+
+def _risk_detector():
+    from sklearn.neural_network import MLPClassifier
+    return MLPClassifier(hidden_layer_sizes=(100, 50), max_iter=500, random_state=42)
+
+
+def _recommendation_engine():
+    from sklearn.neural_network import MLPRegressor
+    return MLPRegressor(hidden_layer_sizes=(150, 100, 50), max_iter=500, random_state=42)
+
+
+def _student_clustering():
+    from sklearn.cluster import KMeans
+    return KMeans(n_clusters=5, random_state=42)
+
+
+def _standard_scaler():
+    from sklearn.preprocessing import StandardScaler
+    return StandardScaler()
+
+
+def _label_encoder():
+    from sklearn.preprocessing import LabelEncoder
+    return LabelEncoder()
+
+
+MODEL_FACTORIES = {
+    'grade_predictor': _grade_predictor,              # نموذج التنبؤ بالدرجات
+    'student_classifier': _student_classifier,        # نموذج تصنيف مستوى الطلاب
+    'risk_detector': _risk_detector,                  # نموذج كشف المخاطر الأكاديمية
+    'recommendation_engine': _recommendation_engine,  # نموذج التوصيات
+    'student_clustering': _student_clustering,        # نموذج تجميع الطلاب
+}
+SCALER_FACTORIES = {'standard': _standard_scaler}
+ENCODER_FACTORIES = {'label': _label_encoder}
+
+
+class LazyModelSet:
+    """
+    مجموعة نماذج تُنشأ عند أول وصول وتُشارك بين جميع الطلبات في العملية
+
+    إذا وُجد إصدار نشط مدرب في سجل النماذج يُستخدم بدلاً من النموذج الافتراضي
+    غير المدرب، ويتبع السجل تبديل الإصدارات تلقائياً.
+    """
+
+    def __init__(self, factories: Dict, use_registry: bool = False):
+        self._factories = factories
+        self._use_registry = use_registry
+        self._instances: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _trained(self, name: str):
+        if not self._use_registry:
+            return None
+        try:
+            from .model_registry import get_model_registry
+            loaded = get_model_registry().get_active(name)
+        except Exception as e:
+            logger.warning(f"Model registry unavailable for {name}: {e}")
+            return None
+        return loaded.estimator if loaded is not None else None
+
+    def __getitem__(self, name: str):
+        if name not in self._factories:
+            raise KeyError(name)
+
+        trained = self._trained(name)
+        if trained is not None:
+            return trained
+
+        instance = self._instances.get(name)
+        if instance is None:
+            with self._lock:
+                instance = self._instances.get(name)
+                if instance is None:
+                    instance = self._factories[name]()
+                    self._instances[name] = instance
+        return instance
+
+    def __contains__(self, name):
+        return name in self._factories
+
+    def keys(self):
+        return self._factories.keys()
+
+    def is_trained(self, name: str) -> bool:
+        return self._trained(name) is not None
+
+
 class UniversityAIEngine:
     """
     محرك الذكاء الاصطناعي الشامل للجامعة
@@ -23,54 +120,23 @@ class UniversityAIEngine:
     """
     
     def __init__(self):
-        self.models = {}
-        self.scalers = {}
-        self.encoders = {}
-        self.is_trained = False
-        
-        # إعداد النماذج
-        self._initialize_models()
-        
-    def _initialize_models(self):
-        """تهيئة نماذج التعلم الآلي"""
-        
-        # نموذج التنبؤ بالدرجات
-        self.models['grade_predictor'] = RandomForestRegressor(
-            n_estimators=100,
-            max_depth=10,
-            random_state=42
-        )
-        
-        # نموذج تصنيف مستوى الطلاب
-        self.models['student_classifier'] = RandomForestClassifier(
-            n_estimators=100,
-            max_depth=8,
-            random_state=42
-        )
-        
-        # نموذج كشف المخاطر الأكاديمية
-        self.models['risk_detector'] = MLPClassifier(
-            hidden_layer_sizes=(100, 50),
-            max_iter=500,
-            random_state=42
-        )
-        
-        # نموذج التوصيات
-        self.models['recommendation_engine'] = MLPRegressor(
-            hidden_layer_sizes=(150, 100, 50),
-            max_iter=500,
-            random_state=42
-        )
-        
-        # نموذج تجميع الطلاب
-        self.models['student_clustering'] = KMeans(
-            n_clusters=5,
-            random_state=42
-        )
-        
-        # معالجات البيانات
-        self.scalers['standard'] = StandardScaler()
-        self.encoders['label'] = LabelEncoder()
+        # النماذج ومعالجات البيانات تُنشأ عند أول استخدام
+        self.models = LazyModelSet(MODEL_FACTORIES, use_registry=True)
+        self.scalers = LazyModelSet(SCALER_FACTORIES)
+        self.encoders = LazyModelSet(ENCODER_FACTORIES)
+    
+    @property
+    def is_trained(self) -> bool:
+        return any(self.models.is_trained(name) for name in self.models.keys())
+    
+    def warm_up(self, names: Optional[List[str]] = None) -> Dict[str, bool]:
+        """تحميل النماذج مسبقاً (مثلاً بعد إنشاء عامل gunicorn) وإرجاع حالة التدريب لكل نموذج"""
+        
+        status = {}
+        for name in names or list(self.models.keys()):
+            self.models[name]
+            status[name] = self.models.is_trained(name)
+        return status
 
 class StudentPerformancePredictor:
     """نظام التنبؤ بأداء الطلاب"""
@@ -442,6 +508,23 @@ class SmartRecommendationEngine:
         
         return recommendations
 
+# القيم الافتراضية لمدخلات مخاطر التسرب
+DROPOUT_RISK_DEFAULTS = {
+    'current_gpa': 4.0,
+    'attendance_rate': 100.0,
+    'financial_difficulties': False,
+    'social_isolation': False,
+    'failed_semesters': 0,
+}
+
+DROPOUT_RISK_FACTOR_LABELS = [
+    'معدل تراكمي منخفض',
+    'ضعف في الحضور',
+    'صعوبات مالية',
+    'عزلة اجتماعية',
+    'فصول دراسية متعثرة',
+]
+
 class PredictiveAnalytics:
     """نظام التحليلات التنبؤية المتقدم"""
     
@@ -466,6 +549,7 @@ class PredictiveAnalytics:
             y = df['enrollment_count']
             
             # تدريب النموذج
+            from sklearn.ensemble import RandomForestRegressor
             model = RandomForestRegressor(n_estimators=100, random_state=42)
             model.fit(X, y)
             
@@ -507,27 +591,22 @@ class PredictiveAnalytics:
         at_risk_students = []
         
         try:
-            for student in student_data:
-                risk_score = self._calculate_dropout_risk_score(student)
-                
-                if risk_score > 0.7:  # عتبة عالية للخطر
-                    at_risk_students.append({
-                        'student_id': student.get('student_id'),
-                        'student_name': student.get('name'),
-                        'risk_score': round(risk_score, 2),
-                        'risk_level': 'high',
-                        'risk_factors': self._identify_risk_factors(student),
-                        'intervention_recommendations': self._suggest_interventions(student, risk_score)
-                    })
-                elif risk_score > 0.5:  # عتبة متوسطة للخطر
-                    at_risk_students.append({
-                        'student_id': student.get('student_id'),
-                        'student_name': student.get('name'),
-                        'risk_score': round(risk_score, 2),
-                        'risk_level': 'medium',
-                        'risk_factors': self._identify_risk_factors(student),
-                        'intervention_recommendations': self._suggest_interventions(student, risk_score)
-                    })
+            frame = self.dropout_risk_inputs(student_data)
+            scores = self.dropout_risk_scores(frame)
+            levels = self.dropout_risk_levels(scores)
+            factors = self.dropout_risk_factors(frame)
+            
+            for position in np.flatnonzero(levels != ''):
+                student = frame.iloc[position].to_dict()
+                risk_score = float(scores[position])
+                at_risk_students.append({
+                    'student_id': student.get('student_id'),
+                    'student_name': student.get('name'),
+                    'risk_score': round(risk_score, 2),
+                    'risk_level': levels[position],
+                    'risk_factors': factors[position],
+                    'intervention_recommendations': self._suggest_interventions(student, risk_score)
+                })
         
         except Exception as e:
             return [{
@@ -539,69 +618,61 @@ class PredictiveAnalytics:
         
         return at_risk_students
     
-    def _calculate_dropout_risk_score(self, student: Dict) -> float:
-        """حساب درجة مخاطر التسرب للطالب"""
-        
-        risk_factors = []
-        
-        # عوامل أكاديمية
-        gpa = student.get('current_gpa', 4.0)
-        if gpa < 2.0:
-            risk_factors.append(0.3)  # GPA منخفض جداً
-        elif gpa < 2.5:
-            risk_factors.append(0.2)  # GPA منخفض
-        
-        # عوامل الحضور
-        attendance = student.get('attendance_rate', 100)
-        if attendance < 60:
-            risk_factors.append(0.25)  # حضور ضعيف جداً
-        elif attendance < 80:
-            risk_factors.append(0.15)  # حضور ضعيف
-        
-        # عوامل مالية
-        if student.get('financial_difficulties', False):
-            risk_factors.append(0.2)
-        
-        # عوامل اجتماعية
-        if student.get('social_isolation', False):
-            risk_factors.append(0.15)
-        
-        # عدد الفصول المتعثر فيها
-        failed_semesters = student.get('failed_semesters', 0)
-        if failed_semesters > 2:
-            risk_factors.append(0.25)
-        elif failed_semesters > 0:
-            risk_factors.append(0.1)
-        
-        # حساب الدرجة الإجمالية
-        total_risk = min(1.0, sum(risk_factors))
-        
-        return total_risk
+    @staticmethod
+    def dropout_risk_inputs(student_data) -> pd.DataFrame:
+        """تحويل بيانات الطلاب إلى جدول مع القيم الافتراضية للحقول الناقصة"""
+        
+        frame = pd.DataFrame(student_data)
+        for column, default in DROPOUT_RISK_DEFAULTS.items():
+            if column not in frame:
+                frame[column] = default
+            frame[column] = frame[column].fillna(default)
+        return frame
     
-    def _identify_risk_factors(self, student: Dict) -> List[str]:
-        """تحديد عوامل المخاطر المحددة للطالب"""
-        
-        factors = []
-        
-        if student.get('current_gpa', 4.0) < 2.5:
-            factors.append('معدل تراكمي منخفض')
-        
-        if student.get('attendance_rate', 100) < 80:
-            factors.append('ضعف في الحضور')
-        
-        if student.get('financial_difficulties', False):
-            factors.append('صعوبات مالية')
-        
-        if student.get('social_isolation', False):
-            factors.append('عزلة اجتماعية')
-        
-        if student.get('failed_semesters', 0) > 0:
-            factors.append('فصول دراسية متعثرة')
+    @staticmethod
+    def dropout_risk_scores(frame: pd.DataFrame) -> np.ndarray:
+        """حساب درجة مخاطر التسرب لجميع الطلاب دفعة واحدة"""
+        
+        gpa = frame['current_gpa'].to_numpy(dtype=float)
+        attendance = frame['attendance_rate'].to_numpy(dtype=float)
+        failed_semesters = frame['failed_semesters'].to_numpy(dtype=float)
+        
+        total_risk = (
+            # عوامل أكاديمية
+            np.select([gpa < 2.0, gpa < 2.5], [0.3, 0.2], 0.0)
+            # عوامل الحضور
+            + np.select([attendance < 60, attendance < 80], [0.25, 0.15], 0.0)
+            # عوامل مالية واجتماعية
+            + frame['financial_difficulties'].to_numpy(dtype=bool) * 0.2
+            + frame['social_isolation'].to_numpy(dtype=bool) * 0.15
+            # عدد الفصول المتعثر فيها
+            + np.select([failed_semesters > 2, failed_semesters > 0], [0.25, 0.1], 0.0)
+        )
         
-        if not factors:
-            factors.append('عوامل عامة')
+        return np.minimum(1.0, total_risk)
+    
+    @staticmethod
+    def dropout_risk_levels(scores: np.ndarray) -> np.ndarray:
+        """مستوى الخطر لكل درجة: high فوق 0.7، medium فوق 0.5، وإلا فارغ"""
         
-        return factors
+        return np.select([scores > 0.7, scores > 0.5], ['high', 'medium'], '')
+    
+    @staticmethod
+    def dropout_risk_factors(frame: pd.DataFrame) -> List[List[str]]:
+        """تحديد عوامل المخاطر المحددة لكل طالب"""
+        
+        flags = np.column_stack([
+            frame['current_gpa'].to_numpy(dtype=float) < 2.5,
+            frame['attendance_rate'].to_numpy(dtype=float) < 80,
+            frame['financial_difficulties'].to_numpy(dtype=bool),
+            frame['social_isolation'].to_numpy(dtype=bool),
+            frame['failed_semesters'].to_numpy(dtype=float) > 0,
+        ])
+        
+        return [
+            [label for label, flag in zip(DROPOUT_RISK_FACTOR_LABELS, row) if flag] or ['عوامل عامة']
+            for row in flags
+        ]
     
     def _suggest_interventions(self, student: Dict, risk_score: float) -> List[Dict]:
         """اقتراح تدخلات للحد من مخاطر التسرب"""
@@ -656,8 +727,51 @@ class PredictiveAnalytics:
         
         return interventions
 
-# مثيل عام للمحرك
-university_ai = UniversityAIEngine()
-performance_predictor = StudentPerformancePredictor(university_ai)
-recommendation_engine = SmartRecommendationEngine(university_ai)
-predictive_analytics = PredictiveAnalytics(university_ai)
\ No newline at end of file
+# سجل المحرك المشترك داخل العملية
+_engine_lock = threading.RLock()
+_engine: Optional[UniversityAIEngine] = None
+_services: Dict[type, Any] = {}
+
+
+def get_ai_engine() -> UniversityAIEngine:
+    """محرك الذكاء الاصطناعي المشترك داخل العملية"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = UniversityAIEngine()
+    return _engine
+
+
+def _service(service_class):
+    service = _services.get(service_class)
+    if service is None:
+        with _engine_lock:
+            service = _services.get(service_class)
+            if service is None:
+                service = service_class(get_ai_engine())
+                _services[service_class] = service
+    return service
+
+
+def get_performance_predictor() -> StudentPerformancePredictor:
+    return _service(StudentPerformancePredictor)
+
+
+def get_recommendation_engine() -> SmartRecommendationEngine:
+    return _service(SmartRecommendationEngine)
+
+
+def get_predictive_analytics() -> PredictiveAnalytics:
+    return _service(PredictiveAnalytics)
+
+
+def warm_up(names: Optional[List[str]] = None) -> Dict[str, bool]:
+    """خطاف التحميل المسبق لعمال gunicorn (post_fork)"""
+    try:
+        status = get_ai_engine().warm_up(names)
+        logger.info(f"AI engine warmed up: {status}")
+        return status
+    except Exception as e:
+        logger.warning(f"AI engine warm-up failed: {e}")
+        return {}
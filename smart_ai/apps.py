@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class SmartAiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'smart_ai'
-    verbose_name = 'الذكاء الاصطناعي الذكي'
\ No newline at end of file
+    verbose_name = 'الذكاء الاصطناعي الذكي'
+
+    def ready(self):
+        import smart_ai.signals
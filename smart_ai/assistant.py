@@ -0,0 +1,314 @@
+# المسار السريع للمساعد الذكي: تصنيف النوايا وتخزين الإجابات وحفظ الرسائل على دفعات
+# Assistant fast path: compiled intent matcher, cached answers and batched chat persistence
+
+import atexit
+import logging
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.core.cache import cache
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------------------------------------------------
+# تطبيع النص العربي
+# ----------------------------------------------------------------------
+
+# التشكيل والألف الخنجرية وعلامات المصحف والتطويل
+_DIACRITICS = re.compile('[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]')
+_FOLDING = str.maketrans({
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ى': 'ي',
+    'ة': 'ه',
+})
+
+
+def normalize_arabic(text: str) -> str:
+    """إزالة التشكيل وتوحيد أشكال الألف والياء والتاء المربوطة"""
+    return _DIACRITICS.sub('', text or '').translate(_FOLDING).lower()
+
+
+# ----------------------------------------------------------------------
+# مصنف النوايا
+# ----------------------------------------------------------------------
+
+# النوايا بترتيب الأولوية عند تطابق أكثر من نية
+INTENT_KEYWORDS: List[Tuple[str, List[str]]] = [
+    ('grades_inquiry', ['درجة', 'درجات', 'نتيجة', 'نتائج', 'علامة', 'علامات']),
+    ('schedule_inquiry', ['جدول', 'محاضرة', 'محاضرات', 'وقت', 'موعد']),
+    ('attendance_inquiry', ['حضور', 'غياب', 'حاضر', 'غائب']),
+    ('financial_inquiry', ['رسوم', 'دفع', 'مالي', 'فاتورة', 'مبلغ']),
+    ('course_recommendation', ['توصية', 'اقتراح', 'مقرر', 'مادة', 'اختيار']),
+    ('academic_advice', ['نصيحة', 'إرشاد', 'مساعدة', 'خطة', 'تخطيط']),
+    ('general_info', ['معلومات', 'تعريف', 'شرح', 'كيف', 'ماذا', 'متى']),
+]
+DEFAULT_INTENT = 'general'
+
+
+class IntentMatcher:
+    """
+    آلة Aho-Corasick مبنية من الكلمات المفتاحية بعد التطبيع
+
+    تمر على الرسالة مرة واحدة وتعيد النية ذات الأولوية الأعلى بين جميع
+    الكلمات المطابقة (مطابقة جزئية داخل الكلمات كما في البحث السابق).
+    """
+
+    def __init__(self, intents: Iterable[Tuple[str, Iterable[str]]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Optional[int]] = [None]
+        self.intents: List[str] = []
+
+        for priority, (intent, keywords) in enumerate(intents):
+            self.intents.append(intent)
+            for keyword in keywords:
+                self._add(normalize_arabic(keyword), priority)
+        self._build_failure_links()
+
+    def _add(self, keyword: str, priority: int):
+        node = 0
+        for char in keyword:
+            if char not in self._goto[node]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(None)
+                self._goto[node][char] = len(self._goto) - 1
+            node = self._goto[node][char]
+        current = self._output[node]
+        self._output[node] = priority if current is None else min(current, priority)
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                if node:
+                    self._fail[child] = self._goto[fallback].get(char, 0)
+                # أفضل أولوية تنتهي عند هذه العقدة أو عند أي لاحقة لها
+                inherited = self._output[self._fail[child]]
+                if inherited is not None and (self._output[child] is None or inherited < self._output[child]):
+                    self._output[child] = inherited
+
+    def match(self, message: str) -> str:
+        node, best = 0, None
+        for char in normalize_arabic(message):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            found = self._output[node]
+            if found is not None and (best is None or found < best):
+                best = found
+                if best == 0:
+                    break
+        return self.intents[best] if best is not None else DEFAULT_INTENT
+
+
+_matcher: Optional[IntentMatcher] = None
+
+
+def classify_intent(message: str) -> str:
+    """تصنيف الرسالة بالمصنف المبني مرة واحدة لكل عملية"""
+    global _matcher
+    if _matcher is None:
+        _matcher = IntentMatcher(INTENT_KEYWORDS)
+    return _matcher.match(message)
+
+
+# ----------------------------------------------------------------------
+# تخزين الإجابات لكل مستخدم
+# ----------------------------------------------------------------------
+
+ANSWER_CACHE_KEY = 'smart_ai:assistant:{user_id}:{intent}:{language}'
+ANSWER_CACHE_TIMEOUT = 60 * 30
+# لغات الإجابة؛ أسماء المقررات تُعرض بلغة الطلب
+ANSWER_LANGUAGES = ('ar', 'en')
+DEFAULT_ANSWER_LANGUAGE = 'ar'
+
+# النوايا التي تتأثر بكل نوع من التغييرات
+DATA_INTENTS = {
+    'grades': ['grades_inquiry', 'academic_advice', 'course_recommendation'],
+    'schedule': ['schedule_inquiry', 'course_recommendation'],
+    'attendance': ['attendance_inquiry', 'academic_advice'],
+    'finance': ['financial_inquiry'],
+}
+
+
+def _answer_key(user_id, intent: str, language: str, version: str = '') -> str:
+    key = ANSWER_CACHE_KEY.format(user_id=user_id, intent=intent, language=language)
+    return f'{key}:{version}' if version else key
+
+
+def answer_language(language: Optional[str]) -> str:
+    """لغة الإجابة المطلوبة أو الافتراضية إن لم تكن مدعومة"""
+    return language if language in ANSWER_LANGUAGES else DEFAULT_ANSWER_LANGUAGE
+
+
+def cached_answer(user_id, intent: str, build: Callable[[], Dict],
+                  language: str = DEFAULT_ANSWER_LANGUAGE) -> Dict:
+    """إجابة النية المخزنة للمستخدم بلغة الطلب أو بناؤها وتخزينها"""
+    key = _answer_key(user_id, intent, language, answer_version(intent))
+    payload = cache.get(key)
+    if payload is None:
+        payload = build()
+        # لا تُخزن إجابات الأخطاء
+        if payload.get('confidence', 0) >= 0.5:
+            cache.set(key, payload, ANSWER_CACHE_TIMEOUT)
+    return payload
+
+
+CURRENT_SEMESTER_KEY = 'smart_ai:assistant:current_semester'
+CURRENT_SEMESTER_TIMEOUT = 60 * 5
+
+
+def current_semester_id():
+    """معرف الفصل الحالي مخزناً لبضع دقائق"""
+    semester_id = cache.get(CURRENT_SEMESTER_KEY)
+    if semester_id is None:
+        from academic.models import Semester
+        semester_id = Semester.objects.filter(is_current=True).values_list('id', flat=True).first() or ''
+        cache.set(CURRENT_SEMESTER_KEY, semester_id, CURRENT_SEMESTER_TIMEOUT)
+    return semester_id or None
+
+
+def answer_version(intent: str) -> str:
+    """
+    إصدار البيانات المشتركة التي تعتمد عليها الإجابة.
+    إجابة الجدول تتبع إصدار الجداول الدراسية للفصل الحالي فتسقط عند تعديل أي محاضرة.
+    """
+    if intent == 'schedule_inquiry':
+        semester_id = current_semester_id()
+        if semester_id:
+            from academic.timetable import timetable_version
+            return f'{semester_id}:{timetable_version(semester_id)}'
+    return ''
+
+
+def invalidate_assistant_answers(user_ids: Iterable, domain: str):
+    """حذف الإجابات المخزنة المتأثرة بتغيير بيانات المستخدمين"""
+    versions = {intent: answer_version(intent) for intent in DATA_INTENTS[domain]}
+    keys = [_answer_key(user_id, intent, language, version)
+            for user_id in user_ids if user_id
+            for intent, version in versions.items()
+            for language in ANSWER_LANGUAGES]
+    if keys:
+        cache.delete_many(keys)
+
+
+# ----------------------------------------------------------------------
+# حفظ الرسائل على دفعات
+# ----------------------------------------------------------------------
+
+CHAT_BATCH_SIZE = 50
+CHAT_FLUSH_SECONDS = 2.0
+
+
+class ChatMessageBuffer:
+    """
+    مخزن مؤقت لرسائل الدردشة داخل العملية يُكتب بـ bulk_create عند امتلاء
+    الدفعة أو مرور مهلة قصيرة، وعند إنهاء العملية.
+
+    المهلة يراقبها خيط خلفي يبدأ مع أول رسالة معلقة وينتهي عند فراغ المخزن،
+    فلا تبقى الرسائل غير مكتوبة على عامل خامل.
+    """
+
+    def __init__(self, batch_size: int = CHAT_BATCH_SIZE, flush_seconds: float = CHAT_FLUSH_SECONDS):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._pending = []
+        self._oldest = None
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Thread] = None
+
+    def add(self, messages: List):
+        with self._lock:
+            if not self._pending:
+                self._oldest = time.monotonic()
+            self._pending.extend(messages)
+            due = (len(self._pending) >= self.batch_size
+                   or time.monotonic() - self._oldest >= self.flush_seconds)
+            if not due and (self._timer is None or not self._timer.is_alive()):
+                self._timer = threading.Thread(target=self._flush_when_due, name='chat-buffer-flush',
+                                               daemon=True)
+                self._timer.start()
+        if due:
+            self.flush()
+
+    def _flush_when_due(self):
+        """كتابة الرسائل المعلقة بعد انقضاء مهلتها ثم التوقف عند فراغ المخزن"""
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._timer = None
+                    break
+                wait = self._oldest + self.flush_seconds - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            else:
+                self.flush()
+        # اتصالات قاعدة البيانات خاصة بكل خيط
+        connections.close_all()
+
+    def flush(self) -> int:
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return 0
+        from .models import ChatMessage
+        try:
+            ChatMessage.objects.bulk_create(pending, batch_size=self.batch_size)
+        except Exception as e:
+            logger.error(f"Failed to persist {len(pending)} chat messages: {e}")
+            return 0
+        return len(pending)
+
+
+chat_buffer = ChatMessageBuffer()
+atexit.register(chat_buffer.flush)
+
+_chatbot_ids: Dict[str, object] = {}
+
+
+def chatbot_id(chat_type: str):
+    """معرف روبوت الدردشة لنوع المحادثة (استعلام واحد لكل عملية)"""
+    from .models import AIChatBot
+
+    bot_type = (chat_type or '').upper()
+    if bot_type not in dict(AIChatBot.BOT_TYPES):
+        bot_type = 'STUDENT_SUPPORT'
+    if bot_type not in _chatbot_ids:
+        bot_id = AIChatBot.objects.filter(bot_type=bot_type).values_list('id', flat=True).first()
+        if bot_id is None:
+            bot_id = AIChatBot.objects.create(
+                name=bot_type.replace('_', ' ').title(),
+                bot_type=bot_type,
+                description=dict(AIChatBot.BOT_TYPES)[bot_type]
+            ).pk
+        _chatbot_ids[bot_type] = bot_id
+    return _chatbot_ids[bot_type]
+
+
+def record_exchange(user, chat_type: str, message: str, payload: Dict):
+    """إضافة رسالة المستخدم ورد المساعد للدفعة التالية وإرجاع معرف الرد"""
+    from .models import ChatMessage
+
+    bot = chatbot_id(chat_type)
+    conversation_id = f'{user.pk}:{chat_type}'
+    response_id = uuid.uuid4()
+    chat_buffer.add([
+        ChatMessage(chatbot_id=bot, user=user, sender_type='USER', message=message,
+                    conversation_id=conversation_id),
+        ChatMessage(id=response_id, chatbot_id=bot, user=user, sender_type='BOT',
+                    message=payload['response'], conversation_id=conversation_id,
+                    metadata={'intent': payload.get('intent', ''),
+                              'confidence': payload.get('confidence', 0.8)}),
+    ])
+    return response_id
@@ -0,0 +1,113 @@
+import resource
+import statistics
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+# الحدود العليا لميزات نموذج التنبؤ بالدرجات بترتيب _extract_features
+FEATURE_RANGES = [4.0, 100.0, 100.0, 100.0, 100.0, 40.0, 5.0, 21.0, 5.0, 1.0]
+
+
+def _rss_mb():
+    """أقصى ذاكرة مقيمة للعملية بالميغابايت"""
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss بالكيلوبايت على لينكس وبالبايت على macOS
+    return usage / (1024 * 1024) if sys.platform == 'darwin' else usage / 1024
+
+
+class Command(BaseCommand):
+    help = 'قياس زمن تحميل محرك الذكاء الاصطناعي وزمن الاستجابة والذاكرة المقيمة للعامل'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=200,
+            help='عدد طلبات التنبؤ المقاسة (افتراضي: 200)'
+        )
+
+        parser.add_argument(
+            '--no-warmup',
+            action='store_true',
+            help='قياس الطلب الأول دون تحميل مسبق للنماذج'
+        )
+
+        parser.add_argument(
+            '--synthetic',
+            type=int,
+            default=0,
+            metavar='SAMPLES',
+            help='تدريب نموذج الدرجات الافتراضي على بيانات مصطنعة بهذا العدد إذا لم يوجد إصدار مدرب'
+        )
+
+    def handle(self, *args, **options):
+        rss_start = _rss_mb()
+
+        started = time.perf_counter()
+        from smart_ai.ai_engine import get_performance_predictor, warm_up
+        import_ms = (time.perf_counter() - started) * 1000
+
+        warmup_ms = None
+        if not options['no_warmup']:
+            started = time.perf_counter()
+            status = warm_up()
+            warmup_ms = (time.perf_counter() - started) * 1000
+            trained = [name for name, is_trained in status.items() if is_trained]
+            self.stdout.write(f'النماذج المدربة من السجل: {", ".join(trained) or "لا يوجد"}')
+            if 'grade_predictor' not in trained:
+                self.fit_synthetic(options['synthetic'])
+        elif options['synthetic']:
+            self.fit_synthetic(options['synthetic'])
+
+        sample = {
+            'current_gpa': 3.1,
+            'attendance_rate': 88.0,
+            'assignment_completion': 92.0,
+            'participation_score': 75.0,
+            'previous_grades_avg': 81.0,
+            'study_hours_per_week': 12.0,
+        }
+
+        latencies = []
+        for _ in range(options['requests']):
+            started = time.perf_counter()
+            result = get_performance_predictor().predict_student_grade(sample)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if 'error' in result:
+                # لا نقيس مسار الاستثناء على أنه زمن تنبؤ
+                raise CommandError(f"{result['error']} - درّب النموذج أو استخدم --synthetic")
+
+        latencies_sorted = sorted(latencies)
+        p95 = latencies_sorted[int(len(latencies_sorted) * 0.95) - 1] if latencies_sorted else 0
+
+        self.stdout.write(self.style.SUCCESS('نتائج القياس:'))
+        self.stdout.write(f'  استيراد المحرك: {import_ms:.1f} ms')
+        if warmup_ms is not None:
+            self.stdout.write(f'  التحميل المسبق: {warmup_ms:.1f} ms')
+        if latencies:
+            self.stdout.write(f'  الطلب الأول: {latencies[0]:.2f} ms')
+            self.stdout.write(f'  الوسيط: {statistics.median(latencies):.2f} ms')
+            self.stdout.write(f'  p95: {p95:.2f} ms')
+        self.stdout.write(f'  الذاكرة المقيمة: {rss_start:.1f} MB -> {_rss_mb():.1f} MB')
+
+    def fit_synthetic(self, samples):
+        """تدريب النموذج الافتراضي المشترك على بيانات مصطنعة حتى يقيس الطلب predict فعلياً"""
+        if not samples:
+            raise CommandError('لا يوجد إصدار مدرب لنموذج grade_predictor - درّبه أو استخدم --synthetic')
+
+        import numpy as np
+        from smart_ai.ai_engine import get_ai_engine
+
+        rng = np.random.default_rng(42)
+        features = rng.random((samples, len(FEATURE_RANGES))) * FEATURE_RANGES
+        grades = np.clip(
+            features[:, 0] * 10 + features[:, 1] * 0.3 + features[:, 4] * 0.3 + rng.normal(0, 5, samples),
+            0, 100
+        )
+
+        started = time.perf_counter()
+        get_ai_engine().models['grade_predictor'].fit(features, grades)
+        self.stdout.write(
+            f'تدريب مصطنع على {samples} عينة: {(time.perf_counter() - started) * 1000:.0f} ms'
+        )
@@ -0,0 +1,224 @@
+# سجل نماذج التعلم الآلي بإصدارات وذاكرة تخزين داخل العملية
+# Versioned model registry with a warm in-process model cache
+
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import joblib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import AIModel
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_VERSION_CACHE_KEY = 'smart_ai:model_registry:{name}:active'
+MISSING_VERSION_TIMEOUT = 300
+MAX_REGISTER_ATTEMPTS = 5
+
+
+@dataclass
+class LoadedModel:
+    """نموذج محمّل في الذاكرة مع بيانات إصداره"""
+    name: str
+    version: int
+    record_id: str
+    estimator: Any
+    feature_columns: List[str]
+
+    def predict(self, features):
+        return self.estimator.predict(features)
+
+
+class ModelRegistry:
+    """
+    سجل إصدارات النماذج فوق جدول AIModel
+
+    كل إصدار صف مستقل برمز "<name>@v<version>" وملف joblib خاص به.
+    يُحمَّل الإصدار النشط مرة واحدة لكل عملية (بمصفوفات مربوطة بالذاكرة)
+    ويُستبدل تلقائياً عند تفعيل إصدار آخر من أي عملية.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or getattr(
+            settings, 'AI_MODEL_REGISTRY_DIR',
+            os.path.join(settings.MEDIA_ROOT, 'ml', 'models')
+        )
+        self._loaded: Dict[str, LoadedModel] = {}
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # الإصدارات
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _code(name: str, version: int) -> str:
+        return f'{name}@v{version}'
+
+    def versions(self, name: str):
+        """جميع إصدارات النموذج من الأحدث للأقدم"""
+        records = AIModel.objects.filter(code__startswith=f'{name}@v')
+        return sorted(records, key=lambda record: int(record.version), reverse=True)
+
+    def _next_version(self, name: str) -> int:
+        versions = AIModel.objects.filter(code__startswith=f'{name}@v').values_list('version', flat=True)
+        return max((int(version) for version in versions), default=0) + 1
+
+    def _path(self, name: str, version: int) -> str:
+        return os.path.join(self.directory, name, f'v{version}.joblib')
+
+    def _reserve_version(self, name: str, **fields) -> AIModel:
+        """
+        حجز رقم الإصدار بإدراج صفه قبل كتابة الملف؛ القيد الفريد على code
+        يمنع عمليتين من أخذ الرقم نفسه، وعند التعارض يُعاد الحساب
+        """
+        for _ in range(MAX_REGISTER_ATTEMPTS):
+            version = self._next_version(name)
+            try:
+                with transaction.atomic():
+                    return AIModel.objects.create(
+                        name_ar=name,
+                        name_en=name,
+                        code=self._code(name, version),
+                        description=f'{name} version {version}',
+                        version=str(version),
+                        status='TRAINING',
+                        model_file_path=self._path(name, version),
+                        **fields
+                    )
+            except IntegrityError:
+                logger.info(f"Model version {name}@v{version} taken concurrently, retrying")
+        raise RuntimeError(f"Could not allocate a version for model {name}")
+
+    def register(self, name: str, estimator, *, model_type: str = 'PREDICTION',
+                 algorithm: str = '', feature_columns: Optional[List[str]] = None,
+                 target_column: str = '', metrics: Optional[Dict] = None,
+                 training_data_size: int = 0, training_started=None,
+                 activate: bool = True) -> AIModel:
+        """حفظ نموذج مدرب كإصدار جديد وتفعيله اختيارياً"""
+        metrics = metrics or {}
+        record = self._reserve_version(
+            name,
+            model_type=model_type,
+            algorithm=algorithm or type(estimator).__name__,
+            parameters={'metrics': metrics},
+            hyperparameters=estimator.get_params() if hasattr(estimator, 'get_params') else {},
+            feature_columns=list(feature_columns or []),
+            target_column=target_column,
+            accuracy=metrics.get('accuracy'),
+            training_data_size=training_data_size,
+            training_start_date=training_started,
+        )
+        version = int(record.version)
+
+        path = record.model_file_path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + '.tmp'
+        try:
+            # بدون ضغط حتى يمكن ربط المصفوفات بالذاكرة عند التحميل
+            joblib.dump(estimator, tmp_path, compress=0)
+            os.replace(tmp_path, path)
+        except Exception:
+            record.delete()
+            raise
+
+        now = timezone.now()
+        record.training_end_date = now
+        record.last_retrained = now
+        record.status = 'TRAINED'
+        record.save(update_fields=['training_end_date', 'last_retrained', 'status', 'updated_at'])
+        logger.info(f"Registered model {record.code} ({training_data_size} samples)")
+
+        if activate:
+            self.activate(name, version)
+        return record
+
+    def activate(self, name: str, version: int):
+        """تفعيل إصدار وإبلاغ جميع العمليات بالتبديل"""
+        with transaction.atomic():
+            records = AIModel.objects.select_for_update().filter(code__startswith=f'{name}@v')
+            target = records.get(code=self._code(name, version))
+            records.filter(is_active=True).exclude(pk=target.pk).update(
+                is_active=False, status='INACTIVE'
+            )
+            AIModel.objects.filter(pk=target.pk).update(is_active=True, status='ACTIVE')
+
+        transaction.on_commit(
+            lambda: cache.set(ACTIVE_VERSION_CACHE_KEY.format(name=name), str(target.pk), None)
+        )
+        return target
+
+    # ------------------------------------------------------------------
+    # التحميل
+    # ------------------------------------------------------------------
+
+    def _active_record_id(self, name: str) -> Optional[str]:
+        key = ACTIVE_VERSION_CACHE_KEY.format(name=name)
+        record_id = cache.get(key)
+        if record_id is None:
+            record_id = AIModel.objects.filter(
+                code__startswith=f'{name}@v', is_active=True
+            ).values_list('pk', flat=True).first()
+            if record_id is None:
+                # تخزين الغياب لفترة قصيرة؛ التفعيل يستبدل القيمة فوراً
+                cache.set(key, '', MISSING_VERSION_TIMEOUT)
+                return None
+            record_id = str(record_id)
+            cache.set(key, record_id, None)
+        return record_id or None
+
+    def load_for_update(self, name: str):
+        """
+        نسخة خاصة قابلة للتعديل من النموذج النشط (بدون ربط بالذاكرة)
+        للتدريب التدريجي؛ None إذا لم يوجد إصدار نشط
+        """
+        record_id = self._active_record_id(name)
+        if record_id is None:
+            return None
+        record = AIModel.objects.get(pk=record_id)
+        return joblib.load(record.model_file_path)
+
+    def get_active(self, name: str) -> Optional[LoadedModel]:
+        """
+        النموذج النشط من ذاكرة العملية؛ يُعاد التحميل فقط عند تغيّر الإصدار النشط
+        """
+        record_id = self._active_record_id(name)
+        if record_id is None:
+            return None
+
+        loaded = self._loaded.get(name)
+        if loaded is not None and loaded.record_id == record_id:
+            return loaded
+
+        with self._lock:
+            loaded = self._loaded.get(name)
+            if loaded is None or loaded.record_id != record_id:
+                record = AIModel.objects.get(pk=record_id)
+                estimator = joblib.load(record.model_file_path, mmap_mode='r')
+                loaded = LoadedModel(
+                    name=name,
+                    version=int(record.version),
+                    record_id=record_id,
+                    estimator=estimator,
+                    feature_columns=list(record.feature_columns),
+                )
+                self._loaded[name] = loaded
+                logger.info(f"Loaded model {record.code} into worker cache")
+        return loaded
+
+
+_registry: Optional[ModelRegistry] = None
+
+
+def get_model_registry() -> ModelRegistry:
+    """سجل النماذج المشترك داخل العملية"""
+    global _registry
+    if _registry is None:
+        _registry = ModelRegistry()
+    return _registry
@@ -0,0 +1,43 @@
+# إشارات الذكاء الاصطناعي: إسقاط إجابات المساعد المخزنة عند تغير بيانات الطالب
+# Smart AI signals: drop cached assistant answers when student data changes
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from academic.models import Attendance, Enrollment, Grade
+from finance.models import StudentFee
+from .assistant import invalidate_assistant_answers
+
+
+def _invalidate_on_commit(user_id, *domains):
+    def invalidate():
+        for domain in domains:
+            invalidate_assistant_answers([user_id], domain)
+    transaction.on_commit(invalidate)
+
+
+@receiver(post_save, sender=Grade)
+@receiver(post_delete, sender=Grade)
+def invalidate_answers_on_grade_change(sender, instance, **kwargs):
+    """الدرجات تؤثر على إجابات الدرجات والإرشاد والتوصيات"""
+    _invalidate_on_commit(instance.enrollment.student_id, 'grades')
+
+
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+def invalidate_answers_on_enrollment_change(sender, instance, **kwargs):
+    """التسجيل والحذف يغيران الجدول، والدرجة النهائية تغير المعدل"""
+    _invalidate_on_commit(instance.student_id, 'schedule', 'grades')
+
+
+@receiver(post_save, sender=Attendance)
+@receiver(post_delete, sender=Attendance)
+def invalidate_answers_on_attendance_change(sender, instance, **kwargs):
+    _invalidate_on_commit(instance.enrollment.student_id, 'attendance')
+
+
+@receiver(post_save, sender=StudentFee)
+@receiver(post_delete, sender=StudentFee)
+def invalidate_answers_on_fee_change(sender, instance, **kwargs):
+    _invalidate_on_commit(instance.student_id, 'finance')
@@ -7,6 +7,7 @@ from django.contrib.auth.decorators import login_required
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from django.views import View
+from django.db.models import Count, F, Q
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
@@ -22,17 +23,43 @@ from .models import (
     ChatMessage, SmartRecommendation, PredictiveAnalytics, AISecurityAlert
 )
 from .ai_engine import (
-    university_ai, performance_predictor, recommendation_engine, predictive_analytics
+    get_performance_predictor, get_recommendation_engine, get_predictive_analytics
+)
+from .assistant import (
+    DEFAULT_ANSWER_LANGUAGE, answer_language, cached_answer, classify_intent, current_semester_id,
+    record_exchange
 )
 from students.models import Student, User
 from courses.models import Course
-from academic.models import Enrollment, Grade
+from academic.models import Attendance, Enrollment, Grade
+from academic.timetable import get_student_timetable
+
+# أسماء الأيام في ردود المساعد
+ARABIC_DAYS = {
+    'MONDAY': 'الاثنين',
+    'TUESDAY': 'الثلاثاء',
+    'WEDNESDAY': 'الأربعاء',
+    'THURSDAY': 'الخميس',
+    'FRIDAY': 'الجمعة',
+    'SATURDAY': 'السبت',
+    'SUNDAY': 'الأحد',
+}
+
 
 class AIStudentAssistantView(APIView):
     """مساعد الطلاب الذكي"""
     
     permission_classes = [IsAuthenticated]
     
+    # النوايا التي تعتمد إجاباتها على بيانات الطالب وتُخزن لكل مستخدم
+    CACHED_INTENTS = {
+        'grades_inquiry', 'schedule_inquiry', 'attendance_inquiry',
+        'financial_inquiry', 'course_recommendation', 'academic_advice',
+    }
+    
+    # لغة الطلب الحالي، من الطلب أو من تفضيل المستخدم
+    language = DEFAULT_ANSWER_LANGUAGE
+    
     def post(self, request):
         """معالجة طلبات المساعد الذكي"""
         
@@ -40,27 +67,15 @@ class AIStudentAssistantView(APIView):
             data = request.data
             message = data.get('message', '')
             chat_type = data.get('chat_type', 'student_support')
-            
-            # الحصول على أو إنشاء جلسة المحادثة
-            chatbot, created = AIChatBot.objects.get_or_create(
-                user=request.user,
-                chat_type=chat_type,
-                defaults={
-                    'session_id': f"{request.user.id}_{datetime.now().timestamp()}"
-                }
+            self.language = answer_language(
+                data.get('language') or getattr(request.user, 'language_preference', None)
             )
             
             # معالجة الرسالة وإنتاج الرد
             response_data = self._process_ai_message(message, chat_type, request.user)
             
-            # حفظ المحادثة
-            chat_message = ChatMessage.objects.create(
-                chatbot=chatbot,
-                message=message,
-                response=response_data['response'],
-                user_intent=response_data.get('intent', ''),
-                confidence_score=response_data.get('confidence', 0.8)
-            )
+            # حفظ المحادثة ضمن الدفعة التالية
+            message_id = record_exchange(request.user, chat_type, message, response_data)
             
             return Response({
                 'success': True,
@@ -68,7 +83,7 @@ class AIStudentAssistantView(APIView):
                 'intent': response_data.get('intent', ''),
                 'confidence': response_data.get('confidence', 0.8),
                 'suggestions': response_data.get('suggestions', []),
-                'message_id': chat_message.id
+                'message_id': message_id
             })
             
         except Exception as e:
@@ -80,106 +95,85 @@ class AIStudentAssistantView(APIView):
     def _process_ai_message(self, message: str, chat_type: str, user: User) -> Dict:
         """معالجة رسالة المساعد الذكي وإنتاج الرد"""
         
-        message_lower = message.lower()
-        
         # تحديد نوع الاستفسار
-        intent = self._classify_intent(message_lower, chat_type)
+        intent = classify_intent(message)
+        
+        handlers = {
+            'grades_inquiry': self._handle_grades_inquiry,
+            'schedule_inquiry': self._handle_schedule_inquiry,
+            'attendance_inquiry': self._handle_attendance_inquiry,
+            'financial_inquiry': self._handle_financial_inquiry,
+            'course_recommendation': self._handle_course_recommendation,
+            'academic_advice': self._handle_academic_advice,
+        }
         
-        # إنتاج الرد حسب النوع
-        if intent == 'grades_inquiry':
-            return self._handle_grades_inquiry(user)
-        elif intent == 'schedule_inquiry':
-            return self._handle_schedule_inquiry(user)
-        elif intent == 'attendance_inquiry':
-            return self._handle_attendance_inquiry(user)
-        elif intent == 'financial_inquiry':
-            return self._handle_financial_inquiry(user)
-        elif intent == 'course_recommendation':
-            return self._handle_course_recommendation(user)
-        elif intent == 'academic_advice':
-            return self._handle_academic_advice(user)
+        # إنتاج الرد حسب النوع، من الذاكرة المؤقتة إن وُجد
+        if intent in self.CACHED_INTENTS:
+            return cached_answer(user.pk, intent, lambda: handlers[intent](user), self.language)
         elif intent == 'general_info':
             return self._handle_general_info(message, user)
         else:
             return self._handle_general_response(message, user)
     
-    def _classify_intent(self, message: str, chat_type: str) -> str:
-        """تصنيف نوع الاستفسار"""
-        
-        # كلمات مفتاحية للدرجات
-        if any(word in message for word in ['درجة', 'درجات', 'نتيجة', 'نتائج', 'علامة', 'علامات']):
-            return 'grades_inquiry'
-        
-        # كلمات مفتاحية للجدول
-        if any(word in message for word in ['جدول', 'محاضرة', 'محاضرات', 'وقت', 'موعد']):
-            return 'schedule_inquiry'
-        
-        # كلمات مفتاحية للحضور
-        if any(word in message for word in ['حضور', 'غياب', 'حاضر', 'غائب']):
-            return 'attendance_inquiry'
-        
-        # كلمات مفتاحية للأمور المالية
-        if any(word in message for word in ['رسوم', 'دفع', 'مالي', 'فاتورة', 'مبلغ']):
-            return 'financial_inquiry'
-        
-        # كلمات مفتاحية للتوصيات
-        if any(word in message for word in ['توصية', 'اقتراح', 'مقرر', 'مادة', 'اختيار']):
-            return 'course_recommendation'
-        
-        # كلمات مفتاحية للإرشاد الأكاديمي
-        if any(word in message for word in ['نصيحة', 'إرشاد', 'مساعدة', 'خطة', 'تخطيط']):
-            return 'academic_advice'
-        
-        # معلومات عامة
-        if any(word in message for word in ['معلومات', 'تعريف', 'شرح', 'كيف', 'ماذا', 'متى']):
-            return 'general_info'
-        
-        return 'general'
+    def _student(self, user: User):
+        """الملف الأكاديمي للمستخدم إن كان طالباً"""
+        try:
+            return user.student_profile
+        except Student.DoesNotExist:
+            return None
+    
+    def _course_name_field(self) -> str:
+        """حقل اسم المقرر بلغة الطلب"""
+        return 'name_en' if self.language == 'en' else 'name_ar'
+    
+    def _no_student_data(self, intent: str) -> Dict:
+        return {
+            'response': 'عذراً، لا يمكنني الوصول إلى بيانات الطالب.',
+            'intent': intent,
+            'confidence': 0.5
+        }
     
     def _handle_grades_inquiry(self, user: User) -> Dict:
         """التعامل مع استفسارات الدرجات"""
         
         try:
-            if hasattr(user, 'student_profile'):
-                student = user.student_profile
+            student = self._student(user)
+            if student is None:
+                return self._no_student_data('grades_inquiry')
+            
+            # جلب الدرجات الحديثة
+            recent_grades = list(Grade.objects.filter(
+                enrollment__student=student
+            ).select_related('enrollment__course').order_by('-created_at')[:5])
+            
+            if recent_grades:
+                response = "إليك درجاتك الأخيرة:\n\n"
+                name_field = self._course_name_field()
+                for grade in recent_grades:
+                    course_name = getattr(grade.enrollment.course, name_field)
+                    response += f"• {course_name} - {grade.title}: {float(grade.percentage):.1f}/100\n"
                 
-                # جلب الدرجات الحديثة
-                recent_grades = Grade.objects.filter(
-                    enrollment__student=student
-                ).order_by('-created_at')[:5]
+                # حساب المعدل
+                avg_grade = sum(float(g.percentage) for g in recent_grades) / len(recent_grades)
+                response += f"\nمتوسط درجاتك الأخيرة: {avg_grade:.1f}"
                 
-                if recent_grades:
-                    response = "إليك درجاتك الأخيرة:\n\n"
-                    for grade in recent_grades:
-                        response += f"• {grade.enrollment.course.name}: {grade.total_grade}/100\n"
-                    
-                    # حساب المعدل
-                    avg_grade = sum(g.total_grade for g in recent_grades) / len(recent_grades)
-                    response += f"\nمتوسط درجاتك الأخيرة: {avg_grade:.1f}"
-                    
-                    # تقييم الأداء
-                    if avg_grade >= 85:
-                        response += "\n\n🎉 أداء ممتاز! استمر على هذا المستوى"
-                    elif avg_grade >= 75:
-                        response += "\n\n👍 أداء جيد، يمكنك تحسينه أكثر"
-                    else:
-                        response += "\n\n📚 يحتاج أداؤك لمزيد من التحسين، أنصحك بمراجعة المرشد الأكاديمي"
-                    
+                # تقييم الأداء
+                if avg_grade >= 85:
+                    response += "\n\n🎉 أداء ممتاز! استمر على هذا المستوى"
+                elif avg_grade >= 75:
+                    response += "\n\n👍 أداء جيد، يمكنك تحسينه أكثر"
                 else:
-                    response = "لا توجد درجات مسجلة حتى الآن."
+                    response += "\n\n📚 يحتاج أداؤك لمزيد من التحسين، أنصحك بمراجعة المرشد الأكاديمي"
                 
-                return {
-                    'response': response,
-                    'intent': 'grades_inquiry',
-                    'confidence': 0.9,
-                    'suggestions': ['عرض تفاصيل المقررات', 'نصائح لتحسين الدرجات', 'مقارنة مع الفصل السابق']
-                }
             else:
-                return {
-                    'response': 'عذراً، لا يمكنني الوصول إلى بيانات الطالب.',
-                    'intent': 'grades_inquiry',
-                    'confidence': 0.5
-                }
+                response = "لا توجد درجات مسجلة حتى الآن."
+            
+            return {
+                'response': response,
+                'intent': 'grades_inquiry',
+                'confidence': 0.9,
+                'suggestions': ['عرض تفاصيل المقررات', 'نصائح لتحسين الدرجات', 'مقارنة مع الفصل السابق']
+            }
                 
         except Exception as e:
             return {
@@ -192,52 +186,55 @@ class AIStudentAssistantView(APIView):
         """التعامل مع استفسارات الجدول الدراسي"""
         
         try:
-            if hasattr(user, 'student_profile'):
-                student = user.student_profile
+            student = self._student(user)
+            if student is None:
+                return self._no_student_data('schedule_inquiry')
+            
+            semester_id = current_semester_id()
+            enrollments = list(Enrollment.objects.filter(
+                student=student,
+                semester_id=semester_id,
+                status='ENROLLED'
+            ).values_list('course__code', f'course__{self._course_name_field()}', 'course__credit_hours'))
+            
+            if enrollments:
+                # المحاضرات من الجدول المحسوب مسبقاً للطالب
+                sessions = {}
+                for session in get_student_timetable(student.pk, semester_id).ordered_sessions():
+                    sessions.setdefault(session.course_code, []).append(session)
                 
-                # جلب المقررات المسجلة للفصل الحالي
-                current_enrollments = Enrollment.objects.filter(
-                    student=student,
-                    academic_year='2024-2025',  # الفصل الحالي
-                    is_active=True
-                )
+                response = "إليك جدولك الدراسي للفصل الحالي:\n\n"
                 
-                if current_enrollments:
-                    response = "إليك جدولك الدراسي للفصل الحالي:\n\n"
-                    
-                    for enrollment in current_enrollments:
-                        course = enrollment.course
-                        response += f"📚 {course.name}\n"
-                        response += f"   الرمز: {course.code}\n"
-                        response += f"   الساعات: {course.credit_hours}\n"
-                        if hasattr(course, 'schedule'):
-                            response += f"   التوقيت: {course.schedule}\n"
+                for code, name, credit_hours in enrollments:
+                    response += f"📚 {name}\n"
+                    response += f"   الرمز: {code}\n"
+                    response += f"   الساعات: {credit_hours}\n"
+                    for session in sessions.get(code, []):
+                        response += (f"   التوقيت: {ARABIC_DAYS.get(session.day_of_week, session.day_of_week)} "
+                                     f"{session.start_time:%H:%M}-{session.end_time:%H:%M}")
+                        if session.room:
+                            response += f" - {session.building} {session.room}".rstrip()
                         response += "\n"
-                    
-                    total_hours = sum(e.course.credit_hours for e in current_enrollments)
-                    response += f"إجمالي الساعات المسجلة: {total_hours}"
-                    
-                    # نصائح حسب العبء الدراسي
-                    if total_hours > 18:
-                        response += "\n\n⚠️ عبؤك الدراسي مرتفع، تأكد من تنظيم وقتك جيداً"
-                    elif total_hours < 12:
-                        response += "\n\n💡 يمكنك إضافة مقررات إضافية إذا أردت"
-                    
-                else:
-                    response = "لا توجد مقررات مسجلة للفصل الحالي."
+                    response += "\n"
+                
+                total_hours = sum(credit_hours for _, _, credit_hours in enrollments)
+                response += f"إجمالي الساعات المسجلة: {total_hours}"
+                
+                # نصائح حسب العبء الدراسي
+                if total_hours > 18:
+                    response += "\n\n⚠️ عبؤك الدراسي مرتفع، تأكد من تنظيم وقتك جيداً"
+                elif total_hours < 12:
+                    response += "\n\n💡 يمكنك إضافة مقررات إضافية إذا أردت"
                 
-                return {
-                    'response': response,
-                    'intent': 'schedule_inquiry',
-                    'confidence': 0.9,
-                    'suggestions': ['تفاصيل المحاضرات', 'تعديل الجدول', 'المقررات المتاحة']
-                }
             else:
-                return {
-                    'response': 'عذراً، لا يمكنني الوصول إلى بيانات الطالب.',
-                    'intent': 'schedule_inquiry',
-                    'confidence': 0.5
-                }
+                response = "لا توجد مقررات مسجلة للفصل الحالي."
+            
+            return {
+                'response': response,
+                'intent': 'schedule_inquiry',
+                'confidence': 0.9,
+                'suggestions': ['تفاصيل المحاضرات', 'تعديل الجدول', 'المقررات المتاحة']
+            }
                 
         except Exception as e:
             return {
@@ -246,51 +243,141 @@ class AIStudentAssistantView(APIView):
                 'confidence': 0.3
             }
     
-    def _handle_course_recommendation(self, user: User) -> Dict:
-        """التعامل مع طلبات توصيات المقررات"""
+    def _handle_attendance_inquiry(self, user: User) -> Dict:
+        """التعامل مع استفسارات الحضور والغياب"""
         
         try:
-            if hasattr(user, 'student_profile'):
-                student = user.student_profile
-                
-                # إعداد بيانات الطالب للذكاء الاصطناعي
-                student_data = {
-                    'current_gpa': float(student.gpa),
-                    'current_semester': student.current_semester,
-                    'major': student.major,
-                    'completed_courses': [],  # يمكن جلبها من قاعدة البيانات
-                    'courses_grades': {}      # يمكن جلبها من قاعدة البيانات
-                }
-                
-                # الحصول على التوصيات من الذكاء الاصطناعي
-                recommendations = recommendation_engine.generate_course_recommendations(student_data)
+            student = self._student(user)
+            if student is None:
+                return self._no_student_data('attendance_inquiry')
+            
+            # أعداد سجلات الحضور لكل مقرر في الفصل الحالي باستعلام واحد
+            rows = list(Attendance.objects.filter(
+                enrollment__student=student,
+                enrollment__semester_id=current_semester_id()
+            ).values(course_name=F(f'enrollment__course__{self._course_name_field()}')).annotate(
+                total=Count('id'),
+                attended=Count('id', filter=Q(status__in=['PRESENT', 'LATE'])),
+                absences=Count('id', filter=Q(status='ABSENT'))
+            ).order_by('course_name'))
+            
+            if rows:
+                response = "إليك سجل حضورك للفصل الحالي:\n\n"
+                warnings = []
+                for row in rows:
+                    rate = row['attended'] / row['total'] * 100
+                    response += f"• {row['course_name']}: {rate:.0f}% (غياب: {row['absences']})\n"
+                    if rate < 75:
+                        warnings.append(row['course_name'])
                 
-                if recommendations:
-                    response = "إليك توصياتي للمقررات:\n\n"
-                    
-                    for i, rec in enumerate(recommendations[:3], 1):  # أول 3 توصيات
-                        if 'error' not in rec:
-                            response += f"{i}. {rec.get('course_name', 'مقرر غير محدد')}\n"
-                            response += f"   النوع: {rec.get('type', 'غير محدد')}\n"
-                            response += f"   السبب: {rec.get('reasoning', 'توصية عامة')}\n"
-                            response += f"   مستوى الصعوبة: {rec.get('difficulty_level', 3)}/5\n\n"
-                    
-                    response += "💡 هذه التوصيات مبنية على أدائك الأكاديمي الحالي وتخصصك."
+                if warnings:
+                    response += f"\n⚠️ نسبة حضورك منخفضة في: {'، '.join(warnings)}. "
+                    response += "قد يؤدي ذلك للحرمان من دخول الاختبار النهائي."
                 else:
-                    response = "عذراً، لا يمكنني إنتاج توصيات في الوقت الحالي."
+                    response += "\n👍 نسبة حضورك جيدة في جميع المقررات"
+            else:
+                response = "لا توجد سجلات حضور للفصل الحالي."
+            
+            return {
+                'response': response,
+                'intent': 'attendance_inquiry',
+                'confidence': 0.9,
+                'suggestions': ['تفاصيل الغياب', 'سياسة الحضور', 'تقديم عذر غياب']
+            }
                 
-                return {
-                    'response': response,
-                    'intent': 'course_recommendation',
-                    'confidence': 0.8,
-                    'suggestions': ['تفاصيل أكثر عن المقررات', 'متطلبات التسجيل', 'جدول المقررات']
-                }
+        except Exception as e:
+            return {
+                'response': f'عذراً، حدث خطأ في جلب سجل الحضور: {str(e)}',
+                'intent': 'attendance_inquiry',
+                'confidence': 0.3
+            }
+    
+    def _handle_financial_inquiry(self, user: User) -> Dict:
+        """التعامل مع الاستفسارات المالية"""
+        
+        try:
+            from finance.models import StudentFee
+            
+            fees = list(StudentFee.objects.filter(student=user).exclude(
+                status__in=['PAID', 'WAIVED', 'CANCELLED']
+            ).order_by('due_date').values(
+                'academic_year', 'semester', 'total_amount', 'paid_amount',
+                'discount_amount', 'due_date', 'status'
+            ))
+            
+            if fees:
+                response = "إليك ملخص رسومك المستحقة:\n\n"
+                total_remaining = 0
+                for fee in fees:
+                    remaining = fee['total_amount'] - fee['paid_amount'] - fee['discount_amount']
+                    total_remaining += remaining
+                    response += f"• {fee['academic_year']} {fee['semester']}: {remaining:.2f} "
+                    response += f"(تاريخ الاستحقاق: {fee['due_date']:%Y-%m-%d})\n"
+                
+                response += f"\nإجمالي المبلغ المتبقي: {total_remaining:.2f}"
+                if any(fee['status'] == 'OVERDUE' for fee in fees):
+                    response += "\n\n⚠️ لديك رسوم متأخرة، يرجى السداد أو التواصل مع الشؤون المالية"
             else:
+                response = "✅ لا توجد رسوم مستحقة عليك حالياً."
+            
+            return {
+                'response': response,
+                'intent': 'financial_inquiry',
+                'confidence': 0.9,
+                'suggestions': ['طرق الدفع', 'طلب تقسيط', 'كشف الحساب']
+            }
+                
+        except Exception as e:
+            return {
+                'response': f'عذراً، حدث خطأ في جلب البيانات المالية: {str(e)}',
+                'intent': 'financial_inquiry',
+                'confidence': 0.3
+            }
+    
+    def _handle_course_recommendation(self, user: User) -> Dict:
+        """التعامل مع طلبات توصيات المقررات"""
+        
+        try:
+            student = self._student(user)
+            if student is None:
                 return {
                     'response': 'عذراً، أحتاج للوصول إلى ملفك الأكاديمي لإنتاج توصيات مناسبة.',
                     'intent': 'course_recommendation',
                     'confidence': 0.5
                 }
+            
+            # إعداد بيانات الطالب للذكاء الاصطناعي
+            student_data = {
+                'current_gpa': float(student.cumulative_gpa),
+                'current_semester': student.current_semester,
+                'major': str(student.major),
+                'completed_courses': [],  # يمكن جلبها من قاعدة البيانات
+                'courses_grades': {}      # يمكن جلبها من قاعدة البيانات
+            }
+            
+            # الحصول على التوصيات من الذكاء الاصطناعي
+            recommendations = get_recommendation_engine().generate_course_recommendations(student_data)
+            
+            if recommendations:
+                response = "إليك توصياتي للمقررات:\n\n"
+                
+                for i, rec in enumerate(recommendations[:3], 1):  # أول 3 توصيات
+                    if 'error' not in rec:
+                        response += f"{i}. {rec.get('course_name', 'مقرر غير محدد')}\n"
+                        response += f"   النوع: {rec.get('type', 'غير محدد')}\n"
+                        response += f"   السبب: {rec.get('reasoning', 'توصية عامة')}\n"
+                        response += f"   مستوى الصعوبة: {rec.get('difficulty_level', 3)}/5\n\n"
+                
+                response += "💡 هذه التوصيات مبنية على أدائك الأكاديمي الحالي وتخصصك."
+            else:
+                response = "عذراً، لا يمكنني إنتاج توصيات في الوقت الحالي."
+            
+            return {
+                'response': response,
+                'intent': 'course_recommendation',
+                'confidence': 0.8,
+                'suggestions': ['تفاصيل أكثر عن المقررات', 'متطلبات التسجيل', 'جدول المقررات']
+            }
                 
         except Exception as e:
             return {
@@ -299,6 +386,71 @@ class AIStudentAssistantView(APIView):
                 'confidence': 0.3
             }
     
+    def _handle_academic_advice(self, user: User) -> Dict:
+        """التعامل مع طلبات الإرشاد الأكاديمي"""
+        
+        try:
+            student = self._student(user)
+            if student is None:
+                return self._no_student_data('academic_advice')
+            
+            gpa = float(student.cumulative_gpa)
+            attendance = Attendance.objects.filter(
+                enrollment__student=student,
+                enrollment__semester_id=current_semester_id()
+            ).aggregate(
+                total=Count('id'),
+                attended=Count('id', filter=Q(status__in=['PRESENT', 'LATE']))
+            )
+            
+            response = f"معدلك التراكمي الحالي: {gpa:.2f}\n"
+            response += f"الساعات المكتملة: {student.completed_credit_hours} من {student.required_credit_hours}\n\n"
+            
+            if student.is_on_probation or gpa < 2.0:
+                response += "⚠️ أنت تحت المراقبة الأكاديمية. أنصحك بتخفيف العبء الدراسي ومراجعة مرشدك الأكاديمي.\n"
+            elif gpa < 2.75:
+                response += "📚 ركز على المقررات الأساسية وخصص وقتاً أسبوعياً ثابتاً للمراجعة.\n"
+            elif gpa >= 3.5:
+                response += "🎉 أداؤك متميز، يمكنك التفكير في مقررات متقدمة أو مشاريع بحثية.\n"
+            else:
+                response += "👍 أداؤك جيد، حافظ على انتظامك واستهدف رفع معدلك في الفصل القادم.\n"
+            
+            if attendance['total']:
+                rate = attendance['attended'] / attendance['total'] * 100
+                if rate < 75:
+                    response += f"\n⚠️ نسبة حضورك {rate:.0f}%، الانتظام في المحاضرات أهم خطوة لتحسين درجاتك."
+            
+            return {
+                'response': response,
+                'intent': 'academic_advice',
+                'confidence': 0.8,
+                'suggestions': ['حجز موعد مع المرشد', 'خطة دراسية', 'توصيات مقررات']
+            }
+                
+        except Exception as e:
+            return {
+                'response': f'عذراً، حدث خطأ في إعداد النصيحة الأكاديمية: {str(e)}',
+                'intent': 'academic_advice',
+                'confidence': 0.3
+            }
+    
+    def _handle_general_info(self, message: str, user: User) -> Dict:
+        """التعامل مع طلبات المعلومات العامة"""
+        
+        response = "يمكنني إرشادك إلى المعلومات التالية:\n\n"
+        response += "📊 اسألني عن \"درجاتي\" لعرض آخر الدرجات\n"
+        response += "📅 اسألني عن \"جدولي\" لعرض المحاضرات وأوقاتها\n"
+        response += "✅ اسألني عن \"الحضور\" لمعرفة نسبة حضورك\n"
+        response += "💰 اسألني عن \"الرسوم\" لمعرفة المبالغ المستحقة\n"
+        response += "🎓 اطلب \"اقتراح مقررات\" للحصول على توصيات\n"
+        
+        return {
+            'response': response,
+            'intent': 'general_info',
+            'confidence': 0.7,
+            'suggestions': ['عرض درجاتي', 'جدولي الدراسي', 'الرسوم المستحقة']
+        }
+    
     def _handle_general_response(self, message: str, user: User) -> Dict:
         """التعامل مع الردود العامة"""
         
@@ -364,7 +516,7 @@ class StudentPerformancePredictionView(APIView):
             }
             
             # التنبؤ بالأداء
-            prediction_result = performance_predictor.predict_student_grade(student_data)
+            prediction_result = get_performance_predictor().predict_student_grade(student_data)
             
             # حفظ النتيجة في قاعدة البيانات
             prediction_record, created = StudentPerformancePrediction.objects.update_or_create(
@@ -492,25 +644,24 @@ class PredictiveAnalyticsView(APIView):
                     {'date': '2024-09-01', 'enrollment_count': 1420, 'total_capacity': 1600, 'marketing_budget': 65000},
                 ]
                 
-                prediction_result = predictive_analytics.predict_enrollment_trends(historical_data)
+                prediction_result = get_predictive_analytics().predict_enrollment_trends(historical_data)
                 
             elif analysis_type == 'dropout_risk':
-                # بيانات طلاب وهمية لأغراض التجربة
-                students_data = []
-                students = Student.objects.all()[:50]  # عينة من الطلاب
+                # عينة من الطلاب مع مدخلات المخاطر من استعلامات مجمعة
+                from .dropout_risk import build_risk_inputs
                 
-                for student in students:
-                    students_data.append({
-                        'student_id': student.id,
-                        'name': student.user.get_full_name(),
-                        'current_gpa': float(student.gpa),
-                        'attendance_rate': 85.0,  # قيمة افتراضية
-                        'financial_difficulties': False,
-                        'social_isolation': False,
-                        'failed_semesters': 0
-                    })
+                sample = Student.objects.filter(
+                    pk__in=list(Student.objects.values_list('pk', flat=True)[:50])
+                )
+                students_data = build_risk_inputs(sample)
+                names = {
+                    student.pk: student.user.get_full_name()
+                    for student in sample.select_related('user')
+                }
+                students_data['name'] = students_data.index.map(names)
+                students_data = students_data.rename_axis('student_id').reset_index()
                 
-                prediction_result = predictive_analytics.detect_dropout_risk(students_data)
+                prediction_result = get_predictive_analytics().detect_dropout_risk(students_data)
             
             else:
                 prediction_result = {'error': 'نوع تحليل غير مدعوم'}
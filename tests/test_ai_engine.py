@@ -0,0 +1,52 @@
+"""
+اختبارات التحميل الكسول لمحرك الذكاء الاصطناعي
+Lazy AI engine tests
+"""
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from smart_ai import ai_engine
+from smart_ai.ai_engine import LazyModelSet, UniversityAIEngine
+
+
+class LazyModelSetTests(SimpleTestCase):
+    """النماذج تُنشأ عند أول استخدام وتُشارك بين الطلبات"""
+
+    def setUp(self):
+        self.calls = []
+        self.models = LazyModelSet({'model': lambda: self.calls.append(1) or object()})
+
+    def test_created_on_first_access_only(self):
+        """لا يُنشأ النموذج عند إنشاء المجموعة، ويُنشأ مرة واحدة فقط"""
+        self.assertEqual(self.calls, [])
+        first = self.models['model']
+        self.assertIs(self.models['model'], first)
+        self.assertEqual(len(self.calls), 1)
+
+    def test_unknown_model(self):
+        with self.assertRaises(KeyError):
+            self.models['missing']
+
+    def test_trained_version_preferred(self):
+        """الإصدار المدرب من سجل النماذج يُستخدم بدلاً من النموذج الافتراضي"""
+        trained = object()
+        models = LazyModelSet({'model': object}, use_registry=True)
+        with mock.patch.object(LazyModelSet, '_trained', return_value=trained):
+            self.assertIs(models['model'], trained)
+            self.assertTrue(models.is_trained('model'))
+
+
+class EngineRegistryTests(SimpleTestCase):
+    """محرك واحد وخدمات مشتركة داخل العملية"""
+
+    def test_engine_does_not_build_models(self):
+        with mock.patch.dict(ai_engine.MODEL_FACTORIES, {'grade_predictor': mock.Mock()}):
+            UniversityAIEngine()
+            ai_engine.MODEL_FACTORIES['grade_predictor'].assert_not_called()
+
+    def test_services_are_shared(self):
+        self.assertIs(ai_engine.get_ai_engine(), ai_engine.get_ai_engine())
+        predictor = ai_engine.get_performance_predictor()
+        self.assertIs(ai_engine.get_performance_predictor(), predictor)
+        self.assertIs(predictor.ai_engine, ai_engine.get_ai_engine())
@@ -0,0 +1,223 @@
+"""
+اختبارات المسار السريع للمساعد الذكي
+AI assistant fast path tests
+"""
+import threading
+import time
+from datetime import date
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from academic.models import Attendance, Enrollment, Grade
+
+from smart_ai import signals
+from smart_ai.assistant import (
+    DEFAULT_INTENT, INTENT_KEYWORDS, ChatMessageBuffer, IntentMatcher, cached_answer,
+    classify_intent, invalidate_assistant_answers, normalize_arabic
+)
+from smart_ai.views import AIStudentAssistantView
+from tests.test_registration import RegistrationFixtureMixin
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class NormalizeArabicTests(SimpleTestCase):
+    """توحيد أشكال الحروف وإزالة التشكيل"""
+
+    def test_folding_and_diacritics(self):
+        self.assertEqual(normalize_arabic('إرشاد'), 'ارشاد')
+        self.assertEqual(normalize_arabic('أُريدُ نَتِيجَة'), 'اريد نتيجه')
+        self.assertEqual(normalize_arabic('متى'), 'متي')
+        self.assertEqual(normalize_arabic('جـــدول'), 'جدول')
+        self.assertEqual(normalize_arabic('GPA'), 'gpa')
+
+
+class IntentMatcherTests(SimpleTestCase):
+    """المصنف يطابق البحث المتسلسل السابق بأولوياته"""
+
+    def _sequential(self, message):
+        message = normalize_arabic(message)
+        for intent, keywords in INTENT_KEYWORDS:
+            if any(normalize_arabic(word) in message for word in keywords):
+                return intent
+        return DEFAULT_INTENT
+
+    def test_matches_sequential_scan(self):
+        messages = [
+            'ما هي درجاتي في الفصل الحالي؟',
+            'متى موعد المحاضرة القادمة',
+            'كم نسبة غيابي',
+            'هل دفعت الرسوم',
+            'أريد اقتراح مقرر مناسب',
+            'أحتاج نصيحة للخطة الدراسية',
+            'كيف أسجل؟',
+            'مرحباً',
+            'ارشاد',
+            'نتيجة الاختبار وجدول المحاضرات',
+        ]
+        for message in messages:
+            with self.subTest(message=message):
+                self.assertEqual(classify_intent(message), self._sequential(message))
+
+    def test_higher_priority_wins_regardless_of_position(self):
+        """كلمة الجدول أولاً لا تتقدم على كلمة الدرجات"""
+        self.assertEqual(classify_intent('جدول الاختبارات ودرجاتي'), 'grades_inquiry')
+
+    def test_overlapping_keywords(self):
+        """الكلمات المتداخلة تُكتشف عبر روابط الفشل"""
+        matcher = IntentMatcher([('first', ['abcd']), ('second', ['bc'])])
+        self.assertEqual(matcher.match('xabcx'), 'second')
+        self.assertEqual(matcher.match('abcd'), 'first')
+        self.assertEqual(matcher.match('xyz'), DEFAULT_INTENT)
+
+    def test_diacritics_in_message(self):
+        self.assertEqual(classify_intent('أَيْنَ جَدْوَلِي'), 'schedule_inquiry')
+
+
+class ChatMessageBufferTests(SimpleTestCase):
+    """الرسائل تُكتب بالجملة عند امتلاء الدفعة أو انقضاء المهلة حتى على عامل خامل"""
+
+    def setUp(self):
+        self.written = []
+        self.flushed = threading.Event()
+
+        def bulk_create(messages, batch_size):
+            self.written.append(list(messages))
+            self.flushed.set()
+
+        patch = mock.patch('smart_ai.models.ChatMessage')
+        self.addCleanup(patch.stop)
+        patch.start().objects.bulk_create.side_effect = bulk_create
+
+    def test_full_batch_is_written_immediately(self):
+        buffer = ChatMessageBuffer(batch_size=4, flush_seconds=60)
+        buffer.add(['a', 'b'])
+        self.assertEqual(self.written, [])
+
+        buffer.add(['c', 'd'])
+        self.assertEqual(self.written, [['a', 'b', 'c', 'd']])
+
+    def test_idle_buffer_is_flushed_after_timeout(self):
+        """لا حاجة لرسالة أخرى حتى تُكتب الرسائل المعلقة"""
+        buffer = ChatMessageBuffer(batch_size=50, flush_seconds=0.05)
+        started = time.monotonic()
+        buffer.add(['a', 'b'])
+        timer = buffer._timer
+
+        self.assertTrue(self.flushed.wait(2))
+        self.assertGreaterEqual(time.monotonic() - started, 0.05)
+        self.assertEqual(self.written, [['a', 'b']])
+
+        # الخيط ينتهي عند فراغ المخزن
+        timer.join(2)
+        self.assertFalse(timer.is_alive())
+        self.assertIsNone(buffer._timer)
+
+    def test_failed_write_is_reported(self):
+        buffer = ChatMessageBuffer(batch_size=50, flush_seconds=60)
+        buffer.add(['a'])
+        with mock.patch('smart_ai.models.ChatMessage.objects.bulk_create', side_effect=RuntimeError):
+            self.assertEqual(buffer.flush(), 0)
+        self.assertEqual(buffer.flush(), 0)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class CachedAnswerTests(SimpleTestCase):
+    """الإجابات تُخزن لكل مستخدم ونية وتسقط عند تغير البيانات"""
+
+    def setUp(self):
+        cache.clear()
+        self.build = mock.Mock(return_value={'response': 'معدلك 3.5', 'confidence': 0.9})
+
+    def test_answer_is_built_once(self):
+        first = cached_answer(7, 'grades_inquiry', self.build)
+        second = cached_answer(7, 'grades_inquiry', self.build)
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.build.call_count, 1)
+        cached_answer(8, 'grades_inquiry', self.build)
+        self.assertEqual(self.build.call_count, 2)
+
+    def test_languages_are_cached_and_invalidated_separately(self):
+        cached_answer(7, 'grades_inquiry', self.build, 'ar')
+        cached_answer(7, 'grades_inquiry', self.build, 'en')
+        self.assertEqual(self.build.call_count, 2)
+
+        invalidate_assistant_answers([7], 'grades')
+        cached_answer(7, 'grades_inquiry', self.build, 'en')
+        self.assertEqual(self.build.call_count, 3)
+
+    def test_low_confidence_answers_are_not_cached(self):
+        self.build.return_value = {'response': 'خطأ', 'confidence': 0.3}
+        cached_answer(7, 'grades_inquiry', self.build)
+        cached_answer(7, 'grades_inquiry', self.build)
+        self.assertEqual(self.build.call_count, 2)
+
+    def test_invalidation_drops_affected_intents_only(self):
+        cached_answer(7, 'grades_inquiry', self.build)
+        cached_answer(7, 'financial_inquiry', self.build)
+
+        invalidate_assistant_answers([7], 'grades')
+        cached_answer(7, 'grades_inquiry', self.build)
+        cached_answer(7, 'financial_inquiry', self.build)
+        self.assertEqual(self.build.call_count, 3)
+
+    def test_signals_invalidate_on_commit(self):
+        """تغيير درجة أو رسوم يسقط إجابات صاحبها بعد تأكيد المعاملة"""
+        cached_answer(7, 'grades_inquiry', self.build)
+        cached_answer(7, 'financial_inquiry', self.build)
+
+        with mock.patch.object(signals.transaction, 'on_commit', side_effect=lambda callback: callback()):
+            signals.invalidate_answers_on_grade_change(
+                sender=None, instance=SimpleNamespace(enrollment=SimpleNamespace(student_id=7))
+            )
+            cached_answer(7, 'grades_inquiry', self.build)
+            cached_answer(7, 'financial_inquiry', self.build)
+            self.assertEqual(self.build.call_count, 3)
+
+            signals.invalidate_answers_on_fee_change(sender=None, instance=SimpleNamespace(student_id=7))
+            cached_answer(7, 'financial_inquiry', self.build)
+            self.assertEqual(self.build.call_count, 4)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class IntentHandlerTests(RegistrationFixtureMixin, TestCase):
+    """إجابات النوايا من بيانات حقيقية وبأسماء المقررات بلغة الطلب"""
+
+    def setUp(self):
+        cache.clear()
+        self.create_fixtures(students=1, capacity=10)
+        self.user = self.students[0].user
+        enrollment = Enrollment.objects.create(student=self.students[0], course=self.course,
+                                               semester=self.semester)
+        Grade.objects.create(enrollment=enrollment, grade_type='QUIZ', title='Quiz 1',
+                             points_earned=18, points_possible=20, date_assigned=date(2024, 10, 1))
+        Attendance.objects.create(enrollment=enrollment, date=date(2024, 10, 1), status='PRESENT')
+        Attendance.objects.create(enrollment=enrollment, date=date(2024, 10, 2), status='ABSENT')
+        self.view = AIStudentAssistantView()
+
+    def answers(self, language):
+        self.view.language = language
+        return [
+            self.view._handle_grades_inquiry(self.user),
+            self.view._handle_schedule_inquiry(self.user),
+            self.view._handle_attendance_inquiry(self.user),
+        ]
+
+    def test_answers_use_arabic_course_names(self):
+        grades, schedule, attendance = self.answers('ar')
+        for answer in (grades, schedule, attendance):
+            self.assertEqual(answer['confidence'], 0.9, answer['response'])
+            self.assertIn('مقدمة في البرمجة', answer['response'])
+
+        self.assertIn('Quiz 1: 90.0/100', grades['response'])
+        self.assertIn('الساعات: 3', schedule['response'])
+        self.assertIn('50% (غياب: 1)', attendance['response'])
+
+    def test_answers_use_english_course_names(self):
+        for answer in self.answers('en'):
+            self.assertEqual(answer['confidence'], 0.9, answer['response'])
+            self.assertIn('Introduction to Programming', answer['response'])
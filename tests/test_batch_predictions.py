@@ -0,0 +1,111 @@
+"""
+اختبارات التنبؤ الجماعي بأداء الطلاب
+Batch cohort prediction tests
+"""
+import tempfile
+from decimal import Decimal
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from ai import batch_predictions
+from ai.batch_predictions import ModelNotReady, confidence_scores, dropout_risks, predict_cohort
+from ai.feature_store import FEATURE_COLUMNS, FeatureStore, build_feature_frame
+from smart_ai.model_registry import LoadedModel
+from smart_ai.models import StudentPerformancePrediction
+from tests.test_registration import RegistrationFixtureMixin
+
+
+class CurrentGpaModel:
+    """نموذج بديل يتنبأ بالمعدل الحالي كما هو"""
+
+    def predict(self, matrix):
+        return matrix[:, FEATURE_COLUMNS.index('current_gpa')]
+
+
+class BatchPredictionHelperTests(SimpleTestCase):
+    """اختبارات الحسابات المتجهة للثقة ومستوى الخطر"""
+
+    def test_confidence_scores(self):
+        """الثقة تزيد مع عدد المقررات وثبات الدرجات"""
+        frame = pd.DataFrame({'completed_courses': [3, 12], 'grade_std': [4.0, 0.0]})
+        scores = confidence_scores(frame)
+
+        np.testing.assert_allclose(scores, [(0.3 * 80 + 20 / 5) / 100, 1.0])
+
+    def test_dropout_risk_levels(self):
+        """تحويل المعدل المتوقع إلى مستوى خطر التسرب"""
+        risks = dropout_risks(np.array([1.2, 1.8, 2.2, 3.5]))
+        self.assertEqual(list(risks), ['CRITICAL', 'HIGH', 'MEDIUM', 'LOW'])
+
+
+class PredictCohortTests(RegistrationFixtureMixin, TestCase):
+    """التنبؤ لدفعة كاملة من قاعدة البيانات باستدعاء predict واحد"""
+
+    def setUp(self):
+        self.create_fixtures(students=4)
+        first, second, third, fourth = self.students
+        third.academic_level = 2
+        third.save()
+        fourth.user.status = 'SUSPENDED'
+        fourth.user.save()
+
+        # الطالب الثاني لديه مقرران مكتملان فقط فلا يُتنبأ له
+        history = {first.pk: (Decimal('3.40'), 4), second.pk: (Decimal('1.80'), 2),
+                   third.pk: (Decimal('1.20'), 5), fourth.pk: (Decimal('2.00'), 5)}
+        frame = build_feature_frame(
+            students=[(pk, gpa, 3) for pk, (gpa, _) in history.items()],
+            grades=[(pk, Decimal('70')) for pk, (_, count) in history.items() for _ in range(count)],
+            course_loads=[], attendance=[], departments=[],
+        )
+        frame.index = frame.index.map(str)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        store = FeatureStore(self.tmp.name)
+        store._write(frame, timezone.now())
+
+        self.registry = mock.MagicMock()
+        self.registry.get_active.return_value = LoadedModel(
+            name='student_performance', version=3, record_id='r3',
+            estimator=CurrentGpaModel(), feature_columns=FEATURE_COLUMNS,
+        )
+        for target, value in (('get_feature_store', lambda: store), ('get_model_registry', lambda: self.registry)):
+            patch = mock.patch.object(batch_predictions, target, value)
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_cohort_is_filtered_and_predicted(self):
+        """التصفية حسب القسم والمستوى واستبعاد غير النشطين وتخزين التنبؤات"""
+        summary = predict_cohort(department_id=self.department.pk, academic_level=1)
+
+        self.assertEqual(summary['cohort_size'], 2)
+        self.assertEqual((summary['predicted'], summary['skipped_insufficient_data']), (1, 1))
+        self.assertEqual(summary['model_version'], 3)
+        self.assertEqual(summary['risk_distribution'], {'LOW': 1})
+
+        prediction = StudentPerformancePrediction.objects.get()
+        self.assertEqual(prediction.user_id, self.students[0].user_id)
+        self.assertEqual(prediction.predicted_gpa, Decimal('3.400'))
+        self.assertEqual(prediction.prediction_data['model_version'], 3)
+        self.assertCountEqual(prediction.prediction_data['features'], FEATURE_COLUMNS)
+
+    def test_whole_active_population(self):
+        """بدون مرشحات تشمل الدفعة جميع الطلاب النشطين"""
+        summary = predict_cohort()
+
+        self.assertEqual(summary['cohort_size'], 3)
+        self.assertEqual(summary['predicted'], 2)
+        self.assertEqual(summary['risk_distribution'], {'CRITICAL': 1, 'LOW': 1})
+        self.assertEqual(StudentPerformancePrediction.objects.count(), 2)
+
+    def test_missing_model(self):
+        """غياب النموذج النشط يرفع ModelNotReady دون كتابة تنبؤات"""
+        self.registry.get_active.return_value = None
+
+        with self.assertRaises(ModelNotReady):
+            predict_cohort()
+        self.assertFalse(StudentPerformancePrediction.objects.exists())
@@ -0,0 +1,89 @@
+"""
+اختبارات استيراد التسجيلات دفعة واحدة
+Bulk enrollment import tests
+"""
+import io
+
+from django.test import TestCase
+
+from academic.bulk_enrollment import BulkEnrollmentImporter, BulkImportError, iter_csv_rows
+from academic.models import CourseCapacity, Enrollment
+from tests.test_registration import RegistrationFixtureMixin
+
+
+def csv_rows(text):
+    """قراءة صفوف CSV من نص"""
+    return iter_csv_rows(io.BytesIO(text.encode('utf-8')))
+
+
+class BulkEnrollmentImportTests(RegistrationFixtureMixin, TestCase):
+    """اختبارات التحقق على دفعات والكتابة المجمعة"""
+
+    def setUp(self):
+        self.create_fixtures(students=4, capacity=2)
+
+    def test_missing_columns_rejected(self):
+        """رفض الملف عند غياب الأعمدة المطلوبة"""
+        with self.assertRaises(BulkImportError):
+            list(csv_rows('student,course\n1,CS101\n'))
+
+    def test_import_with_per_row_errors(self):
+        """إنشاء التسجيلات المقبولة وتقرير خطأ لكل صف مرفوض"""
+        text = 'Student_ID,Course_Code\n' + '\n'.join([
+            '20240000,CS101',
+            '20240001,CS101',
+            '20240001,CS101',
+            '20240002,CS101',
+            '99999999,CS101',
+            '20240003,XX999',
+        ]) + '\n'
+
+        result = BulkEnrollmentImporter(self.semester, chunk_size=2).run(csv_rows(text))
+
+        self.assertEqual(result.total_rows, 6)
+        self.assertEqual(result.created, 2)
+        self.assertEqual(
+            [(error.row_number, error.error) for error in result.errors],
+            [
+                (4, 'Already enrolled in this course for this semester'),
+                (5, 'Course is full'),
+                (6, 'Unknown student'),
+                (7, 'Unknown course'),
+            ]
+        )
+        counter = CourseCapacity.objects.get(course=self.course, semester=self.semester)
+        self.assertEqual(counter.enrolled_count, 2)
+
+    def test_dry_run_writes_nothing(self):
+        """التشغيل التجريبي لا يحفظ أي تسجيل"""
+        text = 'student_id,course_code\n20240000,CS101\n20240001,CS101\n20240002,CS101\n'
+        result = BulkEnrollmentImporter(self.semester, dry_run=True).run(csv_rows(text))
+
+        self.assertEqual(result.created, 2)
+        self.assertEqual(result.rejected, 1)
+        self.assertFalse(Enrollment.objects.filter(semester=self.semester).exists())
+
+    def test_imported_row_is_written(self):
+        """الصف المستورد يُنشئ تسجيلاً فعلياً للطالب المطابق لرقمه"""
+        result = BulkEnrollmentImporter(self.semester).run(csv_rows('student_id,course_code\n20240003,CS101\n'))
+
+        self.assertEqual((result.created, result.rejected), (1, 0))
+        enrollment = Enrollment.objects.get(semester=self.semester)
+        self.assertEqual(enrollment.student_id, self.students[3].pk)
+        self.assertEqual((enrollment.course_id, enrollment.status), (self.course.pk, 'ENROLLED'))
+
+    def test_dropped_registration_is_reactivated(self):
+        """التسجيل المحذوف سابقاً يُعاد تفعيله بدلاً من خرق قيد التفرد"""
+        dropped = Enrollment.objects.create(
+            student=self.students[0], course=self.course, semester=self.semester, status='DROPPED'
+        )
+        text = 'student_id,course_code\n20240000,CS101\n20240001,CS101\n'
+
+        result = BulkEnrollmentImporter(self.semester).run(csv_rows(text))
+
+        self.assertEqual((result.created, result.rejected), (2, 0))
+        dropped.refresh_from_db()
+        self.assertEqual(dropped.status, 'ENROLLED')
+        self.assertEqual(Enrollment.objects.filter(semester=self.semester).count(), 2)
+        counter = CourseCapacity.objects.get(course=self.course, semester=self.semester)
+        self.assertEqual((counter.enrolled_count, counter.dropped_count), (2, 0))
@@ -0,0 +1,70 @@
+"""
+اختبارات خدمة الرسوم البيانية للتقارير
+Report chart service tests
+"""
+import os
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from reports.charts import ChartService, ChartSpec
+
+
+def bar_chart(**overrides):
+    spec = {'kind': 'bar', 'title': 'Enrollments', 'labels': ('A', 'B'), 'values': (3, 5)}
+    spec.update(overrides)
+    return ChartSpec(**spec)
+
+
+class ChartSpecTests(SimpleTestCase):
+    """مفتاح التخزين يتبع المواصفات والبيانات"""
+
+    def test_key_depends_on_data_and_format(self):
+        self.assertEqual(bar_chart().key, bar_chart().key)
+        self.assertNotEqual(bar_chart().key, bar_chart(values=(3, 6)).key)
+        self.assertNotEqual(bar_chart().key, bar_chart(format='svg').key)
+
+    def test_invalid_kind(self):
+        with self.assertRaises(ValueError):
+            bar_chart(kind='radar')
+
+
+class ChartServiceTests(SimpleTestCase):
+    """الرسوم المخزنة لا تُرسم مرة أخرى"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.service = ChartService(directory=self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_repeated_charts_served_from_cache(self):
+        rendered = []
+
+        def fake_render(spec, path):
+            rendered.append(spec)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as output:
+                output.write(b'chart')
+            return path
+
+        specs = {'first': bar_chart(), 'second': bar_chart(kind='pie')}
+        with mock.patch.object(ChartService, '_pool', side_effect=OSError('no processes')), \
+                mock.patch('reports.charts.render_chart', side_effect=fake_render):
+            paths = self.service.render_many(specs)
+            again = self.service.render_many(specs)
+
+        self.assertEqual(len(rendered), 2)
+        self.assertEqual(paths, again)
+        self.assertTrue(paths['first'].endswith(f"{specs['first'].key}.png"))
+
+    def test_prune_removes_old_charts(self):
+        path = self.service.path_for(bar_chart())
+        os.makedirs(os.path.dirname(path))
+        open(path, 'wb').close()
+        os.utime(path, (0, 0))
+
+        self.assertEqual(self.service.prune(max_age_days=1), 1)
+        self.assertFalse(os.path.exists(path))
@@ -0,0 +1,124 @@
+"""
+اختبارات حساب مخاطر التسرب المتجه
+Vectorized dropout risk scoring tests
+"""
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+from django.test import SimpleTestCase, TestCase
+
+from academic.models import Attendance, Enrollment
+from ai.models import EarlyWarningSystem
+from smart_ai.ai_engine import PredictiveAnalytics
+from smart_ai.dropout_risk import score_dropout_risk
+from students.models import Student
+from tests.test_registration import RegistrationFixtureMixin
+
+
+class DropoutRiskScoringTests(SimpleTestCase):
+    """حساب الدرجات والعوامل لجميع الطلاب دفعة واحدة"""
+
+    def setUp(self):
+        self.frame = PredictiveAnalytics.dropout_risk_inputs([
+            {'student_id': 1, 'current_gpa': 1.8, 'attendance_rate': 55.0,
+             'financial_difficulties': True, 'failed_semesters': 3},
+            {'student_id': 2, 'current_gpa': 2.4, 'attendance_rate': 75.0,
+             'failed_semesters': 1, 'social_isolation': True},
+            {'student_id': 3, 'current_gpa': 3.5, 'attendance_rate': 95.0},
+            {'student_id': 4},
+        ])
+
+    def test_scores(self):
+        """الدرجات تجمع أوزان العوامل بحد أقصى 1"""
+        scores = PredictiveAnalytics.dropout_risk_scores(self.frame)
+        np.testing.assert_allclose(scores, [1.0, 0.6, 0.0, 0.0])
+
+    def test_levels(self):
+        """مستويات الخطر حسب العتبات"""
+        levels = PredictiveAnalytics.dropout_risk_levels(np.array([0.9, 0.71, 0.6, 0.5, 0.0]))
+        self.assertEqual(list(levels), ['high', 'high', 'medium', '', ''])
+
+    def test_factors(self):
+        """عوامل الخطر لكل طالب وعوامل عامة عند عدم وجود أي منها"""
+        factors = PredictiveAnalytics.dropout_risk_factors(self.frame)
+        self.assertEqual(len(factors[0]), 4)
+        self.assertIn('عزلة اجتماعية', factors[1])
+        self.assertEqual(factors[3], ['عوامل عامة'])
+
+    def test_detect_dropout_risk_accepts_frame(self):
+        """كشف المخاطر يقبل جدولاً مبنياً من الاستعلامات المجمعة"""
+        analytics = PredictiveAnalytics(ai_engine=None)
+        results = analytics.detect_dropout_risk(pd.DataFrame(self.frame))
+
+        self.assertEqual([row['student_id'] for row in results], [1, 2])
+        self.assertEqual(results[0]['risk_level'], 'high')
+        self.assertEqual(results[1]['risk_level'], 'medium')
+        self.assertTrue(results[0]['intervention_recommendations'])
+
+
+class DropoutRiskWarningTests(RegistrationFixtureMixin, TestCase):
+    """كتابة الإنذارات المتغيرة فقط بين تشغيلين"""
+
+    def setUp(self):
+        self.create_fixtures(students=3, capacity=10)
+        self.enrollments = []
+        for student in self.students:
+            enrollment = Enrollment.objects.create(student=student, course=self.course,
+                                                   semester=self.semester)
+            for day in (1, 2, 3):
+                Attendance.objects.create(enrollment=enrollment, date=date(2024, 10, day),
+                                          status='ABSENT')
+            self.enrollments.append(enrollment)
+        # معدل منخفض مع غياب كامل = 0.55 (متوسط)، ومعدل مرتفع مع غياب كامل = 0.25
+        self.set_gpa(self.students[0], 1.5)
+        self.set_gpa(self.students[1], 1.5)
+        self.set_gpa(self.students[2], 3.5)
+
+    def set_gpa(self, student, gpa):
+        Student.objects.filter(pk=student.pk).update(cumulative_gpa=gpa)
+
+    def warning(self, student):
+        return EarlyWarningSystem.objects.get(student=student, warning_type='DROPOUT_RISK')
+
+    def assertCounts(self, summary, created, updated, resolved):
+        self.assertEqual(
+            (summary['created'], summary['updated'], summary['resolved']),
+            (created, updated, resolved)
+        )
+
+    def test_create_skip_update_resolve(self):
+        """إنشاء الجديد وتخطي غير المتغير وتحديث المتغير وإغلاق من لم يعد معرضاً للخطر"""
+        summary = score_dropout_risk()
+        self.assertEqual(summary['students'], 3)
+        self.assertEqual(summary['at_risk'], 2)
+        self.assertCounts(summary, created=2, updated=0, resolved=0)
+        self.assertEqual(self.warning(self.students[0]).risk_score, Decimal('0.55'))
+        self.assertEqual(self.warning(self.students[0]).severity_level, 'MEDIUM')
+
+        # لا تغيير في المدخلات: لا كتابة
+        self.assertCounts(score_dropout_risk(), created=0, updated=0, resolved=0)
+
+        # رسوب الطالب الأول يرفع درجته، وتحسن معدل الثاني يخرجه، وانخفاض معدل الثالث يدخله
+        Enrollment.objects.filter(pk=self.enrollments[0].pk).update(status='FAILED')
+        self.set_gpa(self.students[1], 3.5)
+        self.set_gpa(self.students[2], 1.5)
+
+        summary = score_dropout_risk()
+        self.assertEqual(summary['at_risk'], 2)
+        self.assertCounts(summary, created=1, updated=1, resolved=1)
+
+        first = self.warning(self.students[0])
+        self.assertEqual(first.status, 'ACTIVE')
+        self.assertEqual(first.risk_score, Decimal('0.65'))
+        self.assertEqual(len(first.risk_factors), 3)
+        second = self.warning(self.students[1])
+        self.assertEqual(second.status, 'RESOLVED')
+        self.assertIsNotNone(second.resolved_at)
+        self.assertEqual(self.warning(self.students[2]).status, 'ACTIVE')
+        self.assertEqual(EarlyWarningSystem.objects.count(), 3)
+
+        # الإنذار المغلق لا يُغلق مرة أخرى
+        self.assertCounts(score_dropout_risk(), created=0, updated=0, resolved=0)
@@ -0,0 +1,78 @@
+"""
+اختبارات عدادات التسجيل المحفوظة
+Maintained enrollment counter tests
+"""
+from django.test import TestCase
+
+from academic.counters import reconcile_enrollment_counters, seat_counters, seed_enrollment_counters
+from academic.models import CourseCapacity, Enrollment
+from academic.registration import drop_enrollment, register_student
+from tests.test_registration import RegistrationFixtureMixin
+
+
+class EnrollmentCounterTests(RegistrationFixtureMixin, TestCase):
+    """اختبارات تحديث العدادات عند تغير حالة التسجيل والمطابقة الدورية"""
+
+    def setUp(self):
+        self.create_fixtures(students=3, capacity=2)
+
+    def counter(self):
+        return CourseCapacity.objects.get(course=self.course, semester=self.semester)
+
+    def test_counters_follow_status_transitions(self):
+        """العدادات تتبع التسجيل والانتظار والانسحاب والحذف"""
+        results = [register_student(s, self.course, self.semester) for s in self.students]
+        drop_enrollment(results[0].enrollment)
+
+        counter = self.counter()
+        self.assertEqual(
+            (counter.enrolled_count, counter.waitlisted_count, counter.dropped_count), (2, 0, 1)
+        )
+
+        Enrollment.objects.get(pk=results[1].enrollment.pk).delete()
+        counter = self.counter()
+        self.assertEqual(
+            (counter.enrolled_count, counter.waitlisted_count, counter.dropped_count), (1, 0, 1)
+        )
+
+    def test_reconciliation_repairs_drift(self):
+        """المطابقة تكتشف الانحراف وتصلحه"""
+        register_student(self.students[0], self.course, self.semester)
+        CourseCapacity.objects.filter(course=self.course).update(enrolled_count=5, dropped_count=2)
+
+        drift = reconcile_enrollment_counters(self.semester)
+        self.assertEqual(len(drift), 1)
+        self.assertEqual(drift[0]['actual']['enrolled_count'], 1)
+
+        counter = self.counter()
+        self.assertEqual((counter.enrolled_count, counter.dropped_count), (1, 0))
+        self.assertEqual(reconcile_enrollment_counters(self.semester), [])
+
+    def test_read_path_does_not_aggregate(self):
+        """قراءة المقاعد المتاحة استعلام واحد دون تجميع التسجيلات"""
+        register_student(self.students[0], self.course, self.semester)
+
+        with self.assertNumQueries(1):
+            counters = seat_counters(self.semester, [self.course])
+
+        self.assertEqual(counters[self.course.pk].enrolled_count, 1)
+        self.assertEqual(counters[self.course.pk].available_seats, 1)
+
+    def test_missing_counter_is_read_without_writing(self):
+        """العداد غير الموجود يُحسب بتجميع واحد دون إنشائه أثناء القراءة"""
+        Enrollment.objects.create(student=self.students[0], course=self.course, semester=self.semester)
+
+        with self.assertNumQueries(2):
+            counters = seat_counters(self.semester, [self.course])
+
+        self.assertIsNone(counters[self.course.pk].pk)
+        self.assertEqual(counters[self.course.pk].enrolled_count, 1)
+        self.assertFalse(CourseCapacity.objects.exists())
+
+    def test_seeding_creates_missing_counters(self):
+        """مهمة المطابقة تنشئ العدادات الناقصة من التسجيلات الحالية"""
+        Enrollment.objects.create(student=self.students[0], course=self.course, semester=self.semester)
+
+        self.assertEqual(seed_enrollment_counters(self.semester, [self.course]), 1)
+        self.assertEqual(self.counter().enrolled_count, 1)
+        self.assertEqual(seed_enrollment_counters(self.semester, [self.course]), 0)
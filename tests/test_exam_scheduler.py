@@ -0,0 +1,89 @@
+"""
+اختبارات جدولة الامتحانات النهائية
+Final exam timetabling tests
+"""
+import datetime
+import io
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from academic.exam_scheduler import (
+    EnrollmentConflictGraph, ExamRoom, ExamTimetabler, build_exam_periods
+)
+
+
+class ExamTimetablerTests(SimpleTestCase):
+    """اختبارات محرك جدولة الامتحانات"""
+
+    def setUp(self):
+        # ثلاثة طلاب مشتركون في مقررات متداخلة
+        enrollments = [
+            ('S1', 'MATH'), ('S1', 'PHYS'), ('S1', 'CHEM'),
+            ('S2', 'MATH'), ('S2', 'PHYS'),
+            ('S3', 'CHEM'), ('S3', 'BIO'), ('S3', 'BIO'),
+        ]
+        students, courses = zip(*enrollments)
+        self.graph = EnrollmentConflictGraph(students, courses)
+        # من الأحد 2025-01-05 إلى الاثنين 2025-01-06: يومان × فترتان
+        self.periods = build_exam_periods(datetime.date(2025, 1, 5), datetime.date(2025, 1, 6))
+
+    def test_conflict_matrix_counts_shared_students(self):
+        """مصفوفة التعارض تحسب الطلاب المشتركين وتتجاهل التكرار"""
+        courses = list(self.graph.courses)
+        math, phys, bio = courses.index('MATH'), courses.index('PHYS'), courses.index('BIO')
+
+        neighbors = list(self.graph.neighbors(math))
+        weights = dict(zip(neighbors, self.graph.weights[self.graph.indptr[math]:self.graph.indptr[math + 1]]))
+        self.assertEqual(weights[phys], 2)
+        self.assertEqual(self.graph.course_sizes[bio], 1)
+
+    def test_no_student_has_two_exams_at_once(self):
+        """لا يوجد طالب بامتحانين في الفترة نفسها ولا أكثر من الحد اليومي"""
+        timetabler = ExamTimetabler(self.graph, self.periods, max_exams_per_day=2)
+        result = timetabler.schedule()
+
+        self.assertEqual(result['unscheduled'], [])
+        for student, entries in timetabler.iter_student_calendars():
+            slots = [(e['date'], e['start_time']) for e in entries]
+            self.assertEqual(len(slots), len(set(slots)))
+            dates = [e['date'] for e in entries]
+            self.assertTrue(all(dates.count(d) <= 2 for d in dates))
+
+    def test_daily_limit_spreads_exams(self):
+        """حد امتحان واحد يومياً يوزع امتحانات الطالب على أيام مختلفة"""
+        timetabler = ExamTimetabler(self.graph, self.periods, max_exams_per_day=1)
+        result = timetabler.schedule()
+
+        # الطالب S1 لديه ثلاثة امتحانات ويومان فقط
+        self.assertEqual(len(result['unscheduled']), 1)
+        for student, entries in timetabler.iter_student_calendars():
+            dates = [e['date'] for e in entries]
+            self.assertEqual(len(dates), len(set(dates)))
+
+    def test_room_capacity_packing(self):
+        """المقرر لا يُجدول في فترة لا تتسع قاعاتها لطلابه"""
+        rooms = [ExamRoom('R1', 'Hall 1', 1), ExamRoom('R2', 'Hall 2', 1)]
+        timetabler = ExamTimetabler(self.graph, self.periods, rooms)
+        result = timetabler.schedule()
+
+        for assignment in result['assignments'].values():
+            seats = sum(count for _, count in assignment.rooms)
+            self.assertEqual(seats, assignment.student_count)
+
+    def test_export_student_calendars_csv(self):
+        """تصدير جداول الطلاب إلى CSV"""
+        timetabler = ExamTimetabler(self.graph, self.periods)
+        timetabler.schedule()
+
+        output = io.StringIO()
+        rows = timetabler.export_student_calendars_csv(output)
+        self.assertEqual(rows, 7)
+        self.assertTrue(output.getvalue().startswith('student_id,course_id,date'))
+
+    def test_periods_skip_weekend(self):
+        """فترات الامتحانات تتخطى عطلة نهاية الأسبوع"""
+        periods = build_exam_periods(datetime.date(2025, 1, 9), datetime.date(2025, 1, 12))
+        dates = sorted({p.date for p in periods})
+        self.assertEqual(dates, [datetime.date(2025, 1, 9), datetime.date(2025, 1, 12)])
+        self.assertTrue(np.array_equal(np.unique([p.day_index for p in periods]), [0, 1]))
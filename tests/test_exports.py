@@ -0,0 +1,71 @@
+"""
+اختبارات خط التصدير المتدفق
+Streaming export pipeline tests
+"""
+import csv
+import datetime
+import io
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+
+from reports.exports import Column, infer_columns, iter_csv, write_xlsx
+
+
+def generate_rows(count):
+    for index in range(count):
+        yield {'code': f'C{index}', 'score': Decimal('81.456'), 'passed': index % 2 == 0,
+               'date': datetime.date(2026, 1, 1 + index % 28)}
+
+
+class ColumnTypingTests(SimpleTestCase):
+    """تحويل القيم حسب نوع العمود"""
+
+    def test_conversion(self):
+        self.assertEqual(Column('n', type='int').convert('7'), 7)
+        self.assertEqual(Column('d', type='date').convert('2026-03-01T10:00:00'), datetime.date(2026, 3, 1))
+        self.assertEqual(Column('x', type='decimal').convert(1.5), Decimal('1.5'))
+        self.assertIsNone(Column('x', type='float').convert(''))
+
+    def test_unknown_type(self):
+        with self.assertRaises(ValueError):
+            Column('x', type='money')
+
+    def test_inferred_from_first_row(self):
+        columns, rows = infer_columns(generate_rows(3))
+        self.assertEqual([column.type for column in columns], ['str', 'decimal', 'bool', 'date'])
+        self.assertEqual(len(list(rows)), 3)
+
+
+class CsvExportTests(SimpleTestCase):
+    """التصدير بصيغة CSV سطراً بسطر"""
+
+    def test_lines_are_streamed(self):
+        columns = [Column('code', 'رمز'), Column('score', type='float'), Column('date', type='date')]
+        lines = iter_csv(columns, generate_rows(1000))
+
+        header = next(lines)
+        self.assertTrue(header.startswith('\ufeffرمز,score,date'))
+        parsed = list(csv.reader(io.StringIO(''.join(lines))))
+        self.assertEqual(len(parsed), 1000)
+        self.assertEqual(parsed[0], ['C0', '81.456', '2026-01-01'])
+
+
+class XlsxExportTests(SimpleTestCase):
+    """ملف Excel مكتوب من مولد مع أنواع الأعمدة"""
+
+    def test_write_only_workbook(self):
+        from openpyxl import load_workbook
+
+        output = io.BytesIO()
+        columns = [Column('code', 'Code'), Column('score', 'Score', 'decimal'), Column('date', 'Date', 'date')]
+        counts = write_xlsx(output, {'Sheet': (columns, generate_rows(500))})
+        self.assertEqual(counts, {'Sheet': 500})
+
+        output.seek(0)
+        sheet = load_workbook(output, read_only=True)['Sheet']
+        rows = list(sheet.iter_rows())
+        self.assertEqual([cell.value for cell in rows[0]], ['Code', 'Score', 'Date'])
+        self.assertEqual(len(rows), 501)
+        self.assertEqual(rows[1][1].number_format, '0.00')
+        self.assertEqual(rows[1][2].value, datetime.datetime(2026, 1, 1))
@@ -0,0 +1,111 @@
+"""
+اختبارات مخزن خصائص الطلاب
+Student feature store tests
+"""
+import tempfile
+from decimal import Decimal
+
+import numpy as np
+
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from academic.models import Enrollment
+from ai.feature_store import FEATURE_COLUMNS, FeatureStore, build_feature_frame
+from tests.test_registration import RegistrationFixtureMixin
+
+
+class FeatureFrameTests(SimpleTestCase):
+    """المصفوفة المتجهة تطابق حساب الخصائص لكل طالب على حدة"""
+
+    def setUp(self):
+        self.grades = {
+            's1': [Decimal('90'), Decimal('80'), Decimal('70'), Decimal('75')],
+            's2': [Decimal('60'), Decimal('65')],
+        }
+        self.frame = build_feature_frame(
+            students=[('s1', Decimal('3.20'), 5), ('s2', Decimal('2.50'), 2), ('s3', Decimal('0'), 1)],
+            grades=[(pk, grade) for pk, grades in self.grades.items() for grade in grades],
+            course_loads=[('s1', 10, 4, 30), ('s2', 4, 2, 12)],
+            attendance=[('s1', 20, 15)],
+            departments=[('s1', 1, Decimal('85')), ('s1', 2, Decimal('72.5')), ('s2', 1, Decimal('62.5'))],
+        )
+
+    def test_matches_scalar_features(self):
+        """تطابق المتوسط والانحراف واتجاه الدرجات مع الحساب الفردي"""
+        row = self.frame.loc['s1']
+        grades = [float(g) for g in self.grades['s1']]
+
+        self.assertAlmostEqual(row['avg_grade'], np.mean(grades))
+        self.assertAlmostEqual(row['grade_std'], np.std(grades))
+        self.assertAlmostEqual(row['grade_trend'], np.polyfit(np.arange(4), grades, 1)[0])
+        self.assertAlmostEqual(row['avg_courses_per_semester'], 2.5)
+        self.assertAlmostEqual(row['avg_credits_per_semester'], 7.5)
+        self.assertAlmostEqual(row['attendance_rate'], 75.0)
+        self.assertEqual((row['best_dept_performance'], row['worst_dept_performance']), (85.0, 72.5))
+
+    def test_defaults_for_students_without_history(self):
+        """القيم الافتراضية للطلاب بدون سجل"""
+        row = self.frame.loc['s3']
+        self.assertEqual(row['completed_courses'], 0)
+        self.assertEqual(row['attendance_rate'], 100.0)
+        self.assertEqual(row['avg_grade'], 0.0)
+        self.assertEqual(list(self.frame.columns), FEATURE_COLUMNS + ['completed_courses'])
+
+    def test_materialized_round_trip(self):
+        """حفظ المصفوفة في ملف مربوط بالذاكرة وقراءتها"""
+        from django.utils import timezone
+
+        with tempfile.TemporaryDirectory() as directory:
+            store = FeatureStore(directory)
+            store._write(self.frame, timezone.now())
+
+            self.assertEqual(store.meta['rows'], 3)
+            features = store.features_for('s1')
+            self.assertAlmostEqual(features['avg_grade'], self.frame.loc['s1', 'avg_grade'])
+            self.assertIsNone(store.features_for('s2'))
+
+    def test_refresh_swaps_version_atomically(self):
+        """كل تحديث يكتب نسخة جديدة ويبدّل ملف الوصف إليها دفعة واحدة"""
+        import os
+        from django.utils import timezone
+
+        with tempfile.TemporaryDirectory() as directory:
+            store = FeatureStore(directory)
+            store._write(self.frame, timezone.now())
+            first = store.meta['version']
+            self.assertIsNotNone(store.features_for('s1'))
+
+            for _ in range(2):
+                store._write(self.frame.drop(index='s1'), timezone.now())
+
+            meta = store.meta
+            self.assertNotEqual(meta['version'], first)
+            self.assertEqual(meta['rows'], 2)
+            self.assertEqual(len(np.load(os.path.join(directory, meta['version'], store.IDS_FILE))), 2)
+            self.assertFalse(os.path.exists(os.path.join(directory, first)))
+            self.assertEqual(len([name for name in os.listdir(directory) if name.startswith('v')]),
+                             store.KEEP_VERSIONS)
+            self.assertEqual(set(store.frame().index), {'s2', 's3'})
+
+
+class ChangedStudentsTests(RegistrationFixtureMixin, TestCase):
+    """التحديث الجزئي يلتقط التسجيلات التي تغيرت حالتها أو درجتها النهائية"""
+
+    def setUp(self):
+        self.create_fixtures(students=2, capacity=10)
+        self.enrollment = Enrollment.objects.create(student=self.students[0], course=self.course,
+                                                    semester=self.semester)
+        self.since = timezone.now()
+
+    def test_completed_enrollment_is_changed(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        store = FeatureStore(directory.name)
+        self.assertEqual(store.changed_students(self.since), set())
+
+        self.enrollment.status = 'COMPLETED'
+        self.enrollment.final_grade = Decimal('88')
+        self.enrollment.save()
+
+        self.assertEqual(store.changed_students(self.since), {self.students[0].pk})
@@ -0,0 +1,100 @@
+"""
+اختبارات إحصائيات الدرجات المجمعة
+Vectorized grade statistics tests
+"""
+import uuid
+
+import numpy as np
+from django.test import SimpleTestCase, TestCase
+
+from academic.models import Enrollment
+from courses.models import Course
+from reports.advanced_reports import analyze_course_grades
+from reports.grade_statistics import course_statistics, grade_statistics
+from reports.snapshots import compute_course_performance
+from tests.test_registration import RegistrationFixtureMixin
+
+
+class GradeStatisticsTests(SimpleTestCase):
+    """النتائج المجمعة تطابق الحساب لكل مقرر على حدة"""
+
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.course_ids = rng.integers(1, 40, size=3000)
+        self.grades = np.round(rng.normal(72, 15, size=3000).clip(0, 100), 2)
+        self.grades[rng.random(3000) < 0.05] = np.nan
+
+    def test_matches_per_course_analysis(self):
+        bulk = grade_statistics(self.course_ids, self.grades)
+
+        for course in np.unique(self.course_ids):
+            values = self.grades[self.course_ids == course]
+            expected = analyze_course_grades(values[~np.isnan(values)].tolist(), len(values))
+            actual = bulk[int(course)]
+
+            self.assertEqual(actual['total_students'], expected['total_students'])
+            self.assertEqual(actual['graded_students'], expected['graded_students'])
+            self.assertEqual(actual['grade_distribution'], expected['grade_distribution'])
+            for key in ('average_grade', 'median_grade', 'std_deviation', 'min_grade', 'max_grade', 'pass_rate'):
+                self.assertAlmostEqual(actual[key], expected[key], places=9)
+            for key in ('first_quartile', 'third_quartile', 'iqr'):
+                self.assertAlmostEqual(actual['statistical_summary'][key],
+                                       expected['statistical_summary'][key], places=9)
+            self.assertEqual(actual['statistical_summary']['outliers'],
+                             sorted(expected['statistical_summary']['outliers']))
+
+    def test_ungraded_courses_are_counted(self):
+        bulk = grade_statistics([1, 1, 2], [np.nan, 95.0, np.nan])
+
+        self.assertEqual(bulk[1]['graded_students'], 1)
+        self.assertEqual(bulk[1]['total_students'], 2)
+        self.assertEqual(bulk[2], {'total_students': 1, 'graded_students': 0})
+
+    def test_uuid_course_ids(self):
+        first, second = uuid.uuid4(), uuid.uuid4()
+        course_ids = np.array([first, second, first], dtype=object)
+
+        bulk = grade_statistics(course_ids, [70.0, np.nan, 90.0])
+
+        self.assertEqual(bulk[first]['average_grade'], 80.0)
+        self.assertEqual(bulk[second], {'total_students': 1, 'graded_students': 0})
+
+    def test_empty_input(self):
+        self.assertEqual(grade_statistics([], []), {})
+
+
+class CourseStatisticsQueryTests(RegistrationFixtureMixin, TestCase):
+    """الإحصائيات من تسجيلات حقيقية مفهرسة بالمفتاح الأساسي للمقرر"""
+
+    def setUp(self):
+        self.create_fixtures(students=3, capacity=10)
+        self.other = Course.objects.create(
+            code='CS102', name_ar='هياكل البيانات', name_en='Data Structures', department=self.department,
+            course_type='CORE', credit_hours=3, academic_level=1, description='هياكل البيانات',
+            objectives='القوائم والأشجار', learning_outcomes='اختيار الهيكل المناسب', max_enrollment=10
+        )
+        for student, grade in zip(self.students, (55, 85, None)):
+            Enrollment.objects.create(student=student, course=self.course, semester=self.semester,
+                                      status='COMPLETED', final_grade=grade)
+        Enrollment.objects.create(student=self.students[0], course=self.other, semester=self.semester,
+                                  status='DROPPED', final_grade=99)
+        Enrollment.objects.create(student=self.students[1], course=self.other, semester=self.semester,
+                                  status='COMPLETED', final_grade=92)
+
+    def test_statistics_are_keyed_by_course_pk(self):
+        statistics = course_statistics(semester_id=self.semester.id)
+
+        self.assertEqual(set(statistics), {self.course.pk, self.other.pk})
+        course = statistics[self.course.pk]
+        self.assertEqual((course['total_students'], course['graded_students']), (3, 2))
+        self.assertEqual(course['average_grade'], 70.0)
+        self.assertEqual(course['pass_rate'], 50.0)
+        self.assertEqual(statistics[self.other.pk]['total_students'], 1)
+
+    def test_course_performance_snapshot_matches_string_pk(self):
+        data = compute_course_performance(
+            {'course_id': str(self.course.pk), 'semester_id': self.semester.id}, ['enrollments']
+        )
+
+        self.assertEqual(data['enrollments']['graded_students'], 2)
+        self.assertEqual(data['enrollments']['max_grade'], 85.0)
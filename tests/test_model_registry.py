@@ -0,0 +1,85 @@
+"""
+اختبارات سجل نماذج التعلم الآلي
+Model registry tests
+"""
+import tempfile
+from unittest import mock
+
+import joblib
+import numpy as np
+from sklearn.linear_model import LinearRegression
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from smart_ai.model_registry import ModelRegistry
+from smart_ai.models import AIModel
+
+
+class ModelRegistryTests(TestCase):
+    """اختبارات الإصدارات والتبديل الفوري للنموذج النشط"""
+
+    def setUp(self):
+        cache.clear()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.registry = ModelRegistry(self.tmp.name)
+        # ميزتان مستقلتان فيستعيد الانحدار الميل بدقة
+        self.X = np.random.default_rng(0).normal(size=(10, 2))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def fit(self, slope):
+        return LinearRegression().fit(self.X, self.X[:, 0] * slope)
+
+    def register(self, slope, activate=True):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.registry.register(
+                'grade_model', self.fit(slope), feature_columns=['a', 'b'],
+                metrics={'accuracy': 0.9}, training_data_size=10, activate=activate
+            )
+
+    def test_versions_and_active_model(self):
+        """كل تسجيل ينشئ إصداراً جديداً ويصبح الأحدث نشطاً"""
+        self.register(1)
+        self.register(2)
+
+        versions = self.registry.versions('grade_model')
+        self.assertEqual([v.version for v in versions], ['2', '1'])
+        self.assertEqual(AIModel.objects.get(is_active=True).code, 'grade_model@v2')
+
+        model = self.registry.get_active('grade_model')
+        self.assertEqual(model.version, 2)
+        self.assertEqual(model.feature_columns, ['a', 'b'])
+        self.assertAlmostEqual(model.predict([[1.0, 0.0]])[0], 2.0)
+
+    def test_hot_swap_and_worker_cache(self):
+        """النموذج يُحمّل مرة واحدة ويُستبدل عند تفعيل إصدار آخر"""
+        self.register(1)
+        self.register(2)
+        first = self.registry.get_active('grade_model')
+        self.assertIs(self.registry.get_active('grade_model'), first)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.registry.activate('grade_model', 1)
+
+        swapped = self.registry.get_active('grade_model')
+        self.assertEqual(swapped.version, 1)
+        self.assertAlmostEqual(swapped.predict([[1.0, 0.0]])[0], 1.0)
+
+    def test_no_active_version(self):
+        """لا يوجد نموذج نشط قبل أول تدريب"""
+        self.assertIsNone(self.registry.get_active('grade_model'))
+
+    def test_taken_version_is_retried_without_overwriting(self):
+        """رقم إصدار محجوز من عملية أخرى يُعاد حسابه دون الكتابة فوق ملفها"""
+        first = self.register(1)
+
+        # عملية متزامنة حسبت الرقم نفسه قبل إدراج الإصدار الأول
+        with mock.patch.object(self.registry, '_next_version', side_effect=[1, 2]):
+            second = self.register(2)
+
+        self.assertEqual((first.version, second.version), ('1', '2'))
+        self.assertEqual(second.status, 'TRAINED')
+        self.assertAlmostEqual(joblib.load(first.model_file_path).predict([[1.0, 0.0]])[0], 1.0)
+        self.assertAlmostEqual(joblib.load(second.model_file_path).predict([[1.0, 0.0]])[0], 2.0)
@@ -0,0 +1,158 @@
+"""
+اختبارات توزيع الإشعارات على دفعات
+Chunked notification fan-out tests
+"""
+import uuid
+from unittest import mock
+
+from django.test import SimpleTestCase
+from django.utils import timezone
+
+from notifications import enhanced_system
+from notifications.enhanced_system import (
+    NotificationChannel, NotificationEngine, NotificationPriority, PREFERENCE_FIELDS
+)
+
+
+class FakeUsers:
+    """استعلام بديل يعيد صفوف القيم من المؤشر"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.iterations = []
+
+    def order_by(self):
+        return self
+
+    def values(self, *fields):
+        self.fields = fields
+        return self
+
+    def iterator(self, chunk_size):
+        self.iterations.append(chunk_size)
+        return iter(self.rows)
+
+
+class FakeModel:
+    """نموذج بديل يسجل استدعاءات bulk_create"""
+
+    batches = []
+
+    def __init__(self, **fields):
+        self.__dict__.update(fields, id=uuid.uuid4(), created_at=timezone.now())
+
+    @classmethod
+    def bulk_create(cls, objects):
+        cls.batches.append(objects)
+        return objects
+
+
+def user_row(user_id, **preferences):
+    row = {
+        'id': user_id, 'email': f'user{user_id}@example.com', 'phone_number': '',
+        'language_preference': 'ar', 'first_name_ar': 'طالب', 'last_name_ar': str(user_id),
+        'first_name_en': 'Student', 'last_name_en': str(user_id), 'middle_name': '',
+    }
+    defaults = dict.fromkeys(PREFERENCE_FIELDS, True)
+    defaults.update(id=user_id if preferences else None, urgent_only=False)
+    defaults.update(preferences)
+    row.update({f'notification_preference__{name}': value for name, value in defaults.items()})
+    return row
+
+
+class NotificationFanoutTests(SimpleTestCase):
+    """مهمة واحدة لكل دفعة ولكل قناة وإنشاء إشعارات التطبيق بالجملة"""
+
+    def setUp(self):
+        in_app = type('InAppNotification', (FakeModel,), {'batches': []})
+        logs = type('NotificationLog', (FakeModel,), {'batches': []})
+        in_app.objects = in_app
+        logs.objects = logs
+        self.in_app, self.logs = in_app, logs
+
+        self.task = mock.MagicMock()
+        patches = [
+            mock.patch('notifications.models.InAppNotification', in_app, create=True),
+            mock.patch('notifications.models.NotificationLog', logs, create=True),
+            mock.patch.object(enhanced_system, 'send_notification_chunk', self.task),
+            mock.patch.object(enhanced_system, 'CELERY_AVAILABLE', True),
+            mock.patch.object(enhanced_system, 'WEBSOCKET_AVAILABLE', True),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+        self.engine = NotificationEngine()
+
+    def test_recipients_are_streamed_in_chunks(self):
+        users = FakeUsers([user_row(user_id) for user_id in range(1, 2501)])
+
+        result = self.engine.broadcast('course_enrollment', users, {'course_name': 'CS101', 'semester': '1'},
+                                       chunk_size=1000)
+
+        self.assertTrue(result['success'])
+        self.assertEqual(users.iterations, [1000])
+        self.assertEqual((result['recipients_count'], result['chunks_count']), (2500, 3))
+        # قناتان (البريد والتطبيق) لكل دفعة
+        self.assertEqual(self.task.delay.call_count, 6)
+        self.assertEqual(result['tasks_count'], 6)
+        self.assertEqual([len(batch) for batch in self.in_app.batches], [1000, 1000, 500])
+        self.assertEqual([len(batch) for batch in self.logs.batches], [1000, 1000, 500])
+        self.assertEqual(result['in_app_created'], 2500)
+
+        channels = {call.args[0] for call in self.task.delay.call_args_list}
+        self.assertEqual(channels, {'email', 'in_app'})
+
+    def test_preferences_select_channels(self):
+        users = FakeUsers([
+            user_row(1),
+            user_row(2, email_enabled=False),
+            user_row(3, academic_notifications=False),
+            user_row(4, urgent_only=True),
+        ])
+
+        self.engine.broadcast('course_enrollment', users, {'course_name': 'CS101', 'semester': '1'})
+
+        recipients = {
+            call.args[0]: [data['user_id'] for data in call.args[1] or call.args[4]]
+            for call in self.task.delay.call_args_list
+        }
+        self.assertEqual(recipients['email'], ['1'])
+        self.assertEqual(recipients['in_app'], ['1', '2'])
+
+    def test_critical_notifications_are_sent_inline(self):
+        self.task.return_value = {'sent_count': 1, 'failed_count': 0}
+        users = FakeUsers([user_row(1)])
+
+        result = self.engine.broadcast('security_alert', users, {'alert_type': 'x', 'alert_details': 'y'},
+                                       priority=NotificationPriority.CRITICAL,
+                                       channels=[NotificationChannel.EMAIL])
+
+        self.task.delay.assert_not_called()
+        self.assertEqual(self.task.call_count, 1)
+        self.assertEqual(result['sent_count'], 1)
+
+    def test_empty_audience(self):
+        result = self.engine.broadcast('course_enrollment', FakeUsers([]), {})
+
+        self.assertFalse(result['success'])
+        self.task.delay.assert_not_called()
+
+
+class InAppChunkTests(SimpleTestCase):
+    """أعداد دفعة التطبيق مأخوذة من نتيجة التسليم الفوري"""
+
+    def send(self, delivered):
+        notifications = [{'user_id': user_id, 'notification': {'id': str(user_id)}} for user_id in (1, 2, 2)]
+        with mock.patch('notifications.realtime.deliver_notifications', return_value=delivered):
+            return enhanced_system.send_notification_chunk(
+                'in_app', [], {'title': 't', 'message': 'm'}, 'academic', notifications
+            )
+
+    def test_delivered_chunk_is_counted_as_sent(self):
+        result = self.send(2)
+        self.assertEqual((result['sent_count'], result['failed_count']), (3, 0))
+
+    def test_undelivered_chunk_is_counted_as_failed(self):
+        result = self.send(0)
+        self.assertEqual((result['sent_count'], result['failed_count']), (0, 3))
@@ -0,0 +1,94 @@
+"""
+اختبارات التحديث التدريجي لنموذج الأداء
+Online performance model tests
+"""
+import pickle
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from academic.models import Enrollment, Grade
+from ai.online_learning import HOLDOUT_MODULUS, OnlinePerformanceModel, changed_pairs, holdout_mask
+from tests.test_registration import RegistrationFixtureMixin
+
+
+class OnlinePerformanceModelTests(SimpleTestCase):
+    """التعلم على دفعات صغيرة متتالية"""
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.X = rng.normal(size=(2000, 3)) * [10, 1, 100] + [70, 3, 500]
+        self.y = np.clip(0.02 * self.X[:, 0] + 0.5 * self.X[:, 1] - 0.5, 0, 4)
+
+    def test_mini_batches_learn_the_target(self):
+        """الخطأ ينخفض مع كل دفعة جديدة"""
+        model = OnlinePerformanceModel()
+        model.partial_fit(self.X[:100], self.y[:100])
+        early = np.mean((model.predict(self.X[-200:]) - self.y[-200:]) ** 2)
+
+        for start in range(100, 1800, 100):
+            model.partial_fit(self.X[start:start + 100], self.y[start:start + 100])
+        late = np.mean((model.predict(self.X[-200:]) - self.y[-200:]) ** 2)
+
+        self.assertEqual(model.samples_seen, 1800)
+        self.assertLess(late, early)
+        self.assertLess(late, 0.05)
+
+    def test_state_survives_serialization(self):
+        """النموذج المحفوظ يستأنف التعلم من حيث توقف"""
+        model = OnlinePerformanceModel().partial_fit(self.X[:500], self.y[:500])
+        model.high_water_mark = 'mark'
+        restored = pickle.loads(pickle.dumps(model))
+
+        np.testing.assert_allclose(restored.predict(self.X[:5]), model.predict(self.X[:5]))
+        self.assertEqual(restored.high_water_mark, 'mark')
+        restored.partial_fit(self.X[500:600], self.y[500:600])
+        self.assertEqual(restored.samples_seen, 600)
+
+
+class HoldoutMaskTests(SimpleTestCase):
+    """مجموعة التحقق ثابتة لكل طالب"""
+
+    def test_stable_and_proportional(self):
+        keys = list(range(10000))
+        mask = holdout_mask(keys)
+        np.testing.assert_array_equal(mask, holdout_mask([str(key) for key in keys]))
+        self.assertAlmostEqual(mask.mean(), 1 / HOLDOUT_MODULUS, delta=0.02)
+
+
+class ChangedPairsTests(RegistrationFixtureMixin, TestCase):
+    """المغذي يلتقط الدرجات الجديدة وتغييرات التسجيلات بعد علامة الماء"""
+
+    def setUp(self):
+        self.create_fixtures(students=2, capacity=10)
+        self.enrollments = [
+            Enrollment.objects.create(student=student, course=self.course, semester=self.semester)
+            for student in self.students
+        ]
+        for enrollment in self.enrollments:
+            Grade.objects.create(enrollment=enrollment, grade_type='QUIZ', title='Quiz 1',
+                                 points_earned=8, points_possible=10, date_assigned=date(2024, 10, 1))
+        self.since = timezone.now()
+
+    def pairs(self, since):
+        return sorted(map(tuple, changed_pairs(since).to_numpy().tolist()))
+
+    def test_all_graded_pairs_without_mark(self):
+        self.assertEqual(self.pairs(None), sorted((student.pk, self.semester.pk) for student in self.students))
+
+    def test_enrollment_and_grade_changes_after_mark(self):
+        self.assertEqual(self.pairs(self.since), [])
+
+        completed = self.enrollments[0]
+        completed.status = 'COMPLETED'
+        completed.final_grade = Decimal('85')
+        completed.save()
+        Grade.objects.create(enrollment=self.enrollments[1], grade_type='QUIZ', title='Quiz 2',
+                             points_earned=9, points_possible=10, date_assigned=date(2024, 10, 8))
+
+        self.assertEqual(self.pairs(self.since),
+                         sorted((student.pk, self.semester.pk) for student in self.students))
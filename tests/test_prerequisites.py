@@ -0,0 +1,49 @@
+"""
+اختبارات خدمة رسم المتطلبات السابقة
+Prerequisite graph service tests
+"""
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+
+from academic.prerequisites import PrerequisiteGraph
+
+
+class PrerequisiteGraphTests(SimpleTestCase):
+    """اختبارات رسم المتطلبات وتقييم الأهلية دفعة واحدة"""
+
+    def setUp(self):
+        # CS301 <- CS201 <- CS101, CS301 <- MATH101
+        self.graph = PrerequisiteGraph([
+            ('CS201', 'CS101', 'CS101', Decimal('60')),
+            ('CS301', 'CS201', 'CS201', Decimal('70')),
+            ('CS301', 'MATH101', 'MATH101', Decimal('60')),
+        ], version='v1')
+
+    def test_bulk_eligibility(self):
+        """تقييم أهلية عدة مقررات بتمريرة واحدة"""
+        grades = {'CS101': Decimal('85'), 'CS201': Decimal('65')}
+        results = self.graph.evaluate(['CS101', 'CS201', 'CS301'], grades)
+
+        self.assertTrue(results['CS101'].prerequisites_met)
+        self.assertTrue(results['CS201'].prerequisites_met)
+        self.assertFalse(results['CS301'].prerequisites_met)
+        self.assertEqual(
+            results['CS301'].missing_prerequisites,
+            {'CS201': Decimal('70'), 'MATH101': Decimal('60')}
+        )
+        self.assertEqual([edge.code for edge in results['CS301'].missing], ['CS201', 'MATH101'])
+
+    def test_transitive_prerequisites(self):
+        """المتطلبات السابقة المتعدية"""
+        self.assertEqual(self.graph.all_prerequisites('CS301'), {'CS201', 'CS101', 'MATH101'})
+        self.assertEqual(self.graph.all_prerequisites('CS101'), set())
+
+    def test_cycle_detection(self):
+        """اكتشاف الحلقات في الرسم"""
+        self.assertEqual(self.graph.cycles, [])
+        graph = PrerequisiteGraph([
+            ('A', 'B', 'B', Decimal('60')),
+            ('B', 'A', 'A', Decimal('60')),
+        ], version='v2')
+        self.assertEqual(len(graph.cycles), 1)
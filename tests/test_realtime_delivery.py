@@ -0,0 +1,64 @@
+"""
+اختبارات التسليم الفوري المجمع للإشعارات
+Batched real-time notification delivery tests
+"""
+from django.test import SimpleTestCase
+
+from notifications.realtime import (
+    BROADCAST_GROUP, broadcast_group_for, broadcast_notification, coalesce_messages,
+    deliver_notifications, socket_groups, user_group
+)
+
+
+class RecordingLayer:
+    """طبقة قنوات بديلة تسجل رسائل group_send"""
+
+    def __init__(self):
+        self.sent = []
+
+    async def group_send(self, group, message):
+        self.sent.append((group, message))
+
+
+class RealtimeDeliveryTests(SimpleTestCase):
+    """رسالة واحدة لكل مستخدم وبث واحد للمحتوى المتطابق"""
+
+    def setUp(self):
+        self.layer = RecordingLayer()
+
+    def test_burst_is_coalesced_per_user(self):
+        payloads = [(1, {'id': 'a'}), (2, {'id': 'b'}), (1, {'id': 'c'})]
+
+        messages = dict(coalesce_messages(payloads))
+
+        self.assertEqual(messages[user_group(1)],
+                         {'type': 'notification.batch', 'notifications': [{'id': 'a'}, {'id': 'c'}]})
+        self.assertEqual(messages[user_group(2)], {'type': 'notification.message', 'notification': {'id': 'b'}})
+
+    def test_deliver_sends_one_message_per_user(self):
+        payloads = [(user_id % 250, {'id': str(user_id)}) for user_id in range(1000)]
+
+        sent = deliver_notifications(payloads, channel_layer=self.layer)
+
+        self.assertEqual(sent, 250)
+        self.assertEqual(len({group for group, _ in self.layer.sent}), 250)
+        self.assertTrue(all(len(message['notifications']) == 4 for _, message in self.layer.sent))
+
+    def test_deliver_nothing(self):
+        self.assertEqual(deliver_notifications([], channel_layer=self.layer), 0)
+        self.assertEqual(self.layer.sent, [])
+
+    def test_broadcast_sends_single_group_message(self):
+        group = broadcast_group_for(role='student')
+
+        self.assertTrue(broadcast_notification(group, {'id': 'x'}, channel_layer=self.layer))
+        self.assertEqual(self.layer.sent, [(group, {'type': 'notification.broadcast', 'notification': {'id': 'x'}})])
+        self.assertEqual(broadcast_group_for(), BROADCAST_GROUP)
+
+    def test_socket_groups_follow_role_and_department(self):
+        profile = type('Profile', (), {'department_id': 7})()
+        user = type('User', (), {'role': 'student', 'student_profile': profile})()
+
+        self.assertEqual(socket_groups(user), [
+            BROADCAST_GROUP, broadcast_group_for(role='student'), broadcast_group_for(department_id=7)
+        ])
@@ -0,0 +1,149 @@
+"""
+اختبارات فهرس توصيات المقررات
+Course recommendation index tests
+"""
+import os
+import tempfile
+from decimal import Decimal
+from unittest import mock
+
+import numpy as np
+from scipy import sparse
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from academic.models import Enrollment
+from ai import recommendation_index
+from ai.recommendation_index import (
+    RecommendationIndex, RecommendationIndexStore, compute_recommendation_index,
+    get_or_queue_recommendation_index, item_similarity
+)
+from courses.models import Course
+from tests.test_registration import RegistrationFixtureMixin
+
+
+class ItemSimilarityTests(SimpleTestCase):
+    """تشابه جيب التمام بين المقررات مع الإبقاء على أقرب الجيران فقط"""
+
+    def test_matches_dense_cosine(self):
+        """تطابق النتيجة حساب جيب التمام الكامل"""
+        dense = np.array([
+            [0.9, 0.8, 0.0],
+            [0.7, 0.0, 0.6],
+            [0.0, 0.5, 0.9],
+        ])
+        similarity = item_similarity(sparse.csr_matrix(dense), top_k=5).toarray()
+
+        norms = np.linalg.norm(dense, axis=0)
+        expected = dense.T @ dense / np.outer(norms, norms)
+        np.fill_diagonal(expected, 0)
+        np.testing.assert_allclose(similarity, expected)
+
+    def test_keeps_top_k_neighbors(self):
+        """لا يُحتفظ إلا بعدد k من الجيران لكل مقرر"""
+        dense = np.random.RandomState(0).rand(20, 6)
+        similarity = item_similarity(sparse.csr_matrix(dense), top_k=2)
+        self.assertTrue(all(np.diff(similarity.indptr) == 2))
+
+
+class RecommendationIndexTests(SimpleTestCase):
+    """الإحصاءات والتقييم من صفوف الاستعلامات المجمعة"""
+
+    def setUp(self):
+        self.index = RecommendationIndex.from_rows(
+            courses=[(1, 'cs'), (2, 'cs'), (3, 'math'), (4, 'cs')],
+            stats=[(1, Decimal('80'), 4, 4), (2, Decimal('70'), 4, 3), (3, None, 2, 0)],
+            grades=[
+                ('a', 1, Decimal('90')), ('a', 2, Decimal('85')),
+                ('b', 1, Decimal('70')), ('b', 2, Decimal('65')),
+                ('c', 1, Decimal('80')), ('c', 3, Decimal('50')),
+            ],
+        )
+
+    def test_course_statistics(self):
+        """نسبة النجاح ومتوسط الدرجات لكل مقرر"""
+        np.testing.assert_allclose(self.index.success_rate, [100.0, 75.0, 0.0, 0.0])
+        self.assertTrue(np.isnan(self.index.avg_grade[3]))
+
+    def test_neighbor_weighted_grade(self):
+        """الدرجة المتوقعة من المقررات المشابهة التي أكملها الطالب"""
+        scored = self.index.score({1: Decimal('88')}, [2, 3, 4], {2: True, 3: True, 4: True})
+
+        self.assertAlmostEqual(scored[2]['neighbor_grade'], 88.0)
+        self.assertIsNone(scored[4]['neighbor_grade'])
+        self.assertEqual(scored[2]['department_average'], 88.0)
+        self.assertIsNone(scored[3]['department_average'])
+
+    def test_missing_prerequisites_lower_score(self):
+        """عدم استيفاء المتطلبات السابقة يخفض التقييم"""
+        grades = {1: Decimal('88')}
+        met = self.index.score(grades, [2], {2: True})[2]['score']
+        missing = self.index.score(grades, [2], {2: False})[2]['score']
+        self.assertGreater(met, missing)
+        self.assertLessEqual(met, 1.0)
+
+    def test_unknown_courses_are_skipped(self):
+        """المقررات غير الموجودة في الفهرس لا تُقيّم"""
+        self.assertEqual(self.index.score({}, [99], {}), {})
+
+
+class RecommendationIndexStoreTests(SimpleTestCase):
+    """الطلب لا يبني الفهرس؛ غيابه يضع مهمة إعادة البناء في الطابور"""
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.store = RecommendationIndexStore(os.path.join(directory.name, 'index.joblib'))
+        patch = mock.patch.object(recommendation_index, 'get_recommendation_index_store', lambda: self.store)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_missing_index_is_queued_not_built(self):
+        """غياب الفهرس يعيد None ويضع مهمة واحدة في الطابور"""
+        with mock.patch.object(self.store, 'rebuild') as rebuild, \
+                mock.patch('university_system.tasks.rebuild_recommendation_index') as task:
+            self.assertIsNone(get_or_queue_recommendation_index())
+            self.assertIsNone(get_or_queue_recommendation_index())
+
+        rebuild.assert_not_called()
+        task.delay.assert_called_once_with()
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class RecommendFromModelsTests(RegistrationFixtureMixin, TestCase):
+    """التوصيات من فهرس مبني على مقررات وتسجيلات حقيقية"""
+
+    def setUp(self):
+        cache.clear()
+        self.create_fixtures(students=2, capacity=10)
+        self.other = Course.objects.create(
+            code='CS102', name_ar='هياكل البيانات', name_en='Data Structures', department=self.department,
+            course_type='CORE', credit_hours=4, academic_level=1, description='هياكل البيانات',
+            objectives='القوائم والأشجار', learning_outcomes='اختيار الهيكل المناسب', max_enrollment=10
+        )
+        Enrollment.objects.create(student=self.students[0], course=self.course, semester=self.semester,
+                                  status='COMPLETED', final_grade=92)
+        self.index = compute_recommendation_index()
+
+    def recommend(self, student):
+        return self.index.recommend(student, Course.objects.filter(pk=self.other.pk).select_related('department'))
+
+    def test_recommendation_uses_model_fields(self):
+        recommendation, = self.recommend(self.students[0])
+
+        self.assertEqual(recommendation['course_id'], self.other.pk)
+        self.assertEqual(recommendation['course_name'], 'هياكل البيانات')
+        self.assertEqual(recommendation['course_name_en'], 'Data Structures')
+        self.assertEqual(recommendation['department'], 'قسم علوم الحاسوب')
+        self.assertEqual(recommendation['credits'], 4)
+        self.assertEqual(recommendation['predicted_performance'], 87.4)
+
+    def test_prediction_falls_back_to_cumulative_gpa(self):
+        student = self.students[1]
+        student.cumulative_gpa = Decimal('3.20')
+
+        recommendation, = self.recommend(student)
+
+        self.assertEqual(recommendation['predicted_performance'], 80.0)
@@ -0,0 +1,181 @@
+"""
+اختبارات محرك التسجيل عالي التزامن
+High-concurrency registration engine tests
+"""
+import threading
+import unittest
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+
+from academic.models import AcademicYear, CourseCapacity, Enrollment, Semester
+from academic.registration import (
+    ENROLLED, WAITLISTED, FULL, ALREADY_REGISTERED, drop_enrollment, register_student
+)
+from courses.models import College, Course, Department, Major, University
+from students.models import Student
+
+User = get_user_model()
+
+
+class RegistrationFixtureMixin:
+    """بيانات مشتركة لاختبارات التسجيل"""
+
+    def create_fixtures(self, students=5, capacity=2):
+        university = University.objects.create(
+            name_ar='الجامعة', name_en='University', code='UNI', founded_year=1990,
+            address='الرياض', phone='0110000000', email='info@university.edu'
+        )
+        college = College.objects.create(
+            university=university, name_ar='كلية الحاسب', name_en='Computing', code='CC',
+            established_year=2000
+        )
+        self.department = Department.objects.create(
+            college=college, name_ar='قسم علوم الحاسوب', name_en='Computer Science', code='CS',
+            established_year=2000
+        )
+        major = Major.objects.create(
+            department=self.department, name_ar='علوم الحاسوب', name_en='Computer Science',
+            code='CS-BSC', degree_type='BACHELOR', duration_years=4, total_credit_hours=132,
+            description='بكالوريوس علوم الحاسوب'
+        )
+        self.course = Course.objects.create(
+            code='CS101',
+            name_ar='مقدمة في البرمجة',
+            name_en='Introduction to Programming',
+            department=self.department,
+            course_type='CORE',
+            credit_hours=3,
+            academic_level=1,
+            description='مقدمة في البرمجة',
+            objectives='أساسيات البرمجة',
+            learning_outcomes='كتابة برامج بسيطة',
+            max_enrollment=capacity
+        )
+        today = datetime.now().date()
+        year = AcademicYear.objects.create(
+            name='2024-2025', start_date=today, end_date=today + timedelta(days=365)
+        )
+        self.semester = Semester.objects.create(
+            academic_year=year,
+            name='FALL',
+            start_date=today,
+            end_date=today + timedelta(days=120),
+            registration_start=today,
+            registration_end=today + timedelta(days=14),
+            is_current=True
+        )
+        self.students = []
+        for i in range(students):
+            user = User.objects.create_user(
+                username=f'student{i}',
+                email=f'student{i}@university.edu',
+                password='password123'
+            )
+            self.students.append(Student.objects.create(
+                user=user,
+                student_id_display=f'2024{i:04d}',
+                college=college,
+                department=self.department,
+                major=major,
+                academic_level=1,
+                current_semester=1,
+                academic_year='2024-2025'
+            ))
+
+
+class RegistrationEngineTests(RegistrationFixtureMixin, TestCase):
+    """اختبارات تخصيص المقاعد وقائمة الانتظار"""
+
+    def setUp(self):
+        self.create_fixtures(students=5, capacity=2)
+
+    def test_seats_then_waitlist_then_full(self):
+        """المقاعد أولاً ثم قائمة الانتظار ثم الرفض عند الامتلاء"""
+        outcomes = [
+            register_student(student, self.course, self.semester).outcome
+            for student in self.students[:4]
+        ]
+        self.assertEqual(outcomes, [ENROLLED, ENROLLED, WAITLISTED, WAITLISTED])
+
+        counter = CourseCapacity.objects.get(course=self.course, semester=self.semester)
+        counter.waitlist_capacity = 2
+        counter.save()
+        self.assertEqual(register_student(self.students[4], self.course, self.semester).outcome, FULL)
+
+        counter.refresh_from_db()
+        self.assertEqual(counter.enrolled_count, 2)
+        self.assertEqual(counter.waitlisted_count, 2)
+
+    def test_duplicate_registration_rejected(self):
+        """لا يمكن تسجيل الطالب مرتين في المقرر نفسه"""
+        register_student(self.students[0], self.course, self.semester)
+        result = register_student(self.students[0], self.course, self.semester)
+        self.assertEqual(result.outcome, ALREADY_REGISTERED)
+
+    def test_drop_promotes_first_waitlisted(self):
+        """الانسحاب يرقّي أول طالب في قائمة الانتظار"""
+        results = [register_student(s, self.course, self.semester) for s in self.students[:4]]
+        self.assertEqual(results[2].waitlist_position, 1)
+        self.assertEqual(results[3].waitlist_position, 2)
+
+        promoted = drop_enrollment(results[0].enrollment)
+        self.assertEqual(promoted.pk, results[2].enrollment.pk)
+
+        counter = CourseCapacity.objects.get(course=self.course, semester=self.semester)
+        self.assertEqual(counter.enrolled_count, 2)
+        self.assertEqual(counter.waitlisted_count, 1)
+        self.assertEqual(Enrollment.objects.get(pk=results[0].enrollment.pk).status, 'DROPPED')
+
+    def test_dropped_student_rejoins_at_back_of_queue(self):
+        """الطالب المنسحب يعود إلى نهاية قائمة الانتظار"""
+        results = [register_student(s, self.course, self.semester) for s in self.students[:3]]
+        drop_enrollment(results[1].enrollment)
+
+        result = register_student(self.students[1], self.course, self.semester)
+        self.assertEqual(result.outcome, WAITLISTED)
+        self.assertEqual(result.enrollment.pk, results[1].enrollment.pk)
+
+
+@unittest.skipUnless(connection.features.has_select_for_update,
+                     'قاعدة البيانات لا تدعم select_for_update')
+class ConcurrentRegistrationTests(RegistrationFixtureMixin, TransactionTestCase):
+    """اختبار حمل: طلاب متزامنون على شعبة واحدة بدون تجاوز السعة"""
+
+    STUDENTS = 60
+    CAPACITY = 15
+
+    def setUp(self):
+        self.create_fixtures(students=self.STUDENTS, capacity=self.CAPACITY)
+
+    def test_no_oversell_under_concurrency(self):
+        outcomes = []
+        lock = threading.Lock()
+        barrier = threading.Barrier(self.STUDENTS)
+
+        def attempt(student):
+            try:
+                barrier.wait()
+                outcome = register_student(student, self.course, self.semester).outcome
+                with lock:
+                    outcomes.append(outcome)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=attempt, args=(s,)) for s in self.students]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        enrolled = Enrollment.objects.filter(
+            course=self.course, semester=self.semester, status='ENROLLED'
+        ).count()
+        counter = CourseCapacity.objects.get(course=self.course, semester=self.semester)
+
+        self.assertEqual(enrolled, self.CAPACITY)
+        self.assertEqual(outcomes.count(ENROLLED), self.CAPACITY)
+        self.assertEqual(counter.enrolled_count, enrolled)
+        self.assertEqual(counter.waitlisted_count, outcomes.count(WAITLISTED))
@@ -0,0 +1,94 @@
+"""
+اختبارات محرك التقارير الأكاديمية
+Academic report engine tests
+"""
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from reports.report_engine import ProgressThrottle, ReportDefinition, format_course_row, format_student_row
+from university_system.tasks import generate_academic_report
+
+
+class ProgressThrottleTests(SimpleTestCase):
+    """تحديثات التقدم محدودة بفاصل زمني"""
+
+    def test_updates_are_throttled(self):
+        now = [0.0]
+        calls = []
+        progress = ProgressThrottle(lambda current, total: calls.append((current, total)),
+                                    interval=2.0, clock=lambda: now[0])
+        progress.total = 1000
+        for current in range(1, 1001):
+            now[0] = current * 0.01  # عشرة آلاف صف في الثانية تقريباً
+            progress(current)
+        progress.finish()
+
+        self.assertEqual(len(calls), 6)
+        self.assertEqual(calls[0], (200, 1000))
+        self.assertEqual(calls[-1], (1000, 1000))
+
+
+class RowFormattingTests(SimpleTestCase):
+    """تنسيق صفوف الاستعلامات المجمعة"""
+
+    def test_student_row(self):
+        row = format_student_row({
+            'student_id': 'S001', 'student_name': 'Ali ', 'department': None,
+            'gpa': '3.250', 'average_grade': 81.456, 'total_courses': 4,
+            'graded_items': 8, 'passed_items': 6,
+        })
+        self.assertEqual(row['department'], 'N/A')
+        self.assertEqual(row['student_name'], 'Ali')
+        self.assertEqual(row['gpa'], 3.25)
+        self.assertEqual(row['average_grade'], 81.46)
+        self.assertEqual(row['pass_rate'], 75.0)
+
+    def test_course_without_grades(self):
+        row = format_course_row({
+            'course_code': 'CS101', 'course_name': 'Intro', 'enrolled_students': 0,
+            'completed_students': 0, 'average_grade': None, 'graded_items': 0, 'passed_items': 0,
+        })
+        self.assertEqual(row['average_grade'], 0)
+        self.assertEqual(row['pass_rate'], 0)
+
+
+class FailingRows:
+    """استعلام بديل يفشل بعد الصف الأول"""
+
+    def count(self):
+        return 2
+
+    def iterator(self, chunk_size=None):
+        yield {'name': 'first'}
+        raise RuntimeError('connection lost')
+
+
+class ReportTaskFailureTests(SimpleTestCase):
+    """فشل التقرير أثناء البث لا يسجل تقريراً مكتملاً"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        storage = override_settings(REPORT_OUTPUT_ROOT=self.root)
+        storage.enable()
+        self.addCleanup(storage.disable)
+
+    def test_failed_stream_is_not_recorded(self):
+        definition = ReportDefinition(
+            name='failing', title='Failing', sheet='Rows', columns=('name',),
+            query=lambda parameters: FailingRows(), format_row=dict,
+        )
+        with mock.patch('reports.report_engine.get_report_definition', return_value=definition), \
+                mock.patch('reports.models.Report.objects.create') as create, \
+                mock.patch.object(generate_academic_report, 'update_state'):
+            result = generate_academic_report('failing')
+
+        self.assertEqual(result['status'], 'failed')
+        self.assertIn('connection lost', result['error'])
+        create.assert_not_called()
+        files = [name for _, _, names in os.walk(self.root) for name in names]
+        self.assertEqual(files, [])
@@ -0,0 +1,80 @@
+"""
+اختبارات تخزين ملفات التقارير وروابط التنزيل
+Report output storage and download link tests
+"""
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core import signing
+from django.http import Http404
+from django.test import SimpleTestCase, override_settings
+
+from reports.outputs import (
+    DOWNLOAD_SALT, report_download_response, resolve_download_token, save_report_output
+)
+
+
+class ReportOutputTests(SimpleTestCase):
+    """التقارير تُكتب في المخزن الخاص وتُنزَّل برابط موقّع"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        storage = override_settings(REPORT_OUTPUT_ROOT=self.root, REPORT_X_ACCEL_REDIRECT_PREFIX='')
+        storage.enable()
+        self.addCleanup(storage.disable)
+        patch = mock.patch('reports.outputs.reverse', lambda name, args: f'/download/{args[0]}/')
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def save(self, content=b'%PDF-1.4 report'):
+        return save_report_output('report.pdf', 'application/pdf', lambda output: output.write(content))
+
+    def test_output_is_written_and_described(self):
+        output = self.save()
+
+        self.assertTrue(output['path'].startswith(self.root))
+        self.assertEqual(output['size'], 15)
+        self.assertNotIn('content', output)
+        self.assertEqual(output['download_url'], f"/download/{output['download_token']}/")
+        self.assertEqual(resolve_download_token(output['download_token']), os.path.realpath(output['path']))
+
+    def test_failed_write_leaves_no_file(self):
+        def write(output):
+            output.write(b'partial')
+            raise RuntimeError('render failed')
+
+        with self.assertRaises(RuntimeError):
+            save_report_output('report.pdf', 'application/pdf', write)
+
+        files = [name for _, _, names in os.walk(self.root) for name in names]
+        self.assertEqual(files, [])
+
+    def test_tampered_and_foreign_tokens_are_rejected(self):
+        token = self.save()['download_token']
+
+        with self.assertRaises(Http404):
+            resolve_download_token(token[:-1] + ('A' if token[-1] != 'A' else 'B'))
+        with self.assertRaises(Http404):
+            resolve_download_token(signing.dumps('../../etc/passwd', salt=DOWNLOAD_SALT))
+
+    def test_expired_token_is_rejected(self):
+        token = self.save()['download_token']
+
+        with override_settings(REPORT_DOWNLOAD_MAX_AGE=-1):
+            with self.assertRaises(Http404):
+                resolve_download_token(token)
+
+    def test_nginx_serves_file_through_internal_redirect(self):
+        output = self.save()
+
+        with override_settings(REPORT_X_ACCEL_REDIRECT_PREFIX='/protected-reports/'):
+            response = report_download_response(output['download_token'])
+
+        relative = os.path.relpath(output['path'], self.root)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-reports/{relative}')
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertIn('attachment; filename="report.pdf"', response['Content-Disposition'])
+        self.assertEqual(response.content, b'')
@@ -0,0 +1,148 @@
+"""
+اختبارات نظام الجدولة الذكي
+Smart scheduler tests
+"""
+import datetime
+
+from django.core.exceptions import ValidationError
+from django.test import SimpleTestCase
+
+from academic.smart_scheduler import (
+    SmartScheduler, SchedulingCalendar, SchedulingConstraint, SchedulingRequest,
+    TimeSlot, create_scheduling_request
+)
+
+
+def make_request(course_id, teacher_id='T1', preferred=None, groups=None, duration=60):
+    """إنشاء طلب جدولة للاختبار"""
+    return SchedulingRequest(
+        course_id=course_id,
+        course_name=f'Course {course_id}',
+        teacher_id=teacher_id,
+        credit_hours=3,
+        sessions_per_week=2,
+        duration_per_session=duration,
+        required_room_type='classroom',
+        student_groups=groups or ['G1'],
+        constraints=SchedulingConstraint(preferred_time_slots=preferred or []),
+    )
+
+
+class SlotScoringModelTests(SimpleTestCase):
+    """اختبارات نموذج تقييم الفترات المتجه"""
+
+    def setUp(self):
+        self.scheduler = SmartScheduler('2024-FALL')
+        preferred = [
+            TimeSlot(1, datetime.time(10, 0), datetime.time(11, 0), 60),
+            TimeSlot(3, datetime.time(14, 0), datetime.time(15, 0), 60),
+        ]
+        self.requests = [
+            make_request('C1', preferred=preferred),
+            make_request('C2', teacher_id='T2', groups=['G2']),
+        ]
+
+    def test_vectorized_scores_match_scalar_path(self):
+        """نقاط النموذج المتجه تطابق الحساب الفردي"""
+        model = self.scheduler.scoring_model
+        model.fit(self.requests)
+
+        self.scheduler.scoring_model = None
+        try:
+            for request in self.requests:
+                for slot in self.scheduler.time_slots:
+                    self.assertEqual(
+                        model.score(slot, request),
+                        self.scheduler._calculate_slot_score(slot, request)
+                    )
+        finally:
+            self.scheduler.scoring_model = model
+
+    def test_preferred_slot_ranked_first(self):
+        """الفترة المفضلة تأتي أولاً في الترتيب"""
+        model = self.scheduler.scoring_model.fit(self.requests)
+        ranked = model.rank(self.scheduler.time_slots, self.requests[0])
+
+        self.assertEqual(ranked[0].day, 1)
+        self.assertEqual(ranked[0].start_time, datetime.time(10, 0))
+
+    def test_schedule_courses_uses_scores(self):
+        """الجدولة الكاملة تنتج جلسات بدون تداخل للأستاذ نفسه"""
+        result = self.scheduler.schedule_courses(self.requests)
+
+        # تحليل الذكاء الاصطناعي لا يُخلط بالمقررات المجدولة
+        self.assertEqual(set(result['schedule']), {'C1', 'C2'})
+        sessions = result['schedule']['C1']['sessions']
+        self.assertEqual(len(sessions), 2)
+        self.assertIn({'day': 1, 'start_time': '10:00'},
+                      [{'day': s['day'], 'start_time': s['start_time']} for s in sessions])
+
+    def test_create_scheduling_request_defaults(self):
+        """إنشاء طلب جدولة بالقيم الافتراضية"""
+        request = create_scheduling_request({
+            'course_id': 'C9', 'course_name': 'Course 9', 'teacher_id': 'T9'
+        })
+        self.assertEqual(request.sessions_per_week, 2)
+        self.assertEqual(request.duration_per_session, 60)
+
+
+class SchedulingCalendarTests(SimpleTestCase):
+    """اختبارات تقويم الجدولة ودقة الفترات"""
+
+    def setUp(self):
+        self.calendar = SchedulingCalendar(
+            working_windows={
+                0: (datetime.time(8, 0), datetime.time(12, 0)),
+                2: (datetime.time(9, 0), datetime.time(14, 0)),
+            },
+            break_times={
+                2: [(datetime.time(10, 0), datetime.time(10, 30)),
+                    (datetime.time(12, 0), datetime.time(12, 30))],
+            },
+            granularity=30
+        )
+
+    def test_base_slots_respect_windows_and_breaks(self):
+        """الفترات الأساسية تحترم نافذة كل يوم والاستراحات المتعددة"""
+        slots = self.calendar.generate_base_slots()
+        sunday = [s for s in slots if s.day == 0]
+        tuesday = [s.start_time.strftime('%H:%M') for s in slots if s.day == 2]
+
+        self.assertEqual(len(sunday), 8)
+        self.assertEqual(tuesday, ['09:00', '09:30', '10:30', '11:00', '11:30',
+                                   '12:30', '13:00', '13:30'])
+
+    def test_unsupported_granularity_rejected(self):
+        """رفض دقة فترات غير مدعومة"""
+        with self.assertRaises(ValidationError):
+            SchedulingCalendar(working_windows={}, granularity=45)
+
+    def test_multi_slot_sessions_use_contiguous_runs(self):
+        """الجلسات الطويلة تُوضع فقط على سلاسل متصلة لا تعبر الاستراحات"""
+        scheduler = SmartScheduler('2024-FALL', calendar=self.calendar)
+        session_slots = scheduler._session_slots(90)
+        tuesday = [s.start_time.strftime('%H:%M') for s in session_slots if s.day == 2]
+
+        self.assertEqual(tuesday, ['10:30', '12:30'])
+        self.assertTrue(all(s.duration == 90 for s in session_slots))
+        self.assertEqual(session_slots[0].end_time, datetime.time(9, 30))
+
+    def test_default_calendar_matches_hourly_grid(self):
+        """التقويم الافتراضي ينتج فترات الساعة الواحدة السابقة"""
+        scheduler = SmartScheduler('2024-FALL')
+        self.assertEqual(len(scheduler.time_slots), 5 * 8)
+        self.assertTrue(all(s.duration == 60 for s in scheduler.time_slots))
+
+    def test_schedule_with_fine_granularity(self):
+        """جدولة جلسات 90 دقيقة على تقويم بدقة 15 دقيقة"""
+        calendar = SchedulingCalendar.from_work_hours(SmartScheduler.DEFAULT_WORK_HOURS, 15)
+        scheduler = SmartScheduler('2024-FALL', calendar=calendar)
+        result = scheduler.schedule_courses([make_request('C1', duration=90)])
+
+        self.assertEqual(list(result['schedule']), ['C1'])
+        self.assertGreater(result['optimization_score'], 0)
+        sessions = result['schedule']['C1']['sessions']
+        self.assertEqual(len(sessions), 2)
+        for session in sessions:
+            self.assertEqual(session['duration'], 90)
+            self.assertFalse('12:00' <= session['start_time'] < '13:00')
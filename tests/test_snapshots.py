@@ -0,0 +1,104 @@
+"""
+اختبارات لقطات التقارير والتحديث الجزئي
+Report snapshot tests
+"""
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from reports.snapshots import (
+    SNAPSHOTS, SnapshotDefinition, combine_enrollment_analytics, get_snapshot
+)
+
+
+class FakeReports:
+    """مخزن بديل لجدول التقارير"""
+
+    def __init__(self):
+        self.rows = {}
+
+    def filter(self, snapshot_key):
+        return SimpleNamespace(first=lambda: self.rows.get(snapshot_key))
+
+    def update_or_create(self, snapshot_key, defaults):
+        created = snapshot_key not in self.rows
+        self.rows[snapshot_key] = SimpleNamespace(pk=1, **defaults)
+        return self.rows[snapshot_key], created
+
+
+class GetSnapshotTests(SimpleTestCase):
+    """لا يُعاد إلا حساب الأجزاء التي تغيرت علاماتها"""
+
+    def setUp(self):
+        self.marks = {'1': {'rows': ['2026-01-01T00:00:00', 3]}, '2': {'rows': ['2026-01-01T00:00:00', 5]}}
+        self.computed = []
+
+        def compute(parameters, partitions):
+            self.computed.append(sorted(partitions))
+            return {partition: {'total': self.marks[partition]['rows'][1]} for partition in partitions}
+
+        definition = SnapshotDefinition(
+            name='test', title='Test', version=1, sources=(),
+            compute=compute,
+            combine=lambda parameters, partitions: {'total': sum(data['total'] for data in partitions.values())},
+        )
+        self.reports = FakeReports()
+        patches = [
+            mock.patch.dict(SNAPSHOTS, {'test': definition}),
+            mock.patch.object(SnapshotDefinition, 'watermarks', lambda definition, parameters: dict(self.marks)),
+            mock.patch('reports.models.Report', SimpleNamespace(objects=self.reports)),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_unchanged_sources_are_served_from_snapshot(self):
+        first = get_snapshot('test', {'semester_id': 1})
+        second = get_snapshot('test', {'semester_id': 1})
+
+        self.assertEqual(first.dataset, {'total': 8})
+        self.assertEqual(second.dataset, {'total': 8})
+        self.assertEqual(self.computed, [['1', '2']])
+        self.assertEqual((second.refreshed, second.reused), ([], 2))
+
+    def test_only_changed_partitions_are_recomputed(self):
+        get_snapshot('test', {'semester_id': 1})
+        self.marks['2'] = {'rows': ['2026-02-01T00:00:00', 6]}
+
+        snapshot = get_snapshot('test', {'semester_id': 1})
+
+        self.assertEqual(self.computed, [['1', '2'], ['2']])
+        self.assertEqual(snapshot.dataset, {'total': 9})
+        self.assertEqual(snapshot.reused, 1)
+
+    def test_removed_partitions_are_dropped(self):
+        get_snapshot('test', {'semester_id': 1})
+        del self.marks['1']
+
+        snapshot = get_snapshot('test', {'semester_id': 1})
+
+        self.assertEqual(self.computed, [['1', '2']])
+        self.assertEqual(snapshot.dataset, {'total': 5})
+
+    def test_parameters_and_version_change_the_key(self):
+        definition = SNAPSHOTS['test']
+        self.assertNotEqual(definition.key({'semester_id': 1}), definition.key({'semester_id': 2}))
+        newer = SnapshotDefinition(**{**definition.__dict__, 'version': 2})
+        self.assertNotEqual(definition.key({'semester_id': 1}), newer.key({'semester_id': 1}))
+
+
+class EnrollmentAnalyticsCombineTests(SimpleTestCase):
+    """دمج أجزاء المقررات في تحليلات الفصل"""
+
+    def test_partitions_are_summed(self):
+        dataset = combine_enrollment_analytics({}, {
+            '1': {'college': 'العلوم', 'total': 3, 'levels': [[1, 2], [2, 1]], 'statuses': [['ENROLLED', 3]]},
+            '2': {'college': 'العلوم', 'total': 1, 'levels': [[1, 1]], 'statuses': [['DROPPED', 1]]},
+            '3': {'college': 'الهندسة', 'total': 2, 'levels': [[None, 2]], 'statuses': [['ENROLLED', 2]]},
+        })
+
+        self.assertEqual(dataset['total_enrollments'], 6)
+        self.assertEqual(dataset['college_distribution'][0], {'course__department__college__name_ar': 'العلوم', 'count': 4})
+        self.assertEqual([item['student__academic_level'] for item in dataset['level_distribution']], [1, 2, None])
+        self.assertEqual(dataset['average_enrollments_per_course'], 2)
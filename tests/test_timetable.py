@@ -0,0 +1,121 @@
+"""
+اختبارات الجدول الأسبوعي للطالب
+Student timetable bitmap tests
+"""
+import datetime
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from academic.models import Enrollment, Schedule
+from academic.timetable import (
+    Timetable, TimetableSession, get_student_timetable, load_course_timetables, session_mask
+)
+from courses.models import Course
+from tests.test_registration import RegistrationFixtureMixin
+
+
+def make_session(course_id, day, start, end):
+    """إنشاء جلسة للاختبار"""
+    return TimetableSession(
+        course_id=course_id,
+        course_code=f'C{course_id}',
+        course_name=f'Course {course_id}',
+        day_of_week=day,
+        start_time=datetime.time(*start),
+        end_time=datetime.time(*end),
+    )
+
+
+class TimetableBitmapTests(SimpleTestCase):
+    """اختبارات كشف التعارض بعملية AND على الخريطة الثنائية"""
+
+    def setUp(self):
+        self.timetable = Timetable([
+            make_session(1, 'MONDAY', (9, 0), (10, 15)),
+            make_session(1, 'WEDNESDAY', (9, 0), (10, 15)),
+            make_session(2, 'TUESDAY', (13, 0), (14, 0)),
+        ])
+
+    def test_overlap_detected(self):
+        """جلسة متداخلة جزئياً تُكتشف كتعارض"""
+        candidate = Timetable([make_session(3, 'WEDNESDAY', (10, 10), (11, 0))])
+        conflicts = self.timetable.conflicts_with(candidate)
+
+        self.assertEqual([(c.course_id, c.day_of_week) for c in conflicts], [(1, 'WEDNESDAY')])
+
+    def test_adjacent_and_other_day_do_not_conflict(self):
+        """الجلسات المتلاصقة أو في يوم آخر لا تتعارض"""
+        candidate = Timetable([
+            make_session(3, 'MONDAY', (10, 15), (11, 0)),
+            make_session(3, 'THURSDAY', (9, 0), (10, 0)),
+        ])
+        self.assertEqual(self.timetable.conflicts_with(candidate), [])
+
+    def test_shared_slot_without_overlap_is_not_conflict(self):
+        """جلسات غير محاذية للشبكة تشترك في فترة دون تداخل فعلي"""
+        timetable = Timetable([make_session(1, 'MONDAY', (10, 0), (10, 53))])
+        candidate = Timetable([make_session(2, 'MONDAY', (10, 54), (11, 30))])
+
+        self.assertTrue(timetable.bitmap & candidate.bitmap)
+        self.assertEqual(timetable.conflicts_with(candidate), [])
+
+        candidate = Timetable([make_session(3, 'MONDAY', (10, 52), (11, 30))])
+        self.assertEqual([c.course_id for c in timetable.conflicts_with(candidate)], [1])
+
+    def test_partial_slots_rounded_outwards(self):
+        """الدقائق الجزئية تغطي الفترة كاملة"""
+        mask = session_mask('MONDAY', datetime.time(0, 2), datetime.time(0, 6))
+        self.assertEqual(mask, 0b11)
+
+    def test_incremental_add_and_remove(self):
+        """إضافة وحذف مقرر يحدّث الخريطة الثنائية"""
+        course = Timetable([make_session(4, 'SUNDAY', (8, 0), (9, 0))])
+        self.assertTrue(self.timetable.add_course(course))
+        self.assertFalse(self.timetable.add_course(course))
+        self.assertTrue(self.timetable.bitmap & course.bitmap)
+
+        self.assertTrue(self.timetable.remove_course(4))
+        self.assertFalse(self.timetable.bitmap & course.bitmap)
+        self.assertEqual(self.timetable.course_ids, {1, 2})
+
+    def test_ordered_sessions(self):
+        """ترتيب الجلسات حسب اليوم ثم وقت البداية"""
+        days = [s.day_of_week for s in self.timetable.ordered_sessions()]
+        self.assertEqual(days, ['MONDAY', 'TUESDAY', 'WEDNESDAY'])
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class CourseTimetableQueryTests(RegistrationFixtureMixin, TestCase):
+    """الجداول تُبنى من محاضرات حقيقية وتكشف التعارض مع جدول الطالب"""
+
+    def setUp(self):
+        cache.clear()
+        self.create_fixtures(students=1, capacity=10)
+        self.other = Course.objects.create(
+            code='CS102', name_ar='هياكل البيانات', name_en='Data Structures', department=self.department,
+            course_type='CORE', credit_hours=3, academic_level=1, description='هياكل البيانات',
+            objectives='القوائم والأشجار', learning_outcomes='اختيار الهيكل المناسب', max_enrollment=10
+        )
+        for course, start, end in ((self.course, (9, 0), (10, 15)), (self.other, (10, 0), (11, 0))):
+            Schedule.objects.create(course=course, semester=self.semester, day_of_week='MONDAY',
+                                    start_time=datetime.time(*start), end_time=datetime.time(*end),
+                                    room='101', building='A')
+        Enrollment.objects.create(student=self.students[0], course=self.course, semester=self.semester)
+
+    def test_sessions_carry_both_course_names(self):
+        timetables = load_course_timetables(self.semester.pk, [self.course.pk, self.other.pk])
+
+        session, = timetables[self.course.pk].sessions
+        self.assertEqual((session.course_code, session.course_name, session.course_name_en),
+                         ('CS101', 'مقدمة في البرمجة', 'Introduction to Programming'))
+        self.assertEqual(session.instructor, 'TBA')
+        self.assertEqual(len(timetables[self.other.pk].sessions), 1)
+
+    def test_candidate_course_conflicts_with_student_timetable(self):
+        student = get_student_timetable(self.students[0].pk, self.semester.pk)
+        candidate = load_course_timetables(self.semester.pk, [self.other.pk])[self.other.pk]
+
+        conflicts = student.conflicts_with(candidate)
+
+        self.assertEqual([session.course_code for session in conflicts], ['CS101'])
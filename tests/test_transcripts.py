@@ -0,0 +1,89 @@
+"""
+اختبارات إنتاج كشوف الدرجات الجماعية
+Batch transcript generation tests
+"""
+import os
+import tempfile
+import zipfile
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from reports.transcripts import BatchTranscriptWriter, GradeScaleLookup, Transcript
+
+
+def fake_render(transcripts):
+    return [(transcript.filename, transcript.student_id.encode()) for transcript in transcripts]
+
+
+def cohort(size):
+    return [Transcript(student_id=f'S{index:04d}', name='طالب', major='', gpa=3.0,
+                       completed_hours=30, issued='2026-06-01')
+            for index in range(size)]
+
+
+class GradeScaleLookupTests(SimpleTestCase):
+    """التقدير يُحسب من سلم الدرجات دون استعلامات"""
+
+    def test_letter_bands(self):
+        scale = GradeScaleLookup([(90, 'A'), (80, 'B'), (0, 'F')])
+        self.assertEqual(scale.letter(95), 'A')
+        self.assertEqual(scale.letter(90), 'A')
+        self.assertEqual(scale.letter(89.99), 'B')
+        self.assertEqual(scale.letter(10), 'F')
+        self.assertEqual(scale.letter(None), '')
+
+
+class BatchTranscriptWriterTests(SimpleTestCase):
+    """الكشوف تُكتب في ملف ZIP واحد حتى عند تعذر تشغيل العمليات"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'out', 'transcripts.zip')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def archived(self):
+        with zipfile.ZipFile(self.path) as archive:
+            return archive.namelist()
+
+    def test_inline_rendering_writes_every_transcript(self):
+        progress = []
+        with mock.patch('reports.transcripts.render_transcripts', side_effect=fake_render):
+            summary = BatchTranscriptWriter(workers=1, batch_size=4).write(
+                cohort(10), self.path, progress.append
+            )
+
+        self.assertEqual(summary['transcripts'], 10)
+        self.assertEqual(progress, [4, 8, 10])
+        self.assertEqual(self.archived(), [f'transcript_S{index:04d}.pdf' for index in range(10)])
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ['transcripts.zip'])
+
+    def test_pool_failure_falls_back_without_losing_batches(self):
+        pool = mock.MagicMock()
+        pool.__enter__.return_value.submit.side_effect = AssertionError('daemonic processes')
+        with mock.patch('reports.transcripts.ProcessPoolExecutor', return_value=pool), \
+                mock.patch('reports.transcripts.render_transcripts', side_effect=fake_render):
+            summary = BatchTranscriptWriter(workers=2, batch_size=3).write(cohort(7), self.path)
+
+        self.assertEqual(summary['transcripts'], 7)
+        self.assertEqual(len(set(self.archived())), 7)
+
+    def test_daemonic_process_renders_without_pool(self):
+        process = mock.Mock(daemon=True)
+        with mock.patch('reports.transcripts.multiprocessing.current_process', return_value=process), \
+                mock.patch('reports.transcripts.ProcessPoolExecutor') as pool, \
+                mock.patch('reports.transcripts.render_transcripts', side_effect=fake_render):
+            summary = BatchTranscriptWriter(workers=4, batch_size=3).write(cohort(7), self.path)
+
+        pool.assert_not_called()
+        self.assertEqual(summary['transcripts'], 7)
+        self.assertEqual(len(set(self.archived())), 7)
+
+    def test_failed_render_leaves_no_partial_archive(self):
+        with mock.patch('reports.transcripts.render_transcripts', side_effect=RuntimeError('font')):
+            with self.assertRaises(RuntimeError):
+                BatchTranscriptWriter(workers=1).write(cohort(3), self.path)
+
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), [])
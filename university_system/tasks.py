@@ -25,8 +25,6 @@ from django.core.management import call_command
 from django.db import transaction
 from django.core.cache import cache
 
-import pandas as pd
-from io import BytesIO
 import json
 
 logger = logging.getLogger(__name__)
@@ -184,89 +182,49 @@ def generate_academic_report(self, report_type, parameters=None):
     """
     Generate academic reports (student performance, course statistics, etc.)
     إنتاج التقارير الأكاديمية (أداء الطلاب، إحصائيات المقررات، إلخ)
+    
+    Each report is one grouped query streamed into the Excel file;
+    progress is reported at most every PROGRESS_INTERVAL seconds.
     """
     try:
         from reports.models import Report
-        from academic.models import Enrollment, Grade
-        from students.models import Student
-        from courses.models import Course
+        from reports.outputs import report_output_metadata
+        from reports.report_engine import ProgressThrottle, get_report_definition
         
-        # Update task progress
-        self.update_state(state='PROGRESS', meta={'current': 0, 'total': 100})
+        definition = get_report_definition(report_type)
+        parameters = parameters or {}
         
-        report_data = {}
+        progress = ProgressThrottle(
+            lambda current, total: self.update_state(
+                state='PROGRESS', meta={'current': current, 'total': total}
+            )
+        )
         
-        if report_type == "student_performance":
-            # Generate student performance report
-            students = Student.objects.filter(is_active=True)
-            performance_data = []
-            
-            for i, student in enumerate(students):
-                grades = Grade.objects.filter(enrollment__student=student)
-                if grades.exists():
-                    avg_grade = grades.aggregate(avg=models.Avg('points'))['avg']
-                    performance_data.append({
-                        'student_id': student.student_id,
-                        'student_name': student.user.get_full_name(),
-                        'gpa': round(avg_grade or 0, 2),
-                        'total_courses': grades.count(),
-                        'department': student.department.name if student.department else 'N/A'
-                    })
-                
-                # Update progress
-                progress = int((i + 1) / len(students) * 50)
-                self.update_state(state='PROGRESS', meta={'current': progress, 'total': 100})
-            
-            report_data['students'] = performance_data
-            
-        elif report_type == "course_statistics":
-            # Generate course statistics report
-            courses = Course.objects.filter(is_active=True)
-            course_stats = []
-            
-            for i, course in enumerate(courses):
-                enrollments = Enrollment.objects.filter(course=course)
-                grades = Grade.objects.filter(enrollment__course=course)
-                
-                course_stats.append({
-                    'course_code': course.code,
-                    'course_name': course.name,
-                    'enrolled_students': enrollments.count(),
-                    'completed_students': grades.count(),
-                    'average_grade': round(grades.aggregate(avg=models.Avg('points'))['avg'] or 0, 2),
-                    'pass_rate': round((grades.filter(points__gte=60).count() / grades.count() * 100) if grades.count() > 0 else 0, 2)
-                })
-                
-                # Update progress
-                progress = 50 + int((i + 1) / len(courses) * 50)
-                self.update_state(state='PROGRESS', meta={'current': progress, 'total': 100})
-            
-            report_data['courses'] = course_stats
+        excel_path = generate_excel_report(
+            {definition.sheet: (definition.columns, definition.rows(parameters, progress))},
+            report_type
+        )
         
         # Save report to database
         report = Report.objects.create(
-            title=f"{report_type.replace('_', ' ').title()} Report",
+            title=definition.title,
             type=report_type,
-            data=report_data,
+            parameters=parameters,
+            data={'row_count': progress.current, 'columns': [column.key for column in definition.columns]},
             generated_by=None,  # System generated
-            file_format='json'
+            file_format='xlsx',
+            file_path=excel_path
         )
         
-        # Generate Excel file
-        excel_path = generate_excel_report(report_data, report_type)
-        
-        self.update_state(state='SUCCESS', meta={
-            'current': 100,
-            'total': 100,
-            'report_id': report.id,
-            'excel_path': excel_path
-        })
-        
+        # The file stays in report storage; the result only describes it
+        output = report_output_metadata(excel_path)
         return {
             "status": "completed",
             "report_id": report.id,
-            "excel_path": excel_path,
-            "data_count": len(report_data.get('students', []) + report_data.get('courses', []))
+            "data_count": progress.current,
+            "filename": output.get('filename'),
+            "size": output.get('size'),
+            "download_url": output.get('download_url')
         }
         
     except Exception as e:
@@ -275,40 +233,85 @@ def generate_academic_report(self, report_type, parameters=None):
         return {"status": "failed", "error": str(e)}
 
 
-def generate_excel_report(data, report_type):
+def generate_excel_report(sheets, report_type):
     """
-    Generate Excel file from report data
+    Generate Excel file from report rows
     إنتاج ملف Excel من بيانات التقرير
+    
+    sheets maps a sheet name to (columns, rows); rows are streamed into
+    the file by the export pipeline. Failures propagate to the calling
+    task so that no report is recorded for a partial file.
     """
+    from reports.exports import write_xlsx
+    from reports.outputs import report_output_path
+    
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    filepath = report_output_path(f"{report_type}_{timestamp}.xlsx")
+    
     try:
-        # Create Excel file
-        output = BytesIO()
-        
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            if 'students' in data:
-                df_students = pd.DataFrame(data['students'])
-                df_students.to_excel(writer, sheet_name='Students', index=False)
-            
-            if 'courses' in data:
-                df_courses = pd.DataFrame(data['courses'])
-                df_courses.to_excel(writer, sheet_name='Courses', index=False)
-        
-        # Save to file
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{report_type}_{timestamp}.xlsx"
-        filepath = os.path.join(settings.MEDIA_ROOT, 'reports', filename)
-        
-        # Create directory if it doesn't exist
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        
-        with open(filepath, 'wb') as f:
-            f.write(output.getvalue())
-        
-        return filepath
-        
+        write_xlsx(filepath, sheets)
     except Exception as e:
         logger.error(f"Excel generation failed: {e}")
-        return None
+        if os.path.exists(filepath):
+            os.remove(filepath)
+        raise
+    return filepath
+
+
+@shared_task(bind=True)
+def generate_batch_transcripts_task(self, department_id=None, major_id=None, academic_year=None):
+    """
+    Generate PDF transcripts for a whole cohort into one ZIP archive
+    إنتاج كشوف درجات دفعة كاملة في ملف ZIP واحد
+    """
+    try:
+        from reports.models import Report
+        from reports.outputs import report_output_metadata, report_output_path
+        from reports.report_engine import ProgressThrottle
+        from reports.transcripts import cohort_students, generate_batch_transcripts
+
+        parameters = {
+            'department_id': department_id,
+            'major_id': major_id,
+            'academic_year': academic_year,
+        }
+        students = cohort_students(**parameters)
+
+        progress = ProgressThrottle(
+            lambda current, total: self.update_state(
+                state='PROGRESS', meta={'current': current, 'total': total}
+            )
+        )
+        progress.total = students.count()
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = report_output_path(f"transcripts_{timestamp}.zip")
+        summary = generate_batch_transcripts(path, students=students, progress=progress)
+        progress.finish()
+
+        report = Report.objects.create(
+            title='Batch Transcripts',
+            type='batch_transcripts',
+            parameters=parameters,
+            data=summary,
+            generated_by=None,  # System generated
+            file_format='zip',
+            file_path=path
+        )
+
+        output = report_output_metadata(path)
+        return {
+            "status": "completed",
+            "report_id": report.id,
+            **summary,
+            "size": output['size'],
+            "download_url": output['download_url']
+        }
+
+    except Exception as e:
+        logger.error(f"Batch transcript generation failed: {e}")
+        self.update_state(state='FAILURE', meta={'error': str(e)})
+        return {"status": "failed", "error": str(e)}
 
 
 # =============================================================================
@@ -401,6 +404,24 @@ def cleanup_old_logs():
         return {"status": "failed", "error": str(e)}
 
 
+@shared_task
+def cleanup_report_outputs():
+    """
+    Remove generated report files whose download links have long expired
+    حذف ملفات التقارير المولدة القديمة من مخزن التقارير
+    """
+    try:
+        from reports.outputs import prune_report_outputs
+        
+        removed = prune_report_outputs()
+        logger.info(f"Removed {removed} old report output files")
+        return {"status": "completed", "removed_files": removed}
+        
+    except Exception as e:
+        logger.error(f"Report output cleanup failed: {e}")
+        return {"status": "failed", "error": str(e)}
+
+
 @shared_task
 def system_health_check():
     """
@@ -582,12 +603,194 @@ def process_student_grades(enrollment_ids):
         return {"status": "failed", "error": str(e)}
 
 
+@shared_task
+def reconcile_enrollment_counters(semester_id=None):
+    """
+    Seed missing enrollment counters and repair drift in the maintained ones
+    إنشاء عدادات التسجيل الناقصة وإصلاح الانحراف في العدادات
+    """
+    try:
+        from academic.counters import reconcile_enrollment_counters as reconcile
+        from academic.counters import seed_enrollment_counters
+        from academic.models import Semester
+        
+        semester = Semester.objects.get(id=semester_id) if semester_id else None
+        
+        # Seed missing counters here so read paths never write them
+        seeded_count = sum(
+            seed_enrollment_counters(sem)
+            for sem in ([semester] if semester else Semester.objects.filter(is_current=True))
+        )
+        drift = reconcile(semester=semester, repair=True)
+        
+        return {
+            "status": "completed",
+            "seeded_count": seeded_count,
+            "repaired_count": len(drift),
+            "drift": [
+                {**item, "course_id": str(item["course_id"]), "semester_id": str(item["semester_id"])}
+                for item in drift[:50]
+            ]
+        }
+        
+    except Exception as e:
+        logger.error(f"Enrollment counter reconciliation failed: {e}")
+        return {"status": "failed", "error": str(e)}
+
+
+@shared_task
+def refresh_student_feature_store(full=False):
+    """
+    Refresh the ML feature matrix for students with new grades or attendance
+    تحديث مصفوفة خصائص الطلاب لنماذج التعلم الآلي
+    """
+    try:
+        from ai.feature_store import get_feature_store
+        
+        store = get_feature_store()
+        refreshed = store.rebuild() if full else store.refresh()
+        
+        return {"status": "completed", "refreshed_students": refreshed}
+        
+    except Exception as e:
+        logger.error(f"Feature store refresh failed: {e}")
+        return {"status": "failed", "error": str(e)}
+
+
+@shared_task
+def train_performance_model_task():
+    """
+    Train and register a new performance model version outside the request cycle
+    تدريب نموذج التنبؤ بالأداء وتسجيل إصدار جديد في الخلفية
+    """
+    from ai.ml_predictions import PERFORMANCE_TRAINING_LOCK, train_performance_model
+    
+    try:
+        model = train_performance_model()
+        return {"status": "completed" if model is not None else "insufficient_data"}
+        
+    except Exception as e:
+        logger.error(f"Performance model training failed: {e}")
+        return {"status": "failed", "error": str(e)}
+    finally:
+        cache.delete(PERFORMANCE_TRAINING_LOCK)
+
+
+@shared_task
+def update_performance_model_online():
+    """
+    Incremental partial_fit update of the performance model from new grades
+    تحديث تدريجي لنموذج التنبؤ بالأداء من الدرجات الجديدة
+    """
+    try:
+        from ai.online_learning import update_online_model
+        
+        summary = update_online_model()
+        return {"status": "completed", **summary}
+        
+    except Exception as e:
+        logger.error(f"Online performance model update failed: {e}")
+        return {"status": "failed", "error": str(e)}
+
+@shared_task
+def predict_cohort_task(department_id=None, academic_level=None, semester_id=None):
+    """
+    Batch performance predictions for a cohort
+    التنبؤ بأداء دفعة كاملة من الطلاب
+    """
+    try:
+        from ai.batch_predictions import predict_cohort
+        
+        summary = predict_cohort(
+            department_id=department_id,
+            academic_level=academic_level,
+            semester_id=semester_id
+        )
+        return {"status": "completed", **summary}
+        
+    except Exception as e:
+        logger.error(f"Cohort prediction failed: {e}")
+        return {"status": "failed", "error": str(e)}
+
+
+@shared_task
+def rebuild_recommendation_index():
+    """
+    Rebuild course statistics and the course similarity index for recommendations
+    إعادة بناء فهرس توصيات المقررات
+    """
+    from ai.recommendation_index import INDEX_BUILD_LOCK, get_recommendation_index_store
+    
+    try:
+        index = get_recommendation_index_store().rebuild()
+        
+        return {
+            "status": "completed",
+            "courses": len(index.course_ids),
+            "neighbor_links": int(index.similarity.nnz)
+        }
+        
+    except Exception as e:
+        logger.error(f"Recommendation index rebuild failed: {e}")
+        return {"status": "failed", "error": str(e)}
+    finally:
+        cache.delete(INDEX_BUILD_LOCK)
+
+@shared_task
+def score_dropout_risk_task():
+    """
+    Score dropout risk for all active students and refresh early warnings
+    حساب مخاطر التسرب لجميع الطلاب النشطين وتحديث الإنذارات المبكرة
+    """
+    try:
+        from smart_ai.dropout_risk import score_dropout_risk
+        
+        summary = score_dropout_risk()
+        return {"status": "completed", **summary}
+        
+    except Exception as e:
+        logger.error(f"Dropout risk scoring failed: {e}")
+        return {"status": "failed", "error": str(e)}
+
 # =============================================================================
 # SCHEDULED PERIODIC TASKS - المهام الدورية المجدولة
 # =============================================================================
 
 # These tasks should be configured in Django settings or Celery beat schedule
 
+@shared_task
+def render_analytics_charts(semester_id=None):
+    """
+    Pre-render enrollment analytics charts into the chart cache and prune unused charts
+    رسم مخططات تحليلات التسجيل مسبقاً في ذاكرة الرسوم المؤقتة
+    """
+    try:
+        from academic.models import Semester
+        from reports.advanced_reports import AnalyticsReportGenerator
+        from reports.charts import get_chart_service
+        
+        if semester_id:
+            semester = Semester.objects.get(id=semester_id)
+        else:
+            semester = Semester.objects.filter(is_current=True).first()
+        
+        charts = {}
+        if semester is not None:
+            generator = AnalyticsReportGenerator()
+            analytics = generator.enrollment_analytics(semester)
+            charts = generator._create_enrollment_charts(analytics)
+        
+        return {
+            "status": "completed",
+            "charts": len(charts),
+            "pruned": get_chart_service().prune()
+        }
+        
+    except Exception as e:
+        logger.error(f"Analytics chart rendering failed: {e}")
+        return {"status": "failed", "error": str(e)}
+
+
 @shared_task
 def daily_maintenance():
     """
@@ -599,7 +802,13 @@ def daily_maintenance():
     results = {
         "session_cleanup": cleanup_old_sessions.delay(),
         "health_check": system_health_check.delay(),
-        "academic_reminders": send_academic_reminders.delay()
+        "academic_reminders": send_academic_reminders.delay(),
+        "enrollment_counters": reconcile_enrollment_counters.delay(),
+        "feature_store": refresh_student_feature_store.delay(),
+        "recommendation_index": rebuild_recommendation_index.delay(),
+        "dropout_risk": score_dropout_risk_task.delay(),
+        "online_performance_model": update_performance_model_online.delay(),
+        "analytics_charts": render_analytics_charts.delay()
     }
     
     return {"status": "scheduled", "tasks": list(results.keys())}
@@ -616,6 +825,8 @@ def weekly_maintenance():
     results = {
         "database_backup": backup_database.delay(),
         "log_cleanup": cleanup_old_logs.delay(),
+        "report_outputs": cleanup_report_outputs.delay(),
+        "performance_model": train_performance_model_task.delay(),
     }
     
     return {"status": "scheduled", "tasks": list(results.keys())}
@@ -24,7 +24,7 @@ import logging
 from students.models import User
 from courses.models import Department
 from courses.models import Course
-from academic.models import Enrollment, Grade, Semester, AcademicYear
+from academic.models import CourseCapacity, Enrollment, Grade, Semester, AcademicYear
 from notifications.models import Notification, InAppNotification
 
 logger = logging.getLogger(__name__)
@@ -290,21 +290,24 @@ def teacher_dashboard_view(request):
             is_active=True
         )[:6]  # Limit for display
         
-        # Add student count to each course
+        # Add student count to each course from the maintained seat counters
+        current_semester = Semester.objects.filter(is_current=True).first()
+        counters = CourseCapacity.objects.filter(semester=current_semester)
+        student_counts = dict(
+            counters.filter(
+                course_id__in=[course.pk for course in teaching_courses]
+            ).values_list('course_id', 'enrolled_count')
+        )
         for course in teaching_courses:
-            course.student_count = Enrollment.objects.filter(
-                course=course,
-                is_active=True
-            ).count()
+            course.student_count = student_counts.get(course.pk, 0)
             course.avg_attendance = 85  # Mock data
         
         # Calculate teacher statistics  
         stats = {
             'teaching_courses': teaching_courses.count(),
-            'total_students': Enrollment.objects.filter(
-                course__instructor=user,
-                is_active=True
-            ).count(),
+            'total_students': counters.filter(
+                course__instructor=user
+            ).aggregate(total=Sum('enrolled_count'))['total'] or 0,
             'pending_grades': 12,  # Mock data
             'weekly_hours': teaching_courses.aggregate(
                 total=Sum('credit_hours')